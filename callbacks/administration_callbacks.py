@@ -16,6 +16,28 @@ from models import SessionStatus
 
 
 
+def _session_picker_options(controller, coach_id, date_filter, search_query):
+    """Opciones del selector de sesiones (primera página de la búsqueda)."""
+    session_descriptions, next_cursor = controller.search_sessions(
+        search_query=search_query, coach_id=coach_id, date_filter=date_filter
+    )
+    if not session_descriptions:
+        return [{"label": "No sessions found", "value": "", "disabled": True}]
+
+    session_options = [
+        {"label": desc, "value": sid} for sid, desc in session_descriptions.items()
+    ]
+    if next_cursor:
+        session_options.append(
+            {
+                "label": "More sessions found – refine the search or date filter",
+                "value": "",
+                "disabled": True,
+            }
+        )
+    return session_options
+
+
 def _update_calendar_and_table_content(from_date, to_date, coach_filter, status_filter):
     """Helper function para actualizar calendario y tabla."""
     try:
@@ -489,24 +511,9 @@ def register_administration_callbacks(app):
 
             with SessionController() as controller:
                 # Obtener sesiones con filtros aplicados (incluye restricción de coach)
-                session_descriptions = controller.get_sessions_for_editing(
-                    coach_id=coach_id_filter,
-                    date_filter=date_filter,
-                    search_query=search_query,
+                return _session_picker_options(
+                    controller, coach_id_filter, date_filter, search_query
                 )
-
-                if not session_descriptions:
-                    return [
-                        {"label": "No sessions found", "value": "", "disabled": True}
-                    ]
-
-                # CORREGIDO: La etiqueta debe ser un string, no un componente Markdown
-                session_options = [
-                    {"label": desc, "value": sid}
-                    for sid, desc in session_descriptions.items()
-                ]
-
-                return session_options
         except Exception as e:
             return [
                 {
@@ -1444,7 +1451,7 @@ def register_administration_callbacks(app):
                 # Valores a establecer
                 coach_value = session.coach_id
                 player_value = session.player_id
-                status_value = session.status.value
+                status_value = session.effective_status().value
                 date_value = session.start_time.date().isoformat()
                 start_time_value = session.start_time.time().strftime("%H:%M")
                 end_time_value = session.end_time.time().strftime("%H:%M")
@@ -1697,24 +1704,9 @@ def register_administration_callbacks(app):
                                 )
 
                     with SessionController() as controller:
-                        session_descriptions = controller.get_sessions_for_editing(
-                            coach_id=selector_coach_id,
-                            date_filter=date_filter,
-                            search_query=search_query,
+                        session_options = _session_picker_options(
+                            controller, selector_coach_id, date_filter, search_query
                         )
-                        if session_descriptions:
-                            session_options = [
-                                {"label": desc, "value": sid}
-                                for sid, desc in session_descriptions.items()
-                            ]
-                        else:
-                            session_options = [
-                                {
-                                    "label": "No sessions found",
-                                    "value": "",
-                                    "disabled": True,
-                                }
-                            ]
                 else:
                     from dash import no_update
 
@@ -1911,24 +1903,8 @@ def register_administration_callbacks(app):
                                 )
 
                     with SessionController() as controller:
-                        session_descriptions = controller.get_sessions_for_editing(
-                            coach_id=selector_coach_id,
-                            date_filter=date_filter,
-                            search_query=search_query,
-                        )
-                        session_options = (
-                            [
-                                {"label": desc, "value": sid}
-                                for sid, desc in session_descriptions.items()
-                            ]
-                            if session_descriptions
-                            else [
-                                {
-                                    "label": "No sessions found",
-                                    "value": "",
-                                    "disabled": True,
-                                }
-                            ]
+                        session_options = _session_picker_options(
+                            controller, selector_coach_id, date_filter, search_query
                         )
 
                 return (
@@ -438,7 +438,7 @@ def create_position_radar_chart(
             create_error_alert,
             create_no_data_alert,
         )
-        from controllers.csv_stats_controller import CSVStatsController
+        from controllers.csv_stats_controller import get_csv_stats_controller
         from controllers.db import get_db_session
         from ml_system.evaluation.analysis.position_analyzer import PositionAnalyzer
         from models.professional_stats_model import ProfessionalStats
@@ -480,7 +480,7 @@ def create_position_radar_chart(
                 return create_no_data_alert(f"metrics for position {mapped_position}")
 
             # Inicializar CSV Controller para datos consistentes
-            csv_controller = CSVStatsController()
+            csv_controller = get_csv_stats_controller()
 
             # Construir datos del radar NORMALIZADOS con CSVStatsController
             metrics = []
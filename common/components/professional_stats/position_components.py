@@ -294,9 +294,9 @@ def create_position_metrics_cards(player_id: int, season: str) -> html.Div:
             primary_metrics = position_config.get("primary_metrics", [])
 
             # Obtener promedios de liga desde CSV usando CSVStatsController
-            from controllers.csv_stats_controller import CSVStatsController
+            from controllers.csv_stats_controller import get_csv_stats_controller
 
-            csv_controller = CSVStatsController()
+            csv_controller = get_csv_stats_controller()
 
             # Obtener promedios de liga para la posición mapeada en la temporada específica
             # Usar las métricas optimizadas del PositionAnalyzer
@@ -539,12 +539,12 @@ def create_position_comparison_table(player_id: int, season: str) -> html.Div:
     """
     try:
         # Imports necesarios
-        from controllers.csv_stats_controller import CSVStatsController
+        from controllers.csv_stats_controller import get_csv_stats_controller
         from ml_system.evaluation.analysis.player_analyzer import PlayerAnalyzer
         from ml_system.evaluation.analysis.position_analyzer import PositionAnalyzer
 
         analyzer = PositionAnalyzer()
-        csv_controller = CSVStatsController()
+        csv_controller = get_csv_stats_controller()
         player_analyzer = PlayerAnalyzer()
 
         # Obtener todas las temporadas disponibles del jugador
@@ -1188,9 +1188,9 @@ def create_position_insights_panel(player_id: int, season: str) -> html.Div:
             secondary_metrics = position_config.get("secondary_metrics", [])
 
             # Obtener referencias usando CSVStatsController (same as comparison table)
-            from controllers.csv_stats_controller import CSVStatsController
+            from controllers.csv_stats_controller import get_csv_stats_controller
 
-            csv_controller = CSVStatsController()
+            csv_controller = get_csv_stats_controller()
 
             # Use same method as Cards and table
             league_averages_data = csv_controller.get_league_averages(
@@ -214,6 +214,11 @@ SESSION_SECRET = get_config_value("SESSION_SECRET", "your-default-secret-key")
 # Configuración de calendario
 CALENDAR_ENABLED = get_config_value("CALENDAR_ENABLED", "True") == "True"
 
+# Estado de la sincronización incremental (nextSyncToken de Google Calendar)
+CALENDAR_SYNC_STATE_PATH = get_config_value(
+    "CALENDAR_SYNC_STATE_PATH", os.path.join(DATA_DIR, "calendar_sync_state.json")
+)
+
 
 # Configuración webhook para producción Render
 def get_webhook_config():
@@ -252,6 +257,11 @@ _webhook_config = get_webhook_config()
 WEBHOOK_PORT = _webhook_config["port"]
 WEBHOOK_BASE_URL = _webhook_config["base_url"]
 WEBHOOK_SECRET_TOKEN = _webhook_config["secret_token"]
+# Sync disparada por webhooks: ventana de agrupación y tamaño de cola
+WEBHOOK_SYNC_DEBOUNCE_SECONDS = float(
+    get_config_value("WEBHOOK_SYNC_DEBOUNCE_SECONDS", "3")
+)
+WEBHOOK_SYNC_QUEUE_SIZE = int(get_config_value("WEBHOOK_SYNC_QUEUE_SIZE", "100"))
 
 # Colores para las sesiones (código Google Calendar + color HEX para la UI)
 CALENDAR_COLORS = {
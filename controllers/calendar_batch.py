@@ -0,0 +1,314 @@
+# controllers/calendar_batch.py
+"""
+Escritura agrupada en Google Calendar.
+Acumula inserts/patches y los envía como batch requests (máx. 50 por lote),
+reintentando con backoff los fallos transitorios.
+
+events.insert no es idempotente: cada insert lleva un id de evento generado
+en cliente, de modo que si un lote llegó a ejecutarse en el servidor antes de
+fallar, el reintento recibe 409 en lugar de duplicar el evento.
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from googleapiclient.errors import HttpError
+
+logger = logging.getLogger(__name__)
+
+CAL_ID = os.getenv("CALENDAR_ID")
+
+# Límite de Google para peticiones por batch en Calendar API
+MAX_BATCH_SIZE = 50
+MAX_RETRIES = 3
+BACKOFF_BASE_SECONDS = 1.0
+RETRYABLE_STATUSES = {403, 429, 500, 502, 503, 504}
+CONFLICT_STATUS = 409
+# El evento ya no existe: no tiene sentido reintentar un patch
+GONE_STATUSES = {404, 410}
+
+# callback(response, error) → se invoca una vez por operación al terminar
+OperationCallback = Callable[[Optional[Dict], Optional[Exception]], None]
+
+
+@dataclass
+class _Operation:
+    kind: str  # "insert" | "patch"
+    body: Dict[str, Any]
+    event_id: Optional[str] = None
+    callback: Optional[OperationCallback] = None
+    attempts: int = 0
+
+
+def new_event_id() -> str:
+    """Id de evento válido para Calendar (base32hex: solo 0-9 y a-v)."""
+    return uuid.uuid4().hex
+
+
+def _error_status(error: Exception) -> Optional[int]:
+    """Devuelve el status HTTP de un error de la API (o None)."""
+    if isinstance(error, HttpError):
+        return error.resp.status
+    return None
+
+
+class CalendarBatchWriter:
+    """
+    Cola de escrituras para Google Calendar enviadas en batch.
+
+    Uso:
+        writer = CalendarBatchWriter(calendar())
+        writer.insert(body, callback=...)
+        writer.patch(event_id, {"colorId": "2"}, callback=...)
+        writer.flush()
+    """
+
+    def __init__(
+        self,
+        service,
+        calendar_id: Optional[str] = None,
+        batch_size: int = MAX_BATCH_SIZE,
+        max_retries: int = MAX_RETRIES,
+        backoff_base: float = BACKOFF_BASE_SECONDS,
+    ):
+        self.service = service
+        self.calendar_id = calendar_id or CAL_ID
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self._pending: List[_Operation] = []
+        self.stats = {
+            "operations": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "retried": 0,
+            "batches": [],  # latencia y resultado por lote
+        }
+
+    # Encolado
+
+    def insert(
+        self, body: Dict[str, Any], callback: Optional[OperationCallback] = None
+    ):
+        """Encola la creación de un evento con un id generado en cliente."""
+        body = dict(body)
+        body.setdefault("id", new_event_id())
+        self._pending.append(_Operation("insert", body, callback=callback))
+
+    def patch(
+        self,
+        event_id: str,
+        body: Dict[str, Any],
+        callback: Optional[OperationCallback] = None,
+    ):
+        """Encola un patch parcial de un evento existente."""
+        self._pending.append(_Operation("patch", body, event_id, callback))
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    # Envío
+
+    def _build_request(self, op: _Operation):
+        events = self.service.events()
+        if op.kind == "insert":
+            return events.insert(calendarId=self.calendar_id, body=op.body)
+        return events.patch(
+            calendarId=self.calendar_id, eventId=op.event_id, body=op.body
+        )
+
+    def _execute_batch(self, operations: List[_Operation]) -> List[_Operation]:
+        """Envía un lote y devuelve las operaciones a reintentar."""
+        results: Dict[str, tuple] = {}
+
+        def _collect(request_id, response, exception):
+            results[request_id] = (response, exception)
+
+        batch = self.service.new_batch_http_request(callback=_collect)
+        for i, op in enumerate(operations):
+            batch.add(self._build_request(op), request_id=str(i))
+
+        start = time.perf_counter()
+        batch_error = False
+        try:
+            batch.execute()
+        except Exception as e:
+            # Fallo del lote completo (red, timeout): se reintenta entero
+            logger.error(f"❌ Error ejecutando batch de Calendar: {e}")
+            batch_error = True
+            for i in range(len(operations)):
+                results[str(i)] = (None, e)
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        retry, ok, failed = [], 0, 0
+        for i, op in enumerate(operations):
+            response, error = results.get(str(i), (None, None))
+            op.attempts += 1
+
+            if (
+                error is not None
+                and op.kind == "insert"
+                and op.attempts > 1
+                and _error_status(error) == CONFLICT_STATUS
+            ):
+                # Un intento anterior ya creó el evento con este id
+                response, error = dict(op.body), None
+
+            if error is not None:
+                retryable = batch_error or _error_status(error) in RETRYABLE_STATUSES
+                if retryable and op.attempts <= self.max_retries:
+                    retry.append(op)
+                    continue
+                failed += 1
+            else:
+                ok += 1
+
+            if op.callback:
+                try:
+                    op.callback(response, error)
+                except Exception as e:
+                    logger.error(f"❌ Error en callback de batch: {e}")
+
+        self.stats["succeeded"] += ok
+        self.stats["failed"] += failed
+        self.stats["retried"] += len(retry)
+        self.stats["batches"].append(
+            {
+                "size": len(operations),
+                "succeeded": ok,
+                "failed": failed,
+                "retried": len(retry),
+                "latency_ms": round(latency_ms, 1),
+            }
+        )
+        logger.info(
+            f"📦 Batch Calendar: {len(operations)} ops en {latency_ms:.0f}ms "
+            f"({ok} ok, {failed} fallidas, {len(retry)} a reintentar)"
+        )
+        return retry
+
+    def flush(self) -> Dict[str, Any]:
+        """
+        Envía todas las operaciones pendientes en lotes de hasta 50.
+
+        Returns:
+            Dict con estadísticas acumuladas del writer
+        """
+        pending, self._pending = self._pending, []
+        self.stats["operations"] += len(pending)
+
+        attempt = 0
+        while pending:
+            if attempt > 0:
+                delay = self.backoff_base * (2 ** (attempt - 1))
+                logger.info(
+                    f"⏳ Reintentando {len(pending)} operaciones en {delay:.1f}s"
+                )
+                time.sleep(delay)
+
+            retry = []
+            for i in range(0, len(pending), self.batch_size):
+                retry.extend(self._execute_batch(pending[i : i + self.batch_size]))
+
+            pending = retry
+            attempt += 1
+
+        # Los callbacks pueden encolar nuevas operaciones (p.ej. recrear un 404)
+        if self._pending:
+            return self.flush()
+
+        return self.stats
+
+
+class CalendarColorQueue:
+    """
+    Cambios de color de eventos pendientes de enviar a Calendar.
+
+    Se acumulan por evento (el último color gana) y se envían juntos con un
+    CalendarBatchWriter al llamar a flush(), normalmente desde un job de
+    background. Los patches que fallan vuelven a la cola; la cola vive en
+    memoria, así que quien encola debe dejar la fila marcada en BD (is_dirty)
+    para que el push BD→Calendar la repare si el proceso se reinicia.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[str, str] = {}
+
+    def enqueue(self, event_id: str, color_id: str):
+        """Encola el color de un evento."""
+        with self._lock:
+            self._pending[event_id] = color_id
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self, service=None, calendar_id: Optional[str] = None) -> int:
+        """
+        Envía los colores pendientes en batch.
+
+        Los que fallan se reencolan para el siguiente flush, salvo que el
+        evento ya no exista o haya llegado entretanto un color más nuevo.
+
+        Returns:
+            Número de eventos actualizados correctamente
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        failed: Dict[str, Optional[str]] = {}
+
+        def _on_patch(event_id: str, color_id: str) -> OperationCallback:
+            def _callback(response, error):
+                if error is None:
+                    return
+                logger.error(f"❌ Error actualizando color de {event_id}: {error}")
+                gone = _error_status(error) in GONE_STATUSES
+                failed[event_id] = None if gone else color_id
+
+            return _callback
+
+        try:
+            if service is None:
+                from controllers.google_client import calendar
+
+                service = calendar()
+            writer = CalendarBatchWriter(service, calendar_id)
+            for event_id, color_id in pending.items():
+                writer.patch(
+                    event_id,
+                    {"colorId": color_id},
+                    callback=_on_patch(event_id, color_id),
+                )
+            writer.flush()
+        except Exception as e:
+            # Sin conexión con Calendar: se reintenta en el próximo flush
+            logger.error(f"❌ Error enviando colores a Calendar: {e}")
+            with self._lock:
+                for event_id, color_id in pending.items():
+                    self._pending.setdefault(event_id, color_id)
+            return 0
+
+        with self._lock:
+            for event_id, color_id in failed.items():
+                if color_id is not None:
+                    self._pending.setdefault(event_id, color_id)
+        return len(pending) - len(failed)
+
+
+_calendar_color_queue: Optional[CalendarColorQueue] = None
+
+
+def get_calendar_color_queue() -> CalendarColorQueue:
+    """Obtiene la cola de colores compartida."""
+    global _calendar_color_queue
+    if _calendar_color_queue is None:
+        _calendar_color_queue = CalendarColorQueue()
+    return _calendar_color_queue
@@ -4,6 +4,7 @@ Núcleo de sincronización con Google Calendar.
 Maneja la sincronización bidireccional sin coordinar auto-sync ni estadísticas.
 """
 import datetime as dt
+import json
 import logging
 import os
 import re
@@ -11,27 +12,30 @@ import time
 from typing import Dict, List, Optional, Tuple
 
 from googleapiclient.errors import HttpError
-from sqlalchemy import func
+from sqlalchemy import and_, func, or_
 from sqlalchemy.orm import joinedload
 
-from config import CALENDAR_COLORS
+from config import CALENDAR_COLORS, CALENDAR_SYNC_STATE_PATH
 from controllers.db import get_db_session
 from controllers.google_client import calendar
 from controllers.validation_controller import validate_session_for_import
 from models import Coach, Player, Session, SessionStatus, User
 
+from .calendar_batch import CalendarBatchWriter
 from .calendar_utils import (
     build_calendar_event_body,
     calculate_event_hash,
     calculate_session_hash,
     extract_id_from_text,
-    find_unique_user,
+    find_unique_user_id,
     format_time_local,
+    get_user_name_index,
     normalize_text,
     safe_int,
     session_needs_update,
     status_from_color,
     update_session_tracking,
+    update_session_tracking_with_hash,
 )
 from .session_controller import SessionController
 
@@ -39,6 +43,75 @@ logger = logging.getLogger(__name__)
 
 CAL_ID = os.getenv("CALENDAR_ID")
 LOCAL_TZ = dt.timezone(dt.timedelta(hours=2))  # Madrid timezone simplificado
+EVENTS_PAGE_SIZE = 250
+
+
+def _load_sync_token() -> Optional[str]:
+    """Lee el nextSyncToken guardado para el calendario actual."""
+    try:
+        with open(CALENDAR_SYNC_STATE_PATH, "r", encoding="utf-8") as fh:
+            state = json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+    if state.get("calendar_id") != CAL_ID:
+        return None
+    return state.get("sync_token")
+
+
+def _save_sync_token(sync_token: Optional[str]):
+    """Persiste el nextSyncToken (escritura atómica)."""
+    if not sync_token:
+        return
+
+    state = {
+        "calendar_id": CAL_ID,
+        "sync_token": sync_token,
+        "saved_at": dt.datetime.now(dt.timezone.utc).isoformat(),
+    }
+    tmp_path = f"{CALENDAR_SYNC_STATE_PATH}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(state, fh)
+        os.replace(tmp_path, CALENDAR_SYNC_STATE_PATH)
+    except OSError as e:
+        logger.warning(f"⚠️ No se pudo guardar el sync token: {e}")
+
+
+def reset_sync_token():
+    """Descarta el sync token guardado; la próxima sync será completa."""
+    try:
+        os.remove(CALENDAR_SYNC_STATE_PATH)
+    except FileNotFoundError:
+        pass
+
+
+def _list_events(svc, **params) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Lista eventos de Google Calendar siguiendo nextPageToken.
+
+    Returns:
+        Tuple (eventos, nextSyncToken de la última página)
+    """
+    events = []
+    page_token = None
+
+    while True:
+        request_params = dict(params, calendarId=CAL_ID, maxResults=EVENTS_PAGE_SIZE)
+        if page_token:
+            request_params["pageToken"] = page_token
+
+        response = svc.events().list(**request_params).execute()
+        events.extend(response.get("items", []))
+
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return events, response.get("nextSyncToken")
+
+
+def _event_start_key(ev: Dict) -> str:
+    """Clave de orden por inicio (sustituye a orderBy, incompatible con syncToken)."""
+    return ev.get("start", {}).get("dateTime", "")
 
 
 def guess_coach_player_ids(event: dict) -> Tuple[Optional[int], Optional[int]]:
@@ -83,9 +156,7 @@ def guess_coach_player_ids(event: dict) -> Tuple[Optional[int], Optional[int]]:
             # No hay ID → buscar por nombre
             coach_name = left_part.strip()
             coach_name_norm = normalize_text(coach_name)
-            coach_obj = find_unique_user(Coach, coach_name_norm)
-            if coach_obj:
-                coach_id = coach_obj.coach_id
+            coach_id = find_unique_user_id(Coach, coach_name_norm)
 
         # Analizar Player (derecha)
         player_id_match = re.search(r"#[Pp](\d+)", right_part)
@@ -96,9 +167,7 @@ def guess_coach_player_ids(event: dict) -> Tuple[Optional[int], Optional[int]]:
             # No hay ID → buscar por nombre
             player_name = right_part.strip()
             player_name_norm = normalize_text(player_name)
-            player_obj = find_unique_user(Player, player_name_norm)
-            if player_obj:
-                player_id = player_obj.player_id
+            player_id = find_unique_user_id(Player, player_name_norm)
 
         # Si encontramos ambos, devolver
         if coach_id and player_id:
@@ -222,10 +291,38 @@ def update_session_in_calendar_only(session: Session):
             raise
 
 
-def sync_calendar_to_db_with_feedback() -> Tuple[int, int, int, List[Dict], List[Dict]]:
+def _sync_window_days() -> Tuple[int, int]:
+    """Ventana configurable por variables de entorno (por defecto: 10 atrás, 20 adelante)."""
+    past_days = int(os.getenv("SYNC_WINDOW_PAST_DAYS", "10"))
+    future_days = int(os.getenv("SYNC_WINDOW_FUTURE_DAYS", "20"))
+    return past_days, future_days
+
+
+def _sync_window() -> Tuple[dt.datetime, dt.datetime]:
+    """Devuelve (inicio, fin) de la ventana de sincronización en UTC."""
+    past_days, future_days = _sync_window_days()
+    now = dt.datetime.now(dt.timezone.utc)
+    return now - dt.timedelta(days=past_days), now + dt.timedelta(days=future_days)
+
+
+def _is_timed_event(ev: Dict) -> bool:
+    """Indica si el evento tiene hora de inicio y fin (no es de día completo)."""
+    return bool(
+        ev.get("start", {}).get("dateTime") and ev.get("end", {}).get("dateTime")
+    )
+
+
+def sync_calendar_to_db_with_feedback(
+    incremental: bool = False,
+) -> Tuple[int, int, int, List[Dict], List[Dict]]:
     """
     Sincroniza eventos de Google Calendar hacia la base de datos con logging detallado.
 
+    Args:
+        incremental: Si hay un nextSyncToken guardado, pedir solo los eventos
+            cambiados/eliminados desde la última sync. Sin token, o si Google
+            responde 410 Gone, se hace la sync completa de la ventana.
+
     Returns:
         Tuple (imported, updated, deleted, rejected_events, warning_events)
     """
@@ -242,12 +339,11 @@ def sync_calendar_to_db_with_feedback() -> Tuple[int, int, int, List[Dict], List
         imported = updated = deleted = 0
         seen_ev_ids: set[str] = set()
 
-        now = dt.datetime.now(dt.timezone.utc)
-        # Ventana configurable por variables de entorno (valores por defecto: 10 atrás, 20 adelante)
-        past_days = int(os.getenv("SYNC_WINDOW_PAST_DAYS", "10"))
-        future_days = int(os.getenv("SYNC_WINDOW_FUTURE_DAYS", "20"))
-        win_start = now - dt.timedelta(days=past_days)
-        win_end = now + dt.timedelta(days=future_days)
+        # Índice nombre → id construido una vez por ejecución
+        get_user_name_index().build()
+
+        past_days, future_days = _sync_window_days()
+        win_start, win_end = _sync_window()
 
         logger.info(
             f"📅 Ventana de sincronización: {win_start.date()} a {win_end.date()} "
@@ -255,21 +351,51 @@ def sync_calendar_to_db_with_feedback() -> Tuple[int, int, int, List[Dict], List
         )
 
         # Obtener eventos de Google Calendar
-        logger.info("📡 Obteniendo eventos de Google Calendar...")
-        events_response = (
-            svc.events()
-            .list(
-                calendarId=CAL_ID,
+        events = None
+        cancelled_ev_ids: set[str] = set()
+        sync_token = _load_sync_token() if incremental else None
+
+        if sync_token:
+            logger.info("📡 Obteniendo cambios incrementales (syncToken)...")
+            try:
+                changed, next_sync_token = _list_events(
+                    svc, syncToken=sync_token, singleEvents=True, showDeleted=True
+                )
+                cancelled_ev_ids = {
+                    ev["id"] for ev in changed if ev.get("status") == "cancelled"
+                }
+                # Aplicar todos los cambios: un evento movido fuera de la ventana
+                # también debe actualizar su sesión (la ventana es solo para la
+                # sync completa)
+                events = [
+                    ev
+                    for ev in changed
+                    if ev["id"] not in cancelled_ev_ids and _is_timed_event(ev)
+                ]
+                logger.info(
+                    f"📋 {len(changed)} cambios ({len(cancelled_ev_ids)} eliminados, "
+                    f"{len(events)} a aplicar)"
+                )
+            except HttpError as e:
+                if e.resp.status != 410:
+                    raise
+                # 410 Gone: token caducado → resincronización completa
+                logger.warning("⚠️ Sync token caducado (410), sync completa")
+                reset_sync_token()
+                events = None
+
+        full_sync = events is None
+        if full_sync:
+            logger.info("📡 Obteniendo eventos de Google Calendar...")
+            events, next_sync_token = _list_events(
+                svc,
                 timeMin=win_start.isoformat(),
                 timeMax=win_end.isoformat(),
                 singleEvents=True,
-                orderBy="startTime",
             )
-            .execute()
-        )
+            logger.info(f"📋 Encontrados {len(events)} eventos en Google Calendar")
 
-        events = events_response.get("items", [])
-        logger.info(f"📋 Encontrados {len(events)} eventos en Google Calendar")
+        events.sort(key=_event_start_key)
 
         def _to_dt(iso: str) -> dt.datetime:
             # Convertir UTC de Google Calendar a Madrid timezone (+2) como naive
@@ -748,24 +874,33 @@ def sync_calendar_to_db_with_feedback() -> Tuple[int, int, int, List[Dict], List
         # Detectar eliminaciones
         logger.info("🗑️ Verificando eventos eliminados...")
 
-        # Sesiones en ventana que DEBERÍAN tener eventos correspondientes
-        sessions_in_window = (
-            db.query(Session)
-            .filter(
-                Session.calendar_event_id != None,
-                Session.start_time >= win_start,
-                Session.start_time <= win_end,
+        if full_sync:
+            # Sesiones en ventana que DEBERÍAN tener eventos correspondientes
+            sessions_in_window = (
+                db.query(Session)
+                .filter(
+                    Session.calendar_event_id.isnot(None),
+                    Session.start_time >= win_start,
+                    Session.start_time <= win_end,
+                )
+                .all()
             )
-            .all()
-        )
 
-        # Crear dict de sesiones en la ventana
-        window_sessions = {s.calendar_event_id: s for s in sessions_in_window}
+            # Crear dict de sesiones en la ventana
+            window_sessions = {s.calendar_event_id: s for s in sessions_in_window}
 
-        # Candidatos: event_ids de BD que no aparecieron en la búsqueda de Calendar
-        elimination_candidates = [
-            ev_id for ev_id in window_sessions.keys() if ev_id not in seen_ev_ids
-        ]
+            # Candidatos: event_ids de BD que no aparecieron en la búsqueda de Calendar
+            elimination_candidates = [
+                ev_id for ev_id in window_sessions.keys() if ev_id not in seen_ev_ids
+            ]
+        else:
+            # Incremental: Google informa explícitamente de los eventos cancelados
+            window_sessions = {
+                ev_id: db_sessions[ev_id]
+                for ev_id in cancelled_ev_ids
+                if ev_id in db_sessions
+            }
+            elimination_candidates = list(window_sessions.keys())
 
         logger.info(f"🔍 Sesiones en ventana: {len(window_sessions)}")
         logger.info(f"🔍 Candidatos para eliminación: {len(elimination_candidates)}")
@@ -786,12 +921,14 @@ def sync_calendar_to_db_with_feedback() -> Tuple[int, int, int, List[Dict], List
 
         # Commit final
         db.commit()
+        _save_sync_token(next_sync_token)
 
         elapsed_time = time.time() - start_time
         events_per_second = len(events) / elapsed_time if elapsed_time > 0 else 0
 
         logger.info(
-            f"✅ SYNC COMPLETADA en {elapsed_time:.2f}s ({events_per_second:.1f} eventos/seg)"
+            f"✅ SYNC {'COMPLETA' if full_sync else 'INCREMENTAL'} en {elapsed_time:.2f}s "
+            f"({events_per_second:.1f} eventos/seg)"
         )
         logger.info(
             f"📊 Resultados: {imported} importadas, {updated} actualizadas, {deleted} eliminadas"
@@ -849,66 +986,178 @@ def sync_calendar_to_db() -> Tuple[int, int, int]:
     return imported, updated, deleted
 
 
+def _event_bounds_utc(ev: Dict) -> Optional[Tuple[dt.datetime, dt.datetime]]:
+    """Inicio y fin de un evento como datetimes UTC naive (como Session.start_time)."""
+    start_iso = ev.get("start", {}).get("dateTime")
+    end_iso = ev.get("end", {}).get("dateTime") or start_iso
+    if not start_iso:
+        return None
+
+    def _to_utc(value: str) -> dt.datetime:
+        parsed = dt.datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(dt.timezone.utc).replace(tzinfo=None)
+        return parsed
+
+    return _to_utc(start_iso), _to_utc(end_iso)
+
+
+def _prefetch_events_for(svc, sessions: List[Session]) -> List[Dict]:
+    """
+    Descarga con un único listado paginado los eventos que cubren a todas las
+    sesiones sin event_id (sustituye una llamada list() por sesión).
+    """
+    if not sessions:
+        return []
+
+    time_min = min(s.start_time for s in sessions) - dt.timedelta(hours=1)
+    time_max = max(s.start_time for s in sessions) + dt.timedelta(hours=3)
+    try:
+        events, _ = _list_events(
+            svc,
+            timeMin=time_min.isoformat() + "Z",
+            timeMax=time_max.isoformat() + "Z",
+            singleEvents=True,
+        )
+        return events
+    except Exception as e:
+        logger.error(f"❌ Error precargando eventos existentes: {e}")
+        return []
+
+
+def _match_existing_event(
+    controller: SessionController, ses: Session, events: List[Dict]
+) -> Optional[str]:
+    """
+    Busca localmente un evento equivalente a la sesión en la ventana
+    [-1h, +3h] alrededor de su inicio (misma regla que _find_existing_calendar_event).
+    """
+    expected = build_calendar_event_body(ses).get("summary", "").lower().strip()
+    lo = ses.start_time - dt.timedelta(hours=1)
+    hi = ses.start_time + dt.timedelta(hours=3)
+
+    for ev in events:
+        bounds = _event_bounds_utc(ev)
+        if not bounds or bounds[1] <= lo or bounds[0] >= hi:
+            continue
+        if controller._titles_match(expected, ev.get("summary", "").lower().strip()):
+            return ev.get("id")
+    return None
+
+
 def sync_db_to_calendar() -> Tuple[int, int]:
     """
     Sincroniza sesiones de BD hacia Google Calendar.
-    Ahora respeta correctamente session_needs_update() y no actualiza innecesariamente.
+    Solo revisa sesiones dentro de la ventana de sincronización o modificadas
+    desde su último sync, y envía inserts/patches agrupados en batch requests.
 
     Returns:
         Tuple (pushed, updated)
     """
+    win_start, win_end = _sync_window()
 
     with SessionController() as controller:
         db = controller.db
-        pushed = updated = skipped = 0
+        svc = calendar()
+        writer = CalendarBatchWriter(svc, CAL_ID)
+        counters = {"pushed": 0, "updated": 0, "failed": 0}
+        skipped = 0
 
-        for ses in db.query(Session).all():
+        sessions = (
+            db.query(Session)
+            .filter(
+                or_(
+                    and_(
+                        Session.start_time >= win_start,
+                        Session.start_time <= win_end,
+                    ),
+                    Session.is_dirty.is_(True),
+                    Session.last_sync_at.is_(None),
+                    Session.updated_at > Session.last_sync_at,
+                )
+            )
+            .all()
+        )
+
+        def _queue_insert(ses: Session):
+            def _on_insert(response, error):
+                if error is not None:
+                    counters["failed"] += 1
+                    logger.error(f"❌ Error creando evento de sesión #{ses.id}: {error}")
+                    return
+                ses.calendar_event_id = response["id"]
+                update_session_tracking(ses)
+                counters["pushed"] += 1
+                logger.info(f"📤 NUEVO: Sesión #{ses.id} creada en Calendar")
+
+            writer.insert(build_calendar_event_body(ses), callback=_on_insert)
+
+        def _queue_patch(ses: Session, cached_hash: str):
+            def _on_patch(response, error):
+                if isinstance(error, HttpError) and error.resp.status == 404:
+                    logger.warning(
+                        f"⚠️ Evento {ses.calendar_event_id[:8]}... no existe - recreando"
+                    )
+                    ses.calendar_event_id = None
+                    _queue_insert(ses)
+                    return
+                if error is not None:
+                    counters["failed"] += 1
+                    logger.warning(f"❌ FALLO: Sesión #{ses.id} falló al actualizar")
+                    return
+                update_session_tracking_with_hash(ses, cached_hash)
+                counters["updated"] += 1
+                logger.info(f"🔄 ACTUALIZADA: Sesión #{ses.id} actualizada en Calendar")
+
+            writer.patch(
+                ses.calendar_event_id, build_calendar_event_body(ses), callback=_on_patch
+            )
+
+        # Sesiones sin evento: un único listado para detectar duplicados
+        unlinked = [s for s in sessions if not s.calendar_event_id]
+        existing_events = _prefetch_events_for(svc, unlinked)
+        claimed: set[str] = set()
+
+        for ses in sessions:
             if not ses.calendar_event_id:
-                # NUEVO: Verificar si ya existe evento duplicado antes de crear
-                existing_event_id = controller._find_existing_calendar_event(ses)
+                candidates = [e for e in existing_events if e.get("id") not in claimed]
+                existing_event_id = _match_existing_event(controller, ses, candidates)
                 if existing_event_id:
                     # Ya existe evento para esta sesión → vincular
                     logger.info(
                         f"🔗 VINCULANDO: Sesión #{ses.id} ya tiene evento {existing_event_id[:8]}..."
                     )
+                    claimed.add(existing_event_id)
                     ses.calendar_event_id = existing_event_id
-                    # Actualizar tracking para sincronizar hashes
-                    from controllers.calendar_utils import update_session_tracking
-
                     update_session_tracking(ses)
-                    db.add(ses)
-                    pushed += 1  # Contarlo como "pushed" aunque sea vincular
+                    counters["pushed"] += 1  # Contarlo como "pushed" aunque sea vincular
                 else:
-                    # Sin event_id y no existe → crear nuevo
-                    success = controller._push_session_to_calendar(ses)
-                    if success:
-                        pushed += 1
-                        logger.info(f"📤 NUEVO: Sesión #{ses.id} creada en Calendar")
+                    _queue_insert(ses)
+            elif session_needs_update(ses):
+                _queue_patch(ses, calculate_session_hash(ses))
             else:
-                # Verificar si necesita actualizacion
-                if session_needs_update(ses):
-                    # Solo actualizar si realmente hay cambios
-                    success = controller._update_session_in_calendar(ses)
-                    if success:
-                        updated += 1
-                        logger.info(
-                            f"🔄 ACTUALIZADA: Sesión #{ses.id} actualizada en Calendar"
-                        )
-                    else:
-                        logger.warning(
-                            f"❌ FALLO: Sesión #{ses.id} falló al actualizar"
-                        )
-                else:
-                    skipped += 1
-                    logger.debug(f"⏭️ OMITIDA: Sesión #{ses.id} sin cambios")
+                skipped += 1
+                logger.debug(f"⏭️ OMITIDA: Sesión #{ses.id} sin cambios")
+
+        stats = writer.flush()
+        db.commit()
+
+        pushed, updated = counters["pushed"], counters["updated"]
 
         # Log detallado
+        latencies = [b["latency_ms"] for b in stats["batches"]]
         total_processed = pushed + updated + skipped
         logger.info(f"📊 Push BD→Calendar completado:")
         logger.info(f"   📤 {pushed} sesiones NUEVAS creadas")
         logger.info(f"   🔄 {updated} sesiones ACTUALIZADAS")
         logger.info(f"   ⏭️ {skipped} sesiones OMITIDAS (sin cambios)")
+        logger.info(f"   ❌ {counters['failed']} sesiones con error")
         logger.info(f"   📋 {total_processed} sesiones procesadas")
+        if latencies:
+            logger.info(
+                f"   📦 {len(latencies)} batches, {stats['retried']} reintentos, "
+                f"latencia por batch: {latencies} ms"
+            )
 
         if updated > 10:
             logger.warning(
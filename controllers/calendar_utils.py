@@ -7,14 +7,15 @@ import datetime as dt
 import hashlib
 import logging
 import re
-from typing import Optional
+import threading
+from typing import Dict, List, Optional
 from zoneinfo import ZoneInfo
 
 from unidecode import unidecode
 
 from config import CALENDAR_COLORS
 from controllers.db import get_db_session
-from models import Session, SessionStatus, User
+from models import Coach, Player, Session, SessionStatus, User
 
 logger = logging.getLogger(__name__)
 LOCAL_TZ = ZoneInfo("Europe/Madrid")
@@ -309,18 +310,95 @@ def extract_id_from_text(text: str, pattern: str):
     return safe_int(m.group(1)) if m else None
 
 
+class UserNameIndex:
+    """
+    Índice en memoria nombre normalizado → ids de Coach/Player activos.
+    Se construye con una sola consulta por modelo y resuelve nombres en O(1).
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._index: Optional[Dict[type, Dict[str, List[int]]]] = None
+
+    def build(self):
+        """(Re)construye el índice desde la BD."""
+        index: Dict[type, Dict[str, List[int]]] = {}
+        db = get_db_session()
+        try:
+            for model_class, id_column in (
+                (Coach, Coach.coach_id),
+                (Player, Player.player_id),
+            ):
+                names: Dict[str, List[int]] = {}
+                rows = (
+                    db.query(id_column, User.name)
+                    .join(User, model_class.user_id == User.user_id)
+                    .filter(User.is_active)
+                    .all()
+                )
+                for row_id, name in rows:
+                    names.setdefault(normalize_text(name), []).append(row_id)
+                index[model_class] = names
+        finally:
+            db.close()
+
+        with self._lock:
+            self._index = index
+        logger.debug(
+            f"🗂️ Índice de nombres construido: {len(index[Coach])} coaches, "
+            f"{len(index[Player])} players"
+        )
+
+    def invalidate(self):
+        """Descarta el índice; se reconstruirá en la próxima consulta."""
+        with self._lock:
+            self._index = None
+
+    def lookup(self, model_class, name_norm: str) -> Optional[int]:
+        """Devuelve el id único para name_norm, o None si hay 0 o >1 coincidencias."""
+        with self._lock:
+            if self._index is None:
+                self.build()
+            matches = self._index.get(model_class, {}).get(name_norm, [])
+        return matches[0] if len(matches) == 1 else None
+
+
+_user_name_index = None
+
+
+def get_user_name_index() -> UserNameIndex:
+    """Obtiene la instancia compartida del índice de nombres."""
+    global _user_name_index
+    if _user_name_index is None:
+        _user_name_index = UserNameIndex()
+    return _user_name_index
+
+
+def invalidate_user_name_index():
+    """Invalida el índice tras crear, editar o borrar usuarios."""
+    get_user_name_index().invalidate()
+
+
+def find_unique_user_id(model_class, name_norm: str) -> Optional[int]:
+    """
+    Devuelve el id (coach_id/player_id) del único usuario activo cuyo nombre
+    normalizado coincide con name_norm. Si hay 0 o >1, devuelve None.
+    """
+    return get_user_name_index().lookup(model_class, name_norm)
+
+
 def find_unique_user(model_class, name_norm: str):
     """
-    Trae todos los registros del modelo (Coach o Player),
-    normaliza user.name y devuelve el único que coincide con name_norm.
-    Si hay 0 o >1, devuelve None.
+    Devuelve el único registro del modelo (Coach o Player) cuyo user.name
+    normalizado coincide con name_norm. Si hay 0 o >1, devuelve None.
     """
+    row_id = find_unique_user_id(model_class, name_norm)
+    if row_id is None:
+        return None
 
     db = get_db_session()
     try:
-        rows = db.query(model_class).join(User).filter(User.is_active).all()
-        matches = [r for r in rows if normalize_text(r.user.name) == name_norm]
-        return matches[0] if len(matches) == 1 else None
+        return db.get(model_class, row_id)
     finally:
         db.close()
 
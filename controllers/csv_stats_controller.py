@@ -6,15 +6,240 @@ los archivos CSV procesados de la liga tailandesa. Integrado con el sistema
 de mapeo posicional de PositionAnalyzer.
 """
 
+import hashlib
 import logging
 import os
+import threading
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+from ml_system.data_processing.storage import read_season_table
+
 logger = logging.getLogger(__name__)
 
+# Columnas de baja cardinalidad que se guardan como categóricas
+CATEGORICAL_COLUMNS = ("Primary position", "Team")
+REQUIRED_COLUMNS = ("Primary position", "Team", "Goals per 90")
+
+
+@dataclass
+class GroupTable:
+    """Valores ordenados por columna CSV para (temporada, grupo, partidos mínimos)."""
+
+    players: int
+    sorted_values: Dict[str, np.ndarray]
+
+
+@dataclass
+class SeasonData:
+    """Datos de una temporada cargados en memoria (solo lectura)."""
+
+    season: str
+    frame: pd.DataFrame
+    columns: Dict[str, np.ndarray]
+    mtime_ns: int
+    size: int
+    file_hash: str
+    load_time: float
+    loaded_at: float = field(default_factory=time.time)
+    # Tablas precalculadas por (grupo posicional, partidos mínimos)
+    tables: Dict[Tuple[str, int], GroupTable] = field(default_factory=dict)
+
+
+def _quantile_sorted(sorted_values: np.ndarray, q: float) -> float:
+    """Cuantil con interpolación lineal (igual que pandas) sobre un array ordenado."""
+    position = q * (len(sorted_values) - 1)
+    lower = int(np.floor(position))
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = position - lower
+    return float(
+        sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+    )
+
+
+class SeasonDataStore:
+    """
+    Almacén de temporadas compartido por todo el proceso.
+
+    Cada ``processed_<temporada>.csv`` se parsea una sola vez y se guarda como
+    DataFrame tipado (categóricas para posición/equipo) más un diccionario de
+    columnas NumPy. En cada acceso se comprueba ``mtime``/tamaño del fichero y,
+    si cambian, el hash del contenido decide si hay que recargar.
+    """
+
+    def __init__(self, base_path: Path):
+        self.base_path = Path(base_path)
+        self._entries: Dict[str, SeasonData] = {}
+        self._lock = threading.RLock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "reloads": 0,
+            "revalidations": 0,
+            "load_time_total": 0.0,
+        }
+
+    def _csv_path(self, season: str) -> Path:
+        return self.base_path / f"processed_{season}.csv"
+
+    @staticmethod
+    def _hash_file(path: Path) -> str:
+        digest = hashlib.sha1()
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _parse(
+        self, season: str, path: Path, stat: os.stat_result
+    ) -> Optional[SeasonData]:
+        """Parsea el CSV y construye la representación columnar."""
+        start = time.perf_counter()
+        file_hash = self._hash_file(path)
+        df = read_season_table(path)
+
+        missing_cols = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+        if missing_cols:
+            logger.error(f"Columnas faltantes en {season}: {missing_cols}")
+            return None
+
+        for col in CATEGORICAL_COLUMNS:
+            df[col] = df[col].astype("category")
+
+        columns = {}
+        for col in df.columns:
+            series = df[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                columns[col] = series.cat.codes.to_numpy()
+            elif pd.api.types.is_numeric_dtype(series.dtype):
+                columns[col] = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                columns[col] = series.to_numpy(dtype=object)
+
+        load_time = time.perf_counter() - start
+        return SeasonData(
+            season=season,
+            frame=df,
+            columns=columns,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            file_hash=file_hash,
+            load_time=load_time,
+        )
+
+    def get(self, season: str) -> Optional[SeasonData]:
+        """
+        Devuelve los datos de una temporada, cargándolos si es necesario.
+
+        Args:
+            season: Temporada (ej: "2023-24")
+
+        Returns:
+            SeasonData o None si el fichero no existe o no es válido
+        """
+        path = self._csv_path(season)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            logger.warning(f"Archivo CSV no encontrado: {path}")
+            with self._lock:
+                self._entries.pop(season, None)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(season)
+            if entry is not None:
+                if entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                    self._stats["hits"] += 1
+                    return entry
+
+                # El fichero se tocó: solo recargar si el contenido cambió
+                if self._hash_file(path) == entry.file_hash:
+                    entry.mtime_ns = stat.st_mtime_ns
+                    entry.size = stat.st_size
+                    self._stats["revalidations"] += 1
+                    self._stats["hits"] += 1
+                    return entry
+                self._stats["reloads"] += 1
+
+            self._stats["misses"] += 1
+            new_entry = self._parse(season, path, stat)
+            if new_entry is None:
+                self._entries.pop(season, None)
+                return None
+
+            self._entries[season] = new_entry
+            self._stats["load_time_total"] += new_entry.load_time
+            logger.info(
+                f"Datos cargados para {season}: {len(new_entry.frame)} jugadores "
+                f"({new_entry.load_time * 1000:.1f} ms)"
+            )
+            return new_entry
+
+    def data_version(self, seasons: List[str]) -> Tuple[Tuple[str, str], ...]:
+        """Identificador de versión (temporada, hash) para las temporadas cargadas."""
+        version = []
+        for season in seasons:
+            entry = self.get(season)
+            if entry is not None:
+                version.append((season, entry.file_hash))
+        return tuple(version)
+
+    def clear(self) -> None:
+        """Descarta todas las temporadas cargadas."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores de uso del almacén."""
+        with self._lock:
+            stats = dict(self._stats)
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+            stats["seasons_loaded"] = sorted(self._entries.keys())
+            stats["load_times"] = {
+                season: entry.load_time for season, entry in self._entries.items()
+            }
+            return stats
+
+
+# Máximo de combinaciones multi-temporada memorizadas
+MERGED_TABLES_MAX = 256
+
+DEFAULT_DATA_PATH = Path(__file__).parent.parent / "data" / "thai_league_processed"
+
+# Instancias globales compartidas por el proceso
+_season_store: Optional[SeasonDataStore] = None
+_csv_stats_controller = None
+_instances_lock = threading.RLock()
+
+
+def get_season_store() -> SeasonDataStore:
+    """Obtiene el almacén de temporadas compartido."""
+    global _season_store
+
+    if _season_store is None:
+        with _instances_lock:
+            if _season_store is None:
+                _season_store = SeasonDataStore(DEFAULT_DATA_PATH)
+    return _season_store
+
+
+def get_csv_stats_controller() -> "CSVStatsController":
+    """Obtiene el CSVStatsController compartido por todo el proceso."""
+    global _csv_stats_controller
+
+    if _csv_stats_controller is None:
+        with _instances_lock:
+            if _csv_stats_controller is None:
+                _csv_stats_controller = CSVStatsController()
+    return _csv_stats_controller
+
 
 class CSVStatsController:
     """
@@ -26,9 +251,10 @@ class CSVStatsController:
 
     def __init__(self):
         """Inicializa el controlador con paths y cache."""
-        self.base_path = Path(__file__).parent.parent / "data" / "thai_league_processed"
-        self.cached_data = {}  # Cache por temporada
+        self.base_path = DEFAULT_DATA_PATH
+        self.store = get_season_store()  # Cache compartido por temporada
         self.available_seasons = []
+        self._merged_tables: Dict[Tuple, GroupTable] = {}
 
         # Mapeo posicional granular (copiado desde PDICalculator)
         self.position_mapping = {
@@ -221,6 +447,7 @@ class CSVStatsController:
                 logger.warning(f"Directorio CSV no encontrado: {self.base_path}")
                 return
 
+            seasons = []
             for csv_file in self.base_path.glob("processed_*.csv"):
                 filename = csv_file.stem
                 if (
@@ -228,10 +455,11 @@ class CSVStatsController:
                     and filename != "processed_complete"
                 ):
                     season = filename.replace("processed_", "")
-                    self.available_seasons.append(season)
+                    seasons.append(season)
 
-            self.available_seasons.sort(reverse=True)  # Más reciente primero
-            logger.info(f"Temporadas disponibles: {self.available_seasons}")
+            seasons.sort(reverse=True)  # Más reciente primero
+            self.available_seasons = seasons
+            logger.debug(f"Temporadas disponibles: {self.available_seasons}")
 
         except Exception as e:
             logger.error(f"Error descubriendo temporadas: {e}")
@@ -244,36 +472,127 @@ class CSVStatsController:
             season: Temporada a cargar (ej: "2023-24")
 
         Returns:
-            DataFrame con datos de la temporada o None
+            DataFrame con datos de la temporada o None. El DataFrame es
+            compartido entre llamadas y no debe modificarse in-place.
         """
-        if season in self.cached_data:
-            return self.cached_data[season]
-
         try:
-            csv_path = self.base_path / f"processed_{season}.csv"
+            entry = self.store.get(season)
+            return entry.frame if entry is not None else None
 
-            if not csv_path.exists():
-                logger.warning(f"Archivo CSV no encontrado: {csv_path}")
-                return None
+        except Exception as e:
+            logger.error(f"Error cargando datos de {season}: {e}")
+            return None
 
-            # Cargar CSV con manejo de encoding
-            df = pd.read_csv(csv_path, encoding="utf-8")
+    # ------------------------------------------------------------------
+    # Tablas precalculadas (posición × temporada × métrica)
+    # ------------------------------------------------------------------
+
+    def _build_group_table(
+        self, entry: SeasonData, position: str, min_matches: int
+    ) -> GroupTable:
+        """Construye los arrays ordenados de un grupo posicional en una temporada."""
+        specific_positions = [
+            pos for pos, grp in self.position_mapping.items() if grp == position
+        ]
+        mask = entry.frame["Primary position"].isin(specific_positions).to_numpy()
+        if min_matches > 0 and "Matches played" in entry.columns:
+            mask = mask & (entry.columns["Matches played"] >= min_matches)
+
+        sorted_values = {}
+        for csv_field in set(self.csv_field_mapping.values()):
+            column = entry.columns.get(csv_field)
+            if column is None or column.dtype != np.float64:
+                continue
+            values = column[mask]
+            values = values[~np.isnan(values)]
+            values.sort()
+            sorted_values[csv_field] = values
+
+        return GroupTable(players=int(mask.sum()), sorted_values=sorted_values)
+
+    def _get_group_table(
+        self, entry: SeasonData, position: str, min_matches: int
+    ) -> GroupTable:
+        """Devuelve la tabla de una temporada, construyéndola una vez por versión."""
+        key = (position, min_matches)
+        table = entry.tables.get(key)
+        if table is None:
+            table = self._build_group_table(entry, position, min_matches)
+            entry.tables[key] = table
+        return table
+
+    def _get_tables(
+        self, position: str, seasons: List[str], min_matches: int
+    ) -> Optional[GroupTable]:
+        """
+        Combina las tablas de varias temporadas fusionando los arrays ordenados.
 
-            # Validar columnas esenciales
-            required_cols = ["Primary position", "Team", "Goals per 90"]
-            missing_cols = [col for col in required_cols if col not in df.columns]
-            if missing_cols:
-                logger.error(f"Columnas faltantes en {season}: {missing_cols}")
-                return None
+        Returns:
+            GroupTable combinada o None si no hay datos para ninguna temporada
+        """
+        tables = []
+        version = []
+        for season in seasons:
+            entry = self.store.get(season)
+            if entry is not None:
+                tables.append(self._get_group_table(entry, position, min_matches))
+                version.append((season, entry.file_hash))
+
+        if not tables:
+            return None
+        if len(tables) == 1:
+            return tables[0]
+
+        key = (position, min_matches, tuple(version))
+        merged = self._merged_tables.get(key)
+        if merged is not None:
+            return merged
+
+        sorted_values = {}
+        for csv_field in tables[0].sorted_values:
+            parts = [
+                t.sorted_values[csv_field]
+                for t in tables
+                if csv_field in t.sorted_values
+            ]
+            # Concatenar runs ordenados: el mergesort los fusiona en O(n)
+            sorted_values[csv_field] = np.sort(np.concatenate(parts), kind="mergesort")
 
-            # Cache y return
-            self.cached_data[season] = df
-            logger.info(f"Datos cargados para {season}: {len(df)} jugadores")
-            return df
+        merged = GroupTable(
+            players=sum(t.players for t in tables), sorted_values=sorted_values
+        )
+        if len(self._merged_tables) >= MERGED_TABLES_MAX:
+            self._merged_tables.clear()
+        self._merged_tables[key] = merged
+        return merged
 
-        except Exception as e:
-            logger.error(f"Error cargando datos de {season}: {e}")
-            return None
+    def precompute_tables(
+        self,
+        seasons: Optional[List[str]] = None,
+        min_matches_levels: Tuple[int, ...] = (0, 5, 10),
+    ) -> int:
+        """
+        Precalcula las tablas de todos los grupos posicionales.
+
+        Args:
+            seasons: Temporadas a precalcular (por defecto todas)
+            min_matches_levels: Umbrales de partidos mínimos usados por la UI
+
+        Returns:
+            Número de tablas construidas o reutilizadas
+        """
+        seasons = seasons or self.get_available_seasons_list()
+        groups = sorted(set(self.position_mapping.values()))
+        built = 0
+        for season in seasons:
+            entry = self.store.get(season)
+            if entry is None:
+                continue
+            for position in groups:
+                for min_matches in min_matches_levels:
+                    self._get_group_table(entry, position, min_matches)
+                    built += 1
+        return built
 
     def get_league_averages(
         self,
@@ -295,33 +614,13 @@ class CSVStatsController:
             Dict con promedios de liga
         """
         try:
-            all_players = []
-
-            # Combinar datos de múltiples temporadas
-            for season in seasons:
-                df = self._load_season_data(season)
-                if df is not None:
-                    all_players.append(df)
+            table = self._get_tables(position, seasons, min_matches)
 
-            if not all_players:
+            if table is None:
                 logger.warning(f"No se encontraron datos para temporadas: {seasons}")
                 return {}
 
-            # Concatenar todas las temporadas
-            combined_df = pd.concat(all_players, ignore_index=True)
-
-            # Obtener posiciones específicas que mapean al grupo
-            specific_positions = [
-                pos for pos, grp in self.position_mapping.items() if grp == position
-            ]
-
-            # Filtrar por posición y partidos mínimos
-            position_players = combined_df[
-                (combined_df["Primary position"].isin(specific_positions))
-                & (combined_df["Matches played"] >= min_matches)
-            ]
-
-            if position_players.empty:
+            if table.players == 0:
                 logger.warning(f"No se encontraron jugadores para posición {position}")
                 return {}
 
@@ -340,24 +639,21 @@ class CSVStatsController:
             averages = {}
             for metric_key in metrics_to_process:
                 csv_field = self.csv_field_mapping.get(metric_key)
-                if csv_field and csv_field in position_players.columns:
-                    # Eliminar valores nulos y calcular promedio
-                    valid_values = position_players[csv_field].dropna()
-                    if len(valid_values) > 0:
-                        avg_value = valid_values.mean()
-                        averages[metric_key] = {
-                            "value": avg_value,
-                            "display_name": position_config.get(
-                                "display_names", {}
-                            ).get(metric_key, metric_key.replace("_", " ").title()),
-                            "sample_size": len(valid_values),
-                        }
+                valid_values = table.sorted_values.get(csv_field)
+                if valid_values is not None and len(valid_values) > 0:
+                    averages[metric_key] = {
+                        "value": float(valid_values.mean()),
+                        "display_name": position_config.get("display_names", {}).get(
+                            metric_key, metric_key.replace("_", " ").title()
+                        ),
+                        "sample_size": len(valid_values),
+                    }
 
             return {
                 "position": position,
                 "seasons": seasons,
                 "averages": averages,
-                "players_analyzed": len(position_players),
+                "players_analyzed": table.players,
                 "data_source": "CSV",
             }
 
@@ -457,27 +753,9 @@ class CSVStatsController:
             Dict con valores de percentil
         """
         try:
-            all_players = []
-
-            for season in seasons:
-                df = self._load_season_data(season)
-                if df is not None:
-                    all_players.append(df)
+            table = self._get_tables(position, seasons, min_matches=10)
 
-            if not all_players:
-                return {}
-
-            combined_df = pd.concat(all_players, ignore_index=True)
-            specific_positions = [
-                pos for pos, grp in self.position_mapping.items() if grp == position
-            ]
-
-            position_players = combined_df[
-                (combined_df["Primary position"].isin(specific_positions))
-                & (combined_df["Matches played"] >= 10)
-            ]
-
-            if position_players.empty:
+            if table is None or table.players == 0:
                 return {}
 
             position_config = self.position_metrics_map.get(position, {})
@@ -486,25 +764,23 @@ class CSVStatsController:
             percentiles = {}
             for metric_key in primary_metrics:
                 csv_field = self.csv_field_mapping.get(metric_key)
-                if csv_field and csv_field in position_players.columns:
-                    valid_values = position_players[csv_field].dropna()
-                    if len(valid_values) > 0:
-                        percentile_value = valid_values.quantile(percentile / 100)
-                        percentiles[metric_key] = {
-                            "value": percentile_value,
-                            "display_name": position_config.get(
-                                "display_names", {}
-                            ).get(metric_key, metric_key),
-                            "percentile": percentile,
-                            "sample_size": len(valid_values),
-                        }
+                valid_values = table.sorted_values.get(csv_field)
+                if valid_values is not None and len(valid_values) > 0:
+                    percentiles[metric_key] = {
+                        "value": _quantile_sorted(valid_values, percentile / 100),
+                        "display_name": position_config.get("display_names", {}).get(
+                            metric_key, metric_key
+                        ),
+                        "percentile": percentile,
+                        "sample_size": len(valid_values),
+                    }
 
             return {
                 "position": position,
                 "seasons": seasons,
                 "percentiles": percentiles,
                 "percentile_level": percentile,
-                "players_analyzed": len(position_players),
+                "players_analyzed": table.players,
                 "data_source": "CSV",
             }
 
@@ -524,27 +800,9 @@ class CSVStatsController:
             Dict con valores promedio del top 25% de jugadores
         """
         try:
-            all_players = []
-
-            for season in seasons:
-                df = self._load_season_data(season)
-                if df is not None:
-                    all_players.append(df)
+            table = self._get_tables(position, seasons, min_matches=10)
 
-            if not all_players:
-                return {}
-
-            combined_df = pd.concat(all_players, ignore_index=True)
-            specific_positions = [
-                pos for pos, grp in self.position_mapping.items() if grp == position
-            ]
-
-            position_players = combined_df[
-                (combined_df["Primary position"].isin(specific_positions))
-                & (combined_df["Matches played"] >= 10)
-            ]
-
-            if position_players.empty:
+            if table is None or table.players == 0:
                 return {}
 
             position_config = self.position_metrics_map.get(position, {})
@@ -554,34 +812,31 @@ class CSVStatsController:
             top25_averages = {}
             for metric_key in all_metrics:
                 csv_field = self.csv_field_mapping.get(metric_key)
-                if csv_field and csv_field in position_players.columns:
-                    valid_values = position_players[csv_field].dropna()
-                    if len(valid_values) > 0:
-                        # Calcular percentil 75 (umbral del top 25%)
-                        p75_threshold = valid_values.quantile(0.75)
-
-                        # Filtrar jugadores en el top 25% (≥ percentil 75)
-                        top25_players = valid_values[valid_values >= p75_threshold]
-
-                        if len(top25_players) > 0:
-                            # Calcular la media real del top 25%
-                            top25_average = top25_players.mean()
-
-                            top25_averages[metric_key] = {
-                                "value": top25_average,
-                                "display_name": position_config.get(
-                                    "display_names", {}
-                                ).get(metric_key, metric_key),
-                                "p75_threshold": p75_threshold,
-                                "top25_sample_size": len(top25_players),
-                                "total_sample_size": len(valid_values),
-                            }
+                valid_values = table.sorted_values.get(csv_field)
+                if valid_values is not None and len(valid_values) > 0:
+                    # Calcular percentil 75 (umbral del top 25%)
+                    p75_threshold = _quantile_sorted(valid_values, 0.75)
+
+                    # Array ordenado: el top 25% es la cola desde el umbral
+                    start = np.searchsorted(valid_values, p75_threshold, side="left")
+                    top25_players = valid_values[start:]
+
+                    if len(top25_players) > 0:
+                        top25_averages[metric_key] = {
+                            "value": float(top25_players.mean()),
+                            "display_name": position_config.get(
+                                "display_names", {}
+                            ).get(metric_key, metric_key),
+                            "p75_threshold": p75_threshold,
+                            "top25_sample_size": len(top25_players),
+                            "total_sample_size": len(valid_values),
+                        }
 
             return {
                 "position": position,
                 "seasons": seasons,
                 "averages": top25_averages,
-                "players_analyzed": len(position_players),
+                "players_analyzed": table.players,
                 "data_source": "CSV",
                 "calculation_method": "top25_mean",
             }
@@ -592,32 +847,14 @@ class CSVStatsController:
 
     def get_available_seasons_list(self) -> List[str]:
         """Retorna lista de temporadas disponibles."""
+        self._discover_available_seasons()
         return self.available_seasons.copy()
 
     def get_position_sample_size(self, position: str, seasons: List[str]) -> int:
         """Retorna el número total de jugadores para una posición en las temporadas especificadas."""
         try:
-            all_players = []
-
-            # Obtener posiciones específicas que mapean al grupo
-            specific_positions = [
-                pos for pos, grp in self.position_mapping.items() if grp == position
-            ]
-
-            for season in seasons:
-                df = self._load_season_data(season)
-                if df is not None:
-                    # Filtrar por posición usando Primary position (como en CSV)
-                    position_players = df[
-                        df["Primary position"].isin(specific_positions)
-                    ]
-                    all_players.append(position_players)
-
-            if all_players:
-                combined_df = pd.concat(all_players, ignore_index=True)
-                return len(combined_df)
-
-            return 0
+            table = self._get_tables(position, seasons, min_matches=0)
+            return table.players if table is not None else 0
 
         except Exception as e:
             logger.error(f"Error obteniendo tamaño de muestra para {position}: {e}")
@@ -632,31 +869,19 @@ class CSVStatsController:
             if not csv_field:
                 return 0
 
-            all_players = []
-
-            # Obtener posiciones específicas que mapean al grupo
-            specific_positions = [
-                pos for pos, grp in self.position_mapping.items() if grp == position
-            ]
-
-            for season in seasons:
-                df = self._load_season_data(season)
-                if df is not None:
-                    # Filtrar por posición usando Primary position (como en CSV)
-                    position_players = df[
-                        df["Primary position"].isin(specific_positions)
-                    ]
-                    all_players.append(position_players)
-
-            if all_players:
-                combined_df = pd.concat(all_players, ignore_index=True)
+            table = self._get_tables(position, seasons, min_matches=0)
+            if table is None:
+                return 0
 
-                if csv_field in combined_df.columns:
-                    # Contar jugadores con valor exactamente 0 (no NaN)
-                    zero_count = (combined_df[csv_field] == 0.0).sum()
-                    return int(zero_count)
+            values = table.sorted_values.get(csv_field)
+            if values is None:
+                return 0
 
-            return 0
+            # Contar jugadores con valor exactamente 0 (no NaN) por búsqueda binaria
+            return int(
+                np.searchsorted(values, 0.0, side="right")
+                - np.searchsorted(values, 0.0, side="left")
+            )
 
         except Exception as e:
             logger.error(f"Error contando ceros para {metric_key} en {position}: {e}")
@@ -688,38 +913,18 @@ class CSVStatsController:
                 logger.warning(f"Métrica no mapeada: {metric}")
                 return None
 
-            all_players = []
+            table = self._get_tables(position, seasons, min_matches=0)
 
-            # Obtener posiciones específicas que mapean al grupo
-            specific_positions = [
-                pos for pos, grp in self.position_mapping.items() if grp == position
-            ]
-
-            # Combinar datos de múltiples temporadas
-            for season in seasons:
-                df = self._load_season_data(season)
-                if df is not None:
-                    # Filtrar por posición usando Primary position
-                    position_players = df[
-                        df["Primary position"].isin(specific_positions)
-                    ]
-                    all_players.append(position_players)
-
-            if not all_players:
+            if table is None:
                 logger.warning(f"No data found for percentiles: {position}, {metric}")
                 return None
 
-            # Concatenar todas las temporadas
-            combined_df = pd.concat(all_players, ignore_index=True)
-
             # Verificar que existe la columna
-            if csv_field not in combined_df.columns:
+            metric_values = table.sorted_values.get(csv_field)
+            if metric_values is None:
                 logger.warning(f"Columna CSV no encontrada: {csv_field}")
                 return None
 
-            # Filtrar valores válidos (no NaN, mayores que 0 para la mayoría de métricas)
-            metric_values = combined_df[csv_field].dropna()
-
             if (
                 len(metric_values) < 10
             ):  # Mínimo 10 jugadores para percentiles confiables
@@ -728,16 +933,16 @@ class CSVStatsController:
                 )
                 return None
 
-            # Calcular percentiles
+            # Calcular percentiles sobre el array ordenado
             percentiles = {
-                "p10": float(metric_values.quantile(0.10)),
-                "p25": float(metric_values.quantile(0.25)),
-                "p50": float(metric_values.quantile(0.50)),  # Mediana
-                "p75": float(metric_values.quantile(0.75)),
-                "p90": float(metric_values.quantile(0.90)),
+                "p10": _quantile_sorted(metric_values, 0.10),
+                "p25": _quantile_sorted(metric_values, 0.25),
+                "p50": _quantile_sorted(metric_values, 0.50),  # Mediana
+                "p75": _quantile_sorted(metric_values, 0.75),
+                "p90": _quantile_sorted(metric_values, 0.90),
                 "sample_size": len(metric_values),
-                "min": float(metric_values.min()),
-                "max": float(metric_values.max()),
+                "min": float(metric_values[0]),
+                "max": float(metric_values[-1]),
             }
 
             # Calcular percentil exacto del jugador si se proporciona player_value
@@ -769,14 +974,14 @@ class CSVStatsController:
 
         Args:
             player_value: Valor del jugador
-            all_values: Serie pandas con todos los valores de la métrica
+            all_values: Array ordenado con todos los valores de la métrica
 
         Returns:
             float: Percentil exacto (0.0-100.0)
         """
         try:
-            # Contar cuántos jugadores están por debajo del valor del jugador
-            values_below = (all_values <= player_value).sum()
+            # Contar cuántos jugadores están por debajo del valor (búsqueda binaria)
+            values_below = int(np.searchsorted(all_values, player_value, side="right"))
             total_players = len(all_values)
 
             # Calcular percentil: (jugadores por debajo / total) * 100
@@ -789,7 +994,12 @@ class CSVStatsController:
             logger.warning(f"Error calculating exact percentile: {e}")
             return 50.0  # Retornar mediana como fallback
 
+    def get_cache_stats(self) -> Dict:
+        """Retorna contadores hit/miss/tiempo de carga del almacén compartido."""
+        return self.store.get_stats()
+
     def clear_cache(self):
         """Limpia el cache de datos."""
-        self.cached_data.clear()
+        self.store.clear()
+        self._merged_tables.clear()
         logger.info("Cache de CSV Stats Controller limpiado")
@@ -113,6 +113,18 @@ def get_db_session() -> SQLAlchemySession:
     return _Session()
 
 
+def get_engine():
+    """
+    Devuelve el engine SQLAlchemy compartido (inicializándolo si hace falta).
+
+    Raises:
+        RuntimeError: Si no se puede inicializar la base de datos
+    """
+    if _engine is None and not initialize_database():
+        raise RuntimeError("No se pudo inicializar la base de datos.")
+    return _engine
+
+
 def force_cleanup_connections():
     """Fuerza limpieza de conexiones idle y huérfanas."""
     global _engine
@@ -0,0 +1,320 @@
+# controllers/db_indexes.py
+"""
+Migración y verificación de los índices secundarios declarados en los modelos.
+
+Los índices de sessions, users, professional_stats y ml_metrics se declaran en
+__table_args__; este módulo los crea en una BD existente (create_all no toca
+tablas que ya existen). En PostgreSQL se usa CREATE INDEX CONCURRENTLY para no
+bloquear escrituras, y los índices inválidos que deja una creación concurrente
+interrumpida se eliminan y se vuelven a crear; los índices trigram (GIN con
+gin_trgm_ops) activan antes la extensión pg_trgm. Es idempotente: los índices
+existentes se dejan como están.
+
+Uso:
+    python -m controllers.db_indexes            # EXPLAIN, migrar y EXPLAIN
+    python -m controllers.db_indexes --verify   # Solo verificar y EXPLAIN
+    python -m controllers.db_indexes --dry-run  # Mostrar qué se crearía
+"""
+
+import argparse
+import datetime as dt
+import logging
+import sys
+from typing import Dict, List, Optional
+
+from sqlalchemy import Index, and_, func, inspect, or_, select, text
+from sqlalchemy.engine import Engine
+
+from models import (
+    Coach,
+    MLMetrics,
+    Player,
+    ProfessionalStats,
+    Session,
+    SessionStatus,
+    User,
+)
+
+logger = logging.getLogger(__name__)
+
+MANAGED_TABLES = (
+    Session.__table__,
+    User.__table__,
+    ProfessionalStats.__table__,
+    MLMetrics.__table__,
+)
+
+
+def managed_indexes() -> List[Index]:
+    """Índices declarados en los modelos gestionados, ordenados por nombre."""
+    indexes = [index for table in MANAGED_TABLES for index in table.indexes]
+    return sorted(indexes, key=lambda index: index.name)
+
+
+def _hot_queries() -> Dict[str, object]:
+    """Consultas más frecuentes de los controllers, con valores de ejemplo."""
+    month_start = dt.datetime.combine(dt.date.today().replace(day=1), dt.time.min)
+    month_end = month_start + dt.timedelta(days=31)
+    name_pattern = "%player%"
+    return {
+        "sessions_by_range": select(Session)
+        .where(Session.start_time >= month_start, Session.start_time <= month_end)
+        .order_by(Session.start_time),
+        "coach_sessions_by_status": select(func.count(Session.id)).where(
+            Session.coach_id == 1, Session.status == SessionStatus.COMPLETED
+        ),
+        "player_sessions_by_status": select(Session)
+        .where(Session.player_id == 1, Session.status == SessionStatus.SCHEDULED)
+        .order_by(Session.start_time),
+        "session_by_calendar_event": select(Session).where(
+            Session.calendar_event_id == "event-id"
+        ),
+        "sessions_table_with_names": select(Session.id, User.name)
+        .outerjoin(Coach, Session.coach_id == Coach.coach_id)
+        .outerjoin(User, Coach.user_id == User.user_id)
+        .where(Session.start_time >= month_start, Session.start_time <= month_end)
+        .order_by(Session.start_time),
+        # Misma forma que SessionController._search_condition
+        "session_search_by_name": select(Session.id)
+        .where(
+            or_(
+                Session.coach_id.in_(
+                    select(Coach.coach_id)
+                    .join(User, Coach.user_id == User.user_id)
+                    .where(User.name.ilike(name_pattern))
+                ),
+                Session.player_id.in_(
+                    select(Player.player_id)
+                    .join(User, Player.user_id == User.user_id)
+                    .where(User.name.ilike(name_pattern))
+                ),
+                Session.coach_name_snapshot.ilike(name_pattern),
+                Session.player_name_snapshot.ilike(name_pattern),
+            )
+        )
+        .order_by(Session.start_time.desc()),
+        "professional_stats_by_player_season": select(ProfessionalStats).where(
+            ProfessionalStats.player_id == 1, ProfessionalStats.season == "2024-25"
+        ),
+        "professional_stats_by_season": select(ProfessionalStats).where(
+            ProfessionalStats.season == "2024-25"
+        ),
+        "ml_metrics_by_player_season": select(MLMetrics).where(
+            MLMetrics.player_id == 1, MLMetrics.season == "2024-25"
+        ),
+    }
+
+
+def explain_hot_queries(engine: Engine) -> Dict[str, List[str]]:
+    """
+    Plan de ejecución de las consultas frecuentes.
+
+    Returns:
+        Dict nombre de consulta → líneas del plan (EXPLAIN / EXPLAIN QUERY PLAN)
+    """
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    plans = {}
+    with engine.connect() as conn:
+        for name, query in _hot_queries().items():
+            sql = query.compile(
+                dialect=engine.dialect, compile_kwargs={"literal_binds": True}
+            )
+            try:
+                rows = conn.execute(text(prefix + str(sql))).all()
+                plans[name] = [str(row[-1]) for row in rows]
+            except Exception as e:
+                logger.error(f"Error en EXPLAIN de {name}: {e}")
+                plans[name] = [f"error: {e}"]
+    return plans
+
+
+def _invalid_indexes(conn) -> set:
+    """Índices marcados como inválidos (CREATE INDEX CONCURRENTLY interrumpido)."""
+    if conn.dialect.name != "postgresql":
+        return set()
+    rows = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid WHERE NOT i.indisvalid"
+        )
+    )
+    return {row[0] for row in rows}
+
+
+def verify_indexes(engine: Engine) -> Dict[str, List[str]]:
+    """
+    Compara los índices declarados con los existentes en la BD.
+
+    Returns:
+        Dict con listas de nombres: present, missing e invalid
+    """
+    with engine.connect() as conn:
+        inspector = inspect(conn)
+        existing = {
+            index["name"]
+            for table in MANAGED_TABLES
+            for index in inspector.get_indexes(table.name)
+        }
+        invalid = _invalid_indexes(conn)
+
+    report = {"present": [], "missing": [], "invalid": []}
+    for index in managed_indexes():
+        if index.name in invalid:
+            report["invalid"].append(index.name)
+        elif index.name in existing:
+            report["present"].append(index.name)
+        else:
+            report["missing"].append(index.name)
+    return report
+
+
+def _duplicate_groups(conn, index: Index) -> int:
+    """Grupos de filas que violarían un índice único (los NULL no cuentan)."""
+    columns = list(index.columns)
+    duplicates = (
+        select(*columns)
+        .where(and_(*[column.is_not(None) for column in columns]))
+        .group_by(*columns)
+        .having(func.count() > 1)
+        .subquery()
+    )
+    return conn.execute(select(func.count()).select_from(duplicates)).scalar()
+
+
+def _create_index_sql(engine: Engine, index: Index) -> str:
+    quote = engine.dialect.identifier_preparer.quote
+    postgresql = engine.dialect.name == "postgresql"
+    concurrently = "CONCURRENTLY " if postgresql else ""
+    unique = "UNIQUE " if index.unique else ""
+    using, ops = "", {}
+    if postgresql:
+        options = index.dialect_options["postgresql"]
+        using = f"USING {options['using']} " if options["using"] else ""
+        ops = options["ops"] or {}
+    columns = ", ".join(
+        " ".join(filter(None, [quote(column.name), ops.get(column.name)]))
+        for column in index.columns
+    )
+    return (
+        f"CREATE {unique}INDEX {concurrently}IF NOT EXISTS {quote(index.name)} "
+        f"ON {quote(index.table.name)} {using}({columns})"
+    )
+
+
+def _uses_trigram(index: Index) -> bool:
+    ops = index.dialect_options["postgresql"]["ops"] or {}
+    return "gin_trgm_ops" in ops.values()
+
+
+def apply_indexes(engine: Engine, dry_run: bool = False) -> List[Dict[str, str]]:
+    """
+    Crea los índices declarados que falten en la BD.
+
+    Los índices únicos no se crean si hay filas duplicadas; se informa del
+    número de grupos duplicados para limpiarlos antes.
+
+    Args:
+        engine: Engine de la BD a migrar
+        dry_run: Solo informar de lo que se haría
+
+    Returns:
+        Lista de {index, status, detail}; status: exists, created, rebuilt,
+        would_create, duplicates o error
+    """
+    report = verify_indexes(engine)
+    results = [
+        {"index": name, "status": "exists", "detail": ""} for name in report["present"]
+    ]
+    pending = {*report["missing"], *report["invalid"]}
+    quote = engine.dialect.identifier_preparer.quote
+
+    # CONCURRENTLY no puede ejecutarse dentro de una transacción
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for index in managed_indexes():
+            if index.name not in pending:
+                continue
+            sql = _create_index_sql(engine, index)
+            if dry_run:
+                results.append(
+                    {"index": index.name, "status": "would_create", "detail": sql}
+                )
+                continue
+            try:
+                if index.unique:
+                    duplicates = _duplicate_groups(conn, index)
+                    if duplicates:
+                        results.append(
+                            {
+                                "index": index.name,
+                                "status": "duplicates",
+                                "detail": f"{duplicates} grupos duplicados",
+                            }
+                        )
+                        continue
+
+                if _uses_trigram(index) and engine.dialect.name == "postgresql":
+                    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+                status = "created"
+                if index.name in report["invalid"]:
+                    conn.execute(
+                        text(f"DROP INDEX CONCURRENTLY IF EXISTS {quote(index.name)}")
+                    )
+                    status = "rebuilt"
+                conn.execute(text(sql))
+                results.append({"index": index.name, "status": status, "detail": sql})
+                logger.info(f"✅ Índice {index.name}: {status}")
+            except Exception as e:
+                logger.error(f"❌ Error creando índice {index.name}: {e}")
+                results.append(
+                    {"index": index.name, "status": "error", "detail": str(e)}
+                )
+
+    return sorted(results, key=lambda result: result["index"])
+
+
+def _print_plans(title: str, plans: Dict[str, List[str]]):
+    print(f"\n📋 {title}")
+    for name, lines in plans.items():
+        print(f"  • {name}")
+        for line in lines:
+            print(f"      {line}")
+
+
+def main(argv: Optional[List[str]] = None, engine: Optional[Engine] = None) -> int:
+    """Punto de entrada de la línea de comandos; devuelve el código de salida."""
+    parser = argparse.ArgumentParser(
+        description="Crea y verifica los índices secundarios de la BD"
+    )
+    parser.add_argument(
+        "--verify", action="store_true", help="Solo verificar y mostrar EXPLAIN"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Mostrar qué índices se crearían"
+    )
+    args = parser.parse_args(argv)
+
+    if engine is None:
+        from controllers.db import get_engine
+
+        engine = get_engine()
+
+    _print_plans("EXPLAIN (antes)", explain_hot_queries(engine))
+
+    if not args.verify:
+        print("\n🔧 Índices:")
+        for result in apply_indexes(engine, dry_run=args.dry_run):
+            print(f"  {result['status']:>12}  {result['index']}  {result['detail']}")
+        if not args.dry_run:
+            _print_plans("EXPLAIN (después)", explain_hot_queries(engine))
+
+    report = verify_indexes(engine)
+    print(
+        f"\n📊 Presentes: {len(report['present'])}, "
+        f"faltan: {report['missing']}, inválidos: {report['invalid']}"
+    )
+    return 0 if not report["missing"] and not report["invalid"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,7 @@ from zoneinfo import ZoneInfo
 
 from config import CALENDAR_COLORS
 from models import Session
+from models.session_model import local_now
 
 # Migrated to Dash - Streamlit imports removed
 
@@ -22,7 +23,7 @@ def _fmt_local(ts: dt.datetime) -> str:
 def _to_event(s: Session) -> dict:
     # Determinar si el evento es pasado para aplicar clase CSS
     # Corregir problema de timezone: usar datetime naive para comparar
-    now = dt.datetime.now()  # Sin timezone para comparar con sesiones naive
+    now = local_now()  # Hora de Madrid sin zona, como las sesiones
     is_past = s.end_time and s.end_time < now
 
     # Obtener nombres (manejar snapshots)
@@ -44,7 +45,7 @@ def _to_event(s: Session) -> dict:
         "description": s.notes or "",
         "player": player_name,
         "coach": coach_name,
-        "color": HEX[s.status.value],
+        "color": HEX[s.effective_status(now).value],
     }
 
     # Añadir clase CSS para eventos pasados
@@ -454,22 +455,21 @@ def sessions_to_events(sessions):
 
 def update_and_get_sessions(controller, **kwargs):
     """
-    Actualiza sesiones pasadas y devuelve las sesiones filtradas.
+    Devuelve las sesiones filtradas.
     Función helper para mantener separación de responsabilidades.
+
+    Las sesiones pasadas se marcan como completadas en un job de background;
+    aquí solo se asegura que esté en marcha y las vistas usan el estado derivado.
     """
-    # Actualizar sesiones pasadas automáticamente
     try:
-        updated_count = controller.update_past_sessions()
-        if updated_count > 0:
-            import logging
+        from controllers.session_rollover import ensure_session_rollover
 
-            logger = logging.getLogger(__name__)
-            logger.info(f"📅 Auto-updated {updated_count} past sessions to completed")
+        ensure_session_rollover()
     except Exception as e:
         import logging
 
         logger = logging.getLogger(__name__)
-        logger.error(f"Error in auto-update past sessions: {e}")
+        logger.error(f"Error starting session rollover job: {e}")
 
     # Obtener sesiones con filtros usando el método correcto
     if hasattr(controller, "get_sessions_for_display"):
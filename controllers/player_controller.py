@@ -6,8 +6,11 @@ Separa la lógica de negocio de las páginas de UI.
 import datetime as dt
 from typing import Any, Dict, List, Optional, Tuple
 
+from sqlalchemy.orm import contains_eager
+
 from controllers.db import get_db_session
-from models import Player, Session, SessionStatus, TestResult, User
+from controllers.session_stats import get_session_stats_service
+from models import Player, Session, TestResult, User
 
 
 class PlayerController:
@@ -101,6 +104,7 @@ class PlayerController:
         return (
             self.db.query(Player)
             .join(User)
+            .options(contains_eager(Player.user))
             .filter(User.is_active.is_(True))
             .order_by(User.name)
             .all()
@@ -125,6 +129,7 @@ class PlayerController:
         return (
             self.db.query(Player)
             .join(User)
+            .options(contains_eager(Player.user))
             .filter(User.is_active.is_(True), User.name.ilike(f"%{search_term}%"))
             .order_by(User.name)
             .all()
@@ -145,10 +150,23 @@ class PlayerController:
         if not self.db:
             raise RuntimeError("Controller debe usarse como context manager")
 
-        # Calcular estadísticas de sesiones
-        completed = sum(s.status == SessionStatus.COMPLETED for s in player.sessions)
-        scheduled = sum(s.status == SessionStatus.SCHEDULED for s in player.sessions)
-        canceled = sum(s.status == SessionStatus.CANCELED for s in player.sessions)
+        session_stats = get_session_stats_service().get_player_stats(
+            [player.player_id], db=self.db
+        )[player.player_id]
+        stats = self._build_player_stats(player, session_stats)
+        stats["next_session_obj"] = (
+            self.db.get(Session, session_stats["next_session_id"])
+            if session_stats["next_session_id"]
+            else None
+        )
+        return stats
+
+    @staticmethod
+    def _build_player_stats(
+        player: Player, session_stats: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Estadísticas de un jugador a partir de sus contadores de sesiones."""
+        completed = session_stats["completed"]
 
         # Calcular edad si hay fecha de nacimiento
         age = None
@@ -161,47 +179,41 @@ class PlayerController:
                 - ((today.month, today.day) < (birth_date.month, birth_date.day))
             )
 
-        # Obtener próxima sesión programada (usar UTC para comparación)
-        from datetime import timezone
-
-        now_utc = dt.datetime.now(timezone.utc)
-        next_session = (
-            self.db.query(Session)
-            .filter(
-                Session.player_id == player.player_id,
-                Session.status == SessionStatus.SCHEDULED,
-                Session.start_time > now_utc,
-            )
-            .order_by(Session.start_time)
-            .first()
-        )
-
+        # Próxima sesión programada
         next_session_text = "To be confirmed"
-        if next_session:
-            next_session_text = next_session.start_time.strftime("%d/%m/%Y %H:%M")
+        if session_stats["next_session_start"]:
+            next_session_text = session_stats["next_session_start"].strftime(
+                "%d/%m/%Y %H:%M"
+            )
 
         return {
             "completed": completed,
-            "scheduled": scheduled,
-            "canceled": canceled,
+            "scheduled": session_stats["scheduled"],
+            "canceled": session_stats["canceled"],
             "remaining": max(player.enrolment - completed, 0),
             "age": age,
             "next_session": next_session_text,
-            "next_session_obj": next_session,
         }
 
-    def get_player_card_data(self, player: Player) -> Dict[str, Any]:
+    def get_player_card_data(
+        self, player: Player, session_stats: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """
         Prepara datos de un jugador para mostrar en tarjeta.
         Usado en listas de jugadores.
 
         Args:
             player: Objeto Player
+            session_stats: Contadores ya calculados (SessionStatsService)
 
         Returns:
             Diccionario con datos formateados para tarjeta
         """
-        stats = self.get_player_stats(player)
+        if session_stats is None:
+            session_stats = get_session_stats_service().get_player_stats(
+                [player.player_id], db=self.db
+            )[player.player_id]
+        stats = self._build_player_stats(player, session_stats)
 
         return {
             "player_id": player.player_id,
@@ -353,7 +365,14 @@ def get_players_for_list(search_term: str = "") -> List[Dict[str, Any]]:
     """
     with PlayerController() as controller:
         players = controller.search_players(search_term)
-        return [controller.get_player_card_data(player) for player in players]
+        # Contadores de todos los jugadores en consultas agrupadas
+        session_stats = get_session_stats_service().get_player_stats(
+            [player.player_id for player in players], db=controller.db
+        )
+        return [
+            controller.get_player_card_data(player, session_stats[player.player_id])
+            for player in players
+        ]
 
 
 def update_player_notes_simple(player_id: int, notes: str) -> Tuple[bool, str]:
@@ -6,27 +6,45 @@ Usa ValidationController para validaciones de existencia
 import datetime as dt
 import logging
 import os
-from typing import Dict, List, Optional
-from zoneinfo import ZoneInfo
+import re
+from typing import Dict, Iterator, List, Optional
 
 from googleapiclient.errors import HttpError
+from sqlalchemy import String, and_, cast, func, or_, select, update
 from sqlalchemy.orm import Session as SQLSession
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import aliased, joinedload
 
 from config import CALENDAR_COLORS
 from controllers.db import get_db_session
 from controllers.google_client import calendar
 from controllers.validation_controller import ValidationController
 from models import Coach, Player, Session, SessionStatus, User
+from models.session_model import derive_status, local_now
 
+from .calendar_batch import CalendarColorQueue, get_calendar_color_queue
 from .calendar_utils import (
     build_calendar_event_body,
     session_needs_update,
     update_session_tracking,
 )
+from .session_stats import get_session_stats_service, invalidate_session_stats
 
 logger = logging.getLogger(__name__)
 CAL_ID = os.getenv("CALENDAR_ID")
+# Filas leídas de la BD por lote al generar la tabla de sesiones
+TABLE_FETCH_SIZE = 200
+# Resultados por página en la búsqueda de sesiones de los selectores
+SEARCH_PAGE_SIZE = 50
+SEARCH_DAY_KEYWORDS = {
+    "today": 0,
+    "hoy": 0,
+    "tomorrow": 1,
+    "mañana": 1,
+    "yesterday": -1,
+    "ayer": -1,
+}
+# Búsquedas que pueden ser parte de una fecha 'dd/mm/aaaa' ('05/0', '/08'...)
+DATE_FRAGMENT_PATTERN = re.compile(r"^[\d/]+$")
 
 
 # Funciones simples para reemplazar cloud_utils removido
@@ -101,7 +119,7 @@ class SessionController:
         if player_id:
             query = query.filter(Session.player_id == player_id)
         if statuses:
-            query = query.filter(Session.status.in_(statuses))
+            query = query.filter(Session.effective_status_expr().in_(statuses))
 
         return query.order_by(Session.start_time.asc()).all()
 
@@ -371,10 +389,22 @@ class SessionController:
             logger.error(f"Error deleting session {session_id}: {e}")
             return False, f"Error deleting session: {str(e)}"
 
-    def update_past_sessions(self) -> int:
+    def update_past_sessions(
+        self, color_queue: Optional[CalendarColorQueue] = None
+    ) -> int:
         """
         Marca sesiones pasadas como completadas.
 
+        Un solo UPDATE ... RETURNING sin cargar las sesiones en memoria; los
+        cambios de color en Calendar se encolan y se envían en batch con
+        color_queue.flush(). Las filas quedan con is_dirty para que el push
+        BD→Calendar reenvíe el evento si la cola en memoria se pierde. Las
+        lecturas no dependen de esto: muestran las sesiones terminadas como
+        completadas (Session.effective_status).
+
+        Args:
+            color_queue: Cola de colores (por defecto la compartida)
+
         Returns:
             Número de sesiones actualizadas
         """
@@ -382,36 +412,72 @@ class SessionController:
             raise RuntimeError("Controller debe usarse como context manager")
 
         try:
-
-            madrid_tz = ZoneInfo("Europe/Madrid")
-            now = dt.datetime.now(madrid_tz)
-            sessions_to_update = (
-                self.db.query(Session)
-                .filter(
-                    Session.status == SessionStatus.SCHEDULED, Session.end_time <= now
+            updated = self.db.execute(
+                update(Session)
+                .where(
+                    Session.status == SessionStatus.SCHEDULED,
+                    Session.end_time <= local_now(),
                 )
-                .all()
-            )
+                .values(status=SessionStatus.COMPLETED, is_dirty=True)
+                .returning(Session.id, Session.calendar_event_id)
+                .execution_options(synchronize_session=False)
+            ).all()
+            if not updated:
+                return 0
 
-            count = 0
-            for session in sessions_to_update:
-                session.status = SessionStatus.COMPLETED
-                # Actualizar color en Calendar
-                if session.calendar_event_id:
-                    self._patch_session_color(session)
-                count += 1
+            self.db.commit()
+            # Los UPDATE masivos no disparan los eventos del mapper
+            invalidate_session_stats()
 
-            if count > 0:
-                self.db.commit()
-                logger.info(f"📅 {count} sesiones marcadas como completadas")
+            if color_queue is None:
+                color_queue = get_calendar_color_queue()
+            color = CALENDAR_COLORS[SessionStatus.COMPLETED.value]["google"]
+            for _, event_id in updated:
+                if event_id:
+                    color_queue.enqueue(event_id, color)
 
-            return count
+            logger.info(f"📅 {len(updated)} sesiones marcadas como completadas")
+            return len(updated)
 
         except Exception as e:
             self.db.rollback()
             logger.error(f"Error updating past sessions: {e}")
             return 0
 
+    def enqueue_pending_colors(
+        self, color_queue: Optional[CalendarColorQueue] = None
+    ) -> int:
+        """
+        Reconstruye desde la BD los colores de Calendar aún no confirmados.
+
+        Son las sesiones completadas que siguen con is_dirty (el push
+        BD→Calendar lo limpia al actualizar el evento). Se usa al arrancar,
+        ya que la cola de colores solo vive en memoria.
+
+        Returns:
+            Número de colores encolados
+        """
+        if not self.db:
+            raise RuntimeError("Controller debe usarse como context manager")
+
+        if color_queue is None:
+            color_queue = get_calendar_color_queue()
+        color = CALENDAR_COLORS[SessionStatus.COMPLETED.value]["google"]
+        event_ids = (
+            self.db.query(Session.calendar_event_id)
+            .filter(
+                Session.is_dirty.is_(True),
+                Session.status == SessionStatus.COMPLETED,
+                Session.calendar_event_id.isnot(None),
+            )
+            .all()
+        )
+        for (event_id,) in event_ids:
+            color_queue.enqueue(event_id, color)
+        if event_ids:
+            logger.info(f"📅 {len(event_ids)} colores pendientes recuperados de la BD")
+        return len(event_ids)
+
     # Metodos privados para Google Calendar
 
     def _find_existing_calendar_event(self, session: Session) -> Optional[str]:
@@ -622,31 +688,13 @@ class SessionController:
         if not self.db:
             raise RuntimeError("Controller debe usarse como context manager")
 
-        comp = (
-            self.db.query(Session)
-            .filter(
-                Session.coach_id == coach_id, Session.status == SessionStatus.COMPLETED
-            )
-            .count()
-        )
-
-        prog = (
-            self.db.query(Session)
-            .filter(
-                Session.coach_id == coach_id, Session.status == SessionStatus.SCHEDULED
-            )
-            .count()
-        )
-
-        canc = (
-            self.db.query(Session)
-            .filter(
-                Session.coach_id == coach_id, Session.status == SessionStatus.CANCELED
-            )
-            .count()
-        )
-
-        return {"completed": comp, "scheduled": prog, "canceled": canc}
+        stats = get_session_stats_service().get_coach_stats([coach_id], db=self.db)
+        coach_stats = stats[coach_id]
+        return {
+            "completed": coach_stats["completed"],
+            "scheduled": coach_stats["scheduled"],
+            "canceled": coach_stats["canceled"],
+        }
 
     def get_sessions_for_display(
         self,
@@ -660,23 +708,13 @@ class SessionController:
         if not self.db:
             raise RuntimeError("Controller debe usarse como context manager")
 
-        # Asegurar que los datetime sean timezone-naive para compatibilidad con BD
-        start_datetime = dt.datetime.combine(start_date, dt.time.min).replace(
-            tzinfo=None
-        )
-        end_datetime = dt.datetime.combine(end_date, dt.time.max).replace(tzinfo=None)
-
-        # Convertir status strings a enums si se proporcionan
-        status_enums = None
-        if status_filter:
-            status_enums = [SessionStatus(s) for s in status_filter]
-
+        start_datetime, end_datetime = self._display_range(start_date, end_date)
         sessions = self.get_sessions(
             start=start_datetime,
             end=end_datetime,
             coach_id=coach_id,
             player_id=player_id,
-            statuses=status_enums,
+            statuses=self._status_enums(status_filter),
         )
 
         # Asegurar que todas las sesiones devueltas sean timezone-naive
@@ -689,56 +727,182 @@ class SessionController:
 
         return sessions
 
+    @staticmethod
+    def _display_range(
+        start_date: dt.date, end_date: dt.date
+    ) -> tuple[dt.datetime, dt.datetime]:
+        """Rango de fechas de UI como datetimes timezone-naive (compatibles con BD)."""
+        start_datetime = dt.datetime.combine(start_date, dt.time.min).replace(
+            tzinfo=None
+        )
+        end_datetime = dt.datetime.combine(end_date, dt.time.max).replace(tzinfo=None)
+        return start_datetime, end_datetime
+
+    @staticmethod
+    def _status_enums(
+        status_filter: Optional[List[str]],
+    ) -> Optional[List[SessionStatus]]:
+        """Convierte los estados de UI (strings) a enums."""
+        if not status_filter:
+            return None
+        return [SessionStatus(s) for s in status_filter]
+
+    @staticmethod
+    def _table_row(
+        session_id: int,
+        coach_name: str,
+        player_name: str,
+        start_time: dt.datetime,
+        end_time: Optional[dt.datetime],
+        status: SessionStatus,
+    ) -> dict:
+        """Fila de la tabla de sesiones en formato Dash."""
+        return {
+            "ID": session_id,
+            "Coach": coach_name,
+            "Player": player_name,
+            "Date": start_time.strftime("%d/%m/%Y"),
+            "Start Time": start_time.strftime("%H:%M"),
+            "End Time": end_time.strftime("%H:%M") if end_time else "Not established",
+            "Status": status.value,
+        }
+
+    @staticmethod
+    def _participant_name(
+        participant_id: Optional[int],
+        user_name: Optional[str],
+        snapshot: Optional[str],
+        label: str,
+    ) -> str:
+        """Nombre de coach/player, o su snapshot si el usuario fue eliminado."""
+        if participant_id:
+            return user_name or f"{label} not found"
+        return snapshot or f"{label} deleted"
+
+    def _session_rows_query(self):
+        """
+        Consulta con las columnas de sesión que usan tablas y selectores, y los
+        nombres de coach/player unidos desde users.
+
+        Returns:
+            Tuple[query, alias de users del coach, alias de users del player]
+        """
+        coach_user = aliased(User)
+        player_user = aliased(User)
+        query = (
+            self.db.query(
+                Session.id,
+                Session.coach_id,
+                Session.player_id,
+                Session.coach_name_snapshot,
+                Session.player_name_snapshot,
+                Session.start_time,
+                Session.end_time,
+                Session.status,
+                coach_user.name.label("coach_name"),
+                player_user.name.label("player_name"),
+            )
+            .outerjoin(Coach, Session.coach_id == Coach.coach_id)
+            .outerjoin(coach_user, Coach.user_id == coach_user.user_id)
+            .outerjoin(Player, Session.player_id == Player.player_id)
+            .outerjoin(player_user, Player.user_id == player_user.user_id)
+        )
+        return query, coach_user, player_user
+
+    def iter_sessions_table_rows(
+        self,
+        start_date: dt.date,
+        end_date: dt.date,
+        coach_id: Optional[int] = None,
+        player_id: Optional[int] = None,
+        status_filter: Optional[List[str]] = None,
+    ) -> Iterator[dict]:
+        """
+        Filas de la tabla de sesiones con una sola consulta.
+
+        Solo se seleccionan las columnas que muestra la tabla; los nombres de
+        coach y player salen de un join con users y las filas se leen por lotes.
+
+        Args:
+            start_date: Fecha inicio del rango
+            end_date: Fecha fin del rango
+            coach_id: ID del coach (opcional)
+            player_id: ID del player (opcional)
+            status_filter: Estados a mostrar como strings (opcional)
+
+        Yields:
+            Diccionarios con el formato de format_sessions_for_table
+        """
+        if not self.db:
+            raise RuntimeError("Controller debe usarse como context manager")
+
+        start_datetime, end_datetime = self._display_range(start_date, end_date)
+        query, _, _ = self._session_rows_query()
+        query = query.filter(
+            Session.start_time >= start_datetime,
+            Session.start_time <= end_datetime,
+        )
+
+        if coach_id:
+            query = query.filter(Session.coach_id == coach_id)
+        if player_id:
+            query = query.filter(Session.player_id == player_id)
+        now = local_now()
+        statuses = self._status_enums(status_filter)
+        if statuses:
+            query = query.filter(Session.effective_status_expr(now).in_(statuses))
+
+        query = query.order_by(Session.start_time.asc()).execution_options(
+            yield_per=TABLE_FETCH_SIZE
+        )
+        for row in query:
+            yield self._table_row(
+                row.id,
+                self._participant_name(
+                    row.coach_id, row.coach_name, row.coach_name_snapshot, "Coach"
+                ),
+                self._participant_name(
+                    row.player_id, row.player_name, row.player_name_snapshot, "Player"
+                ),
+                row.start_time,
+                row.end_time,
+                derive_status(row.status, row.end_time, now),
+            )
+
     def format_sessions_for_table(self, sessions: List[Session]) -> List[dict]:
-        """Formatea sesiones para mostrar en tabla de UI."""
+        """
+        Formatea sesiones ya cargadas para mostrar en tabla de UI.
+
+        Usa las relaciones coach/player cargadas por get_sessions (joinedload);
+        para listados nuevos es preferible iter_sessions_table_rows.
+        """
         if not self.db:
             raise RuntimeError("Controller debe usarse como context manager")
 
+        now = local_now()
         sessions_data = []
         for session in sessions:
-            # Obtener nombres de coach y player (manejar snapshots)
-            if session.coach_id:
-                coach = (
-                    self.db.query(Coach)
-                    .join(User)
-                    .filter(Coach.coach_id == session.coach_id)
-                    .first()
-                )
-                coach_name = (
-                    coach.user.name if coach and coach.user else "Coach not found"
-                )
-            else:
-                # Usar snapshot si coach fue eliminado
-                coach_name = session.coach_name_snapshot or "Coach deleted"
-
-            if session.player_id:
-                player = (
-                    self.db.query(Player)
-                    .join(User)
-                    .filter(Player.player_id == session.player_id)
-                    .first()
-                )
-                player_name = (
-                    player.user.name if player and player.user else "Player not found"
-                )
-            else:
-                # Usar snapshot si player fue eliminado
-                player_name = session.player_name_snapshot or "Player deleted"
-
+            coach = session.coach if session.coach_id else None
+            player = session.player if session.player_id else None
             sessions_data.append(
-                {
-                    "ID": session.id,
-                    "Coach": coach_name,
-                    "Player": player_name,
-                    "Date": session.start_time.strftime("%d/%m/%Y"),
-                    "Start Time": session.start_time.strftime("%H:%M"),
-                    "End Time": (
-                        session.end_time.strftime("%H:%M")
-                        if session.end_time
-                        else "Not established"
+                self._table_row(
+                    session.id,
+                    self._participant_name(
+                        session.coach_id,
+                        coach.user.name if coach and coach.user else None,
+                        session.coach_name_snapshot,
+                        "Coach",
+                    ),
+                    self._participant_name(
+                        session.player_id,
+                        player.user.name if player and player.user else None,
+                        session.player_name_snapshot,
+                        "Player",
                     ),
-                    "Status": session.status.value,
-                }
+                    session.start_time,
+                    session.end_time,
+                    session.effective_status(now),
+                )
             )
 
         return sessions_data
@@ -769,23 +933,51 @@ class SessionController:
     ) -> Dict[int, str]:
         """
         Obtiene sesiones para editar como diccionario con filtros avanzados.
+        Devuelve la primera página de search_sessions (próximas primero).
 
         Args:
             coach_id: ID del coach para filtrar (opcional)
             date_filter: Filtro temporal ('today', 'tomorrow', 'this_week', etc.)
             search_query: Texto de búsqueda (nombre coach/player, ID, fecha)
         """
+        descriptions, _ = self.search_sessions(search_query, coach_id, date_filter)
+        return descriptions
+
+    def search_sessions(
+        self,
+        search_query: Optional[str] = None,
+        coach_id: Optional[int] = None,
+        date_filter: Optional[str] = None,
+        limit: int = SEARCH_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ) -> tuple[Dict[int, str], Optional[str]]:
+        """
+        Búsqueda paginada de sesiones para los selectores de edición.
+
+        El filtrado se hace en la BD: el texto se compara con ILIKE contra los
+        nombres de coach/player y sus snapshots (con índices trigram en
+        PostgreSQL), y números y fechas parciales ('05/0', '/08', '7') como
+        subcadena del ID y de la fecha 'dd/mm/aaaa', igual que la búsqueda
+        original en Python; 'hoy', 'mañana'... buscan por día. Primero van las
+        próximas sesiones, de la más cercana a la más lejana, y después las
+        pasadas de la más reciente a la más antigua, paginadas por
+        (start_time, id) dentro de cada tramo.
+
+        Args:
+            search_query: Texto de búsqueda (opcional)
+            coach_id: ID del coach para filtrar (opcional)
+            date_filter: Filtro temporal ('today', 'tomorrow', 'this_week', etc.)
+            limit: Número máximo de resultados
+            cursor: Cursor devuelto por la página anterior (opcional)
+
+        Returns:
+            Tuple[descripciones por ID de sesión, cursor de la siguiente página
+            o None si no hay más]
+        """
         if not self.db:
             raise RuntimeError("Controller debe usarse como context manager")
 
-        query = (
-            self.db.query(Session)
-            .options(
-                joinedload(Session.coach).joinedload(Coach.user),
-                joinedload(Session.player).joinedload(Player.user),
-            )
-            .order_by(Session.start_time.asc())
-        )
+        query, coach_user, player_user = self._session_rows_query()
 
         # Filtro por coach
         if coach_id:
@@ -795,24 +987,152 @@ class SessionController:
         if date_filter:
             start_date, end_date = self._get_date_range_for_filter(date_filter)
             if start_date and end_date:
+                start_datetime, end_datetime = self._display_range(start_date, end_date)
                 query = query.filter(
-                    # Asegurar timezone-naive para comparaciones con BD
-                    Session.start_time
-                    >= dt.datetime.combine(start_date, dt.time.min).replace(
-                        tzinfo=None
-                    ),
-                    Session.start_time
-                    <= dt.datetime.combine(end_date, dt.time.max).replace(tzinfo=None),
+                    Session.start_time >= start_datetime,
+                    Session.start_time <= end_datetime,
                 )
 
-        sessions = query.all()
-
-        # Aplicar búsqueda por texto si se proporciona
         if search_query and search_query.strip():
-            sessions = self._filter_sessions_by_search(sessions, search_query.strip())
+            query = query.filter(self._search_condition(search_query.strip()))
+
+        now = local_now()
+        segment, cursor_start, cursor_id = "upcoming", None, None
+        if cursor:
+            try:
+                segment, cursor_start, cursor_id = self._decode_search_cursor(cursor)
+            except ValueError:
+                logger.error(f"Invalid session search cursor: {cursor}")
+                return {}, None
+
+        # Próximas: de la más cercana a la más lejana
+        rows = []
+        if segment == "upcoming":
+            upcoming = query.filter(Session.start_time >= now)
+            if cursor_start is not None:
+                upcoming = upcoming.filter(
+                    or_(
+                        Session.start_time > cursor_start,
+                        and_(
+                            Session.start_time == cursor_start,
+                            Session.id > cursor_id,
+                        ),
+                    )
+                )
+            rows = (
+                upcoming.order_by(Session.start_time.asc(), Session.id.asc())
+                .limit(limit + 1)
+                .all()
+            )
 
-        # Crear diccionario con descripciones mejoradas
-        return self._create_session_descriptions(sessions)
+        # Pasadas: solo si las próximas no llenan la página
+        if len(rows) <= limit:
+            past = query.filter(Session.start_time < now)
+            if segment == "past":
+                past = past.filter(
+                    or_(
+                        Session.start_time < cursor_start,
+                        and_(
+                            Session.start_time == cursor_start,
+                            Session.id < cursor_id,
+                        ),
+                    )
+                )
+            rows += (
+                past.order_by(Session.start_time.desc(), Session.id.desc())
+                .limit(limit + 1 - len(rows))
+                .all()
+            )
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            last_segment = "upcoming" if last.start_time >= now else "past"
+            next_cursor = f"{last_segment}|{last.start_time.isoformat()}|{last.id}"
+
+        today = dt.date.today()
+        descriptions = {
+            row.id: self._session_description(row, today, now) for row in rows
+        }
+        return descriptions, next_cursor
+
+    @staticmethod
+    def _decode_search_cursor(cursor: str) -> tuple[str, dt.datetime, int]:
+        """
+        Cursor 'tramo|start_time|id' → (tramo, start_time, id).
+
+        Raises:
+            ValueError: si el cursor no es válido
+        """
+        segment, start_time, session_id = cursor.split("|")
+        if segment not in ("upcoming", "past"):
+            raise ValueError(f"Tramo desconocido: {segment}")
+        return segment, dt.datetime.fromisoformat(start_time), int(session_id)
+
+    def _start_date_text(self):
+        """start_time formateado en SQL como 'dd/mm/aaaa'."""
+        if self.db.get_bind().dialect.name == "postgresql":
+            return func.to_char(Session.start_time, "DD/MM/YYYY")
+        return func.strftime("%d/%m/%Y", Session.start_time)
+
+    def _search_condition(self, search_query: str):
+        """Condición SQL de la búsqueda de texto (nombres, ID o fecha)."""
+        day = self._parse_search_date(search_query)
+        if day is not None:
+            # Fecha completa (dd/mm/aaaa): rango del día sobre ix_sessions_start_time
+            return and_(*self._day_range(day))
+
+        # Escapar comodines de LIKE en el texto del usuario
+        escaped = search_query.replace("\\", "\\\\")
+        escaped = escaped.replace("%", "\\%").replace("_", "\\_")
+        pattern = f"%{escaped}%"
+
+        # Nombres por subconsulta IN sobre users: cada ILIKE usa su índice
+        # trigram en lugar de filtrar sobre los outer joins de la consulta
+        conditions = [
+            Session.coach_id.in_(
+                select(Coach.coach_id)
+                .join(User, Coach.user_id == User.user_id)
+                .where(User.name.ilike(pattern, escape="\\"))
+            ),
+            Session.player_id.in_(
+                select(Player.player_id)
+                .join(User, Player.user_id == User.user_id)
+                .where(User.name.ilike(pattern, escape="\\"))
+            ),
+            Session.coach_name_snapshot.ilike(pattern, escape="\\"),
+            Session.player_name_snapshot.ilike(pattern, escape="\\"),
+        ]
+        if search_query.isdigit():
+            conditions.append(cast(Session.id, String).like(f"%{search_query}%"))
+        if DATE_FRAGMENT_PATTERN.match(search_query):
+            conditions.append(self._start_date_text().like(f"%{search_query}%"))
+
+        # Palabras clave temporales ('hoy', 'tomorrow'...) por prefijo
+        search_lower = search_query.lower()
+        today = dt.date.today()
+        for keyword, offset in SEARCH_DAY_KEYWORDS.items():
+            if keyword.startswith(search_lower):
+                day = today + dt.timedelta(days=offset)
+                conditions.append(and_(*self._day_range(day)))
+
+        return or_(*conditions)
+
+    @staticmethod
+    def _parse_search_date(search_query: str) -> Optional[dt.date]:
+        """Fecha 'dd/mm/aaaa' completa (con ceros) de la búsqueda, o None."""
+        if len(search_query) != 10:
+            return None
+        try:
+            return dt.datetime.strptime(search_query, "%d/%m/%Y").date()
+        except ValueError:
+            return None
+
+    def _day_range(self, day: dt.date) -> tuple:
+        """Condiciones start_time dentro de un día."""
+        start_datetime, end_datetime = self._display_range(day, day)
+        return Session.start_time >= start_datetime, Session.start_time <= end_datetime
 
     def _get_date_range_for_filter(
         self, date_filter: str
@@ -858,103 +1178,38 @@ class SessionController:
         else:
             return None, None
 
-    def _filter_sessions_by_search(
-        self, sessions: List[Session], search_query: str
-    ) -> List[Session]:
-        """Filtra sesiones por consulta de búsqueda."""
-        search_lower = search_query.lower()
-        filtered_sessions = []
-
-        for session in sessions:
-            # Buscar en nombres de coach y player (manejar snapshots)
-            if session.coach:
-                coach_name = session.coach.user.name.lower()
-            else:
-                # Usar snapshot si coach fue eliminado
-                coach_name = (session.coach_name_snapshot or "").lower()
-
-            if session.player:
-                player_name = session.player.user.name.lower()
-            else:
-                # Usar snapshot si player fue eliminado
-                player_name = (session.player_name_snapshot or "").lower()
-
-            # Buscar en ID de sesión
-            session_id_str = str(session.id)
-
-            # Buscar en fecha formateada
-            date_str = session.start_time.strftime("%d/%m/%Y").lower()
-            date_str_alt = session.start_time.strftime("%d/%m").lower()
-
-            # Buscar palabras clave temporales
-            session_date = session.start_time.date()
-            today = dt.date.today()
-            temporal_keywords = []
-
-            if session_date == today:
-                temporal_keywords.extend(["today", "hoy"])
-            elif session_date == today + dt.timedelta(days=1):
-                temporal_keywords.extend(["tomorrow", "mañana"])
-            elif session_date == today - dt.timedelta(days=1):
-                temporal_keywords.extend(["yesterday", "ayer"])
-
-            # Verificar si la búsqueda coincide con algún campo
-            if (
-                search_lower in coach_name
-                or search_lower in player_name
-                or search_lower in session_id_str
-                or search_lower in date_str
-                or search_lower in date_str_alt
-                or any(
-                    keyword.startswith(search_lower) for keyword in temporal_keywords
-                )
-            ):
-                filtered_sessions.append(session)
-
-        return filtered_sessions
-
-    def _create_session_descriptions(self, sessions: List[Session]) -> Dict[int, str]:
-        """Crea descripciones mejoradas para las sesiones."""
-        today = dt.date.today()
-        tomorrow = today + dt.timedelta(days=1)
-        yesterday = today - dt.timedelta(days=1)
-
-        descriptions = {}
-        for s in sessions:
-            session_date = s.start_time.date()
-
-            # Prefijo temporal con emoji
-            if session_date == yesterday:
-                prefix = "🔘 Yesterday – "
-            elif session_date == today:
-                prefix = "🟢 Today – "
-            elif session_date == tomorrow:
-                prefix = "🟡 Tomorrow – "
-            elif session_date < today:
-                prefix = "🔘 Past – "
-            elif session_date <= today + dt.timedelta(days=7):
-                prefix = "📅 This week – "
-            else:
-                prefix = "📆 "
-
-            # Obtener nombres (manejar snapshots)
-            if s.coach_id and s.coach:
-                coach_name = s.coach.user.name
-            else:
-                coach_name = s.coach_name_snapshot or "Coach deleted"
-
-            if s.player_id and s.player:
-                player_name = s.player.user.name
-            else:
-                player_name = s.player_name_snapshot or "Player deleted"
+    def _session_description(self, row, today: dt.date, now: dt.datetime) -> str:
+        """Descripción de una sesión para los selectores de edición."""
+        session_date = row.start_time.date()
+
+        # Prefijo temporal con emoji
+        if session_date == today - dt.timedelta(days=1):
+            prefix = "🔘 Yesterday – "
+        elif session_date == today:
+            prefix = "🟢 Today – "
+        elif session_date == today + dt.timedelta(days=1):
+            prefix = "🟡 Tomorrow – "
+        elif session_date < today:
+            prefix = "🔘 Past – "
+        elif session_date <= today + dt.timedelta(days=7):
+            prefix = "📅 This week – "
+        else:
+            prefix = "📆 "
 
-            # Descripción completa
-            descriptions[s.id] = (
-                f"{prefix}{coach_name} with {player_name} "
-                f"({s.start_time:%d/%m %H:%M}) [{s.status.value}]"
-            )
+        # Obtener nombres (manejar snapshots)
+        coach_name = self._participant_name(
+            row.coach_id, row.coach_name, row.coach_name_snapshot, "Coach"
+        )
+        player_name = self._participant_name(
+            row.player_id, row.player_name, row.player_name_snapshot, "Player"
+        )
+        status = derive_status(row.status, row.end_time, now)
 
-        return descriptions
+        # Descripción completa
+        return (
+            f"{prefix}{coach_name} with {player_name} "
+            f"({row.start_time:%d/%m %H:%M}) [{status.value}]"
+        )
 
     def _session_needs_update(self, session: Session) -> bool:
         """Método que faltaba - movido desde calendar_utils."""
@@ -1005,9 +1260,11 @@ def delete_session(session: Session):
 
 
 def update_past_sessions() -> int:
-    """Función de conveniencia para mantener compatibilidad."""
+    """Marca sesiones pasadas como completadas y envía sus colores a Calendar."""
     with SessionController() as controller:
-        return controller.update_past_sessions()
+        count = controller.update_past_sessions()
+    get_calendar_color_queue().flush()
+    return count
 
 
 # Decorador removido para simplificación
@@ -1100,6 +1357,22 @@ def format_sessions_for_table(sessions: List[Session]) -> List[dict]:
         return controller.format_sessions_for_table(sessions)
 
 
+def get_sessions_table_rows(
+    start_date: dt.date,
+    end_date: dt.date,
+    coach_id: Optional[int] = None,
+    player_id: Optional[int] = None,
+    status_filter: Optional[List[str]] = None,
+) -> List[dict]:
+    """Función de conveniencia para obtener las filas de la tabla de sesiones."""
+    with SessionController() as controller:
+        return list(
+            controller.iter_sessions_table_rows(
+                start_date, end_date, coach_id, player_id, status_filter
+            )
+        )
+
+
 def get_available_coaches() -> List[tuple]:
     """Función de conveniencia para obtener coaches."""
     with SessionController() as controller:
@@ -1122,6 +1395,20 @@ def get_sessions_for_editing(
         return controller.get_sessions_for_editing(coach_id, date_filter, search_query)
 
 
+def search_sessions(
+    search_query: Optional[str] = None,
+    coach_id: Optional[int] = None,
+    date_filter: Optional[str] = None,
+    limit: int = SEARCH_PAGE_SIZE,
+    cursor: Optional[str] = None,
+) -> tuple[Dict[int, str], Optional[str]]:
+    """Función de conveniencia para la búsqueda paginada de sesiones."""
+    with SessionController() as controller:
+        return controller.search_sessions(
+            search_query, coach_id, date_filter, limit, cursor
+        )
+
+
 def get_coach_by_user_id(user_id: int):
     """Obtiene un coach por su user_id."""
     from controllers.db import get_db_session
@@ -0,0 +1,117 @@
+# controllers/session_rollover.py
+"""
+Job de background que marca como completadas las sesiones ya terminadas.
+
+Sustituye a la llamada síncrona a update_past_sessions que se hacía al pintar
+calendario y tablas: cada SESSION_ROLLOVER_INTERVAL segundos se ejecuta un
+único UPDATE y los colores de Calendar se envían en batch. Mientras tanto las
+vistas ya muestran esas sesiones como completadas con el estado derivado.
+La primera ejecución recupera de la BD los colores que quedaron sin enviar.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .calendar_batch import CalendarColorQueue, get_calendar_color_queue
+from .session_controller import SessionController
+
+logger = logging.getLogger(__name__)
+
+# Segundos entre ejecuciones del job
+SESSION_ROLLOVER_INTERVAL = int(os.getenv("SESSION_ROLLOVER_INTERVAL", "300"))
+
+
+class SessionRolloverJob:
+    """Hilo daemon que ejecuta update_past_sessions periódicamente."""
+
+    def __init__(
+        self,
+        interval_seconds: int = SESSION_ROLLOVER_INTERVAL,
+        color_queue: Optional[CalendarColorQueue] = None,
+    ):
+        self.interval_seconds = interval_seconds
+        if color_queue is None:
+            color_queue = get_calendar_color_queue()
+        self.color_queue = color_queue
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._restored = False
+        self._stats = {"runs": 0, "updated": 0, "colors_sent": 0, "last_run": None}
+
+    def run_once(self) -> int:
+        """
+        Marca las sesiones terminadas y envía los colores pendientes.
+
+        Returns:
+            Número de sesiones actualizadas
+        """
+        try:
+            with SessionController() as controller:
+                if not self._restored:
+                    controller.enqueue_pending_colors(self.color_queue)
+                    self._restored = True
+                updated = controller.update_past_sessions(self.color_queue)
+            colors_sent = self.color_queue.flush()
+        except Exception as e:
+            logger.error(f"❌ Error en rollover de sesiones: {e}")
+            return 0
+
+        with self._lock:
+            self._stats["runs"] += 1
+            self._stats["updated"] += updated
+            self._stats["colors_sent"] += colors_sent
+            self._stats["last_run"] = time.time()
+        return updated
+
+    def start(self):
+        """Arranca el hilo si no está en marcha."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._loop, name="session-rollover", daemon=True
+            )
+            self._thread.start()
+        logger.info(f"🕒 Rollover de sesiones activo (cada {self.interval_seconds}s)")
+
+    def stop(self, timeout: Optional[float] = None):
+        """Detiene el hilo tras la ejecución en curso."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores de ejecuciones del job."""
+        with self._lock:
+            return dict(self._stats, running=self.is_running())
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval_seconds)
+
+
+_session_rollover_job: Optional[SessionRolloverJob] = None
+
+
+def get_session_rollover_job() -> SessionRolloverJob:
+    """Obtiene el job de rollover compartido."""
+    global _session_rollover_job
+    if _session_rollover_job is None:
+        _session_rollover_job = SessionRolloverJob()
+    return _session_rollover_job
+
+
+def ensure_session_rollover():
+    """Arranca el job si aún no está en marcha (no bloquea)."""
+    job = get_session_rollover_job()
+    if not job.is_running():
+        job.start()
@@ -0,0 +1,220 @@
+# controllers/session_stats.py
+"""
+Contadores de sesiones por jugador o coach con consultas agrupadas.
+
+Para una lista de ids se obtienen completadas/programadas/canceladas con un
+solo GROUP BY y la próxima sesión programada con una consulta de ventana, de
+modo que listas de jugadores y dashboards usan un número fijo de consultas.
+Los estados se cuentan ya derivados: una sesión programada que terminó cuenta
+como completada aunque el rollover aún no la haya actualizado.
+Los resultados se cachean unos segundos y el cache se vacía al escribir una
+sesión desde el ORM y otra vez al confirmar la transacción, para descartar lo
+que otros lectores cachearon entre el flush y el commit.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import case, event, func, select
+from sqlalchemy.orm import Session as SQLSession
+from sqlalchemy.orm import object_session
+
+from controllers.db import get_db_session
+from models import Session, SessionStatus
+from models.session_model import local_now
+
+logger = logging.getLogger(__name__)
+
+# Segundos que se reutilizan los contadores (0 = sin cache)
+SESSION_STATS_TTL = int(os.getenv("SESSION_STATS_TTL", "30"))
+
+ROLE_COLUMNS = {"player": Session.player_id, "coach": Session.coach_id}
+
+# Marca en Session.info de las transacciones con sesiones escritas sin confirmar
+PENDING_WRITES_KEY = "session_stats_pending"
+
+
+def _empty_stats() -> Dict[str, Any]:
+    return {
+        "completed": 0,
+        "scheduled": 0,
+        "canceled": 0,
+        "next_session_id": None,
+        "next_session_start": None,
+    }
+
+
+class SessionStatsService:
+    """
+    Contadores de sesiones agrupados por player_id o coach_id.
+
+    - 1 consulta GROUP BY con los tres estados (derivados) para todos los ids
+    - 1 consulta con ROW_NUMBER() para la próxima sesión programada de cada id
+    - Cache en memoria por (rol, id) con TTL corto
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], SQLSession]] = None,
+        ttl_seconds: int = SESSION_STATS_TTL,
+    ):
+        self.session_factory = session_factory or get_db_session
+        self.ttl_seconds = ttl_seconds
+        self._cache: Dict[Tuple[str, int], Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "queries": 0}
+        # Cambia en cada invalidación: descarta resultados leídos antes de ella
+        self._generation = 0
+
+    def get_player_stats(
+        self, player_ids: Iterable[int], db: Optional[SQLSession] = None
+    ) -> Dict[int, Dict[str, Any]]:
+        """Contadores y próxima sesión de cada jugador."""
+        return self._get_stats("player", player_ids, db)
+
+    def get_coach_stats(
+        self, coach_ids: Iterable[int], db: Optional[SQLSession] = None
+    ) -> Dict[int, Dict[str, Any]]:
+        """Contadores y próxima sesión de cada coach."""
+        return self._get_stats("coach", coach_ids, db)
+
+    def _get_stats(
+        self, role: str, ids: Iterable[int], db: Optional[SQLSession]
+    ) -> Dict[int, Dict[str, Any]]:
+        ids = list(dict.fromkeys(ids))
+        now = time.monotonic()
+        result: Dict[int, Dict[str, Any]] = {}
+        with self._lock:
+            for row_id in ids:
+                cached = self._cache.get((role, row_id))
+                if cached and now - cached[0] < self.ttl_seconds:
+                    result[row_id] = dict(cached[1])
+            self._stats["hits"] += len(result)
+            self._stats["misses"] += len(ids) - len(result)
+            generation = self._generation
+
+        missing = [row_id for row_id in ids if row_id not in result]
+        if not missing:
+            return result
+
+        if db is not None:
+            fetched = self._query_stats(db, role, missing)
+        else:
+            with self.session_factory() as own_db:
+                fetched = self._query_stats(own_db, role, missing)
+
+        with self._lock:
+            if generation == self._generation:
+                for row_id, stats in fetched.items():
+                    self._cache[(role, row_id)] = (now, stats)
+        result.update({row_id: dict(stats) for row_id, stats in fetched.items()})
+        return result
+
+    def _query_stats(
+        self, db: SQLSession, role: str, ids: list
+    ) -> Dict[int, Dict[str, Any]]:
+        id_column = ROLE_COLUMNS[role]
+        stats = {row_id: _empty_stats() for row_id in ids}
+        now = local_now()
+        status_expr = Session.effective_status_expr(now)
+
+        counts = db.execute(
+            select(
+                id_column,
+                *[
+                    func.sum(case((status_expr == status, 1), else_=0))
+                    for status in (
+                        SessionStatus.COMPLETED,
+                        SessionStatus.SCHEDULED,
+                        SessionStatus.CANCELED,
+                    )
+                ],
+            )
+            .where(id_column.in_(ids))
+            .group_by(id_column)
+        )
+        for row_id, completed, scheduled, canceled in counts:
+            stats[row_id].update(
+                completed=int(completed or 0),
+                scheduled=int(scheduled or 0),
+                canceled=int(canceled or 0),
+            )
+
+        ranked = (
+            select(
+                id_column.label("owner_id"),
+                Session.id,
+                Session.start_time,
+                func.row_number()
+                .over(partition_by=id_column, order_by=Session.start_time)
+                .label("position"),
+            )
+            .where(
+                id_column.in_(ids),
+                Session.status == SessionStatus.SCHEDULED,
+                Session.start_time > now,
+            )
+            .subquery()
+        )
+        next_sessions = db.execute(
+            select(ranked.c.owner_id, ranked.c.id, ranked.c.start_time).where(
+                ranked.c.position == 1
+            )
+        )
+        for row_id, session_id, start_time in next_sessions:
+            stats[row_id].update(
+                next_session_id=session_id, next_session_start=start_time
+            )
+
+        with self._lock:
+            self._stats["queries"] += 2
+        return stats
+
+    def invalidate(self):
+        """Vacía el cache (tras crear, editar o borrar sesiones)."""
+        with self._lock:
+            self._cache.clear()
+            self._generation += 1
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Contadores de uso del cache."""
+        with self._lock:
+            return dict(self._stats, cached_entries=len(self._cache))
+
+
+_session_stats_service: Optional[SessionStatsService] = None
+
+
+def get_session_stats_service() -> SessionStatsService:
+    """Obtiene el servicio de contadores compartido."""
+    global _session_stats_service
+    if _session_stats_service is None:
+        _session_stats_service = SessionStatsService()
+    return _session_stats_service
+
+
+def invalidate_session_stats():
+    """Invalida los contadores tras crear, editar o borrar sesiones."""
+    if _session_stats_service is not None:
+        _session_stats_service.invalidate()
+
+
+@event.listens_for(Session, "after_insert")
+@event.listens_for(Session, "after_update")
+@event.listens_for(Session, "after_delete")
+def _on_session_write(mapper, connection, target):
+    invalidate_session_stats()
+    db = object_session(target)
+    if db is not None:
+        db.info[PENDING_WRITES_KEY] = True
+
+
+@event.listens_for(SQLSession, "after_commit")
+@event.listens_for(SQLSession, "after_rollback")
+def _on_transaction_end(db):
+    # Entre flush y commit otros lectores aún ven (y cachean) el estado anterior
+    if db.info.pop(PENDING_WRITES_KEY, False):
+        invalidate_session_stats()
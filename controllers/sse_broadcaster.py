@@ -0,0 +1,246 @@
+# controllers/sse_broadcaster.py
+"""
+Difusión Server-Sent Events a múltiples clientes.
+Cada suscriptor tiene su propio buffer acotado; los clientes lentos se
+desconectan en lugar de bloquear al productor, y al reconectar recuperan
+los eventos perdidos mediante la cabecera Last-Event-ID.
+
+Los ids empiezan en time.time_ns() del arranque del proceso: un id anterior
+(de otro proceso), futuro o ya fuera del historial no se puede reproducir y
+el cliente recibe un evento de refresco completo en su lugar.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HISTORY_SIZE = 200  # Eventos recientes disponibles para replay
+CLIENT_BUFFER_SIZE = 50  # Eventos pendientes por cliente antes de desconectarlo
+HEARTBEAT_SECONDS = 30.0
+
+
+def format_sse(data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    """Serializa un evento al formato de texto SSE."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _full_state_event() -> Dict[str, Any]:
+    # calendar_change: el cliente ya refresca la vista completa con este tipo
+    return {
+        "type": "calendar_change",
+        "full_refresh": True,
+        "changes_count": 0,
+        "timestamp": time.time(),
+        "message": "Reconnected: refreshing full state",
+    }
+
+
+def _heartbeat() -> str:
+    # Sin id: no avanza el Last-Event-ID del cliente
+    return format_sse({"type": "heartbeat", "timestamp": time.time()})
+
+
+class Subscriber:
+    """Buffer acotado de un cliente SSE."""
+
+    def __init__(self, buffer_size: int, loop: Optional[asyncio.AbstractEventLoop]):
+        self.buffer: Deque[Tuple[int, Dict[str, Any]]] = deque()
+        self.buffer_size = buffer_size
+        self.dropped = False
+        self._loop = loop
+        # Con gevent (monkey-patch) threading.Event es cooperativo
+        self._ready = threading.Event()
+        self._async_ready = asyncio.Event() if loop else None
+
+    def offer(self, item: Tuple[int, Dict[str, Any]]) -> bool:
+        """Añade un evento; devuelve False si el cliente va demasiado lento."""
+        if len(self.buffer) >= self.buffer_size:
+            self.dropped = True
+            self._wake()
+            return False
+        self.buffer.append(item)
+        self._wake()
+        return True
+
+    def _wake(self):
+        self._ready.set()
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._async_ready.set)
+
+    def drain(self):
+        """Devuelve y vacía los eventos pendientes."""
+        # Limpiar antes de vaciar: un offer concurrente vuelve a activar la señal
+        self._ready.clear()
+        if self._async_ready is not None:
+            self._async_ready.clear()
+        items = []
+        while self.buffer:
+            items.append(self.buffer.popleft())
+        return items
+
+    def wait(self, timeout: float) -> bool:
+        return self._ready.wait(timeout)
+
+    async def await_ready(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._async_ready.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class SSEBroadcaster:
+    """
+    Fan-out de eventos a todos los suscriptores conectados.
+
+    Uso:
+        broadcaster.publish({"type": "calendar_change", ...})
+        return Response(broadcaster.stream(last_event_id), mimetype="text/event-stream")
+    """
+
+    def __init__(
+        self,
+        history_size: int = HISTORY_SIZE,
+        client_buffer_size: int = CLIENT_BUFFER_SIZE,
+        heartbeat_seconds: float = HEARTBEAT_SECONDS,
+    ):
+        self.client_buffer_size = client_buffer_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self._lock = threading.Lock()
+        # Época por proceso: los ids de un proceso anterior quedan por debajo
+        self._first_id = time.time_ns()
+        self._last_id = self._first_id - 1
+        self._ids = itertools.count(self._first_id)
+        self._history: Deque[Tuple[int, Dict[str, Any]]] = deque(maxlen=history_size)
+        self._subscribers: set = set()
+        self.stats = {
+            "published": 0,
+            "connected_total": 0,
+            "dropped_clients": 0,
+            "full_resyncs": 0,
+        }
+
+    # Productor
+
+    def publish(self, data: Dict[str, Any]) -> int:
+        """Publica un evento a todos los suscriptores sin bloquear."""
+        with self._lock:
+            event_id = next(self._ids)
+            self._last_id = event_id
+            item = (event_id, data)
+            self._history.append(item)
+            self.stats["published"] += 1
+            for sub in list(self._subscribers):
+                if not sub.offer(item):
+                    self._subscribers.discard(sub)
+                    self.stats["dropped_clients"] += 1
+                    logger.warning("⚠️ Cliente SSE lento desconectado")
+        return event_id
+
+    # Suscripción
+
+    def subscribe(
+        self,
+        last_event_id: Optional[str] = None,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> Subscriber:
+        """Registra un cliente y precarga los eventos posteriores a last_event_id."""
+        sub = Subscriber(self.client_buffer_size, loop)
+        with self._lock:
+            last_id = _parse_event_id(last_event_id)
+            if last_id is not None:
+                if self._can_replay(last_id):
+                    # El replay no cuenta contra el límite: lo acota el historial
+                    sub.buffer.extend(
+                        item for item in self._history if item[0] > last_id
+                    )
+                else:
+                    sub.buffer.append((self._last_id, _full_state_event()))
+                    self.stats["full_resyncs"] += 1
+                if sub.buffer:
+                    sub._wake()
+            self._subscribers.add(sub)
+            self.stats["connected_total"] += 1
+        return sub
+
+    def _can_replay(self, last_id: int) -> bool:
+        """Indica si el historial contiene todo lo posterior a last_id."""
+        if last_id < self._first_id - 1 or last_id > self._last_id:
+            # Id de otro proceso o del futuro
+            return False
+        oldest = self._history[0][0] if self._history else self._last_id + 1
+        return last_id >= oldest - 1
+
+    def unsubscribe(self, sub: Subscriber):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    # Consumidores
+
+    def stream(self, last_event_id: Optional[str] = None) -> Iterator[str]:
+        """Generador SSE síncrono (hilos de Werkzeug o greenlets de gevent)."""
+        sub = self.subscribe(last_event_id)
+        try:
+            while True:
+                if not sub.wait(self.heartbeat_seconds):
+                    yield _heartbeat()
+                    continue
+                for event_id, data in sub.drain():
+                    yield format_sse(data, event_id)
+                if sub.dropped:
+                    # El cliente reconecta y recupera lo perdido con Last-Event-ID
+                    return
+        finally:
+            self.unsubscribe(sub)
+
+    async def astream(self, last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+        """Generador SSE asíncrono para servidores asyncio (ASGI)."""
+        sub = self.subscribe(last_event_id, loop=asyncio.get_running_loop())
+        try:
+            while True:
+                if not sub.buffer and not sub.dropped:
+                    if not await sub.await_ready(self.heartbeat_seconds):
+                        yield _heartbeat()
+                        continue
+                for event_id, data in sub.drain():
+                    yield format_sse(data, event_id)
+                if sub.dropped:
+                    return
+        finally:
+            self.unsubscribe(sub)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(
+                self.stats,
+                subscribers=len(self._subscribers),
+                history=len(self._history),
+            )
+
+
+def _parse_event_id(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+_sse_broadcaster = None
+
+
+def get_sse_broadcaster() -> SSEBroadcaster:
+    """Obtiene la instancia compartida del broadcaster."""
+    global _sse_broadcaster
+    if _sse_broadcaster is None:
+        _sse_broadcaster = SSEBroadcaster()
+    return _sse_broadcaster
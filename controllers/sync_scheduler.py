@@ -0,0 +1,182 @@
+# controllers/sync_scheduler.py
+"""
+Planificador de sincronizaciones disparadas por webhooks.
+Un único worker consume una cola acotada de notificaciones, agrupa las que
+llegan dentro de la ventana de debounce y ejecuta una sola sync por grupo.
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Límites superiores (segundos) de los buckets del histograma de duración
+DURATION_BUCKETS = (1, 2, 5, 10, 30, 60, 120)
+
+# Cada cuánto se revisa el reloj mientras se espera dentro de la ventana
+DEBOUNCE_POLL_SECONDS = 0.05
+
+
+class SyncScheduler:
+    """
+    Worker único con debounce y coalescencia.
+
+    - Nunca ejecuta dos syncs a la vez (un solo thread consumidor).
+    - Las notificaciones que llegan durante la ventana de debounce se agrupan.
+    - Las que llegan durante una sync quedan en cola y provocan una sync más.
+    """
+
+    def __init__(
+        self,
+        run_sync: Callable[[], Any],
+        debounce_seconds: float = 3.0,
+        max_queue: int = 100,
+        name: str = "webhook-sync",
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.run_sync = run_sync
+        self.debounce_seconds = debounce_seconds
+        self.name = name
+        self._clock = clock
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._running = False
+
+        self.stats = {
+            "notifications": 0,
+            "runs": 0,
+            "coalesced": 0,
+            "dropped": 0,
+            "errors": 0,
+            "last_run_at": None,
+            "last_run_duration": None,
+            "duration_histogram": self._empty_histogram(),
+        }
+
+    @staticmethod
+    def _empty_histogram() -> Dict[str, int]:
+        buckets = {f"le_{limit}s": 0 for limit in DURATION_BUCKETS}
+        buckets["gt_{}s".format(DURATION_BUCKETS[-1])] = 0
+        return buckets
+
+    def _record_duration(self, duration: float):
+        histogram = self.stats["duration_histogram"]
+        for limit in DURATION_BUCKETS:
+            if duration <= limit:
+                histogram[f"le_{limit}s"] += 1
+                return
+        histogram["gt_{}s".format(DURATION_BUCKETS[-1])] += 1
+
+    # Ciclo de vida
+
+    def start(self):
+        """Arranca el worker si no está ya en marcha."""
+        with self._lock:
+            if self._worker and self._worker.is_alive():
+                return
+            self._stop.clear()
+            self._worker = threading.Thread(
+                target=self._run_loop, name=self.name, daemon=True
+            )
+            self._worker.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Detiene el worker tras la sync en curso (si la hay)."""
+        self._stop.set()
+        if self._worker:
+            self._worker.join(timeout)
+
+    # Productor
+
+    def submit(self, notification: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Encola una notificación. Si la cola está llena, la notificación se
+        descarta: las ya encoladas garantizan una sync posterior.
+
+        Returns:
+            True si se encoló, False si se descartó
+        """
+        self.start()
+        with self._lock:
+            self.stats["notifications"] += 1
+        try:
+            self._queue.put_nowait(dict(notification or {}, received_at=time.time()))
+            return True
+        except queue.Full:
+            with self._lock:
+                self.stats["dropped"] += 1
+            logger.warning(
+                "⚠️ Cola de sync llena, notificación agrupada con la pendiente"
+            )
+            return False
+
+    # Consumidor
+
+    def _collect_batch(self) -> int:
+        """Agrupa las notificaciones que llegan dentro de la ventana de debounce."""
+        collected = 1
+        deadline = self._clock() + self.debounce_seconds
+        while not self._stop.is_set():
+            remaining = deadline - self._clock()
+            if remaining <= 0:
+                break
+            try:
+                self._queue.get(timeout=min(remaining, DEBOUNCE_POLL_SECONDS))
+                collected += 1
+            except queue.Empty:
+                continue
+
+        # Lo que ya esté en cola también queda cubierto por esta sync
+        while True:
+            try:
+                self._queue.get_nowait()
+                collected += 1
+            except queue.Empty:
+                break
+        return collected
+
+    def _run_loop(self):
+        while not self._stop.is_set():
+            try:
+                self._queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+
+            collected = self._collect_batch()
+            with self._lock:
+                self.stats["coalesced"] += collected - 1
+                self._running = True
+
+            logger.info(f"🔄 Sync programada: {collected} notificaciones agrupadas")
+            start = time.time()
+            try:
+                self.run_sync()
+            except Exception as e:
+                with self._lock:
+                    self.stats["errors"] += 1
+                logger.error(f"❌ Error en sync programada: {e}")
+            finally:
+                duration = time.time() - start
+                with self._lock:
+                    self._running = False
+                    self.stats["runs"] += 1
+                    self.stats["last_run_at"] = start
+                    self.stats["last_run_duration"] = round(duration, 3)
+                    self._record_duration(duration)
+
+    # Observabilidad
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas para /webhook/status."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["duration_histogram"] = dict(self.stats["duration_histogram"])
+            stats["running"] = self._running
+        stats["queue_depth"] = self._queue.qsize()
+        stats["queue_capacity"] = self._queue.maxsize
+        stats["debounce_seconds"] = self.debounce_seconds
+        return stats
@@ -10,6 +10,7 @@ from typing import Any, Dict, List, Optional, Tuple
 from sqlalchemy.orm import joinedload
 
 from common.utils import hash_password
+from controllers.calendar_utils import invalidate_user_name_index
 from controllers.db import get_db_session
 from models import Admin, Coach, Player, ProfessionalStats, User, UserType
 
@@ -298,6 +299,7 @@ class UserController:
                 return False, f"Error creating {user_type} profile", None
 
             self.db.commit()
+            invalidate_user_name_index()
             return True, f"User {name} created successfully.", new_user
 
         except Exception as e:
@@ -411,6 +413,7 @@ class UserController:
                 self._update_user_profile(user, profile_data)
 
             self.db.commit()
+            invalidate_user_name_index()
             return True, f"User {user.name} updated successfully."
 
         except Exception as e:
@@ -491,6 +494,7 @@ class UserController:
             user_name = user.name
             self.db.delete(user)
             self.db.commit()
+            invalidate_user_name_index()
 
             # PASO 5: Crear mensaje informativo
             message_parts = [f"User {user_name} successfully deleted"]
@@ -534,6 +538,7 @@ class UserController:
             user.is_active = not user.is_active
             status = "activated" if user.is_active else "deactivated"
             self.db.commit()
+            invalidate_user_name_index()
 
             return True, f"User {user.name} {status} successfully"
 
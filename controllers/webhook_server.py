@@ -4,10 +4,8 @@ Webhook server for Google Calendar push notifications.
 Runs as separate Flask server to receive real-time calendar events.
 """
 import datetime as dt
-import json
 import logging
 import os
-import queue
 import threading
 import time
 from typing import Any, Dict
@@ -19,17 +17,37 @@ from werkzeug.serving import make_server
 # Cargar variables de entorno al inicio del webhook server
 load_dotenv()
 
-from config import WEBHOOK_PORT, WEBHOOK_SECRET_TOKEN
+from config import (
+    WEBHOOK_PORT,
+    WEBHOOK_SECRET_TOKEN,
+    WEBHOOK_SYNC_DEBOUNCE_SECONDS,
+    WEBHOOK_SYNC_QUEUE_SIZE,
+)
 from controllers.calendar_sync_core import (
     sync_calendar_to_db_with_feedback,
     sync_db_to_calendar,
 )
 from controllers.notification_controller import save_sync_problems
 from controllers.session_controller import update_past_sessions
+from controllers.sse_broadcaster import get_sse_broadcaster
+from controllers.sync_scheduler import SyncScheduler
 
 logger = logging.getLogger(__name__)
 
 
+class _GeventServer:
+    """Adapta gevent.pywsgi.WSGIServer a la interfaz de werkzeug (serve_forever/shutdown)."""
+
+    def __init__(self, server):
+        self._server = server
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def shutdown(self):
+        self._server.stop()
+
+
 class WebhookServer:
     """
     Flask server para recibir webhooks de Google Calendar.
@@ -54,13 +72,16 @@ class WebhookServer:
             "server_started_at": None,
             "sync_errors": 0,
         }
-        
-        # Simple duplicate detection (última ventana de 2 segundos)
-        self.last_webhook_timestamp = 0
 
-        # SSE Event queue for real-time updates (SOLUCIÓN: Zero-polling)
-        self.sse_event_queue = queue.Queue(maxsize=100)
-        self.sse_clients = set()  # Track connected SSE clients
+        # Worker único: agrupa ráfagas de notificaciones en una sola sync
+        self.sync_scheduler = SyncScheduler(
+            self._run_webhook_sync,
+            debounce_seconds=WEBHOOK_SYNC_DEBOUNCE_SECONDS,
+            max_queue=WEBHOOK_SYNC_QUEUE_SIZE,
+        )
+
+        # SSE fan-out: cada cliente recibe todos los eventos (buffer propio)
+        self.sse_broadcaster = get_sse_broadcaster()
 
     def _setup_routes(self):
         """Configura las rutas del servidor Flask"""
@@ -86,20 +107,8 @@ class WebhookServer:
                 logger.info(
                     f"📡 Webhook received: channel={channel_id}, state={resource_state}"
                 )
-                
-                # Actualizar estadísticas
-                self.stats["webhooks_received"] += 1
-                self.stats["last_webhook_time"] = dt.datetime.now().isoformat()
-                
-                # Simple detección de duplicados (ventana de 2 segundos)
-                current_time = time.time()
-                if current_time - self.last_webhook_timestamp < 2.0:
-                    logger.info("🔄 Webhook duplicado detectado, ignorando")
-                    return jsonify({"status": "duplicate_ignored"}), 200
-                
-                self.last_webhook_timestamp = current_time
-
-                # Procesar webhook directamente
+
+                # Encolar sync (los duplicados se agrupan en el scheduler)
                 if resource_state in ["exists", "updated"]:
                     self._process_webhook_async(channel_id, resource_id, resource_state)
                     self.stats["webhooks_processed"] += 1
@@ -124,6 +133,8 @@ class WebhookServer:
                     {
                         "status": "active",
                         "stats": self.stats,
+                        "sync_scheduler": self.sync_scheduler.get_stats(),
+                        "sse": self.sse_broadcaster.get_stats(),
                         "uptime_seconds": (
                             (
                                 time.time()
@@ -149,40 +160,21 @@ class WebhookServer:
             SOLUCIÓN: Zero-polling, updates instantáneos a la UI.
             """
 
-            def generate_sse_events():
-                """Generador de eventos SSE para el cliente"""
-                try:
-                    logger.info("🌐 New SSE client connected")
-
-                    while True:
-                        try:
-                            # Esperar evento de webhook (con timeout para heartbeat)
-                            event_data = self.sse_event_queue.get(timeout=30)
-
-                            # Enviar evento al cliente
-                            sse_message = f"data: {json.dumps(event_data)}\n\n"
-                            logger.debug(f"📤 Sending SSE event: {event_data}")
-                            yield sse_message
-
-                        except queue.Empty:
-                            # Heartbeat para mantener conexión viva
-                            heartbeat = f"data: {json.dumps({'type': 'heartbeat', 'timestamp': time.time()})}\n\n"
-                            yield heartbeat
-
-                except GeneratorExit:
-                    logger.info("🔌 SSE client disconnected")
-                except Exception as e:
-                    logger.error(f"❌ SSE stream error: {e}")
+            # Last-Event-ID: el navegador lo envía al reconectar
+            last_event_id = request.headers.get("Last-Event-ID") or request.args.get(
+                "lastEventId"
+            )
+            logger.info("🌐 New SSE client connected")
 
             # Retornar stream SSE con headers correctos
             return Response(
-                generate_sse_events(),
+                self.sse_broadcaster.stream(last_event_id),
                 mimetype="text/event-stream",
                 headers={
                     "Cache-Control": "no-cache",
                     "Connection": "keep-alive",
                     "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Headers": "Content-Type",
+                    "Access-Control-Allow-Headers": "Content-Type, Last-Event-ID",
                 },
             )
 
@@ -219,91 +211,114 @@ class WebhookServer:
             logger.error(f"Webhook validation error: {e}")
             return False
 
-
     def _process_webhook_async(
         self, channel_id: str, resource_id: str, resource_state: str
     ):
         """
-        Procesa el webhook de forma asíncrona para no bloquear la respuesta HTTP.
-        Ejecuta sincronización targeted usando el core sync existente.
+        Encola el webhook en el scheduler para no bloquear la respuesta HTTP.
+        Las notificaciones de una misma ráfaga se agrupan en una sola sync.
         """
+        self.sync_scheduler.submit(
+            {
+                "channel_id": channel_id,
+                "resource_id": resource_id,
+                "resource_state": resource_state,
+            }
+        )
+
+    def _run_webhook_sync(self):
+        """
+        Ejecuta una sincronización completa del ciclo webhook usando el core sync.
+        Solo la invoca el worker del scheduler (nunca en paralelo); los errores
+        se re-lanzan tras registrarlos para que el scheduler también los cuente.
+        """
+        try:
+            logger.info("🔄 Processing webhook sync")
+            start_time = time.time()
 
-        def process():
-            try:
-                logger.info(
-                    f"🔄 Processing webhook: {resource_state} for resource {resource_id}"
-                )
-                start_time = time.time()
-
-                # Ejecutar sincronización usando la función existente
-                imported, updated, deleted, rejected_events, warning_events = (
-                    sync_calendar_to_db_with_feedback()
-                )
-
-                # Actualizar sesiones pasadas y garantizar BD→Calendar
-                n_past = update_past_sessions()
-                try:
-                    sync_db_to_calendar()
-                except Exception:
-                    logger.warning(
-                        "⚠️ DB→Calendar push skipped due to error; continuing"
-                    )
+            # Sincronización incremental: solo eventos cambiados desde la última
+            imported, updated, deleted, rejected_events, warning_events = (
+                sync_calendar_to_db_with_feedback(incremental=True)
+            )
 
-                duration = time.time() - start_time
+            # Actualizar sesiones pasadas y garantizar BD→Calendar
+            n_past = update_past_sessions()
+            try:
+                sync_db_to_calendar()
+            except Exception:
+                logger.warning("⚠️ DB→Calendar push skipped due to error; continuing")
 
-                # Guardar problemas y métricas usando NotificationController existente
-                save_sync_problems(rejected_events, warning_events)
-                try:
-                    from controllers.notification_controller import update_sync_stats
+            duration = time.time() - start_time
 
-                    update_sync_stats(
-                        imported=imported,
-                        updated=updated,
-                        deleted=deleted,
-                        duration=duration,
-                    )
-                except Exception as _:
-                    # No bloquear por métricas
-                    pass
+            # Guardar problemas y métricas usando NotificationController existente
+            save_sync_problems(rejected_events, warning_events)
+            try:
+                from controllers.notification_controller import update_sync_stats
 
-                # Calcular totales para logging y notificaciones
-                total_changes = imported + updated + deleted
-                total_problems = len(rejected_events) + len(warning_events)
+                update_sync_stats(
+                    imported=imported,
+                    updated=updated,
+                    deleted=deleted,
+                    duration=duration,
+                )
+            except Exception as _:
+                # No bloquear por métricas
+                pass
+
+            # Calcular totales para logging y notificaciones
+            total_changes = imported + updated + deleted
+            total_problems = len(rejected_events) + len(warning_events)
+
+            # Notificar cambios a la UI para auto-refresh
+            self._notify_ui_changes(
+                total_changes,
+                {
+                    "imported": imported,
+                    "updated": updated,
+                    "deleted": deleted,
+                    "problems": total_problems,
+                },
+            )
 
-                # Notificar cambios a la UI para auto-refresh
-                self._notify_ui_changes(
-                    total_changes,
-                    {
-                        "imported": imported,
-                        "updated": updated,
-                        "deleted": deleted,
-                        "problems": total_problems,
-                    },
+            if total_problems > 0:
+                logger.warning(
+                    f"🔧 Webhook sync completed with issues in {duration:.1f}s: "
+                    f"{imported}+{updated}+{deleted} changes, "
+                    f"{len(rejected_events)} rejected, {len(warning_events)} warnings"
+                )
+            else:
+                logger.info(
+                    f"✅ Webhook sync completed successfully in {duration:.1f}s: "
+                    f"{imported}+{updated}+{deleted} changes"
                 )
 
-                if total_problems > 0:
-                    logger.warning(
-                        f"🔧 Webhook sync completed with issues in {duration:.1f}s: "
-                        f"{imported}+{updated}+{deleted} changes, "
-                        f"{len(rejected_events)} rejected, {len(warning_events)} warnings"
-                    )
-                else:
-                    logger.info(
-                        f"✅ Webhook sync completed successfully in {duration:.1f}s: "
-                        f"{imported}+{updated}+{deleted} changes"
-                    )
+            # Real-time UI updates handled via notification system
 
-                # Real-time UI updates handled via notification system
+        except Exception as e:
+            self.stats["sync_errors"] += 1
+            logger.error(f"❌ Webhook sync processing error: {e}")
+            # Limpiar problemas en caso de error
+            save_sync_problems([], [])
+            raise
 
-            except Exception as e:
-                self.stats["sync_errors"] += 1
-                logger.error(f"❌ Webhook sync processing error: {e}")
-                # Limpiar problemas en caso de error
-                save_sync_problems([], [])
+    def _make_server(self, host: str, port: int):
+        """
+        Crea el servidor WSGI. Si el proceso corre con gevent (monkey-patch),
+        usa su servidor para que cada cliente SSE sea un greenlet y no un hilo.
+        """
+        try:
+            from gevent import monkey
+            from gevent.pywsgi import WSGIServer
+
+            if monkey.is_module_patched("threading"):
+                logger.info(
+                    "🟢 Webhook server usando gevent (SSE sin hilo por cliente)"
+                )
+                return _GeventServer(WSGIServer((host, port), self.app))
+        except ImportError:
+            pass
 
-        # Ejecutar en thread separado
-        thread = threading.Thread(target=process, daemon=True)
-        thread.start()
+        return make_server(host, port, self.app, threaded=True)
 
     def start(self) -> bool:
         """Inicia el servidor webhook en un thread separado"""
@@ -329,7 +344,7 @@ class WebhookServer:
                 logger.info(f"🔧 Configuración desarrollo: {host}:{port}")
 
             # Crear servidor con configuración adaptativa
-            self.server = make_server(host, port, self.app, threaded=True)
+            self.server = self._make_server(host, port)
             self.stats["server_started_at"] = time.time()
 
             # Iniciar en thread separado
@@ -362,6 +377,7 @@ class WebhookServer:
     def stop(self) -> bool:
         """Detiene el servidor webhook"""
         try:
+            self.sync_scheduler.stop()
             if self.server:
                 self.server.shutdown()
                 logger.info("🛑 Webhook server stopped")
@@ -391,6 +407,7 @@ class WebhookServer:
             "webhook_url": webhook_url,
             "environment": ENVIRONMENT,
             "stats": self.stats.copy(),
+            "sync_scheduler": self.sync_scheduler.get_stats(),
         }
 
     def _notify_ui_changes(self, changes_count: int, details: Dict = None):
@@ -432,12 +449,9 @@ class WebhookServer:
                     if parts:
                         sse_event["message"] = f'Calendar sync: {", ".join(parts)}'
 
-                # Push evento a la cola SSE (sin blocking)
-                try:
-                    self.sse_event_queue.put_nowait(sse_event)
-                    logger.info(f"📤 SSE event pushed: {changes_count} changes")
-                except queue.Full:
-                    logger.warning("⚠️ SSE event queue full, skipping event")
+                # Difundir a todos los clientes SSE (sin blocking)
+                event_id = self.sse_broadcaster.publish(sse_event)
+                logger.info(f"📤 SSE event #{event_id} pushed: {changes_count} changes")
 
             except Exception as e:
                 logger.error(f"❌ Failed to push SSE event: {e}")
@@ -1,10 +1,7 @@
 # main_dash.py - Aplicación principal migrada de Streamlit a Dash
 import atexit
-import json
 import logging
 import os
-import queue
-import time
 
 import dash
 import dash_bootstrap_components as dbc
@@ -165,9 +162,9 @@ if ENVIRONMENT == "production":
                         )
                         from controllers.session_controller import update_past_sessions
 
-                        # Ejecutar sincronización
+                        # Ejecutar sincronización incremental
                         imported, updated, deleted, rejected_events, warning_events = (
-                            sync_calendar_to_db_with_feedback()
+                            sync_calendar_to_db_with_feedback(incremental=True)
                         )
 
                         # Actualizar sesiones pasadas si es necesario
@@ -246,49 +243,27 @@ if ENVIRONMENT == "production":
     def sse_event_stream():
         """
         Server-Sent Events endpoint reutilizando webhook_server existente.
-        DELEGACIÓN: Usa la implementación y cola del webhook_server.
+        DELEGACIÓN: Usa el broadcaster SSE compartido del webhook_server.
         """
         from controllers.webhook_server import _webhook_server
 
-        # Reutilizar el generador existente del webhook_server
-        def generate_sse_events():
-            """Generador que delega al webhook_server existente"""
-            try:
-                logging.info(
-                    "🌐 New SSE client connected to integrated endpoint (delegating to webhook_server)"
-                )
-
-                while True:
-                    try:
-                        # Usar la cola SSE del webhook_server existente
-                        event_data = _webhook_server.sse_event_queue.get(timeout=30)
-
-                        # Enviar evento al cliente
-                        sse_message = f"data: {json.dumps(event_data)}\\n\\n"
-                        logging.debug(
-                            f"📤 Sending SSE event via delegation: {event_data}"
-                        )
-                        yield sse_message
-
-                    except queue.Empty:
-                        # Heartbeat para mantener conexión viva
-                        heartbeat = f"data: {json.dumps({'type': 'heartbeat', 'timestamp': time.time()})}\\n\\n"
-                        yield heartbeat
-
-            except GeneratorExit:
-                logging.info("🔌 SSE client disconnected from integrated endpoint")
-            except Exception as e:
-                logging.error(f"❌ SSE stream error: {e}")
+        # Last-Event-ID: el navegador lo envía al reconectar
+        last_event_id = request.headers.get("Last-Event-ID") or request.args.get(
+            "lastEventId"
+        )
+        logging.info(
+            "🌐 New SSE client connected to integrated endpoint (delegating to webhook_server)"
+        )
 
         # Retornar stream SSE con headers correctos
         return Response(
-            generate_sse_events(),
+            _webhook_server.sse_broadcaster.stream(last_event_id),
             mimetype="text/event-stream",
             headers={
                 "Cache-Control": "no-cache",
                 "Connection": "keep-alive",
                 "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Headers": "Content-Type",
+                "Access-Control-Allow-Headers": "Content-Type, Last-Event-ID",
             },
         )
 
@@ -544,9 +519,22 @@ def initialize_dash_app():
     # Inicializar integración completa de webhooks para sync en tiempo real
     _initialize_webhook_integration()
 
+    # Marcar sesiones pasadas como completadas en background
+    _start_session_rollover()
+
     return app
 
 
+def _start_session_rollover():
+    """Arranca el job que marca sesiones pasadas como completadas."""
+    try:
+        from controllers.session_rollover import ensure_session_rollover
+
+        ensure_session_rollover()
+    except Exception as e:
+        print(f"⚠️ Session rollover job not started: {e}")
+
+
 def _initialize_webhook_integration():
     """Inicializa la integración completa de webhooks (servidor + Google Calendar)."""
     # Evitar doble inicialización en modo debug (Flask reloader)
@@ -3,10 +3,13 @@ Loader Module - Carga de datos a la base de datos
 """
 
 import logging
+import time
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Tuple
 
 import pandas as pd
+from sqlalchemy import insert, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import SQLAlchemyError
 
 from controllers.db import get_db_session
@@ -14,6 +17,13 @@ from models import ImportStatus, ProfessionalStats, ThaiLeagueSeason
 
 logger = logging.getLogger(__name__)
 
+# Filas por sentencia en la importación por conjuntos
+BULK_BATCH_SIZE = 1000
+
+# INSERT ... ON CONFLICT por dialecto (clave única player_id + season)
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+UPSERT_KEY = ("player_id", "season")
+
 
 class ThaiLeagueLoader:
     """
@@ -36,6 +46,7 @@ class ThaiLeagueLoader:
         df: pd.DataFrame,
         matching_results: Dict,
         column_mapping: Dict,
+        bulk: bool = True,
     ) -> Tuple[bool, str, Dict]:
         """
         Importa datos de una temporada a la base de datos.
@@ -45,6 +56,7 @@ class ThaiLeagueLoader:
             df: DataFrame con datos limpios
             matching_results: Resultados del matching de jugadores
             column_mapping: Mapping de columnas CSV a BD
+            bulk: Importación por conjuntos (False = ruta registro a registro)
 
         Returns:
             Tuple[success, message, statistics]
@@ -58,6 +70,9 @@ class ThaiLeagueLoader:
             "unmatched_players": 0,
             "errors": 0,
             "error_details": [],
+            "inserted_records": 0,
+            "updated_records": 0,
+            "rows_per_sec": 0.0,
         }
 
         try:
@@ -78,68 +93,23 @@ class ThaiLeagueLoader:
 
                 logger.info(f"🎯 Procesando {len(all_matches)} matches encontrados")
 
-                for i, match in enumerate(all_matches):
-                    try:
-                        # Buscar datos del jugador en el CSV
-                        player_rows = df[df["Full name"] == match["csv_player"]]
-                        if player_rows.empty:
-                            stats["error_details"].append(
-                                f"Jugador no encontrado en CSV: {match['csv_player']}"
-                            )
-                            stats["errors"] += 1
-                            continue
-
-                        player_data = player_rows.iloc[0]
-
-                        # Crear registro de estadísticas usando el mapping
-                        prof_stats = self._create_professional_stats_record(
-                            player_data,
-                            season,
-                            match["matched_player"]["player_id"],
-                            column_mapping,
-                        )
-
-                        # Verificar si ya existe registro para esta temporada
-                        existing = (
-                            session.query(ProfessionalStats)
-                            .filter(
-                                ProfessionalStats.player_id
-                                == match["matched_player"]["player_id"],
-                                ProfessionalStats.season == season,
-                            )
-                            .first()
-                        )
-
-                        if existing:
-                            # Actualizar registro existente
-                            for key, value in prof_stats.items():
-                                if hasattr(existing, key):
-                                    setattr(existing, key, value)
-                            logger.debug(
-                                f"Actualizado registro existente para {match['csv_player']}"
-                            )
-                        else:
-                            # Crear nuevo registro
-                            new_stats = ProfessionalStats(**prof_stats)
-                            session.add(new_stats)
-                            logger.debug(
-                                f"Creado nuevo registro para {match['csv_player']}"
-                            )
-
-                        stats["imported_records"] += 1
-                        stats["matched_players"] += 1
-
-                        # Commit cada 50 registros para evitar transacciones muy grandes
-                        if (i + 1) % 50 == 0:
-                            session.commit()
-                            logger.info(f"💾 Guardados {i + 1} registros...")
-
-                    except Exception as e:
-                        stats["errors"] += 1
-                        error_msg = f"Error procesando {match['csv_player']}: {str(e)}"
-                        stats["error_details"].append(error_msg)
-                        logger.error(error_msg)
-                        # Continuar con el siguiente registro
+                start = time.perf_counter()
+                if bulk:
+                    self._import_matches_bulk(
+                        session, season, df, all_matches, column_mapping, stats
+                    )
+                else:
+                    self._import_matches_rowwise(
+                        session, season, df, all_matches, column_mapping, stats
+                    )
+                elapsed = time.perf_counter() - start
+                stats["rows_per_sec"] = (
+                    round(stats["imported_records"] / elapsed, 1) if elapsed else 0.0
+                )
+                logger.info(
+                    f"⚡ {stats['imported_records']} registros escritos en "
+                    f"{elapsed:.2f}s ({stats['rows_per_sec']} filas/s)"
+                )
 
                 # Procesar jugadores sin match
                 unmatched_count = len(matching_results.get("no_matches", []))
@@ -191,6 +161,246 @@ class ThaiLeagueLoader:
             logger.error(error_msg)
             return False, error_msg, stats
 
+    def _import_matches_bulk(
+        self,
+        session,
+        season: str,
+        df: pd.DataFrame,
+        all_matches: List[Dict],
+        column_mapping: Dict,
+        stats: Dict,
+    ):
+        """
+        Importación por conjuntos: mismo resultado que la ruta registro a registro.
+
+        - Indexa el DataFrame por "Full name" una sola vez (primera fila por nombre)
+        - Escribe con INSERT ... ON CONFLICT (player_id, season) DO UPDATE en lotes
+          grandes, cada uno en su propio savepoint
+        - Si un lote falla se reimporta registro a registro, de modo que solo se
+          pierden (y se reportan en error_details) las filas problemáticas
+        """
+        by_name = df.drop_duplicates("Full name").set_index("Full name", drop=False)
+
+        found = []
+        for match in all_matches:
+            if match["csv_player"] in by_name.index:
+                found.append(match)
+            else:
+                stats["error_details"].append(
+                    f"Jugador no encontrado en CSV: {match['csv_player']}"
+                )
+                stats["errors"] += 1
+        if not found:
+            return
+
+        # Columnas de destino (si dos columnas CSV van al mismo campo, gana la última)
+        valid_fields = set(ProfessionalStats.__table__.columns.keys())
+        field_sources = {}
+        for csv_column, db_field in column_mapping.items():
+            if csv_column in by_name.columns:
+                field_sources[db_field] = csv_column
+        invalid_fields = sorted(set(field_sources) - valid_fields)
+        if invalid_fields:
+            logger.warning(f"⚠️ Campos problemáticos descartados: {invalid_fields}")
+            for db_field in invalid_fields:
+                del field_sources[db_field]
+
+        selected = by_name.loc[[match["csv_player"] for match in found]]
+        columns = {
+            db_field: self._clean_column(selected[csv_column])
+            for db_field, csv_column in field_sources.items()
+        }
+
+        # Un registro por jugador: si se repite, prevalece el último match
+        records, player_matches = {}, {}
+        for i, match in enumerate(found):
+            player_id = match["matched_player"]["player_id"]
+            record = {"player_id": player_id, "season": season}
+            for db_field, values in columns.items():
+                record[db_field] = values[i]
+            records[player_id] = record
+            player_matches.setdefault(player_id, []).append(match)
+
+        # Solo para distinguir insertados de actualizados en las estadísticas
+        existing = {
+            player_id
+            for (player_id,) in session.query(ProfessionalStats.player_id).filter(
+                ProfessionalStats.season == season
+            )
+        }
+
+        upsert = self._upsert_statement(session, list(columns))
+        player_ids = list(records)
+        for start in range(0, len(player_ids), BULK_BATCH_SIZE):
+            batch_ids = player_ids[start : start + BULK_BATCH_SIZE]
+            try:
+                with session.begin_nested():
+                    self._write_batch(
+                        session, upsert, [records[pid] for pid in batch_ids], existing
+                    )
+            except SQLAlchemyError as e:
+                logger.warning(
+                    f"⚠️ Lote de {len(batch_ids)} registros falló en {season} "
+                    f"({e.__class__.__name__}); reintentando registro a registro"
+                )
+                self._import_matches_rowwise(
+                    session,
+                    season,
+                    df,
+                    [m for pid in batch_ids for m in player_matches[pid]],
+                    column_mapping,
+                    stats,
+                )
+                continue
+
+            written = sum(len(player_matches[pid]) for pid in batch_ids)
+            stats["imported_records"] += written
+            stats["matched_players"] += written
+            new_ids = [pid for pid in batch_ids if pid not in existing]
+            stats["inserted_records"] += len(new_ids)
+            stats["updated_records"] += len(batch_ids) - len(new_ids)
+        session.commit()
+
+        logger.info(
+            f"💾 Upsert {season}: {stats['inserted_records']} insertados, "
+            f"{stats['updated_records']} actualizados, {stats['errors']} errores"
+        )
+
+    @staticmethod
+    def _upsert_statement(session, fields: List[str]):
+        """INSERT ... ON CONFLICT (player_id, season) DO UPDATE, o None si el
+        dialecto no lo soporta."""
+        dialect_insert = UPSERT_INSERTS.get(session.get_bind().dialect.name)
+        if dialect_insert is None:
+            return None
+        statement = dialect_insert(ProfessionalStats)
+        update_fields = [f for f in fields if f not in UPSERT_KEY]
+        if not update_fields:
+            return statement.on_conflict_do_nothing(index_elements=list(UPSERT_KEY))
+        return statement.on_conflict_do_update(
+            index_elements=list(UPSERT_KEY),
+            set_={f: statement.excluded[f] for f in update_fields},
+        )
+
+    @staticmethod
+    def _write_batch(session, upsert, batch: List[Dict], existing: set):
+        """Escribe un lote; sin upsert nativo separa UPDATE e INSERT."""
+        if upsert is not None:
+            session.execute(upsert, batch)
+            return
+
+        stat_ids = dict(
+            session.query(ProfessionalStats.player_id, ProfessionalStats.stat_id)
+            .filter(
+                ProfessionalStats.season == batch[0]["season"],
+                ProfessionalStats.player_id.in_([r["player_id"] for r in batch]),
+            )
+            .all()
+        )
+        updates = [
+            dict(r, stat_id=stat_ids[r["player_id"]])
+            for r in batch
+            if r["player_id"] in stat_ids
+        ]
+        inserts = [r for r in batch if r["player_id"] not in stat_ids]
+        if updates:
+            session.execute(update(ProfessionalStats), updates)
+        if inserts:
+            session.execute(insert(ProfessionalStats), inserts)
+
+    @staticmethod
+    def _clean_column(series: pd.Series) -> List:
+        """Valores Python de una columna con NaN y cadenas vacías como None."""
+        values = series.astype(object).where(series.notna(), None).tolist()
+        if series.dtype == object or pd.api.types.is_string_dtype(series):
+            values = [
+                None if isinstance(value, str) and not value.strip() else value
+                for value in values
+            ]
+        return values
+
+    def _import_matches_rowwise(
+        self,
+        session,
+        season: str,
+        df: pd.DataFrame,
+        all_matches: List[Dict],
+        column_mapping: Dict,
+        stats: Dict,
+    ):
+        """
+        Ruta original registro a registro (una consulta y un setattr por jugador).
+
+        Se usa como respaldo cuando falla un lote de la ruta por conjuntos y para
+        depurar registros concretos; cada fila va en su propio savepoint.
+        """
+        for i, match in enumerate(all_matches):
+            try:
+                # Buscar datos del jugador en el CSV
+                player_rows = df[df["Full name"] == match["csv_player"]]
+                if player_rows.empty:
+                    stats["error_details"].append(
+                        f"Jugador no encontrado en CSV: {match['csv_player']}"
+                    )
+                    stats["errors"] += 1
+                    continue
+
+                player_data = player_rows.iloc[0]
+
+                # Crear registro de estadísticas usando el mapping
+                prof_stats = self._create_professional_stats_record(
+                    player_data,
+                    season,
+                    match["matched_player"]["player_id"],
+                    column_mapping,
+                )
+
+                # Savepoint por registro: un fallo solo descarta esta fila
+                with session.begin_nested():
+                    # Verificar si ya existe registro para esta temporada
+                    existing = (
+                        session.query(ProfessionalStats)
+                        .filter(
+                            ProfessionalStats.player_id
+                            == match["matched_player"]["player_id"],
+                            ProfessionalStats.season == season,
+                        )
+                        .first()
+                    )
+
+                    if existing:
+                        # Actualizar registro existente
+                        for key, value in prof_stats.items():
+                            if hasattr(existing, key):
+                                setattr(existing, key, value)
+                    else:
+                        # Crear nuevo registro
+                        session.add(ProfessionalStats(**prof_stats))
+
+                if existing:
+                    stats["updated_records"] += 1
+                    logger.debug(
+                        f"Actualizado registro existente para {match['csv_player']}"
+                    )
+                else:
+                    stats["inserted_records"] += 1
+                    logger.debug(f"Creado nuevo registro para {match['csv_player']}")
+
+                stats["imported_records"] += 1
+                stats["matched_players"] += 1
+
+                # Commit cada 50 registros para evitar transacciones muy grandes
+                if (i + 1) % 50 == 0:
+                    session.commit()
+                    logger.info(f"💾 Guardados {i + 1} registros...")
+
+            except Exception as e:
+                stats["errors"] += 1
+                error_msg = f"Error procesando {match['csv_player']}: {str(e)}"
+                stats["error_details"].append(error_msg)
+                logger.error(error_msg)
+                # Continuar con el siguiente registro
+
     def _create_professional_stats_record(
         self, player_data: pd.Series, season: str, player_id: int, column_mapping: Dict
     ) -> Dict:
@@ -283,7 +493,7 @@ class ThaiLeagueLoader:
         )
 
     def bulk_insert_records(
-        self, records: List[Dict], session, batch_size: int = 100
+        self, records: List[Dict], session, batch_size: int = BULK_BATCH_SIZE
     ) -> Tuple[int, int, List[str]]:
         """
         Inserta múltiples registros en lotes para mejor rendimiento.
@@ -307,14 +517,8 @@ class ThaiLeagueLoader:
             batch = records[i : i + batch_size]
 
             try:
-                # Crear objetos ProfessionalStats
-                stats_objects = []
-                for record in batch:
-                    stats_obj = ProfessionalStats(**record)
-                    stats_objects.append(stats_obj)
-
-                # Insertar lote
-                session.add_all(stats_objects)
+                # Insertar lote en una sola sentencia (sin objetos ORM)
+                session.execute(insert(ProfessionalStats), batch)
                 session.commit()
 
                 inserted_count += len(batch)
@@ -332,8 +536,7 @@ class ThaiLeagueLoader:
                 # Intentar insertar uno por uno para identificar el problemático
                 for j, record in enumerate(batch):
                     try:
-                        stats_obj = ProfessionalStats(**record)
-                        session.add(stats_obj)
+                        session.execute(insert(ProfessionalStats), [record])
                         session.commit()
                         inserted_count += 1
                         error_count -= 1  # Corregir el conteo
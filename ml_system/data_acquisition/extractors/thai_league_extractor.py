@@ -17,6 +17,7 @@ from unidecode import unidecode
 
 from config import DATABASE_PATH
 from controllers.db import get_db_session
+from ml_system.data_processing.storage import read_season_table, write_csv_text
 from models import Player, ProfessionalStats, ThaiLeagueSeason
 
 logger = logging.getLogger(__name__)
@@ -104,8 +105,9 @@ class ThaiLeagueExtractor:
                             logger.info(
                                 f"⚡ Usando cache reciente para temporada {season}"
                             )
-                            csv_content = StringIO(cached_content)
-                            df = pd.read_csv(csv_content)
+                            df = read_season_table(
+                                self.cache_dir / f"thai_league_{season}.csv"
+                            )
                             return True, df, f"Cache cargado: {len(df)} registros"
 
             # Paso 3: Descargar y actualizar cache
@@ -113,14 +115,14 @@ class ThaiLeagueExtractor:
             response = requests.get(url, timeout=30)
             response.raise_for_status()
 
-            # Guardar en cache para próximas consultas
-            file_hash = self.calculate_file_hash(response.text)
-            self._save_to_cache(season, response.text, file_hash)
-
             # Procesar CSV
             csv_content = StringIO(response.text)
             df = pd.read_csv(csv_content)
 
+            # Guardar en cache para próximas consultas
+            file_hash = self.calculate_file_hash(response.text)
+            self._save_to_cache(season, response.text, file_hash, df)
+
             logger.info(
                 f"✅ Descarga exitosa: {len(df)} registros para temporada {season}"
             )
@@ -131,8 +133,7 @@ class ThaiLeagueExtractor:
             cached_content = self._load_from_cache(season)
             if cached_content:
                 logger.warning(f"⚠️ Error de red, usando cache obsoleto para {season}")
-                csv_content = StringIO(cached_content)
-                df = pd.read_csv(csv_content)
+                df = read_season_table(self.cache_dir / f"thai_league_{season}.csv")
                 return True, df, f"Cache obsoleto: {len(df)} registros (sin conexión)"
 
             error_msg = f"Error al descargar datos de {season}: {str(e)}"
@@ -165,18 +166,25 @@ class ThaiLeagueExtractor:
             logger.warning(f"Error leyendo cache para {season}: {e}")
         return None
 
-    def _save_to_cache(self, season: str, content: str, file_hash: str) -> None:
+    def _save_to_cache(
+        self,
+        season: str,
+        content: str,
+        file_hash: str,
+        df: Optional[pd.DataFrame] = None,
+    ) -> None:
         """
-        Guarda datos en cache local.
+        Guarda datos en cache local (CSV original y su copia Parquet).
 
         Args:
             season: Temporada a guardar
             content: Contenido del archivo
             file_hash: Hash del archivo para validación
+            df: Contenido ya parseado, para no volver a leer el CSV
         """
         cache_file = self.cache_dir / f"thai_league_{season}.csv"
         try:
-            cache_file.write_text(content, encoding="utf-8")
+            write_csv_text(content, cache_file, df)
             logger.info(f"💾 Cache actualizado para temporada {season}")
         except Exception as e:
             logger.warning(f"Error guardando cache para {season}: {e}")
@@ -300,9 +308,6 @@ class ThaiLeagueExtractor:
                 logger.warning(f"Archivo procesado no encontrado: {processed_file}")
                 return []
 
-            # Leer datos procesados (ya limpios y normalizados)
-            df = pd.read_csv(processed_file)
-
             # Asegurar que las columnas existen y están limpias
             required_columns = [
                 "Player",
@@ -314,11 +319,12 @@ class ThaiLeagueExtractor:
                 "Birthday",
                 "season",
             ]
-            missing_columns = [col for col in required_columns if col not in df.columns]
-            if missing_columns:
-                logger.error(
-                    f"Columnas faltantes en archivo procesado: {missing_columns}"
-                )
+
+            # Leer solo las columnas de búsqueda (datos ya limpios y normalizados)
+            try:
+                df = read_season_table(processed_file, columns=required_columns)
+            except (KeyError, ValueError) as e:
+                logger.error(f"Columnas faltantes en archivo procesado: {e}")
                 return []
 
             # Limpiar datos nulos
@@ -538,10 +544,10 @@ class ThaiLeagueExtractor:
             if not processed_file.exists():
                 return False, "Archivo de datos procesados no encontrado", stats
 
-            df = pd.read_csv(processed_file)
-
-            # Filtrar por WyscoutID
-            player_records = df[df["Wyscout id"] == wyscout_id_int]
+            # Filtrar por WyscoutID al leer (solo se cargan sus temporadas)
+            player_records = read_season_table(
+                processed_file, filters=[("Wyscout id", "==", wyscout_id_int)]
+            )
             if player_records.empty:
                 return (
                     False,
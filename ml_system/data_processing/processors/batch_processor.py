@@ -36,6 +36,7 @@ from ml_system.data_acquisition.extractors import (
     ThaiLeagueLoader,
     ThaiLeagueTransformer,
 )
+from ml_system.data_processing.storage import read_season_table, write_season_table
 
 # Importar utilidades consolidadas
 from ml_system.deployment.utils.script_utils import (
@@ -46,6 +47,18 @@ from ml_system.deployment.utils.script_utils import (
     validate_data_requirements,
 )
 
+from .row_hashes import (
+    ROW_HASHES_DIRNAME,
+    ROW_KEY_COLUMN,
+    compute_row_hashes,
+    diff_row_hashes,
+    has_unique_keys,
+    load_row_hashes,
+    read_csv_lines,
+    save_row_hashes,
+    write_csv_lines,
+)
+
 # from controllers.ml.feature_engineer import FeatureEngineer  # NO EXISTE - COMENTADO
 # from controllers.ml.advanced_features import create_advanced_feature_pipeline  # NO EXISTE - COMENTADO
 # from controllers.data_quality import DataCleaners, DataNormalizers, DataValidators  # MOVIDO A ml_system
@@ -156,9 +169,13 @@ class BatchProcessor:
                     results["seasons_failed"][season] = {"error": error_msg}
                     self.logger.error(error_msg)
 
-            # Generar cache completo unificado
-            cache_result = self._generate_complete_cache()
-            results["final_cache_path"] = cache_result.get("cache_file", "")
+            # Cada temporada ya parchea el cache completo; regenerar solo si falta
+            cache_file = self.processed_dir / "processed_complete.csv"
+            if force_reprocess or not cache_file.exists():
+                cache_result = self._generate_complete_cache()
+                results["final_cache_path"] = cache_result.get("cache_file", "")
+            else:
+                results["final_cache_path"] = str(cache_file)
 
             # Generar resumen
             execution_time = format_execution_time(start_time)
@@ -221,7 +238,9 @@ class BatchProcessor:
             if processed_file.exists() and not force_reprocess:
                 if not self._season_needs_update(season):
                     self.logger.info(f"⚡ {season} ya procesada y actualizada")
-                    df_processed = pd.read_csv(processed_file)
+                    df_processed = read_season_table(
+                        processed_file, columns=[ROW_KEY_COLUMN]
+                    )
                     return {
                         "success": True,
                         "season": season,
@@ -262,6 +281,14 @@ class BatchProcessor:
                     "stage": "raw_data_loading",
                 }
 
+            # Solo se re-derivan los jugadores cuyas filas crudas cambiaron
+            if not force_reprocess:
+                incremental_result = self._apply_incremental_update(
+                    season, raw_df, processed_file
+                )
+                if incremental_result is not None:
+                    return incremental_result
+
             # PASO 3: Aplicar features básicas (comentado hasta crear FeatureEngineer)
             # self.logger.info(f"🔧 Aplicando features básicas para {season}")
             # df_with_basic = self._apply_basic_features(raw_df, season)
@@ -276,9 +303,16 @@ class BatchProcessor:
             # PASO 5: Validación y limpieza final
             df_final = self._final_validation_and_cleanup(df_with_advanced, season)
 
-            # PASO 6: Guardar CSV procesado
-            df_final.to_csv(processed_file, index=False, encoding="utf-8")
+            # PASO 6: Guardar CSV procesado, hashes de filas y cache completo
+            write_season_table(df_final, processed_file)
             self.logger.info(f"💾 Guardado: {processed_file}")
+            if has_unique_keys(raw_df):
+                save_row_hashes(
+                    self._row_hashes_path(season),
+                    compute_row_hashes(raw_df),
+                    raw_df.columns,
+                )
+            self._patch_complete_cache(season, processed_file)
 
             # Actualizar cache
             self.processed_seasons_cache[season] = {
@@ -296,6 +330,7 @@ class BatchProcessor:
                 "processed_file": str(processed_file),
                 "message": "Procesamiento completo exitoso",
                 "etl_data": etl_data,
+                "update_mode": "full",
             }
 
         except Exception as e:
@@ -307,30 +342,48 @@ class BatchProcessor:
                 "stage": "processing",
             }
 
-    def _season_needs_update(self, season: str) -> bool:
+    def _season_needs_update(
+        self, season: str, is_active: Optional[bool] = None
+    ) -> bool:
         """
         Determina si una temporada necesita actualización.
-        Temporadas finales: NO (a menos que force)
-        Temporada activa: SÍ si hay cambios
+        Cualquier temporada: SÍ si alguna fila del CSV crudo difiere de sus hashes
+        Temporada activa: SÍ además si hace más de 24h que no se consulta la fuente
+
+        Args:
+            season: Temporada a verificar
+            is_active: Si la temporada está activa (por defecto según el año)
         """
         try:
             processed_file = self.processed_dir / f"processed_{season}.csv"
+            manifest = load_row_hashes(self._row_hashes_path(season))
 
-            if not processed_file.exists():
+            if not processed_file.exists() or manifest is None:
                 return True
 
-            # Verificar si es temporada activa (implementar lógica)
-            # Por ahora, asumir que 2024-25 es la más reciente y podría ser activa
-            current_year = datetime.now().year
-            if season.startswith(str(current_year)) or season.startswith(
-                str(current_year - 1)
-            ):
-                # Para temporada potencialmente activa, verificar timestamps
-                processed_time = datetime.fromtimestamp(processed_file.stat().st_mtime)
-                age_hours = (datetime.now() - processed_time).total_seconds() / 3600
+            # Cambios por fila en el CSV crudo ya descargado
+            raw_file = self.extractor.cache_dir / f"thai_league_{season}.csv"
+            if raw_file.exists():
+                raw_df = read_season_table(raw_file)
+                same_columns = list(raw_df.columns) == manifest["columns"]
+                if not same_columns or not has_unique_keys(raw_df):
+                    return True
+                changed, removed = diff_row_hashes(
+                    manifest["hashes"], compute_row_hashes(raw_df)
+                )
+                if changed or removed:
+                    return True
 
-                # Si tiene más de 24 horas, podría necesitar actualización
-                return age_hours > 24
+            # Por ahora, asumir que 2024-25 es la más reciente y podría ser activa
+            if is_active is None:
+                current_year = datetime.now().year
+                is_active = season.startswith(str(current_year)) or season.startswith(
+                    str(current_year - 1)
+                )
+            if is_active:
+                # Temporada activa: volver a consultar la fuente cada 24 horas
+                age = datetime.now() - manifest["checked_at"]
+                return age.total_seconds() / 3600 > 24
 
             # Temporadas finales no necesitan actualización
             return False
@@ -339,6 +392,146 @@ class BatchProcessor:
             self.logger.warning(f"Error verificando actualización {season}: {e}")
             return True  # En caso de duda, procesar
 
+    def _row_hashes_path(self, season: str) -> Path:
+        return self.processed_dir / ROW_HASHES_DIRNAME / f"{season}.json"
+
+    def _apply_incremental_update(
+        self, season: str, raw_df: pd.DataFrame, processed_file: Path
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Re-deriva solo los jugadores nuevos o modificados y parchea los CSVs.
+
+        Returns:
+            Resultado del procesamiento, o None si hace falta un procesamiento
+            completo (sin hashes previos, columnas distintas o ids no únicos)
+        """
+        manifest = load_row_hashes(self._row_hashes_path(season))
+        if (
+            manifest is None
+            or not processed_file.exists()
+            or manifest["columns"] != list(raw_df.columns)
+            or not has_unique_keys(raw_df)
+        ):
+            return None
+
+        hashes = compute_row_hashes(raw_df)
+        changed, removed = diff_row_hashes(manifest["hashes"], hashes)
+        result = {
+            "success": True,
+            "season": season,
+            "processed_file": str(processed_file),
+            "update_mode": "incremental",
+            "rows_changed": len(changed),
+            "rows_removed": len(removed),
+        }
+
+        if not changed and not removed:
+            save_row_hashes(self._row_hashes_path(season), hashes, raw_df.columns)
+            self.logger.info(f"⚡ {season}: sin cambios en el CSV crudo")
+            result.update(
+                {
+                    "records_processed": len(raw_df),
+                    "message": "Sin cambios por jugador",
+                    "skipped": True,
+                }
+            )
+            return result
+
+        processed = read_csv_lines(processed_file, [ROW_KEY_COLUMN])
+        if processed is None:
+            return None
+        header, lines, keys = processed
+        line_by_id = dict(zip(keys[ROW_KEY_COLUMN].astype("int64"), lines))
+        columns = pd.read_csv(processed_file, nrows=0).columns
+
+        # Features solo para las filas cambiadas (conservan los dtypes del crudo)
+        changed_rows = raw_df[raw_df[ROW_KEY_COLUMN].isin(changed)].copy()
+        changed_rows["season"] = season
+        derived = self._final_validation_and_cleanup(changed_rows, season)
+        derived_lines = (
+            derived.reindex(columns=columns)
+            .to_csv(index=False, header=False, lineterminator="\n")
+            .splitlines()
+        )
+        if len(derived_lines) != len(derived):
+            return None
+        line_by_id.update(zip(derived[ROW_KEY_COLUMN].astype("int64"), derived_lines))
+
+        # Mismo orden de filas que el CSV crudo; los eliminados desaparecen
+        raw_ids = raw_df[ROW_KEY_COLUMN].astype("int64")
+        if not set(raw_ids).issubset(line_by_id):
+            return None
+        write_csv_lines(processed_file, header, [line_by_id[i] for i in raw_ids])
+        self._patch_complete_cache(season, processed_file)
+        save_row_hashes(self._row_hashes_path(season), hashes, raw_df.columns)
+
+        self.processed_seasons_cache[season] = {
+            "file": str(processed_file),
+            "records": len(raw_ids),
+            "columns": len(columns),
+            "last_processed": datetime.now(),
+        }
+        self.logger.info(
+            f"🩹 {season}: {len(changed)} jugadores actualizados, "
+            f"{len(removed)} eliminados"
+        )
+        result.update(
+            {
+                "records_processed": len(raw_ids),
+                "total_features": len(columns),
+                "message": "Actualización incremental por jugador",
+            }
+        )
+        return result
+
+    def _patch_complete_cache(self, season: str, season_file: Path):
+        """
+        Sustituye el bloque de una temporada en processed_complete.csv.
+
+        Con la misma cabecera se copian las líneas del CSV de la temporada sin
+        releer el resto; si no, se reconstruye el bloque con pandas. Si el cache
+        no existe se deja para _generate_complete_cache.
+        """
+        cache_file = self.processed_dir / "processed_complete.csv"
+        if not cache_file.exists():
+            return
+        try:
+            season_rows = read_csv_lines(season_file, [ROW_KEY_COLUMN])
+            complete_rows = read_csv_lines(cache_file, ["season"])
+            if complete_rows is None:
+                self._generate_complete_cache()
+                return
+
+            header, lines, keys = complete_rows
+            in_season = (keys["season"] == season).to_numpy()
+            # El bloque de la temporada se reinserta en su posición original
+            position = int(in_season.argmax()) if in_season.any() else len(lines)
+            others = [line for line, same in zip(lines, in_season) if not same]
+            insert_at = int((~in_season[:position]).sum())
+
+            if season_rows is not None and season_rows[0] == header:
+                block = season_rows[1]
+                write_csv_lines(
+                    cache_file,
+                    header,
+                    others[:insert_at] + block + others[insert_at:],
+                )
+            else:
+                complete_df = read_season_table(cache_file)
+                others_df = complete_df[~in_season]
+                patched = pd.concat(
+                    [
+                        others_df.iloc[:insert_at],
+                        read_season_table(season_file),
+                        others_df.iloc[insert_at:],
+                    ],
+                    ignore_index=True,
+                )
+                write_season_table(patched, cache_file)
+            self.logger.info(f"🗃️  Cache completo parcheado: {season}")
+        except Exception as e:
+            self.logger.error(f"Error parcheando cache completo: {e}")
+
     def _apply_basic_features(self, df: pd.DataFrame, season: str) -> pd.DataFrame:
         """
         Aplica features básicas usando FeatureEngineer existente.
@@ -439,7 +632,7 @@ class BatchProcessor:
 
                 if season_file.exists():
                     try:
-                        df = pd.read_csv(season_file)
+                        df = read_season_table(season_file)
                         all_dataframes.append(df)
                         self.logger.info(f"✅ Cache: {season} - {len(df)} registros")
                     except Exception as e:
@@ -450,7 +643,7 @@ class BatchProcessor:
                 unified_df = pd.concat(all_dataframes, ignore_index=True)
 
                 # Guardar cache completo
-                unified_df.to_csv(cache_file, index=False, encoding="utf-8")
+                write_season_table(unified_df, cache_file)
 
                 self.logger.info(
                     f"🗃️  Cache completo generado: {len(unified_df)} registros, {len(unified_df.columns)} columnas"
@@ -4,13 +4,27 @@ Fuzzy Matcher - Módulo de matching inteligente para jugadores profesionales.
 Migrado desde ThaiLeagueController para consolidación ML.
 Proporciona funciones de fuzzy matching para encontrar jugadores coincidentes
 usando WyscoutID, nombres exactos y fuzzy matching.
+
+Los pases exactos usan diccionarios y el fuzzy solo puntúa candidatos que
+pasan un filtro de bigramas (sin pérdidas para umbrales > 67), de modo que
+el resultado es idéntico al recorrido lineal original.
 """
 
 import logging
-from typing import Dict, List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
-from fuzzywuzzy import fuzz
+from fuzzywuzzy import fuzz, utils
+
+try:
+    from rapidfuzz import fuzz as rf_fuzz
+    from rapidfuzz import process as rf_process
+
+    _rapidfuzz_available = True
+except ImportError:
+    _rapidfuzz_available = False
 
 from controllers.db import get_db_session
 from models.player_model import Player
@@ -18,6 +32,193 @@ from models.user_model import User, UserType
 
 logger = logging.getLogger(__name__)
 
+# Consultas fuzzy a partir de las cuales compensa repartir en procesos
+PARALLEL_MIN_QUERIES = 2000
+
+
+def _player_record(player, user) -> Dict:
+    return {
+        "player_id": player.player_id,
+        "user_id": user.user_id,
+        "name": user.name,
+        "wyscout_id": player.wyscout_id,
+    }
+
+
+def _bigrams(text: str) -> List[Tuple[str, int]]:
+    """Bigramas numerados por aparición: ("an", 2) es el segundo "an"."""
+    seen: Dict[str, int] = {}
+    grams = []
+    for i in range(len(text) - 1):
+        gram = text[i : i + 2]
+        seen[gram] = seen.get(gram, 0) + 1
+        grams.append((gram, seen[gram]))
+    return grams
+
+
+def _token_sort_key(text: str) -> str:
+    """Misma cadena que compara fuzz.token_sort_ratio (procesada y ordenada)."""
+    return " ".join(sorted(utils.full_process(text, force_ascii=True).split()))
+
+
+class PlayerNameIndex:
+    """
+    Índices de jugadores profesionales para FuzzyMatcher.
+
+    - WyscoutID y nombre exacto: diccionarios (primer jugador gana, como el
+      recorrido lineal)
+    - Fuzzy: bloqueo por bigramas compartidos. Toda subsecuencia común de M
+      caracteres en R tramos comparte al menos M - R bigramas y obliga a
+      la + lb >= 2M + R - 1; con similitud t eso da una cota inferior de
+      bigramas compartidos para ratio/partial_ratio/token_sort_ratio, así que
+      descartar por debajo de ella no pierde ningún match
+    - Con rapidfuzz disponible, sus puntuaciones (iguales o superiores a las de
+      fuzzywuzzy) filtran en bloque antes del cálculo exacto
+    """
+
+    def __init__(self, existing_players: Sequence):
+        self._records: List[Dict] = []
+        self._by_wyscout: Dict = {}
+        self._by_name: Dict[str, int] = {}
+        self._lower: List[str] = []
+        self._sorted: List[str] = []
+        raw_postings: Dict[Tuple[str, int], List[int]] = {}
+        sorted_postings: Dict[Tuple[str, int], List[int]] = {}
+
+        for i, (player, user) in enumerate(existing_players):
+            self._records.append(_player_record(player, user))
+            self._by_wyscout.setdefault(player.wyscout_id, i)
+            self._by_name.setdefault(user.name.strip().lower(), i)
+
+            lower = user.name.lower()
+            sort_key = _token_sort_key(lower)
+            self._lower.append(lower)
+            self._sorted.append(sort_key)
+            for gram in _bigrams(lower):
+                raw_postings.setdefault(gram, []).append(i)
+            for gram in _bigrams(sort_key):
+                sorted_postings.setdefault(gram, []).append(i)
+
+        self._raw_postings = {
+            g: np.asarray(ids, dtype=np.int32) for g, ids in raw_postings.items()
+        }
+        self._sorted_postings = {
+            g: np.asarray(ids, dtype=np.int32) for g, ids in sorted_postings.items()
+        }
+        self._raw_lengths = np.array([len(n) for n in self._lower], dtype=np.float64)
+        self._sorted_lengths = np.array(
+            [len(n) for n in self._sorted], dtype=np.float64
+        )
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def by_wyscout_id(self, wyscout_id: int) -> Optional[Dict]:
+        """Equivalente indexado de FuzzyMatcher._find_by_wyscout_id."""
+        if not wyscout_id:
+            return None
+        i = self._by_wyscout.get(wyscout_id)
+        return dict(self._records[i]) if i is not None else None
+
+    def by_exact_name(self, full_name: str) -> Optional[Dict]:
+        """Equivalente indexado de FuzzyMatcher._find_by_exact_name."""
+        i = self._by_name.get(full_name.strip().lower())
+        return dict(self._records[i]) if i is not None else None
+
+    def _shared_bigrams(self, text: str, postings: Dict) -> np.ndarray:
+        # Con la numeración por aparición el recuento es la intersección multiconjunto
+        lists = [postings[g] for g in _bigrams(text) if g in postings]
+        if not lists:
+            return np.zeros(len(self), dtype=np.int64)
+        return np.bincount(np.concatenate(lists), minlength=len(self))
+
+    def candidates(self, full_name: str, threshold: int) -> np.ndarray:
+        """Índices (en orden de BD) que pueden alcanzar el umbral."""
+        n = len(self)
+        t = (threshold - 0.5) / 100  # intr() redondea: 84.5 ya cuenta como 85
+        if n == 0 or t <= 2 / 3:
+            return np.arange(n)
+
+        lower = full_name.lower()
+        sort_key = _token_sort_key(lower)
+
+        # partial_ratio (la cota más débil) cubre también ratio
+        shortest = np.minimum(self._raw_lengths, len(lower))
+        need_raw = (3 * t - 2) * shortest / (2 - t) - 1
+        # token_sort_ratio es un ratio sobre las cadenas procesadas
+        need_sorted = (1.5 * t - 1) * (self._sorted_lengths + len(sort_key)) - 1
+
+        mask = self._shared_bigrams(lower, self._raw_postings) >= need_raw - 1e-9
+        mask |= (
+            self._shared_bigrams(sort_key, self._sorted_postings) >= need_sorted - 1e-9
+        )
+        candidates = np.flatnonzero(mask)
+
+        if _rapidfuzz_available and len(candidates):
+            cutoff = threshold - 0.5 - 1e-3
+            keep = np.zeros(len(candidates), dtype=bool)
+            for scorer, query, names in (
+                (rf_fuzz.ratio, sort_key, self._sorted),
+                (rf_fuzz.ratio, lower, self._lower),
+                (rf_fuzz.partial_ratio, lower, self._lower),
+            ):
+                # Solo se puntúa lo que aún no ha superado el umbral
+                pending = candidates[~keep]
+                if not len(pending):
+                    break
+                scores = rf_process.cdist(
+                    [query],
+                    [names[i] for i in pending],
+                    scorer=scorer,
+                    score_cutoff=cutoff,
+                )[0]
+                keep[np.flatnonzero(~keep)[scores >= cutoff]] = True
+            candidates = candidates[keep]
+
+        return candidates
+
+    def fuzzy_matches(self, full_name: str, threshold: int) -> List[Dict]:
+        """Mismo resultado que FuzzyMatcher._find_by_fuzzy_name."""
+        matches = []
+        name_lower = full_name.lower()
+
+        for i in self.candidates(full_name, threshold):
+            other = self._lower[i]
+            ratio = fuzz.ratio(name_lower, other)
+            partial_ratio = fuzz.partial_ratio(name_lower, other)
+            token_sort_ratio = fuzz.token_sort_ratio(name_lower, other)
+            confidence = max(ratio, partial_ratio, token_sort_ratio)
+
+            if confidence >= threshold:
+                matches.append(
+                    {
+                        "player": dict(self._records[i]),
+                        "confidence": confidence,
+                        "similarity_scores": {
+                            "ratio": ratio,
+                            "partial_ratio": partial_ratio,
+                            "token_sort_ratio": token_sort_ratio,
+                        },
+                    }
+                )
+
+        matches.sort(key=lambda x: x["confidence"], reverse=True)
+        return matches
+
+
+# Estado por proceso para la puntuación en paralelo
+_worker_index: Optional[PlayerNameIndex] = None
+
+
+def _init_worker(index: PlayerNameIndex):
+    global _worker_index
+    _worker_index = index
+
+
+def _score_chunk(args) -> List[List[Dict]]:
+    names, threshold = args
+    return [_worker_index.fuzzy_matches(name, threshold) for name in names]
+
 
 class FuzzyMatcher:
     """
@@ -30,7 +231,7 @@ class FuzzyMatcher:
         self.session_factory = session_factory or get_db_session
 
     def find_matching_players(
-        self, df: pd.DataFrame, threshold: int = 85
+        self, df: pd.DataFrame, threshold: int = 85, workers: Optional[int] = None
     ) -> Dict[str, List[Dict]]:
         """
         Encuentra jugadores coincidentes usando fuzzy matching.
@@ -40,6 +241,7 @@ class FuzzyMatcher:
         Args:
             df: DataFrame con datos de jugadores
             threshold: Umbral de similitud (0-100)
+            workers: Procesos para la fase fuzzy (None/1 = en el proceso actual)
 
         Returns:
             Diccionario con sugerencias de matching
@@ -60,90 +262,181 @@ class FuzzyMatcher:
 
             logger.info(f"👥 Jugadores profesionales en BD: {len(existing_players)}")
 
-        results = {
-            "exact_matches": [],
-            "fuzzy_matches": [],
-            "no_matches": [],
-            "multiple_matches": [],
-        }
+        return self.match_players(existing_players, df, threshold, workers)
 
-        for _, row in df.iterrows():
-            full_name = row.get("Full name")
-            wyscout_id = int(row.get("Wyscout id", 0))
+    def match_players(
+        self,
+        existing_players: Sequence,
+        df: pd.DataFrame,
+        threshold: int = 85,
+        workers: Optional[int] = None,
+    ) -> Dict[str, List[Dict]]:
+        """
+        Matching indexado contra una lista de pares (Player, User) ya cargada.
 
-            if not full_name:
-                continue
+        Args:
+            existing_players: Pares (Player, User) de jugadores profesionales
+            df: DataFrame con datos de jugadores
+            threshold: Umbral de similitud (0-100)
+            workers: Procesos para la fase fuzzy (None/1 = en el proceso actual)
 
-            # Buscar matching exacto por WyscoutID
-            exact_wyscout = self._find_by_wyscout_id(existing_players, wyscout_id)
-            if exact_wyscout:
-                results["exact_matches"].append(
-                    {
-                        "csv_player": full_name,
-                        "wyscout_id": wyscout_id,
-                        "matched_player": exact_wyscout,
-                        "confidence": 100,
-                        "match_type": "wyscout_id",
-                    }
-                )
-                continue
+        Returns:
+            Diccionario con sugerencias de matching
+        """
+        index = PlayerNameIndex(existing_players)
 
-            # Buscar matching exacto por nombre
-            exact_name = self._find_by_exact_name(existing_players, full_name)
-            if exact_name:
-                results["exact_matches"].append(
-                    {
-                        "csv_player": full_name,
-                        "wyscout_id": wyscout_id,
-                        "matched_player": exact_name,
-                        "confidence": 100,
-                        "match_type": "exact_name",
-                    }
-                )
+        # Pases exactos por diccionario; lo que queda va a la fase fuzzy
+        entries = []
+        for full_name, wyscout_id in self._iter_rows(df):
+            if not full_name:
                 continue
+            exact_wyscout = index.by_wyscout_id(wyscout_id)
+            exact_name = None if exact_wyscout else index.by_exact_name(full_name)
+            entries.append((full_name, wyscout_id, exact_wyscout, exact_name))
+
+        fuzzy_names = [e[0] for e in entries if not e[2] and not e[3]]
+        fuzzy_results = iter(self._score_fuzzy(index, fuzzy_names, threshold, workers))
 
-            # Buscar matching fuzzy
-            fuzzy_matches = self._find_by_fuzzy_name(
-                existing_players, full_name, threshold
+        results = self._empty_results()
+        for full_name, wyscout_id, exact_wyscout, exact_name in entries:
+            fuzzy_matches = (
+                next(fuzzy_results) if not (exact_wyscout or exact_name) else []
+            )
+            self._append_result(
+                results, full_name, wyscout_id, exact_wyscout, exact_name, fuzzy_matches
             )
 
-            if len(fuzzy_matches) == 1:
-                results["fuzzy_matches"].append(
-                    {
-                        "csv_player": full_name,
-                        "wyscout_id": wyscout_id,
-                        "matched_player": fuzzy_matches[0]["player"],
-                        "confidence": fuzzy_matches[0]["confidence"],
-                        "match_type": "fuzzy_name",
-                    }
-                )
-            elif len(fuzzy_matches) > 1:
-                results["multiple_matches"].append(
-                    {
-                        "csv_player": full_name,
-                        "wyscout_id": wyscout_id,
-                        "candidates": fuzzy_matches,
-                        "match_type": "multiple_fuzzy",
-                    }
-                )
-            else:
-                results["no_matches"].append(
-                    {
-                        "csv_player": full_name,
-                        "wyscout_id": wyscout_id,
-                        "match_type": "no_match",
-                    }
-                )
+        self._log_summary(results, len(df))
+        return results
+
+    def _score_fuzzy(
+        self,
+        index: PlayerNameIndex,
+        names: List[str],
+        threshold: int,
+        workers: Optional[int],
+    ) -> List[List[Dict]]:
+        """Puntúa los nombres pendientes, en paralelo si se pide y compensa."""
+        if not workers or workers <= 1 or len(names) < PARALLEL_MIN_QUERIES:
+            return [index.fuzzy_matches(name, threshold) for name in names]
+
+        chunk_size = -(-len(names) // (workers * 4))
+        chunks = [
+            (names[i : i + chunk_size], threshold)
+            for i in range(0, len(names), chunk_size)
+        ]
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(index,)
+        ) as executor:
+            return [m for chunk in executor.map(_score_chunk, chunks) for m in chunk]
+
+    @staticmethod
+    def _iter_rows(df: pd.DataFrame):
+        """(Full name, Wyscout id entero) por fila, como hacía iterrows."""
+        names = df["Full name"] if "Full name" in df.columns else [None] * len(df)
+        ids = df["Wyscout id"] if "Wyscout id" in df.columns else [0] * len(df)
+        for full_name, wyscout_id in zip(names, ids):
+            yield full_name, int(wyscout_id)
+
+    @staticmethod
+    def _empty_results() -> Dict[str, List[Dict]]:
+        return {
+            "exact_matches": [],
+            "fuzzy_matches": [],
+            "no_matches": [],
+            "multiple_matches": [],
+        }
+
+    @staticmethod
+    def _append_result(
+        results: Dict,
+        full_name: str,
+        wyscout_id: int,
+        exact_wyscout: Optional[Dict],
+        exact_name: Optional[Dict],
+        fuzzy_matches: List[Dict],
+    ):
+        """Clasifica una fila del CSV en la categoría de resultado que le toca."""
+        if exact_wyscout:
+            results["exact_matches"].append(
+                {
+                    "csv_player": full_name,
+                    "wyscout_id": wyscout_id,
+                    "matched_player": exact_wyscout,
+                    "confidence": 100,
+                    "match_type": "wyscout_id",
+                }
+            )
+        elif exact_name:
+            results["exact_matches"].append(
+                {
+                    "csv_player": full_name,
+                    "wyscout_id": wyscout_id,
+                    "matched_player": exact_name,
+                    "confidence": 100,
+                    "match_type": "exact_name",
+                }
+            )
+        elif len(fuzzy_matches) == 1:
+            results["fuzzy_matches"].append(
+                {
+                    "csv_player": full_name,
+                    "wyscout_id": wyscout_id,
+                    "matched_player": fuzzy_matches[0]["player"],
+                    "confidence": fuzzy_matches[0]["confidence"],
+                    "match_type": "fuzzy_name",
+                }
+            )
+        elif len(fuzzy_matches) > 1:
+            results["multiple_matches"].append(
+                {
+                    "csv_player": full_name,
+                    "wyscout_id": wyscout_id,
+                    "candidates": fuzzy_matches,
+                    "match_type": "multiple_fuzzy",
+                }
+            )
+        else:
+            results["no_matches"].append(
+                {
+                    "csv_player": full_name,
+                    "wyscout_id": wyscout_id,
+                    "match_type": "no_match",
+                }
+            )
 
-        # Log de resumen
+    @staticmethod
+    def _log_summary(results: Dict, total_rows: int):
         total_matches = len(results["exact_matches"]) + len(results["fuzzy_matches"])
         logger.info(f"✅ Matching completado:")
         logger.info(f"   • Exactos: {len(results['exact_matches'])}")
         logger.info(f"   • Fuzzy: {len(results['fuzzy_matches'])}")
         logger.info(f"   • Múltiples: {len(results['multiple_matches'])}")
         logger.info(f"   • Sin match: {len(results['no_matches'])}")
-        logger.info(f"   • Total matches: {total_matches}/{len(df)}")
+        logger.info(f"   • Total matches: {total_matches}/{total_rows}")
 
+    def _match_players_linear(
+        self, existing_players: Sequence, df: pd.DataFrame, threshold: int = 85
+    ) -> Dict[str, List[Dict]]:
+        """Recorrido lineal original (referencia para tests y benchmark)."""
+        results = self._empty_results()
+        for full_name, wyscout_id in self._iter_rows(df):
+            if not full_name:
+                continue
+            exact_wyscout = self._find_by_wyscout_id(existing_players, wyscout_id)
+            exact_name = (
+                None
+                if exact_wyscout
+                else self._find_by_exact_name(existing_players, full_name)
+            )
+            fuzzy_matches = (
+                []
+                if exact_wyscout or exact_name
+                else self._find_by_fuzzy_name(existing_players, full_name, threshold)
+            )
+            self._append_result(
+                results, full_name, wyscout_id, exact_wyscout, exact_name, fuzzy_matches
+            )
         return results
 
     def _find_by_wyscout_id(self, existing_players: List, wyscout_id: int) -> Dict:
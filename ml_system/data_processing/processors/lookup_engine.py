@@ -16,21 +16,26 @@ Autor: Proyecto Fin de Máster - Python Aplicado al Deporte
 Fecha: Agosto 2025
 """
 
+import json
 import logging
+import os
 import sys
 from collections import defaultdict
+from collections.abc import Mapping
 from datetime import datetime, timedelta
 from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
 # Configurar path del proyecto
-project_root = Path(__file__).parent.parent.parent
+project_root = Path(__file__).parent.parent.parent.parent
 sys.path.append(str(project_root))
 
 import numpy as np
 import pandas as pd
 
+from ml_system.data_processing.storage import read_season_table
+
 # Importar utilidades consolidadas
 from ml_system.deployment.utils.script_utils import (
     format_execution_time,
@@ -40,6 +45,7 @@ from ml_system.deployment.utils.script_utils import (
 
 # Importar otros preprocessors del sistema
 from .batch_processor import BatchProcessor
+from .name_search import NameSearchIndex
 from .season_monitor import SeasonMonitor
 
 logger = logging.getLogger(__name__)
@@ -52,6 +58,85 @@ CACHE_CONFIG = {
 }
 
 
+# Snapshot en disco de los índices (carga en frío sin re-parsear CSVs)
+SNAPSHOT_DIRNAME = ".lookup_index"
+INDEX_VERSION = "2.0"
+
+
+def _parquet_available() -> bool:
+    """Parquet requiere pyarrow (dependencia opcional)."""
+    try:
+        import pyarrow  # noqa: F401
+
+        return True
+    except ImportError:
+        return False
+
+
+def _group_offsets(keys: pd.Series) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Agrupa posiciones de fila por clave en formato CSR.
+
+    Returns:
+        (claves, orden, inicios): las filas de claves[i] son
+        orden[inicios[i]:inicios[i + 1]], en orden de aparición.
+    """
+    keys = keys.where(keys != "")
+    codes, uniques = pd.factorize(keys, sort=False)
+    rows = np.flatnonzero(codes >= 0)
+    order = rows[np.argsort(codes[rows], kind="stable")]
+    counts = np.bincount(codes[rows], minlength=len(uniques))
+    starts = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    return [str(key) for key in uniques], order.astype(np.int64), starts
+
+
+def _membership_index(frame: pd.DataFrame, column: str) -> Dict[str, List[str]]:
+    """clave (posición/equipo) -> jugadores únicos en orden de aparición."""
+    if column not in frame.columns or "Player" not in frame.columns:
+        return {}
+
+    valid = (
+        frame["Player"].notna()
+        & (frame["Player"] != "")
+        & frame[column].notna()
+        & (frame[column] != "")
+    )
+    pairs = frame.loc[valid, [column, "Player"]].drop_duplicates()
+    return {
+        str(key): group["Player"].tolist()
+        for key, group in pairs.groupby(column, sort=False)
+    }
+
+
+class _LazyRecordIndex(Mapping):
+    """
+    Índice jugador -> [records] sobre el frame concatenado.
+    Guarda solo offsets de fila; los dicts se materializan al consultar.
+    """
+
+    def __init__(self, frame: pd.DataFrame, names: List[str], order, starts):
+        self._frame = frame
+        self._order = order
+        self._starts = starts
+        self._positions = {name: i for i, name in enumerate(names)}
+
+    def offsets(self, player_name: str) -> np.ndarray:
+        i = self._positions[player_name]
+        return self._order[self._starts[i] : self._starts[i + 1]]
+
+    def __getitem__(self, player_name: str) -> List[Dict[str, Any]]:
+        return self._frame.iloc[self.offsets(player_name)].to_dict("records")
+
+    def __contains__(self, player_name) -> bool:
+        return player_name in self._positions
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+
 class LookupEngine:
     """
     Motor de búsqueda O(1) que proporciona acceso instantáneo a CSVs procesados.
@@ -80,11 +165,16 @@ class LookupEngine:
         self.batch_processor = BatchProcessor()
         self.season_monitor = SeasonMonitor()
 
-        # Índices HashMap O(1)
-        self.player_index = {}  # player_name -> [records]
+        self.snapshot_dir = self.processed_dir / SNAPSHOT_DIRNAME
+
+        # Índices HashMap O(1) sobre un único frame columnar
+        self._frame = None  # Todas las temporadas concatenadas
+        self.player_index = {}  # player_name -> [records] (lazy)
         self.season_index = {}  # season -> DataFrame
         self.position_index = {}  # position -> [player_names]
         self.team_index = {}  # team -> [player_names]
+        self.name_index = NameSearchIndex()  # trigramas + trie para fuzzy
+        self._indexes_ready = False
 
         # Cache de consultas frecuentes
         self.query_cache = {}
@@ -96,7 +186,7 @@ class LookupEngine:
             "total_records": 0,
             "total_players": 0,
             "available_seasons": [],
-            "index_version": "1.0",
+            "index_version": INDEX_VERSION,
         }
 
         # Configurar logging
@@ -104,8 +194,7 @@ class LookupEngine:
 
         logger.info("🔍 LookupEngine inicializado con cache LRU optimizado")
 
-        # Inicializar índices automáticamente
-        self._initialize_indexes()
+        # Los índices se cargan en la primera consulta (snapshot o CSVs)
 
     def lookup_player_instantly(
         self, player_name: str, fuzzy: bool = True, season_filter: str = None
@@ -123,6 +212,7 @@ class LookupEngine:
         """
         try:
             start_time = datetime.now()
+            self._ensure_indexes()
             cache_key = f"player_{player_name}_{season_filter}_{fuzzy}"
 
             # Verificar cache primero
@@ -204,6 +294,7 @@ class LookupEngine:
         """
         try:
             start_time = datetime.now()
+            self._ensure_indexes()
             cache_key = f"season_{season}_{include_stats}"
 
             # Verificar cache
@@ -289,6 +380,7 @@ class LookupEngine:
         """
         try:
             start_time = datetime.now()
+            self._ensure_indexes()
             cache_key = f"position_{position}_{season_filter}_{limit}"
 
             # Verificar cache
@@ -373,6 +465,7 @@ class LookupEngine:
         """
         try:
             start_time = datetime.now()
+            self._ensure_indexes()
             cache_key = f"advanced_{hash(str(sorted(query.items())))}"
 
             # Verificar cache
@@ -493,47 +586,20 @@ class LookupEngine:
                 "errors": [],
             }
 
-            # Procesar cada archivo CSV procesado
-            for season_file in self.processed_dir.glob("processed_*.csv"):
+            # Cargar cada CSV una vez y concatenar en un único frame columnar
+            frames = []
+            for season_file in sorted(self.processed_dir.glob("processed_*.csv")):
                 try:
                     self.logger.info(f"📊 Indexando {season_file.name}")
 
-                    # Cargar CSV
-                    df = pd.read_csv(season_file)
+                    df = read_season_table(season_file)
                     season = self._extract_season_from_filename(season_file.name)
 
                     # Indexar temporada
                     self.season_index[season] = df
-
-                    # Indexar por jugador
-                    for idx, row in df.iterrows():
-                        player_name = row.get("Player", "")
-                        if player_name:
-                            if player_name not in self.player_index:
-                                self.player_index[player_name] = []
-
-                            # Convertir row a dict y añadir metadatos
-                            player_record = row.to_dict()
-                            player_record["_season"] = season
-                            player_record["_file_source"] = season_file.name
-
-                            self.player_index[player_name].append(player_record)
-
-                            # Indexar por posición
-                            position = row.get("Primary position", "")
-                            if position:
-                                if position not in self.position_index:
-                                    self.position_index[position] = []
-                                if player_name not in self.position_index[position]:
-                                    self.position_index[position].append(player_name)
-
-                            # Indexar por equipo (si existe)
-                            team = row.get("Team", "")
-                            if team:
-                                if team not in self.team_index:
-                                    self.team_index[team] = []
-                                if player_name not in self.team_index[team]:
-                                    self.team_index[team].append(player_name)
+                    frames.append(
+                        df.assign(_season=season, _file_source=season_file.name)
+                    )
 
                     rebuild_stats["files_processed"] += 1
                     rebuild_stats["records_indexed"] += len(df)
@@ -546,10 +612,16 @@ class LookupEngine:
                     rebuild_stats["errors"].append(error_msg)
                     self.logger.error(error_msg)
 
+            if frames:
+                frame = pd.concat(frames, ignore_index=True)
+                player_groups = self._build_indexes_from_frame(frame)
+                self._save_snapshot(frame, player_groups)
+
             rebuild_stats["players_indexed"] = len(self.player_index)
 
             # Actualizar metadatos
             self._update_index_metadata(rebuild_stats)
+            self._indexes_ready = True
 
             # Limpiar cache (ya no válido)
             self._clear_cache()
@@ -592,9 +664,10 @@ class LookupEngine:
             Dict con estadísticas y estado del motor
         """
         try:
+            self._ensure_indexes()
             status = {
                 "engine_info": {
-                    "version": "1.0",
+                    "version": INDEX_VERSION,
                     "cache_size": len(self.query_cache),
                     "max_cache_size": self.max_cache_size,
                     "cache_hit_ratio": self._calculate_cache_hit_ratio(),
@@ -632,10 +705,16 @@ class LookupEngine:
 
     # Métodos privados de implementación
 
+    def _ensure_indexes(self):
+        """Carga los índices en la primera consulta."""
+        if not self._indexes_ready:
+            self._initialize_indexes()
+
     def _initialize_indexes(self):
-        """Inicializa índices automáticamente al crear el engine."""
+        """Inicializa índices desde el snapshot en disco o, si no es válido, desde CSVs."""
         try:
-            self.logger.info("🔄 Inicializando índices automáticamente")
+            self._indexes_ready = True
+            self.logger.info("🔄 Inicializando índices")
 
             # Verificar si existen archivos procesados
             processed_files = list(self.processed_dir.glob("processed_*.csv"))
@@ -645,8 +724,12 @@ class LookupEngine:
                 self.logger.info("💡 Ejecuta BatchProcessor primero para generar datos")
                 return
 
-            # Reconstruir índices automáticamente
-            result = self.rebuild_indexes()
+            if self._load_snapshot():
+                self.logger.info("⚡ Índices cargados desde snapshot")
+                return
+
+            # Reconstruir índices desde CSVs
+            result = self.rebuild_indexes(force=True)
 
             if result["success"]:
                 self.logger.info("✅ Índices inicializados correctamente")
@@ -656,31 +739,147 @@ class LookupEngine:
         except Exception as e:
             self.logger.error(f"Error en inicialización automática: {e}")
 
-    def _fuzzy_player_search(
-        self, query: str, threshold: float = 0.8
-    ) -> List[Tuple[str, float]]:
-        """Búsqueda fuzzy para nombres con typos."""
+    def _build_indexes_from_frame(
+        self, frame: pd.DataFrame
+    ) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Construye los índices jugador/posición/equipo con operaciones vectorizadas."""
+        self._frame = frame
+
+        if "Player" in frame.columns:
+            player_groups = _group_offsets(frame["Player"])
+        else:
+            player_groups = ([], np.array([], dtype=np.int64), np.zeros(1, np.int64))
+
+        self.player_index = _LazyRecordIndex(frame, *player_groups)
+        self.position_index = _membership_index(frame, "Primary position")
+        self.team_index = _membership_index(frame, "Team")
+        self.name_index = NameSearchIndex(self.player_index.keys())
+        return player_groups
+
+    # Snapshot en disco
+
+    def _source_signature(self) -> Dict[str, List[int]]:
+        """Firma (mtime_ns, tamaño) de cada CSV procesado."""
+        signature = {}
+        for season_file in sorted(self.processed_dir.glob("processed_*.csv")):
+            stat = season_file.stat()
+            signature[season_file.name] = [stat.st_mtime_ns, stat.st_size]
+        return signature
+
+    def _save_snapshot(
+        self,
+        frame: pd.DataFrame,
+        player_groups: Tuple[List[str], np.ndarray, np.ndarray],
+    ):
+        """Guarda frame + offsets + metadatos; meta.json se escribe al final."""
         try:
-            from difflib import SequenceMatcher
+            self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+            names, order, starts = player_groups
+
+            use_parquet = _parquet_available()
+            frame_file = "records.parquet" if use_parquet else "records.pkl"
+            tmp_frame = self.snapshot_dir / f"{frame_file}.tmp"
+            if use_parquet:
+                frame.to_parquet(tmp_frame, index=False)
+            else:
+                frame.to_pickle(tmp_frame)
+            os.replace(tmp_frame, self.snapshot_dir / frame_file)
+
+            tmp_offsets = self.snapshot_dir / "offsets.tmp.npz"
+            np.savez(tmp_offsets, player_order=order, player_starts=starts)
+            os.replace(tmp_offsets, self.snapshot_dir / "offsets.npz")
+
+            seasons = {}
+            for season, df in self.season_index.items():
+                rows = np.flatnonzero((frame["_season"] == season).to_numpy())
+                seasons[season] = {
+                    "start": int(rows[0]) if len(rows) else 0,
+                    "stop": int(rows[-1]) + 1 if len(rows) else 0,
+                    "columns": list(df.columns),
+                }
+
+            meta = {
+                "index_version": INDEX_VERSION,
+                "frame_file": frame_file,
+                "sources": self._source_signature(),
+                "created_at": datetime.now().isoformat(),
+                "player_names": names,
+                "seasons": seasons,
+                "position_index": self.position_index,
+                "team_index": self.team_index,
+            }
+            tmp_meta = self.snapshot_dir / "meta.json.tmp"
+            with open(tmp_meta, "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+            os.replace(tmp_meta, self.snapshot_dir / "meta.json")
+
+            self.logger.info(f"💾 Snapshot de índices guardado ({frame_file})")
 
-            matches = []
-            query_lower = query.lower()
+        except Exception as e:
+            self.logger.warning(f"⚠️ No se pudo guardar snapshot de índices: {e}")
 
-            for player_name in self.player_index.keys():
-                similarity = SequenceMatcher(
-                    None, query_lower, player_name.lower()
-                ).ratio()
+    def _load_snapshot(self) -> bool:
+        """Carga índices desde el snapshot si coincide con los CSVs actuales."""
+        try:
+            meta_path = self.snapshot_dir / "meta.json"
+            if not meta_path.exists():
+                return False
+
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+
+            if meta.get("index_version") != INDEX_VERSION:
+                return False
+            if meta.get("sources") != self._source_signature():
+                self.logger.info("🔄 CSVs modificados desde el último snapshot")
+                return False
+
+            frame_path = self.snapshot_dir / meta["frame_file"]
+            if meta["frame_file"].endswith(".parquet"):
+                if not _parquet_available():
+                    return False
+                frame = pd.read_parquet(frame_path)
+            else:
+                frame = pd.read_pickle(frame_path)
 
-                if similarity >= threshold:
-                    matches.append((player_name, similarity))
+            with np.load(self.snapshot_dir / "offsets.npz") as offsets:
+                order = offsets["player_order"]
+                starts = offsets["player_starts"]
 
-            # Ordenar por similitud descendente
-            matches.sort(key=lambda x: x[1], reverse=True)
-            return matches[:5]  # Top 5 matches
+            self._frame = frame
+            self.player_index = _LazyRecordIndex(
+                frame, meta["player_names"], order, starts
+            )
+            self.position_index = meta["position_index"]
+            self.team_index = meta["team_index"]
+            self.name_index = NameSearchIndex(self.player_index.keys())
+            self.season_index = {
+                season: frame.iloc[info["start"] : info["stop"]][info["columns"]]
+                for season, info in meta["seasons"].items()
+            }
+
+            self._update_index_metadata(
+                {
+                    "records_indexed": len(frame),
+                    "players_indexed": len(self.player_index),
+                    "files_processed": len(meta["sources"]),
+                    "errors": [],
+                }
+            )
+            self.index_metadata["snapshot_created_at"] = meta.get("created_at")
+            return True
+
+        except Exception as e:
+            self.logger.warning(f"⚠️ Snapshot de índices no válido: {e}")
+            return False
+
+    def _fuzzy_player_search(
+        self, query: str, threshold: float = 0.8
+    ) -> List[Tuple[str, float]]:
+        """Búsqueda fuzzy para nombres con typos (candidatos por trigramas)."""
+        try:
+            return self.name_index.search(query, threshold=threshold, limit=5)
 
-        except ImportError:
-            self.logger.warning("difflib no disponible, fuzzy search deshabilitado")
-            return []
         except Exception as e:
             self.logger.error(f"Error en fuzzy search: {e}")
             return []
@@ -688,18 +887,16 @@ class LookupEngine:
     def _get_player_suggestions(self, query: str) -> List[str]:
         """Obtiene sugerencias de jugadores similares."""
         try:
-            suggestions = []
-            query_lower = query.lower()
-
-            # Sugerencias por coincidencias parciales
-            for player_name in self.player_index.keys():
-                if query_lower in player_name.lower() or player_name.lower().startswith(
-                    query_lower
-                ):
-                    suggestions.append(player_name)
+            # Autocompletado por prefijo de nombre o apellido
+            suggestions = self.name_index.autocomplete(query, limit=5)
 
-                if len(suggestions) >= 5:
-                    break
+            # Completar con coincidencias aproximadas más laxas
+            if len(suggestions) < 5:
+                for name, _ in self.name_index.search(query, threshold=0.6):
+                    if name not in suggestions:
+                        suggestions.append(name)
+                    if len(suggestions) >= 5:
+                        break
 
             return suggestions
 
@@ -977,10 +1174,12 @@ class LookupEngine:
 
     def _clear_indexes(self):
         """Limpia todos los índices."""
-        self.player_index.clear()
-        self.season_index.clear()
-        self.position_index.clear()
-        self.team_index.clear()
+        self._frame = None
+        self.player_index = {}
+        self.season_index = {}
+        self.position_index = {}
+        self.team_index = {}
+        self.name_index = NameSearchIndex()
         self.logger.info("🧹 Índices limpiados")
 
     def _indexes_need_rebuild(self) -> bool:
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+NameSearchIndex - Búsqueda fuzzy y autocompletado de nombres de jugadores.
+
+Estructura dedicada para LookupEngine:
+1. Trigramas → candidatos (solo los mejores se puntúan con SequenceMatcher)
+2. Trie de prefijos por palabra para autocompletado
+3. Normalización idéntica a _normalize_name (sin acentos, minúsculas)
+
+Autor: Proyecto Fin de Máster - Python Aplicado al Deporte
+Fecha: Agosto 2025
+"""
+
+import logging
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .normalizers import DataNormalizers
+
+logger = logging.getLogger(__name__)
+
+# Candidatos por trigramas que se puntúan de forma exacta
+MAX_EXACT_CANDIDATES = 10
+# Nombres guardados por nodo del trie (suficiente para sugerencias)
+TRIE_NODE_LIMIT = 10
+
+
+def _trigrams(text: str) -> set:
+    """Trigramas con relleno para que inicios y finales de palabra cuenten."""
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class NameSearchIndex:
+    """
+    Índice de nombres con candidatos por trigramas y trie de prefijos.
+
+    Uso:
+        index = NameSearchIndex(player_names)
+        index.search("chanathip songkrazin")  # → [("Chanathip Songkrasin", 0.97)]
+        index.autocomplete("chana")
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._names: List[str] = []  # nombres originales
+        self._normalized: List[str] = []  # forma normalizada (paralela a _names)
+        self._gram_counts = np.zeros(0, dtype=np.int32)
+        self._postings: Dict[str, np.ndarray] = {}
+        self._exact: Dict[str, List[int]] = {}
+        self._trie: Dict = {}
+        self.build(names)
+
+    @staticmethod
+    def normalize(name: str) -> Optional[str]:
+        """Misma normalización que _normalize_name del pipeline de datos."""
+        return DataNormalizers.normalize_player_name(name)
+
+    def build(self, names: Iterable[str]):
+        """(Re)construye trigramas y trie para la lista de nombres."""
+        self._names, self._normalized = [], []
+        self._exact, self._trie = {}, {}
+        postings: Dict[str, List[int]] = {}
+        gram_counts = []
+
+        for name in dict.fromkeys(names):
+            norm = self.normalize(name)
+            if not norm:
+                continue
+            name_id = len(self._names)
+            self._names.append(name)
+            self._normalized.append(norm)
+            self._exact.setdefault(norm, []).append(name_id)
+
+            grams = _trigrams(norm)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(name_id)
+
+            # Trie por cada palabra (y nombre completo) para autocompletar apellidos
+            words = norm.split()
+            for start in range(len(words)):
+                self._insert_prefixes(" ".join(words[start:]), name_id)
+
+        self._postings = {
+            gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()
+        }
+        self._gram_counts = np.asarray(gram_counts, dtype=np.int32)
+
+    def _insert_prefixes(self, text: str, name_id: int):
+        node = self._trie
+        for char in text:
+            node = node.setdefault(char, {})
+            ids = node.setdefault("", [])
+            if len(ids) < TRIE_NODE_LIMIT and name_id not in ids:
+                ids.append(name_id)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    # Búsqueda
+
+    def search(
+        self, query: str, threshold: float = 0.8, limit: int = 5
+    ) -> List[Tuple[str, float]]:
+        """
+        Búsqueda tolerante a typos.
+
+        Returns:
+            Lista [(nombre, similitud)] ordenada por similitud descendente
+        """
+        norm = self.normalize(query)
+        if not norm or not self._names:
+            return []
+
+        # Coincidencia exacta tras normalizar (acentos/mayúsculas)
+        if norm in self._exact:
+            return [(self._names[i], 1.0) for i in self._exact[norm][:limit]]
+
+        query_grams = _trigrams(norm)
+        lists = [self._postings[g] for g in query_grams if g in self._postings]
+        if not lists:
+            return []
+
+        shared = np.bincount(np.concatenate(lists), minlength=len(self._names))
+        # Coeficiente Dice sobre trigramas como cota barata de similitud
+        dice = 2.0 * shared / (len(query_grams) + self._gram_counts)
+        top = min(MAX_EXACT_CANDIDATES, int(np.count_nonzero(shared)))
+        candidates = np.argpartition(-dice, top - 1)[:top]
+
+        matcher = SequenceMatcher(None, "", norm)
+        matches = []
+        for name_id in candidates:
+            # SequenceMatcher cachea la segunda secuencia: query como b
+            matcher.set_seq1(self._normalized[name_id])
+            if matcher.real_quick_ratio() < threshold:
+                continue
+            if matcher.quick_ratio() < threshold:
+                continue
+            score = matcher.ratio()
+            if score >= threshold:
+                matches.append((self._names[name_id], score))
+
+        matches.sort(key=lambda x: x[1], reverse=True)
+        return matches[:limit]
+
+    def autocomplete(self, prefix: str, limit: int = 5) -> List[str]:
+        """Nombres cuyo nombre completo o alguna palabra empieza por prefix."""
+        norm = self.normalize(prefix)
+        if not norm:
+            return []
+
+        node = self._trie
+        for char in norm:
+            node = node.get(char)
+            if node is None:
+                return []
+        return [self._names[i] for i in node.get("", [])[:limit]]
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Row Hashes - Detección de cambios por jugador en los CSVs crudos de temporada.
+
+Cada fila del CSV crudo (data/thai_league_cache) se resume en un hash de
+contenido indexado por Wyscout id. Comparando con el manifiesto guardado en
+el último procesamiento se obtienen los jugadores nuevos, modificados y
+eliminados, de modo que solo esos se vuelven a procesar. Los CSVs procesados
+se parchean por líneas: las filas sin cambios se conservan byte a byte.
+
+Autor: Proyecto Fin de Máster - Python Aplicado al Deporte
+Fecha: Agosto 2025
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+ROW_KEY_COLUMN = "Wyscout id"
+ROW_HASHES_DIRNAME = ".row_hashes"
+
+
+def compute_row_hashes(df: pd.DataFrame) -> pd.Series:
+    """
+    Hash de contenido de cada fila, indexado por Wyscout id.
+
+    Las columnas numéricas se comparan como float64 y el resto como texto, para
+    que un entero leído como float (por un nulo en otra fila) no cuente como
+    cambio.
+    """
+    numeric = df.select_dtypes(include="number").astype("float64")
+    text = df.select_dtypes(exclude="number").astype(str)
+    canonical = pd.concat([numeric, text], axis=1)[df.columns]
+    hashes = pd.util.hash_pandas_object(canonical, index=False)
+    hashes.index = df[ROW_KEY_COLUMN].astype("int64").to_numpy()
+    return hashes
+
+
+def diff_row_hashes(
+    previous: pd.Series, current: pd.Series
+) -> Tuple[Set[int], Set[int]]:
+    """
+    Compara dos conjuntos de hashes.
+
+    Returns:
+        Tuple[ids nuevos o modificados, ids eliminados]
+    """
+    common = current.index.intersection(previous.index)
+    modified = common[previous[common].to_numpy() != current[common].to_numpy()]
+    changed = set(current.index.difference(previous.index).tolist())
+    changed.update(modified.tolist())
+    removed = set(previous.index.difference(current.index).tolist())
+    return changed, removed
+
+
+def has_unique_keys(df: pd.DataFrame) -> bool:
+    """True si todas las filas tienen un Wyscout id único."""
+    if ROW_KEY_COLUMN not in df.columns:
+        return False
+    keys = df[ROW_KEY_COLUMN]
+    return bool(keys.notna().all() and keys.is_unique)
+
+
+def read_csv_lines(
+    path: Path, key_columns: List[str]
+) -> Optional[Tuple[str, List[str], pd.DataFrame]]:
+    """
+    Cabecera, líneas de datos y columnas clave de un CSV.
+
+    Returns:
+        Tuple[cabecera, líneas, claves]; None si alguna fila ocupa varias líneas
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        lines = f.read().splitlines()
+    keys = pd.read_csv(path, usecols=key_columns)
+    if not lines or len(keys) != len(lines) - 1:
+        return None
+    return lines[0], lines[1:], keys
+
+
+def write_csv_lines(path: Path, header: str, lines: List[str]):
+    """Escribe cabecera y líneas de forma atómica (tmp + os.replace)."""
+    tmp_path = path.with_suffix(".csv.tmp")
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        f.write("\n".join([header, *lines]) + "\n")
+    os.replace(tmp_path, path)
+
+
+def load_row_hashes(path: Path) -> Optional[Dict]:
+    """
+    Lee el manifiesto de hashes de una temporada.
+
+    Returns:
+        Dict con columns, checked_at (datetime) y hashes (Series); None si no existe
+    """
+    if not path.exists():
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        hashes = manifest["hashes"]
+        return {
+            "columns": manifest["columns"],
+            "checked_at": datetime.fromisoformat(manifest["checked_at"]),
+            "hashes": pd.Series(
+                [int(value) for value in hashes.values()],
+                index=[int(key) for key in hashes],
+                dtype="uint64",
+            ),
+        }
+    except Exception as e:
+        logger.warning(f"⚠️ Manifiesto de hashes no válido en {path.name}: {e}")
+        return None
+
+
+def save_row_hashes(path: Path, hashes: pd.Series, columns: list):
+    """Guarda el manifiesto de hashes de forma atómica (tmp + os.replace)."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        manifest = {
+            "columns": list(columns),
+            "checked_at": datetime.now().isoformat(),
+            "hashes": {str(key): str(value) for key, value in hashes.items()},
+        }
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo guardar manifiesto de hashes: {e}")
@@ -368,20 +368,15 @@ class SeasonMonitor:
         try:
             self.logger.info(f"🔄 Ejecutando actualización automática para {season}")
 
-            # Usar BatchProcessor para procesar la temporada actualizada
-            update_result = self.batch_processor.preprocess_season_with_ml(
-                season, force_reprocess=True  # Forzar porque sabemos que hay cambios
-            )
+            # BatchProcessor re-deriva solo los jugadores cuyas filas cambiaron
+            # y parchea processed_{season}.csv y el cache completo
+            update_result = self.batch_processor.preprocess_season_with_ml(season)
 
             if update_result.get("success", False):
-                self.logger.info(f"✅ {season} actualizada exitosamente")
-
-                # Regenerar cache completo si es necesario
-                if not update_result.get("skipped", False):
-                    cache_result = self.batch_processor._generate_complete_cache()
-                    update_result["cache_regenerated"] = cache_result.get(
-                        "success", False
-                    )
+                self.logger.info(
+                    f"✅ {season} actualizada exitosamente "
+                    f"({update_result.get('update_mode', 'full')})"
+                )
 
             return update_result
 
@@ -406,25 +401,13 @@ class SeasonMonitor:
     def _needs_reprocessing(self, season: str) -> bool:
         """
         Determina si una temporada necesita reprocesamiento.
-        Combina verificación remota + estado de archivos locales.
+        Compara los hashes por jugador del CSV crudo con los del último
+        procesamiento (ver BatchProcessor._season_needs_update).
         """
         try:
-            processed_file = self.processed_dir / f"processed_{season}.csv"
-
-            # Si no existe archivo procesado, definitivamente necesita procesamiento
-            if not processed_file.exists():
-                return True
-
-            # Para temporadas activas, verificar antigüedad
-            if self._is_active_season_cached(season):
-                processed_time = datetime.fromtimestamp(processed_file.stat().st_mtime)
-                age_hours = (datetime.now() - processed_time).total_seconds() / 3600
-
-                # Si tiene más de 24 horas, reprocesar
-                return age_hours > 24
-
-            # Temporadas finales normalmente no necesitan reprocesamiento
-            return False
+            return self.batch_processor._season_needs_update(
+                season, is_active=self._is_active_season_cached(season)
+            )
 
         except Exception as e:
             self.logger.warning(f"Error verificando reprocesamiento {season}: {e}")
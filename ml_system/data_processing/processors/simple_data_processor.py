@@ -36,6 +36,7 @@ from ml_system.data_acquisition.extractors.thai_league_extractor import (
     ThaiLeagueExtractor,
 )
 from ml_system.data_processing.processors.position_mapper import map_position
+from ml_system.data_processing.storage import write_season_table
 from ml_system.deployment.utils.script_utils import print_header
 
 
@@ -328,9 +329,9 @@ def process_all_seasons():
                 df_final = add_basic_features(df_mapped)
                 print(f"   ✨ Features añadidas: {len(df_final.columns)} columnas")
 
-                # Guardar CSV procesado
+                # Guardar CSV procesado (y su Parquet)
                 output_file = processed_dir / f"processed_{season}.csv"
-                df_final.to_csv(output_file, index=False, encoding="utf-8")
+                write_season_table(df_final, output_file)
 
                 print(f"   💾 Guardado: {output_file.name}")
                 print(
@@ -354,7 +355,7 @@ def process_all_seasons():
 
             df_consolidated = pd.concat(all_dataframes, ignore_index=True)
             consolidated_file = processed_dir / "processed_complete.csv"
-            df_consolidated.to_csv(consolidated_file, index=False, encoding="utf-8")
+            write_season_table(df_consolidated, consolidated_file)
 
             print(f"   💾 CSV consolidado: {consolidated_file.name}")
             print(f"   📊 Total registros: {len(df_consolidated):,}")
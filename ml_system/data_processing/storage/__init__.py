@@ -0,0 +1,23 @@
+"""
+Storage Module - Almacenamiento columnar de datos Thai League.
+
+Parquet con esquema explícito (texto categórico en diccionario) junto a cada
+CSV de temporada, con proyección de columnas y filtros por temporada/posición.
+El CSV se mantiene como exportación compatible.
+"""
+
+from .season_storage import (
+    CATEGORICAL_COLUMNS,
+    columnar_path,
+    read_season_table,
+    write_csv_text,
+    write_season_table,
+)
+
+__all__ = [
+    "CATEGORICAL_COLUMNS",
+    "columnar_path",
+    "read_season_table",
+    "write_csv_text",
+    "write_season_table",
+]
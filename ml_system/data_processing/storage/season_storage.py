@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Season Storage - Almacenamiento columnar de temporadas Thai League.
+
+Cada CSV de temporada (crudo en data/thai_league_cache y procesado en
+data/thai_league_processed, incluido processed_complete) tiene un Parquet
+hermano con esquema explícito:
+1. Texto repetitivo (equipos, posiciones, temporada...) con codificación diccionario
+2. Enteros, decimales y booleanos con su tipo, sin re-inferir en cada lectura
+3. Un row group por temporada para que los filtros por temporada salten bloques
+
+El CSV se sigue escribiendo como exportación compatible. El Parquet se marca
+con el mtime del CSV; si el CSV cambia por otra vía (herramientas externas,
+parches por líneas), la siguiente lectura lo relee y regenera el Parquet.
+Cada escritura usa su propio fichero temporal y la regeneración del Parquet de
+una ruta se serializa con un lock, de modo que lectores concurrentes no lo
+reescriben a la vez. Sin pyarrow todo funciona sobre CSV.
+
+Autor: Proyecto Fin de Máster - Python Aplicado al Deporte
+Fecha: Agosto 2025
+"""
+
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    _pyarrow_available = True
+except ImportError:
+    _pyarrow_available = False
+
+logger = logging.getLogger(__name__)
+
+# Columnas de texto con pocos valores distintos (codificación diccionario)
+CATEGORICAL_COLUMNS = {
+    "season",
+    "Team",
+    "Team within selected timeframe",
+    "Team logo",
+    "Competition",
+    "Primary position",
+    "Secondary position",
+    "Third position",
+    "Position_Group",
+    "Contract expires",
+    "Birth country",
+    "Passport country",
+    "Foot",
+    "data_source",
+    "processing_date",
+}
+ROW_GROUP_COLUMN = "season"
+
+# Filtro estilo pyarrow: (columna, operador, valor)
+Filter = Tuple[str, str, Any]
+PathLike = Union[str, Path]
+
+# Un lock por Parquet: una sola regeneración a la vez por ruta
+_path_locks: Dict[Path, threading.RLock] = {}
+_path_locks_guard = threading.Lock()
+
+
+def columnar_path(csv_path: PathLike) -> Path:
+    """Ruta del Parquet asociado a un CSV de temporada."""
+    return Path(csv_path).with_suffix(".parquet")
+
+
+def _path_lock(path: Path) -> threading.RLock:
+    with _path_locks_guard:
+        return _path_locks.setdefault(path.resolve(), threading.RLock())
+
+
+def _temp_path(path: Path) -> Path:
+    """Fichero temporal único junto a path (mismo sistema de ficheros)."""
+    fd, tmp_name = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    os.close(fd)
+    return Path(tmp_name)
+
+
+def _replace_atomically(path: Path, write: Callable[[Path], None]):
+    """Escribe en un temporal único con write(tmp) y lo publica en path."""
+    tmp_path = _temp_path(path)
+    try:
+        write(tmp_path)
+        # mkstemp crea con 0600: conservar los permisos del fichero publicado
+        mode = path.stat().st_mode & 0o777 if path.exists() else 0o644
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _arrow_schema(df: pd.DataFrame) -> "pa.Schema":
+    """Esquema explícito: diccionario, bool, int64, float64 o string."""
+    fields = []
+    for column, values in df.items():
+        if column in CATEGORICAL_COLUMNS:
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        elif pd.api.types.is_bool_dtype(values):
+            arrow_type = pa.bool_()
+        elif pd.api.types.is_integer_dtype(values):
+            arrow_type = pa.int64()
+        elif pd.api.types.is_numeric_dtype(values):
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(str(column), arrow_type))
+    return pa.schema(fields)
+
+
+def _to_arrow_table(df: pd.DataFrame) -> "pa.Table":
+    schema = _arrow_schema(df)
+    arrays = []
+    for field, (_, values) in zip(schema, df.items()):
+        if pa.types.is_dictionary(field.type) or pa.types.is_string(field.type):
+            # "" se guarda como nulo: el CSV exportado se relee igual
+            text = values.astype("string").replace("", pd.NA)
+            array = pa.array(text, type=pa.string(), from_pandas=True)
+            if pa.types.is_dictionary(field.type):
+                array = array.dictionary_encode()
+        else:
+            array = pa.array(values, type=field.type, from_pandas=True)
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _write_parquet(df: pd.DataFrame, path: Path, stamp_from: Optional[Path]):
+    """Parquet atómico, un row group por bloque contiguo de temporada."""
+    table = _to_arrow_table(df)
+
+    bounds = [0, len(df)]
+    if ROW_GROUP_COLUMN in df.columns and len(df):
+        seasons = df[ROW_GROUP_COLUMN].astype(str).to_numpy()
+        changes = np.flatnonzero(seasons[1:] != seasons[:-1]) + 1
+        bounds = [0, *changes.tolist(), len(df)]
+
+    def _write(tmp_path: Path):
+        with pq.ParquetWriter(tmp_path, table.schema) as writer:
+            for start, end in zip(bounds[:-1], bounds[1:]):
+                writer.write_table(table.slice(start, end - start))
+        if stamp_from is not None and stamp_from.exists():
+            # Mismo mtime que el CSV: distinto = el CSV cambió después
+            mtime_ns = stamp_from.stat().st_mtime_ns
+            os.utime(tmp_path, ns=(mtime_ns, mtime_ns))
+
+    with _path_lock(path):
+        _replace_atomically(path, _write)
+
+
+def _is_fresh(csv_path: Path, parquet_path: Path) -> bool:
+    if not parquet_path.exists():
+        return False
+    if not csv_path.exists():
+        return True
+    return parquet_path.stat().st_mtime_ns >= csv_path.stat().st_mtime_ns
+
+
+def _apply_filters(df: pd.DataFrame, filters: Sequence[Filter]) -> pd.DataFrame:
+    """Mismos filtros que pyarrow, aplicados en pandas (ruta CSV)."""
+    mask = pd.Series(True, index=df.index)
+    for column, op, value in filters:
+        values = df[column]
+        if op in ("==", "="):
+            mask &= values == value
+        elif op == "!=":
+            mask &= values != value
+        elif op == "in":
+            mask &= values.isin(list(value))
+        elif op == "not in":
+            mask &= ~values.isin(list(value))
+        elif op == ">":
+            mask &= values > value
+        elif op == ">=":
+            mask &= values >= value
+        elif op == "<":
+            mask &= values < value
+        elif op == "<=":
+            mask &= values <= value
+        else:
+            raise ValueError(f"Operador de filtro no soportado: {op}")
+    return df[mask].reset_index(drop=True)
+
+
+def write_season_table(
+    df: pd.DataFrame, csv_path: PathLike, export_csv: bool = True
+) -> Path:
+    """
+    Guarda una tabla de temporada: CSV (exportación) y Parquet, ambos atómicos.
+
+    Args:
+        df: Datos a guardar
+        csv_path: Ruta del CSV; el Parquet se guarda al lado
+        export_csv: Si escribir también el CSV
+
+    Returns:
+        Ruta del fichero principal (Parquet, o CSV sin pyarrow)
+    """
+    csv_path = Path(csv_path)
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    if export_csv or not _pyarrow_available:
+        _replace_atomically(
+            csv_path, lambda tmp: df.to_csv(tmp, index=False, encoding="utf-8")
+        )
+
+    if not _pyarrow_available:
+        return csv_path
+    parquet_path = columnar_path(csv_path)
+    _write_parquet(df, parquet_path, stamp_from=csv_path if export_csv else None)
+    return parquet_path
+
+
+def write_csv_text(content: str, csv_path: PathLike, df: Optional[pd.DataFrame] = None):
+    """
+    Guarda un CSV tal cual (p. ej. el descargado) y su Parquet.
+
+    Args:
+        content: Texto CSV original
+        csv_path: Ruta del CSV
+        df: Contenido ya parseado (si no, se parsea el CSV)
+    """
+    csv_path = Path(csv_path)
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    _replace_atomically(csv_path, lambda tmp: tmp.write_text(content, encoding="utf-8"))
+
+    if _pyarrow_available:
+        if df is None:
+            df = pd.read_csv(csv_path)
+        _write_parquet(df, columnar_path(csv_path), stamp_from=csv_path)
+
+
+def read_season_table(
+    csv_path: PathLike,
+    columns: Optional[List[str]] = None,
+    filters: Optional[Sequence[Filter]] = None,
+    categorical: bool = False,
+) -> pd.DataFrame:
+    """
+    Lee una tabla de temporada con proyección de columnas y filtros.
+
+    Args:
+        csv_path: Ruta del CSV de la temporada (se usa su Parquet si está al día)
+        columns: Columnas a leer (None = todas)
+        filters: Lista de (columna, operador, valor) combinados con AND;
+            con Parquet se descartan row groups por sus estadísticas
+        categorical: Devolver las columnas diccionario como category
+
+    Returns:
+        DataFrame con los mismos valores que pd.read_csv del CSV
+
+    Raises:
+        FileNotFoundError: Si no existe ni el CSV ni el Parquet
+    """
+    csv_path = Path(csv_path)
+    parquet_path = columnar_path(csv_path)
+    filters = list(filters or [])
+
+    if _pyarrow_available and _is_fresh(csv_path, parquet_path):
+        try:
+            table = pq.read_table(
+                parquet_path, columns=columns, filters=filters or None
+            )
+            if not categorical:
+                table = table.cast(
+                    pa.schema(
+                        [
+                            (
+                                pa.field(f.name, f.type.value_type)
+                                if pa.types.is_dictionary(f.type)
+                                else f
+                            )
+                            for f in table.schema
+                        ]
+                    )
+                )
+            return table.to_pandas()
+        except Exception as e:
+            logger.warning(f"⚠️ Parquet no legible ({parquet_path.name}): {e}")
+
+    if not csv_path.exists():
+        raise FileNotFoundError(csv_path)
+
+    filter_columns = [column for column, _, _ in filters]
+    if columns is not None:
+        usecols = list(dict.fromkeys([*columns, *filter_columns]))
+        df = pd.read_csv(csv_path, usecols=usecols, encoding="utf-8")
+    else:
+        df = pd.read_csv(csv_path, encoding="utf-8")
+        # CSV completo: regenerar el Parquet para las siguientes lecturas
+        if _pyarrow_available:
+            try:
+                with _path_lock(parquet_path):
+                    # Otro lector pudo regenerarlo mientras esperábamos
+                    if not _is_fresh(csv_path, parquet_path):
+                        _write_parquet(df, parquet_path, stamp_from=csv_path)
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo generar {parquet_path.name}: {e}")
+
+    if filters:
+        df = _apply_filters(df, filters)
+    if columns is not None:
+        df = df[columns]
+    if categorical:
+        for column in CATEGORICAL_COLUMNS.intersection(df.columns):
+            df[column] = df[column].astype("category")
+    return df
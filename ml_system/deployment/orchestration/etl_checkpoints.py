@@ -0,0 +1,128 @@
+"""
+ETL Checkpoints - Salidas persistidas de cada fase CRISP-DM por temporada.
+
+Cada checkpoint corresponde a (temporada, fase) y se versiona con el hash de
+las entradas de la fase. Los hashes se encadenan (el de una fase incluye el de
+la anterior), de modo que al cambiar los datos crudos o los parámetros se
+invalidan la fase afectada y todas las posteriores.
+
+Autor: Proyecto Fin de Máster - Python Aplicado al Deporte
+Fecha: Agosto 2025
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Cambiar al modificar el contenido de los checkpoints
+CHECKPOINT_VERSION = "1.0"
+CHECKPOINTS_DIRNAME = ".etl_checkpoints"
+DEFAULT_CHECKPOINTS_PATH = (
+    Path(__file__).parents[3] / "data" / "thai_league_processed" / CHECKPOINTS_DIRNAME
+)
+
+
+def hash_phase_inputs(*values: Any) -> str:
+    """
+    Hash estable de las entradas de una fase.
+
+    DataFrames: hash de filas y columnas; resto de valores: repr().
+    """
+    digest = hashlib.md5(CHECKPOINT_VERSION.encode())
+    for value in values:
+        if isinstance(value, pd.DataFrame):
+            digest.update(repr(list(value.columns)).encode())
+            row_hashes = pd.util.hash_pandas_object(value, index=True)
+            digest.update(row_hashes.to_numpy().tobytes())
+        else:
+            digest.update(repr(value).encode())
+        digest.update(b"|")
+    return digest.hexdigest()
+
+
+class PhaseCheckpointStore:
+    """
+    Checkpoints de fases ETL en disco, escritos de forma atómica.
+
+    - Un pickle por (temporada, fase) con el hash de entradas que lo generó
+    - Un checkpoint con otro hash se ignora (la fase se vuelve a ejecutar)
+    - Al completar el pipeline se borran los de la temporada
+    """
+
+    def __init__(self, base_path: Union[str, Path] = DEFAULT_CHECKPOINTS_PATH):
+        self.base_path = Path(base_path)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "saved": 0}
+
+    def _path(self, season: str, phase: str) -> Path:
+        return self.base_path / f"{season}_{phase}.pkl"
+
+    def load(self, season: str, phase: str, input_hash: str) -> Optional[Any]:
+        """Salida guardada de la fase si se generó con las mismas entradas."""
+        path = self._path(season, phase)
+        checkpoint = None
+        if path.exists():
+            try:
+                with open(path, "rb") as f:
+                    checkpoint = pickle.load(f)
+            except Exception as e:
+                logger.warning(f"⚠️ Checkpoint ETL no válido en {path.name}: {e}")
+
+        valid = checkpoint is not None and checkpoint.get("input_hash") == input_hash
+        with self._lock:
+            self._stats["hits" if valid else "misses"] += 1
+        return checkpoint["output"] if valid else None
+
+    def save(self, season: str, phase: str, input_hash: str, output: Any):
+        """Guarda la salida de la fase (tmp + os.replace)."""
+        try:
+            self.base_path.mkdir(parents=True, exist_ok=True)
+            path = self._path(season, phase)
+            tmp_path = path.with_suffix(f".pkl.{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                pickle.dump(
+                    {"input_hash": input_hash, "output": output},
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(tmp_path, path)
+            with self._lock:
+                self._stats["saved"] += 1
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo guardar checkpoint ETL {phase}: {e}")
+
+    def has_pending(self, season: str) -> bool:
+        """True si hay una ejecución a medias de la temporada."""
+        return self.base_path.exists() and any(self.base_path.glob(f"{season}_*.pkl"))
+
+    def clear(self, season: Optional[str] = None):
+        """Borra los checkpoints de una temporada (o todos)."""
+        if not self.base_path.exists():
+            return
+        pattern = f"{season}_*.pkl" if season else "*.pkl"
+        for path in self.base_path.glob(pattern):
+            path.unlink(missing_ok=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores de uso de los checkpoints."""
+        with self._lock:
+            return dict(self._stats)
+
+
+_etl_checkpoint_store: Optional[PhaseCheckpointStore] = None
+
+
+def get_etl_checkpoint_store() -> PhaseCheckpointStore:
+    """Obtiene el almacén de checkpoints ETL compartido."""
+    global _etl_checkpoint_store
+    if _etl_checkpoint_store is None:
+        _etl_checkpoint_store = PhaseCheckpointStore()
+    return _etl_checkpoint_store
@@ -14,12 +14,17 @@ Integra completamente con los componentes existentes del ml_system:
 """
 
 import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import pandas as pd
 
-from controllers.db import get_db_session
+from controllers.db import POOL_SIZE, get_db_session
 from ml_system.data_acquisition.extractors.thai_league_extractor import (
     ThaiLeagueExtractor,
 )
@@ -27,8 +32,34 @@ from ml_system.data_processing.processors import simple_data_processor
 from ml_system.data_processing.processors.fuzzy_matcher import FuzzyMatcher
 from ml_system.evaluation.metrics.pdi_calculator import PDICalculator
 
+from .etl_checkpoints import (
+    PhaseCheckpointStore,
+    get_etl_checkpoint_store,
+    hash_phase_inputs,
+)
+
 logger = logging.getLogger(__name__)
 
+# Fases CRISP-DM en orden de ejecución (cada una depende de la anterior)
+ETL_PHASES = (
+    "business_understanding",
+    "data_understanding",
+    "data_preparation",
+    "modeling",
+    "evaluation",
+    "deployment",
+)
+# Fases que usan conexiones de BD: limitadas al tamaño del pool
+DB_BOUND_PHASES = {
+    "business_understanding",
+    "data_preparation",
+    "modeling",
+    "evaluation",
+}
+
+# Límite compartido por todos los coordinadores del proceso
+_db_phase_gate = threading.BoundedSemaphore(POOL_SIZE)
+
 
 class ETLCoordinator:
     """
@@ -48,14 +79,23 @@ class ETLCoordinator:
     - Integra PDI Calculator y PlayerAnalyzer para métricas ML
     """
 
-    def __init__(self, session_factory=None):
+    def __init__(
+        self,
+        session_factory=None,
+        checkpoint_store: Optional[PhaseCheckpointStore] = None,
+        db_gate=None,
+    ):
         """
         Inicializa el coordinador ETL con componentes ml_system.
 
         Args:
             session_factory: Factory para sesiones de BD (opcional)
+            checkpoint_store: Checkpoints de fases (por defecto el compartido)
+            db_gate: Semáforo para fases con BD (por defecto el del proceso)
         """
         self.session_factory = session_factory or get_db_session
+        self.checkpoints = checkpoint_store or get_etl_checkpoint_store()
+        self.db_gate = db_gate or _db_phase_gate
 
         # Componentes ml_system (CRISP-DM phases)
         self.extractor = ThaiLeagueExtractor()  # Data Understanding + Preparation
@@ -81,10 +121,14 @@ class ETLCoordinator:
         threshold: int = 85,
         force_reload: bool = False,
         calculate_pdi: bool = True,
+        resume: bool = True,
     ) -> Tuple[bool, str, Dict]:
         """
         Ejecuta pipeline ETL completo usando metodología CRISP-DM.
 
+        Las fases 3-5 guardan checkpoint de su salida; si una ejecución falla,
+        la siguiente reutiliza las fases ya completadas con las mismas entradas.
+
         Fases implementadas:
         1. Business Understanding - Validación de objetivos y temporada
         2. Data Understanding - Extracción y exploración inicial
@@ -98,12 +142,18 @@ class ETLCoordinator:
             threshold: Umbral para fuzzy matching (0-100)
             force_reload: Si forzar recarga aunque existan datos
             calculate_pdi: Si calcular métricas PDI automáticamente
+            resume: Si reutilizar checkpoints de una ejecución incompleta
 
         Returns:
             Tuple[success, message, comprehensive_results]
         """
         logger.info(f"🎯 Iniciando pipeline CRISP-DM para temporada {season}")
 
+        if not resume:
+            self.checkpoints.clear(season)
+        # Una ejecución a medias ya pasó la validación de "temporada procesada"
+        resuming = self.checkpoints.has_pending(season)
+
         results = {
             "season": season,
             "methodology": "CRISP-DM",
@@ -113,16 +163,23 @@ class ETLCoordinator:
             "errors": [],
             "warnings": [],
             "execution_time": None,
+            "phase_timings": {},
             "crisp_dm_compliance": True,
         }
+        timings = results["phase_timings"]
 
         start_time = datetime.now()
 
         try:
             # === PHASE 1: BUSINESS UNDERSTANDING ===
             logger.info("🎯 PHASE 1: BUSINESS UNDERSTANDING - Validando objetivos...")
-            business_success, business_msg = self._phase_1_business_understanding(
-                season, force_reload
+            business_success, business_msg = self._run_phase(
+                "business_understanding",
+                season,
+                timings,
+                lambda: self._phase_1_business_understanding(
+                    season, force_reload or resuming
+                ),
             )
 
             results["pipeline_phases"]["business_understanding"] = {
@@ -137,7 +194,12 @@ class ETLCoordinator:
 
             # === PHASE 2: DATA UNDERSTANDING ===
             logger.info("📊 PHASE 2: DATA UNDERSTANDING - Explorando datos...")
-            raw_df, data_understanding_report = self._phase_2_data_understanding(season)
+            raw_df, data_understanding_report = self._run_phase(
+                "data_understanding",
+                season,
+                timings,
+                lambda: self._phase_2_data_understanding(season),
+            )
 
             results["pipeline_phases"]["data_understanding"] = {
                 "success": True,
@@ -153,8 +215,15 @@ class ETLCoordinator:
 
             # === PHASE 3: DATA PREPARATION ===
             logger.info("🧹 PHASE 3: DATA PREPARATION - Preparando datos...")
-            prepared_df, matching_results, prep_stats = self._phase_3_data_preparation(
-                raw_df, season, threshold
+            # Hashes encadenados: cambiar los datos o parámetros invalida lo posterior
+            preparation_hash = hash_phase_inputs(season, raw_df, threshold)
+            prepared_df, matching_results, prep_stats = self._run_phase(
+                "data_preparation",
+                season,
+                timings,
+                lambda: self._phase_3_data_preparation(raw_df, season, threshold),
+                input_hash=preparation_hash,
+                succeeded=lambda output: len(output[0]) > 0,
             )
 
             results["pipeline_phases"]["data_preparation"] = {
@@ -167,8 +236,14 @@ class ETLCoordinator:
 
             # === PHASE 4: MODELING ===
             logger.info("🔬 PHASE 4: MODELING - Aplicando lógica de negocio...")
-            modeling_success, modeling_stats = self._phase_4_modeling(
-                season, prepared_df, matching_results
+            modeling_hash = hash_phase_inputs(preparation_hash)
+            modeling_success, modeling_stats = self._run_phase(
+                "modeling",
+                season,
+                timings,
+                lambda: self._phase_4_modeling(season, prepared_df, matching_results),
+                input_hash=modeling_hash,
+                succeeded=lambda output: output[0],
             )
 
             results["pipeline_phases"]["modeling"] = {
@@ -183,8 +258,15 @@ class ETLCoordinator:
 
             # === PHASE 5: EVALUATION ===
             logger.info("📈 PHASE 5: EVALUATION - Análisis y métricas ML...")
-            evaluation_success, evaluation_report = self._phase_5_evaluation(
-                season, prepared_df, matching_results, calculate_pdi
+            evaluation_success, evaluation_report = self._run_phase(
+                "evaluation",
+                season,
+                timings,
+                lambda: self._phase_5_evaluation(
+                    season, prepared_df, matching_results, calculate_pdi
+                ),
+                input_hash=hash_phase_inputs(modeling_hash, calculate_pdi),
+                succeeded=lambda output: output[0],
             )
 
             results["pipeline_phases"]["evaluation"] = {
@@ -195,9 +277,20 @@ class ETLCoordinator:
                 "ml_insights": evaluation_report.get("ml_insights", {}),
             }
 
+            if not evaluation_success:
+                error = evaluation_report.get("error", "sin detalle")
+                results["pipeline_phases"]["evaluation"]["error"] = error
+                results["errors"].append(f"Evaluation: {error}")
+                return False, f"Evaluation phase failed: {error}", results
+
             # === PHASE 6: DEPLOYMENT ===
             logger.info("🚀 PHASE 6: DEPLOYMENT - Finalizando y reporting...")
-            deployment_report = self._phase_6_deployment(results)
+            deployment_report = self._run_phase(
+                "deployment",
+                season,
+                timings,
+                lambda: self._phase_6_deployment(results),
+            )
 
             results["pipeline_phases"]["deployment"] = {
                 "success": True,
@@ -227,6 +320,9 @@ class ETLCoordinator:
                 f"Cargados: {modeling_stats.get('loaded_records', 0)} registros con {len(matching_results.get('exact_matches', []))} matches exactos"
             )
 
+            # Pipeline completo: los checkpoints de la temporada ya no hacen falta
+            self.checkpoints.clear(season)
+
             logger.info(success_msg)
             return True, success_msg, results
 
@@ -239,6 +335,146 @@ class ETLCoordinator:
             results["execution_time"] = str(datetime.now() - start_time)
             return False, error_msg, results
 
+    def execute_multi_season_pipeline(
+        self,
+        seasons: Optional[List[str]] = None,
+        threshold: int = 85,
+        force_reload: bool = False,
+        calculate_pdi: bool = True,
+        max_workers: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Ejecuta el pipeline CRISP-DM de varias temporadas en paralelo.
+
+        Las temporadas son independientes: cada una corre en un proceso del
+        pool con sus fases en orden. Las fases con BD de todos los procesos
+        comparten un semáforo del tamaño del pool de conexiones.
+
+        Args:
+            seasons: Temporadas a procesar (por defecto todas las disponibles)
+            threshold: Umbral para fuzzy matching (0-100)
+            force_reload: Si forzar recarga aunque existan datos
+            calculate_pdi: Si calcular métricas PDI automáticamente
+            max_workers: Procesos en paralelo (por defecto nº de CPUs)
+
+        Returns:
+            Dict con resultado y tiempos por fase de cada temporada
+        """
+        seasons = list(seasons or self.get_available_seasons())
+        workers = min(len(seasons), max_workers or os.cpu_count() or 1)
+        # Una session_factory personalizada no se puede enviar a otro proceso
+        if self.session_factory is not get_db_session:
+            workers = 1
+
+        options = {
+            "threshold": threshold,
+            "force_reload": force_reload,
+            "calculate_pdi": calculate_pdi,
+        }
+        logger.info(
+            f"🏭 Pipeline multi-temporada: {len(seasons)} temporadas, "
+            f"{workers} procesos"
+        )
+
+        start = time.perf_counter()
+        outcomes = {}
+        if workers <= 1:
+            for season in seasons:
+                outcomes[season] = _summarize_season_run(
+                    *self.execute_full_crisp_dm_pipeline(season, **options)
+                )
+        else:
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=context,
+                initializer=_init_etl_worker,
+                initargs=(context.BoundedSemaphore(POOL_SIZE),),
+            ) as pool:
+                futures = {
+                    pool.submit(
+                        _run_season_pipeline,
+                        season,
+                        options,
+                        str(self.checkpoints.base_path),
+                    ): season
+                    for season in seasons
+                }
+                for future in as_completed(futures):
+                    season = futures[future]
+                    try:
+                        outcomes[season] = future.result()
+                    except Exception as e:
+                        logger.error(f"Error en proceso ETL de {season}: {e}")
+                        outcomes[season] = {
+                            "success": False,
+                            "message": str(e),
+                            "phase_timings": {},
+                            "final_stats": {},
+                        }
+
+        return {
+            "seasons": {season: outcomes[season] for season in seasons},
+            "seasons_successful": sum(o["success"] for o in outcomes.values()),
+            "seasons_failed": [s for s in seasons if not outcomes[s]["success"]],
+            "workers": workers,
+            "total_seconds": round(time.perf_counter() - start, 3),
+        }
+
+    def _run_phase(
+        self,
+        phase: str,
+        season: str,
+        timings: Dict,
+        run: Callable[[], Any],
+        input_hash: Optional[str] = None,
+        succeeded: Callable[[Any], bool] = bool,
+    ) -> Any:
+        """
+        Ejecuta una fase con checkpoint, límite de conexiones y medición de tiempo.
+
+        Args:
+            phase: Nombre de la fase (ETL_PHASES)
+            season: Temporada
+            timings: Dict donde se registra el tiempo de la fase
+            run: Función que ejecuta la fase
+            input_hash: Hash de entradas; None si la fase no usa checkpoint
+            succeeded: Decide si la salida es válida para guardarla
+
+        Returns:
+            Salida de la fase (ejecutada o recuperada del checkpoint)
+        """
+        if input_hash is not None:
+            output = self.checkpoints.load(season, phase, input_hash)
+            if output is not None:
+                logger.info(f"⏭️ {phase}: reutilizando checkpoint de {season}")
+                timings[phase] = {
+                    "seconds": 0.0,
+                    "db_wait_seconds": 0.0,
+                    "from_checkpoint": True,
+                }
+                return output
+
+        db_bound = phase in DB_BOUND_PHASES
+        start = time.perf_counter()
+        if db_bound:
+            self.db_gate.acquire()
+        db_wait = time.perf_counter() - start
+        try:
+            output = run()
+        finally:
+            if db_bound:
+                self.db_gate.release()
+
+        timings[phase] = {
+            "seconds": round(time.perf_counter() - start - db_wait, 3),
+            "db_wait_seconds": round(db_wait, 3),
+            "from_checkpoint": False,
+        }
+        if input_hash is not None and succeeded(output):
+            self.checkpoints.save(season, phase, input_hash, output)
+        return output
+
     def _phase_1_business_understanding(
         self, season: str, force_reload: bool
     ) -> Tuple[bool, str]:
@@ -548,6 +784,9 @@ class ETLCoordinator:
                 logger.info("📈 Evaluation: Calculando métricas PDI...")
                 pdi_summary = self._calculate_pdi_for_season(season, matching_results)
                 evaluation_report["pdi_summary"] = pdi_summary
+                if "error" in pdi_summary:
+                    evaluation_report["error"] = pdi_summary["error"]
+                    return False, evaluation_report
 
                 # ML Insights usando PlayerAnalyzer
                 ml_insights = self._generate_ml_insights(season, matching_results)
@@ -673,7 +912,7 @@ class ETLCoordinator:
             return {"validation_success": False, "error": str(e)}
 
     def _calculate_pdi_for_season(self, season: str, matching_results: Dict) -> Dict:
-        """Calcula PDI para jugadores matcheados de la temporada."""
+        """Calcula PDI de toda la temporada en lote si hay jugadores matcheados."""
         try:
             pdi_summary = {
                 "season": season,
@@ -691,31 +930,26 @@ class ETLCoordinator:
                 )
                 return pdi_summary
 
-            pdi_values = []
-            calculated_players = 0
+            # Recalcular toda la temporada en un solo lote vectorizado
+            batch_summary = self.pdi_calculator.calculate_metrics_batch([season])
+            calculated_players = batch_summary.get("rows", 0)
 
-            for match_data in exact_matches[:10]:  # Limitar para prueba
-                try:
-                    player_id = match_data.get("player_id")
-                    if player_id:
-                        metrics = self.pdi_calculator.get_or_calculate_metrics(
-                            player_id, season, force_recalculate=False
-                        )
-                        if metrics and metrics.pdi_overall:
-                            pdi_values.append(metrics.pdi_overall)
-                            calculated_players += 1
-
-                except Exception as e:
-                    logger.debug(f"Error calculating PDI for player {player_id}: {e}")
-                    continue
+            if "error" in batch_summary:
+                logger.error(
+                    f"❌ Error en el cálculo PDI por lotes de {season}: "
+                    f"{batch_summary['error']}"
+                )
+                pdi_summary["error"] = batch_summary["error"]
+                return pdi_summary
 
-            if pdi_values:
+            if calculated_players:
                 pdi_summary.update(
                     {
                         "players_calculated": calculated_players,
-                        "avg_pdi_overall": round(sum(pdi_values) / len(pdi_values), 2),
-                        "max_pdi": round(max(pdi_values), 2),
-                        "min_pdi": round(min(pdi_values), 2),
+                        "avg_pdi_overall": batch_summary["avg_pdi_overall"],
+                        "max_pdi": batch_summary["max_pdi_overall"],
+                        "min_pdi": batch_summary["min_pdi_overall"],
+                        "calculation_time_ms": batch_summary["total_ms"],
                         "calculation_success": True,
                     }
                 )
@@ -901,3 +1135,32 @@ class ETLCoordinator:
             )
             logger.error(error_msg)
             return False, error_msg
+
+
+def _summarize_season_run(success: bool, message: str, results: Dict) -> Dict:
+    """Resumen serializable de una ejecución para el panel ETL."""
+    return {
+        "success": success,
+        "message": message,
+        "phase_timings": results.get("phase_timings", {}),
+        "final_stats": results.get("final_stats", {}),
+    }
+
+
+# Procesos del pool multi-temporada (spawn): semáforo de BD compartido
+_worker_db_gate = None
+
+
+def _init_etl_worker(db_gate):
+    global _worker_db_gate
+    _worker_db_gate = db_gate
+
+
+def _run_season_pipeline(season: str, options: Dict, checkpoints_path: str) -> Dict:
+    coordinator = ETLCoordinator(
+        checkpoint_store=PhaseCheckpointStore(checkpoints_path),
+        db_gate=_worker_db_gate,
+    )
+    return _summarize_season_run(
+        *coordinator.execute_full_crisp_dm_pipeline(season, **options)
+    )
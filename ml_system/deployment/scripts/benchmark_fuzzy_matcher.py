@@ -0,0 +1,144 @@
+"""
+Benchmark del FuzzyMatcher indexado frente al recorrido lineal original.
+
+Genera jugadores y filas de CSV sintéticos (nombres por sílabas, con
+WyscoutID, nombre exacto, typos y desconocidos) y compara el matching por
+índice de bigramas con _match_players_linear, comprobando que el resultado
+es idéntico.
+
+Uso:
+    python ml_system/deployment/scripts/benchmark_fuzzy_matcher.py
+"""
+
+import logging
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+project_root = Path(__file__).parents[3]
+sys.path.append(str(project_root))
+
+from ml_system.data_processing.processors.fuzzy_matcher import (  # noqa: E402
+    FuzzyMatcher,
+)
+
+SYLLABLES = (
+    "cha na thip song kra sin ti sak chai wat pong su pa chok kit "
+    "phan wong sri rat ana lu cas mar nez jo se pe dro"
+).split()
+
+
+def synthetic_name(rng: np.random.Generator) -> str:
+    """Nombre de 2-3 palabras formadas por sílabas aleatorias."""
+    words = []
+    for _ in range(int(rng.integers(2, 4))):
+        parts = rng.choice(SYLLABLES, size=int(rng.integers(2, 4)))
+        words.append("".join(parts).capitalize())
+    return " ".join(words)
+
+
+def with_typo(name: str, rng: np.random.Generator) -> str:
+    """Introduce una sustitución o un borrado en el nombre."""
+    chars = list(name)
+    pos = int(rng.integers(1, len(chars) - 1))
+    if rng.random() < 0.5:
+        chars[pos] = "x"
+    else:
+        del chars[pos]
+    return "".join(chars)
+
+
+def synthetic_players(n_players: int, rng: np.random.Generator) -> List:
+    """Pares (player, user) con la forma que devuelve la consulta de la BD."""
+    players = []
+    for i in range(n_players):
+        player = SimpleNamespace(player_id=i + 1, wyscout_id=100000 + i)
+        user = SimpleNamespace(user_id=i + 1, name=synthetic_name(rng))
+        players.append((player, user))
+    return players
+
+
+def synthetic_csv(players: List, n_rows: int, rng: np.random.Generator):
+    """30% WyscoutID, 20% nombre exacto, 30% con typo y 20% desconocidos."""
+    names, ids = [], []
+    for _ in range(n_rows):
+        player, user = players[int(rng.integers(len(players)))]
+        roll = rng.random()
+        if roll < 0.3:
+            names.append(user.name)
+            ids.append(player.wyscout_id)
+        elif roll < 0.5:
+            names.append(f" {user.name.upper()} ")
+            ids.append(0)
+        elif roll < 0.8:
+            names.append(with_typo(user.name, rng))
+            ids.append(0)
+        else:
+            names.append(synthetic_name(rng))
+            ids.append(0)
+    return pd.DataFrame({"Full name": names, "Wyscout id": ids})
+
+
+def benchmark_fuzzy_matcher(
+    n_players: int = 10000,
+    n_rows: int = 10000,
+    threshold: int = 85,
+    legacy_rows: int = 100,
+    workers: Optional[int] = None,
+    seed: int = 42,
+) -> Dict:
+    """
+    Compara el matching indexado con el recorrido lineal original.
+
+    El lineal es O(filas × jugadores), así que se mide sobre legacy_rows filas
+    y se extrapola; sobre esas filas se comprueba que el resultado es idéntico.
+
+    Returns:
+        Dict con tiempos (s), filas/s, speedup estimado e igualdad de resultados
+    """
+    rng = np.random.default_rng(seed)
+    players = synthetic_players(n_players, rng)
+    df = synthetic_csv(players, n_rows, rng)
+    matcher = FuzzyMatcher(session_factory=lambda: None)
+
+    matcher_logger = logging.getLogger(FuzzyMatcher.__module__)
+    previous_level = matcher_logger.level
+    matcher_logger.setLevel(logging.WARNING)
+    try:
+        start = time.perf_counter()
+        matcher.match_players(players, df, threshold, workers)
+        indexed_s = time.perf_counter() - start
+
+        sample = df.head(legacy_rows)
+        start = time.perf_counter()
+        legacy = matcher._match_players_linear(players, sample, threshold)
+        legacy_s = (time.perf_counter() - start) * n_rows / len(sample)
+        identical = legacy == matcher.match_players(players, sample, threshold)
+    finally:
+        matcher_logger.setLevel(previous_level)
+
+    return {
+        "players": n_players,
+        "rows": n_rows,
+        "indexed_s": round(indexed_s, 2),
+        "indexed_rows_per_sec": round(n_rows / indexed_s, 1),
+        "legacy_estimated_s": round(legacy_s, 1),
+        "speedup": round(legacy_s / indexed_s, 1),
+        "identical_on_sample": identical,
+    }
+
+
+def main() -> int:
+    print("🔍 Benchmark FuzzyMatcher (10k jugadores × 10k filas)")
+    for key, value in benchmark_fuzzy_matcher().items():
+        print(f"   • {key}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
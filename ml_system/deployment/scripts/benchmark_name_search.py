@@ -0,0 +1,112 @@
+"""
+Benchmark de la búsqueda fuzzy de jugadores del LookupEngine.
+
+Compara NameSearchIndex (trigramas + SequenceMatcher sobre candidatos) con la
+ruta anterior, que puntuaba con difflib todos los nombres indexados. Las
+consultas son nombres reales de los CSVs procesados con un typo aleatorio.
+
+Uso:
+    python ml_system/deployment/scripts/benchmark_name_search.py
+"""
+
+import sys
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+project_root = Path(__file__).parents[3]
+sys.path.append(str(project_root))
+
+from ml_system.data_processing.processors.name_search import (  # noqa: E402
+    NameSearchIndex,
+)
+from ml_system.data_processing.storage import read_season_table  # noqa: E402
+
+
+def legacy_fuzzy_search(
+    names: List[str], query: str, threshold: float = 0.8
+) -> List[Tuple[str, float]]:
+    """Ruta anterior de LookupEngine: SequenceMatcher contra todos los nombres."""
+    matches = []
+    query_lower = query.lower()
+    for name in names:
+        similarity = SequenceMatcher(None, query_lower, name.lower()).ratio()
+        if similarity >= threshold:
+            matches.append((name, similarity))
+    matches.sort(key=lambda x: x[1], reverse=True)
+    return matches[:5]
+
+
+def make_typo(name: str, rng: np.random.Generator) -> str:
+    """Introduce una sustitución, borrado o transposición en el nombre."""
+    chars = list(name)
+    pos = int(rng.integers(1, max(2, len(chars) - 1)))
+    op = rng.integers(3)
+    if op == 0:
+        chars[pos] = "x"  # sustitución
+    elif op == 1:
+        del chars[pos]  # borrado
+    else:
+        chars[pos - 1], chars[pos] = chars[pos], chars[pos - 1]  # transposición
+    return "".join(chars)
+
+
+def benchmark_name_search(
+    names: List[str], n_queries: int = 200, seed: int = 42
+) -> Dict[str, float]:
+    """
+    Compara latencia y acierto del índice frente al escaneo lineal con difflib.
+
+    Returns:
+        Dict con tiempos medios (ms) y tasa de acierto del top-1 de cada ruta
+    """
+    rng = np.random.default_rng(seed)
+    unique_names = list(dict.fromkeys(n for n in names if isinstance(n, str)))
+    targets = [unique_names[i] for i in rng.integers(len(unique_names), size=n_queries)]
+    queries = [make_typo(name, rng) for name in targets]
+
+    start = time.perf_counter()
+    index = NameSearchIndex(unique_names)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    results = {}
+    for label, search in (
+        ("legacy", lambda q: legacy_fuzzy_search(unique_names, q)),
+        ("index", lambda q: index.search(q)),
+    ):
+        hits = 0
+        start = time.perf_counter()
+        for query, target in zip(queries, targets):
+            found = search(query)
+            hits += bool(found) and found[0][0] == target
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        results[f"{label}_avg_ms"] = round(elapsed_ms / n_queries, 4)
+        results[f"{label}_top1_hit_rate"] = round(hits / n_queries, 3)
+
+    results["index_build_ms"] = round(build_ms, 2)
+    results["names"] = len(unique_names)
+    results["speedup"] = round(results["legacy_avg_ms"] / results["index_avg_ms"], 1)
+    return results
+
+
+def main() -> int:
+    processed_dir = project_root / "data" / "thai_league_processed"
+    all_names = []
+    for csv_file in sorted(processed_dir.glob("processed_*.csv")):
+        all_names.extend(read_season_table(csv_file, columns=["Player"])["Player"])
+
+    if not all_names:
+        print("❌ No hay CSVs procesados para el benchmark")
+        return 1
+
+    print("🔍 Benchmark búsqueda fuzzy de jugadores")
+    for key, value in benchmark_name_search(all_names).items():
+        print(f"   • {key}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -44,6 +44,7 @@ warnings.filterwarnings("ignore", category=FutureWarning)
 
 # Imports de módulos del proyecto (actualizados para nueva estructura)
 try:
+    from ml_system.data_processing.storage import read_season_table
     from ml_system.evaluation.analysis.advanced_features import AdvancedFeatureEngineer
     from ml_system.evaluation.analysis.evaluation_pipeline import (
         EvaluationConfig,
@@ -119,7 +120,7 @@ class AdvancedMLPipeline:
 
         for file_path in data_files:
             try:
-                season_data = pd.read_csv(file_path, encoding="utf-8")
+                season_data = read_season_table(file_path)
 
                 # Extraer temporada del nombre del archivo
                 season = file_path.stem.replace("thai_league_", "")
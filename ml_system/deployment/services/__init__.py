@@ -7,13 +7,18 @@ Este módulo contiene los servicios para el despliegue en producción del
 sistema de predicción PDI optimizado con MAE 3.692.
 
 Componentes principales:
-- model_loader: Carga automática del mejor modelo disponible
+- model_loader: Carga automática del mejor modelo disponible y registro compartido
 - pdi_prediction_service: Servicio principal de predicciones
+- feature_store: Matrices de features por temporada para predicción por lotes
 """
 
 __all__ = [
     "ModelLoader",
     "load_production_model",
+    "ModelRegistry",
+    "get_model_registry",
     "PdiPredictionService",
     "get_pdi_prediction_service",
+    "SeasonFeatureStore",
+    "get_season_feature_store",
 ]
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+Season Feature Store - Matrices de features por temporada para predicción PDI
+
+Materializa una vez por temporada la matriz jugador × feature que espera el
+modelo de producción, en su orden exacto de columnas, a partir de los CSVs
+procesados (fallback: ProfessionalStats + MLMetrics). La matriz se
+reconstruye cuando cambian los ficheros de origen y, como también depende de
+la BD (player_id por wyscout_id, fallback), cada DB_REFRESH_SECONDS.
+
+Autor: Proyecto Fin de Máster - Python Aplicado al Deporte
+Fecha: Agosto 2025
+"""
+
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+import pandas as pd
+
+from controllers.db import get_db_session
+from ml_system.data_processing.storage import read_season_table
+from ml_system.evaluation.analysis.advanced_features import LegacyFeatureWeights
+from models import MLMetrics, ProfessionalStats
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROCESSED_DIR = Path(__file__).parents[3] / "data" / "thai_league_processed"
+
+# Vigencia de lo leído de BD (ProfessionalStats/MLMetrics no tienen mtime)
+DB_REFRESH_SECONDS = 15 * 60
+
+# Orden exacto de features del modelo XGBoost entrenado (113 columnas)
+MODEL_FEATURE_COLUMNS = [
+    "Primary_position_pct",
+    "Secondary_position_pct",
+    "Third_position_pct",
+    "age",
+    "market_value",
+    "minutes_played",
+    "duels_per_90",
+    "duels_won_pct",
+    "height",
+    "weight",
+    "On_loan",
+    "defensive_duels_per_90",
+    "defensive_duels_won_pct",
+    "aerial_duels_per_90",
+    "aerial_duels_won_pct",
+    "PAdj_Sliding_tackles",
+    "Shots_blocked_per_90",
+    "interceptions_per_90",
+    "PAdj_Interceptions",
+    "fouls_per_90",
+    "yellow_cards",
+    "yellow_cards_per_90",
+    "red_cards",
+    "red_cards_per_90",
+    "Successful_attacking_actions_per_90",
+    "goals_per_90",
+    "Non-penalty_goals",
+    "Non-penalty_goals_per_90",
+    "xg_per_90",
+    "Head_goals",
+    "Head_goals_per_90",
+    "shots_per_90",
+    "shots_on_target_pct",
+    "goal_conversion_pct",
+    "assists_per_90",
+    "Crosses_per_90",
+    "Accurate_crosses_pct",
+    "Crosses_from_left_flank_per_90",
+    "Accurate_crosses_from_left_flank_pct",
+    "Crosses_from_right_flank_per_90",
+    "Accurate_crosses_from_right_flank_pct",
+    "Crosses_to_goalie_box_per_90",
+    "dribbles_per_90",
+    "dribbles_success_pct",
+    "offensive_duels_per_90",
+    "offensive_duels_won_pct",
+    "touches_in_box_per_90",
+    "progressive_runs_per_90",
+    "Accelerations_per_90",
+    "Received_passes_per_90",
+    "Received_long_passes_per_90",
+    "fouls_suffered_per_90",
+    "passes_per_90",
+    "pass_accuracy_pct",
+    "forward_passes_per_90",
+    "forward_passes_accuracy_pct",
+    "back_passes_per_90",
+    "back_passes_accuracy_pct",
+    "Short_/_medium_passes_per_90",
+    "Accurate_short_/_medium_passes_pct",
+    "long_passes_per_90",
+    "long_passes_accuracy_pct",
+    "Average_pass_length_m",
+    "Average_long_pass_length_m",
+    "xa_per_90",
+    "Shot_assists_per_90",
+    "Second_assists_per_90",
+    "Third_assists_per_90",
+    "Smart_passes_per_90",
+    "Accurate_smart_passes_pct",
+    "key_passes_per_90",
+    "Passes_to_final_third_per_90",
+    "Accurate_passes_to_final_third_pct",
+    "Passes_to_penalty_area_per_90",
+    "Accurate_passes_to_penalty_area_pct",
+    "Through_passes_per_90",
+    "Accurate_through_passes_pct",
+    "Deep_completions_per_90",
+    "Deep_completed_crosses_per_90",
+    "Progressive_passes_per_90",
+    "Accurate_progressive_passes_pct",
+    "Accurate_vertical_passes_pct",
+    "Vertical_passes_per_90",
+    "Conceded_goals",
+    "Conceded_goals_per_90",
+    "Shots_against",
+    "Shots_against_per_90",
+    "Clean_sheets",
+    "Save_rate_pct",
+    "xG_against",
+    "xG_against_per_90",
+    "Prevented_goals",
+    "Prevented_goals_per_90",
+    "Back_passes_received_as_GK_per_90",
+    "Exits_per_90",
+    "Aerial_duels_per_90.1",
+    "Free_kicks_per_90",
+    "Direct_free_kicks_per_90",
+    "Direct_free_kicks_on_target_pct",
+    "Corners_per_90",
+    "Penalties_taken",
+    "Penalty_conversion_pct",
+    "PDI",
+    "ml_features_applied",
+    "pos_GK",
+    "pos_CB",
+    "pos_FB",
+    "pos_DMF",
+    "pos_CMF",
+    "pos_AMF",
+    "pos_W",
+    "pos_CF",
+    "pdi_overall_lag1",
+]
+
+POSITION_GROUPS = ["GK", "CB", "FB", "DMF", "CMF", "AMF", "W", "CF"]
+
+# Columnas del CSV cuyo nombre en el modelo no sigue la regla genérica
+CSV_FEATURE_ALIASES = {
+    "Age": "age",
+    "Market value": "market_value",
+    "Minutes played": "minutes_played",
+    "Height": "height",
+    "Weight": "weight",
+    "Duels per 90": "duels_per_90",
+    "Duels won, %": "duels_won_pct",
+    "Defensive duels per 90": "defensive_duels_per_90",
+    "Defensive duels won, %": "defensive_duels_won_pct",
+    "Aerial duels per 90": "aerial_duels_per_90",
+    "Aerial duels won, %": "aerial_duels_won_pct",
+    "Interceptions per 90": "interceptions_per_90",
+    "Fouls per 90": "fouls_per_90",
+    "Yellow cards": "yellow_cards",
+    "Yellow cards per 90": "yellow_cards_per_90",
+    "Red cards": "red_cards",
+    "Red cards per 90": "red_cards_per_90",
+    "Goals per 90": "goals_per_90",
+    "xG per 90": "xg_per_90",
+    "Shots per 90": "shots_per_90",
+    "Shots on target, %": "shots_on_target_pct",
+    "Goal conversion, %": "goal_conversion_pct",
+    "Assists per 90": "assists_per_90",
+    "Dribbles per 90": "dribbles_per_90",
+    "Successful dribbles, %": "dribbles_success_pct",
+    "Offensive duels per 90": "offensive_duels_per_90",
+    "Offensive duels won, %": "offensive_duels_won_pct",
+    "Touches in box per 90": "touches_in_box_per_90",
+    "Progressive runs per 90": "progressive_runs_per_90",
+    "Fouls suffered per 90": "fouls_suffered_per_90",
+    "Passes per 90": "passes_per_90",
+    "Accurate passes, %": "pass_accuracy_pct",
+    "Forward passes per 90": "forward_passes_per_90",
+    "Accurate forward passes, %": "forward_passes_accuracy_pct",
+    "Back passes per 90": "back_passes_per_90",
+    "Accurate back passes, %": "back_passes_accuracy_pct",
+    "Long passes per 90": "long_passes_per_90",
+    "Accurate long passes, %": "long_passes_accuracy_pct",
+    "xA per 90": "xa_per_90",
+    "Key passes per 90": "key_passes_per_90",
+}
+
+# Features que ProfessionalStats guarda con el mismo nombre que el modelo
+DB_FEATURE_COLUMNS = [c for c in MODEL_FEATURE_COLUMNS if hasattr(ProfessionalStats, c)]
+
+# (mtime_ns, tamaño) de los CSVs de la temporada y la anterior
+Signature = Tuple[Optional[Tuple[int, int]], ...]
+
+
+def model_feature_name(csv_column: str) -> str:
+    """Nombre de feature del modelo para una columna del CSV procesado."""
+    if csv_column in CSV_FEATURE_ALIASES:
+        return CSV_FEATURE_ALIASES[csv_column]
+    return csv_column.replace(", %", "_pct").replace(", m", "_m").replace(" ", "_")
+
+
+def previous_season(season: str) -> str:
+    """Temporada anterior en formato "2023-24"."""
+    start_year = int(season.split("-")[0]) - 1
+    return f"{start_year}-{str(start_year + 1)[-2:]}"
+
+
+class SeasonFeatureStore:
+    """
+    Matrices de features por temporada indexadas por player_id.
+
+    - CSV: processed_{season}.csv, con el PDI de la temporada anterior como lag
+    - Fallback BD: ProfessionalStats + MLMetrics.pdi_overall
+    - Nulos: mediana de la temporada y luego 0, como el dataset de entrenamiento
+    - Versión: cambia cada vez que la matriz de la temporada cambia de contenido
+    """
+
+    def __init__(
+        self,
+        processed_dir: Union[str, Path] = DEFAULT_PROCESSED_DIR,
+        session_factory=None,
+        db_refresh_seconds: float = DB_REFRESH_SECONDS,
+    ):
+        self.processed_dir = Path(processed_dir)
+        self.session_factory = session_factory or get_db_session
+        self.db_refresh_seconds = db_refresh_seconds
+        self._position_weights = LegacyFeatureWeights()
+        # temporada → (firma, instante de construcción, versión, matriz)
+        self._matrices: Dict[str, Tuple[Signature, float, int, pd.DataFrame]] = {}
+        self._lock = threading.RLock()
+        self._stats = {"hits": 0, "builds": 0}
+
+    def _csv_path(self, season: str) -> Path:
+        return self.processed_dir / f"processed_{season}.csv"
+
+    def _signature(self, season: str) -> Signature:
+        signature = []
+        for path in (self._csv_path(season), self._csv_path(previous_season(season))):
+            try:
+                stat = path.stat()
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def get_season_matrix(self, season: str) -> pd.DataFrame:
+        """
+        Matriz (player_id × MODEL_FEATURE_COLUMNS) de la temporada.
+
+        Returns:
+            DataFrame float64; vacío si no hay datos para la temporada
+        """
+        signature = self._signature(season)
+        with self._lock:
+            cached = self._matrices.get(season)
+            if (
+                cached is not None
+                and cached[0] == signature
+                and time.monotonic() - cached[1] <= self.db_refresh_seconds
+            ):
+                self._stats["hits"] += 1
+                return cached[3]
+
+        try:
+            if signature[0] is not None:
+                features = self._load_from_csv(season)
+            else:
+                features = self._load_from_database(season)
+            matrix = self._finalize(features)
+        except Exception as e:
+            logger.error(f"❌ Error construyendo features de {season}: {e}")
+            return self._finalize(pd.DataFrame())
+
+        with self._lock:
+            self._stats["builds"] += 1
+            previous = self._matrices.get(season)
+            if previous is not None and previous[3].equals(matrix):
+                # Mismo contenido: se conservan versión y objeto
+                version, matrix = previous[2], previous[3]
+            else:
+                version = self._stats["builds"]
+            self._matrices[season] = (signature, time.monotonic(), version, matrix)
+        logger.info(f"📊 Matriz de features {season}: {len(matrix)} jugadores")
+        return matrix
+
+    def season_version(self, season: str) -> int:
+        """
+        Versión de la matriz servida para la temporada (0 si no se ha construido).
+
+        Sirve para invalidar cachés derivadas, como las predicciones.
+        """
+        with self._lock:
+            cached = self._matrices.get(season)
+            return cached[2] if cached is not None else 0
+
+    def get_player_features(
+        self, player_id: int, season: str
+    ) -> Optional[Dict[str, float]]:
+        """Features de un jugador en el orden del modelo, o None si no existe."""
+        matrix = self.get_season_matrix(season)
+        if player_id not in matrix.index:
+            return None
+        return matrix.loc[player_id].to_dict()
+
+    def _load_from_csv(self, season: str) -> pd.DataFrame:
+        df = read_season_table(self._csv_path(season))
+        df = df.dropna(subset=["Wyscout id"]).drop_duplicates("Wyscout id")
+        # "Primary position" se conserva para el one-hot de posiciones
+        renamed = {c: model_feature_name(c) for c in df.columns}
+        renamed.pop("Primary position", None)
+        features = df.rename(columns=renamed)
+
+        previous_path = self._csv_path(previous_season(season))
+        if previous_path.exists():
+            previous = read_season_table(previous_path, columns=["Wyscout id", "PDI"])
+            previous_pdi = previous.drop_duplicates("Wyscout id").set_index(
+                "Wyscout id"
+            )["PDI"]
+            features["pdi_overall_lag1"] = df["Wyscout id"].map(previous_pdi)
+
+        player_ids = self._player_ids_by_wyscout(season)
+        features.index = df["Wyscout id"].map(player_ids).to_numpy()
+        features = features[features.index.notna()]
+        features.index = features.index.astype(int)
+        return features
+
+    def _player_ids_by_wyscout(self, season: str) -> Dict[int, int]:
+        """wyscout_id → player_id según ProfessionalStats (primer stat_id)."""
+        with self.session_factory() as session:
+            rows = (
+                session.query(ProfessionalStats.wyscout_id, ProfessionalStats.player_id)
+                .filter(ProfessionalStats.season == season)
+                .order_by(ProfessionalStats.stat_id.desc())
+                .all()
+            )
+        return dict(rows)
+
+    def _load_from_database(self, season: str) -> pd.DataFrame:
+        with self.session_factory() as session:
+            stats = pd.DataFrame(
+                session.query(
+                    ProfessionalStats.player_id,
+                    ProfessionalStats.primary_position,
+                    *[getattr(ProfessionalStats, c) for c in DB_FEATURE_COLUMNS],
+                )
+                .filter(ProfessionalStats.season == season)
+                .order_by(ProfessionalStats.stat_id)
+                .all(),
+                columns=["player_id", "Primary position", *DB_FEATURE_COLUMNS],
+            )
+            pdi = pd.DataFrame(
+                session.query(
+                    MLMetrics.player_id, MLMetrics.season, MLMetrics.pdi_overall
+                )
+                .filter(MLMetrics.season.in_([season, previous_season(season)]))
+                .all(),
+                columns=["player_id", "season", "pdi_overall"],
+            )
+
+        stats = stats.drop_duplicates("player_id").set_index("player_id")
+        pdi = pdi.drop_duplicates(["player_id", "season"])
+        by_season = pdi.pivot(index="player_id", columns="season", values="pdi_overall")
+        if season in by_season.columns:
+            stats["PDI"] = by_season[season]
+        if previous_season(season) in by_season.columns:
+            stats["pdi_overall_lag1"] = by_season[previous_season(season)]
+        return stats
+
+    def _finalize(self, features: pd.DataFrame) -> pd.DataFrame:
+        """Posiciones one-hot, lag y nulos; columnas en el orden del modelo."""
+        if "Primary position" in features.columns:
+            groups = features["Primary position"].map(
+                self._position_weights._normalize_position_for_weights
+            )
+            for group in POSITION_GROUPS:
+                features[f"pos_{group}"] = (groups == group).astype(float)
+
+        # Sin temporada anterior: se asume continuidad del PDI actual
+        if "PDI" in features.columns:
+            if "pdi_overall_lag1" in features.columns:
+                features["pdi_overall_lag1"] = features["pdi_overall_lag1"].fillna(
+                    features["PDI"]
+                )
+            else:
+                features["pdi_overall_lag1"] = features["PDI"]
+
+        matrix = features.reindex(columns=MODEL_FEATURE_COLUMNS)
+        matrix = matrix.apply(pd.to_numeric, errors="coerce").astype(float)
+        return matrix.fillna(matrix.median()).fillna(0)
+
+    def invalidate(self, season: Optional[str] = None):
+        """Descarta la matriz de una temporada (o todas)."""
+        with self._lock:
+            if season is None:
+                self._matrices.clear()
+            else:
+                self._matrices.pop(season, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores de uso del store."""
+        with self._lock:
+            return dict(self._stats, seasons_in_memory=sorted(self._matrices))
+
+
+_season_feature_store: Optional[SeasonFeatureStore] = None
+
+
+def get_season_feature_store() -> SeasonFeatureStore:
+    """Obtiene el feature store compartido."""
+    global _season_feature_store
+    if _season_feature_store is None:
+        _season_feature_store = SeasonFeatureStore()
+    return _season_feature_store
@@ -11,23 +11,216 @@ Fecha: Agosto 2025
 
 import logging
 import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import joblib
 
 # Configurar logging
 logger = logging.getLogger(__name__)
 
+PROJECT_ROOT = Path(__file__).parents[3]
+DEFAULT_MODELS_DIR = PROJECT_ROOT / "ml_system" / "outputs" / "models"
+# Versiones de un mismo fichero que se mantienen en memoria a la vez
+MAX_VERSIONS_PER_MODEL = 3
+
+# (mtime_ns, tamaño) del fichero del modelo
+ModelVersion = Tuple[int, int]
+
+
+def _rss_bytes() -> Optional[int]:
+    """Memoria residente del proceso (Linux); None si no está disponible."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+@dataclass
+class ModelEntry:
+    """Modelo deserializado con su versión de fichero y coste de carga."""
+
+    model: Any
+    path: Path
+    version: ModelVersion
+    load_seconds: float
+    memory_bytes: int  # aumento de RSS al cargar (o tamaño en disco)
+    mmap: bool
+    loaded_at: str = field(default_factory=lambda: datetime.now().isoformat())
+
+
+class ModelRegistry:
+    """
+    Registro de modelos compartido por todo el proceso.
+
+    - Carga perezosa: cada fichero se deserializa una sola vez
+    - Recarga atómica: si cambia el fichero (mtime/tamaño) la nueva versión se
+      carga aparte y se publica de golpe; quien ya tenía la anterior la conserva
+    - Versiones: se guardan las últimas MAX_VERSIONS_PER_MODEL de cada fichero
+    - mmap opcional: joblib mapea en memoria los arrays numpy sin comprimir
+    """
+
+    def __init__(
+        self,
+        models_dir: Union[str, Path] = DEFAULT_MODELS_DIR,
+        max_versions: int = MAX_VERSIONS_PER_MODEL,
+    ):
+        self.models_dir = Path(models_dir)
+        self.max_versions = max_versions
+        self._versions: Dict[Path, "OrderedDict[ModelVersion, ModelEntry]"] = {}
+        self._lock = threading.RLock()
+        self._path_locks: Dict[Path, threading.Lock] = {}
+        self._stats = {"hits": 0, "loads": 0, "reloads": 0}
+
+    def resolve(self, name_or_path: Union[str, Path]) -> Path:
+        """Nombre de fichero → models_dir; ruta relativa → raíz del proyecto."""
+        path = Path(name_or_path)
+        if path.is_absolute():
+            return path
+        if len(path.parts) == 1:
+            return self.models_dir / path
+        return PROJECT_ROOT / path
+
+    def _current(self, path: Path) -> Optional[ModelEntry]:
+        with self._lock:
+            versions = self._versions.get(path)
+            return next(reversed(versions.values())) if versions else None
+
+    def get_entry(
+        self, name_or_path: Union[str, Path], mmap: bool = False
+    ) -> Optional[ModelEntry]:
+        """
+        Devuelve la versión vigente del modelo, cargándola si hace falta.
+
+        Returns:
+            ModelEntry o None si el fichero no existe o no se puede cargar
+        """
+        path = self.resolve(name_or_path)
+        try:
+            stat = path.stat()
+        except OSError:
+            logger.warning(f"❌ Modelo no encontrado: {path}")
+            return None
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        current = self._current(path)
+        if current is not None and current.version == version:
+            with self._lock:
+                self._stats["hits"] += 1
+            return current
+
+        with self._lock:
+            path_lock = self._path_locks.setdefault(path, threading.Lock())
+
+        with path_lock:
+            with self._lock:
+                versions = self._versions.setdefault(path, OrderedDict())
+                entry = versions.get(version)
+            # Otro hilo ya la cargó, o el fichero volvió a una versión conocida
+            loaded = entry is None
+            if loaded:
+                entry = self._load(path, version, mmap)
+                if entry is None:
+                    return None
+
+            with self._lock:
+                versions[version] = entry
+                versions.move_to_end(version)
+                while len(versions) > self.max_versions:
+                    versions.popitem(last=False)
+                if loaded:
+                    self._stats["reloads" if current is not None else "loads"] += 1
+                else:
+                    self._stats["hits"] += 1
+        return entry
+
+    def get(self, name_or_path: Union[str, Path], mmap: bool = False) -> Optional[Any]:
+        """Modelo vigente (o None) para un nombre de fichero o ruta."""
+        entry = self.get_entry(name_or_path, mmap=mmap)
+        return entry.model if entry is not None else None
+
+    def get_versions(self, name_or_path: Union[str, Path]) -> List[ModelEntry]:
+        """Versiones en memoria de un modelo, de la más antigua a la vigente."""
+        with self._lock:
+            versions = self._versions.get(self.resolve(name_or_path), {})
+            return list(versions.values())
+
+    def _load(
+        self, path: Path, version: ModelVersion, mmap: bool
+    ) -> Optional[ModelEntry]:
+        try:
+            rss_before = _rss_bytes()
+            start = time.perf_counter()
+            model = joblib.load(path, mmap_mode="r" if mmap else None)
+            load_seconds = time.perf_counter() - start
+            rss_after = _rss_bytes()
+        except Exception as e:
+            logger.error(f"❌ Error cargando modelo {path.name}: {e}")
+            return None
+
+        if rss_before is None or rss_after is None:
+            memory_bytes = version[1]
+        else:
+            memory_bytes = max(rss_after - rss_before, 0)
+
+        logger.info(f"📥 Modelo {path.name} cargado en {load_seconds * 1000:.0f} ms")
+        return ModelEntry(
+            model=model,
+            path=path,
+            version=version,
+            load_seconds=load_seconds,
+            memory_bytes=memory_bytes,
+            mmap=mmap,
+        )
+
+    def clear(self):
+        """Descarta todos los modelos cargados."""
+        with self._lock:
+            self._versions.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores de uso y, por modelo, tiempo de carga y memoria."""
+        with self._lock:
+            models = {}
+            for path, versions in self._versions.items():
+                if not versions:
+                    continue
+                entry = next(reversed(versions.values()))
+                models[path.name] = {
+                    "versions_loaded": len(versions),
+                    "loaded_at": entry.loaded_at,
+                    "load_seconds": round(entry.load_seconds, 4),
+                    "memory_bytes": entry.memory_bytes,
+                    "file_bytes": entry.version[1],
+                    "mmap": entry.mmap,
+                }
+            return dict(self._stats, models=models)
+
+
+_model_registry: Optional[ModelRegistry] = None
+
+
+def get_model_registry() -> ModelRegistry:
+    """Obtiene el registro de modelos compartido."""
+    global _model_registry
+    if _model_registry is None:
+        _model_registry = ModelRegistry()
+    return _model_registry
+
 
 class ModelLoader:
     """Cargador inteligente de modelos ML para predicción PDI."""
 
     def __init__(self):
         """Inicializar el cargador de modelos."""
-        self.project_root = Path(__file__).parent.parent.parent.parent
-        self.models_dir = self.project_root / "ml_system" / "outputs" / "models"
+        self.project_root = PROJECT_ROOT
+        self.models_dir = DEFAULT_MODELS_DIR
         self.cached_model = None
         self.cached_metadata = None
 
@@ -200,12 +393,17 @@ class ModelLoader:
                 logger.error("❌ No se encontró modelo para cargar")
                 return None, {"validation_passed": False, "error": "No model found"}
 
-            # Cargar modelo
+            # Cargar modelo (una sola deserialización por proceso)
             logger.info(f"📥 Cargando modelo desde: {model_path}")
-            model = joblib.load(model_path)
+            entry = get_model_registry().get_entry(model_path)
+            if entry is None:
+                return None, {"validation_passed": False, "error": "Load failed"}
+            model = entry.model
 
             # Generar metadata
             metadata = self.load_model_metadata(model_path)
+            metadata["load_seconds"] = entry.load_seconds
+            metadata["memory_bytes"] = entry.memory_bytes
 
             # Validación básica
             if hasattr(model, "predict"):
@@ -234,6 +432,11 @@ class ModelLoader:
             Tuple (modelo, metadata) o (None, {}) si no hay cache
         """
         if self.cached_model is not None and self.cached_metadata is not None:
+            # Recoger la nueva versión si el fichero cambió en disco
+            model_path = self.cached_metadata.get("model_path")
+            entry = get_model_registry().get_entry(model_path) if model_path else None
+            if entry is not None:
+                self.cached_model = entry.model
             return self.cached_model, self.cached_metadata
         else:
             return None, {}
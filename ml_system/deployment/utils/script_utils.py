@@ -6,7 +6,7 @@ Consolida funciones comunes que se repetían en múltiples scripts de análisis
 import logging
 import warnings
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 
 def print_header(title: str, char: str = "=", width: int = 80) -> None:
@@ -134,23 +134,27 @@ def create_progress_tracker(
 
 
 def format_execution_time(
-    start_time: datetime, end_time: Optional[datetime] = None
-) -> str:
+    start_time: datetime, end_time: Optional[datetime] = None, unit: str = "auto"
+) -> Union[str, float]:
     """
     Formatea tiempo de ejecución de manera legible.
 
     Args:
         start_time: Tiempo de inicio
         end_time: Tiempo de fin (default: ahora)
+        unit: "auto" para texto legible, "ms" para milisegundos numéricos
 
     Returns:
-        String con tiempo formateado
+        String con tiempo formateado (o float en milisegundos si unit="ms")
     """
     if end_time is None:
         end_time = datetime.now()
 
     duration = end_time - start_time
 
+    if unit == "ms":
+        return round(duration.total_seconds() * 1000, 2)
+
     hours, remainder = divmod(duration.total_seconds(), 3600)
     minutes, seconds = divmod(remainder, 60)
 
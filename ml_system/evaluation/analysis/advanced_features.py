@@ -34,6 +34,66 @@ from sklearn.preprocessing import RobustScaler, StandardScaler
 logger = logging.getLogger(__name__)
 warnings.filterwarnings("ignore")
 
+# Mapeo de features legacy a columnas del dataset (por tier)
+LEGACY_UNIVERSAL_FIELDS = {
+    "accurate_passes_pct": "Pass accuracy, %",
+    "duels_won_pct": "Duels won, %",
+    "passes_per_90": "Passes per 90",  # Si existe
+}
+LEGACY_ZONE_FIELDS = {
+    "goals_per_90": "Goals per 90",
+    "assists_per_90": "Assists per 90",
+    "shots_on_target_pct": "Shots on target, %",
+    "progressive_passes_per_90": "Progressive passes per 90",
+    "key_passes_per_90": "Key passes per 90",
+}
+# Mapeo básico - expandir según necesidades
+LEGACY_POSITION_FIELDS = {
+    "aerial_duels_won_pct": "Aerial duels won, %",
+    "successful_dribbles_pct": "Successful dribbles, %",
+    "goals_per_90": "Goals per 90",
+    "assists_per_90": "Assists per 90",
+}
+
+
+def _nanmean_by_row(matrix: np.ndarray) -> np.ndarray:
+    """Media por fila ignorando NaN (misma aritmética que Series.mean)."""
+    mask = np.isnan(matrix)
+    count = (~mask).sum(axis=1).astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(mask, 0.0, matrix).sum(axis=1) / count
+
+
+def _nanstd_by_row(matrix: np.ndarray) -> np.ndarray:
+    """Desviación típica muestral por fila ignorando NaN (como Series.std)."""
+    mask = np.isnan(matrix)
+    count = (~mask).sum(axis=1).astype(float)
+    values = np.where(mask, 0.0, matrix)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg = values.sum(axis=1) / count
+        sqr = (avg[:, None] - values) ** 2
+        sqr[mask] = 0.0
+        variance = sqr.sum(axis=1) / (count - 1)
+    variance[count <= 1] = np.nan
+    return np.sqrt(variance)
+
+
+def _previous_window_stat(values: np.ndarray, ranks: np.ndarray, stat) -> np.ndarray:
+    """
+    Aplica stat a la ventana expanding de temporadas previas de cada fila.
+
+    values y ranks van ordenados por (jugador, temporada). Las filas se agrupan
+    por longitud de ventana y cada grupo se reduce como una matriz
+    (filas × ventana): con la longitud fija numpy suma cada fila igual que
+    pandas la serie del jugador, así que los valores coinciden exactamente.
+    """
+    result = np.full(len(values), np.nan)
+    positions = np.arange(len(values))
+    for window in np.unique(ranks[ranks > 0]):
+        rows = positions[ranks == window]
+        result[rows] = stat(values[(rows - window)[:, None] + np.arange(window)])
+    return result
+
 
 class PositionalNormalizationEngine:
     """
@@ -1102,7 +1162,207 @@ class AdvancedFeatureEngineer:
             return pd.DataFrame()
 
     def _generate_rolling_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Genera features rolling si hay múltiples temporadas."""
+        """
+        Genera features rolling si hay múltiples temporadas.
+
+        Una sola ordenación (jugador, temporada) y ventanas expanding sobre las
+        temporadas previas de cada fila, en lugar de filtrar el DataFrame por
+        jugador y recortar prefijos fila a fila.
+        """
+        try:
+            if "season" not in df.columns:
+                logger.info("No hay columna 'season', omitiendo features rolling")
+                return pd.DataFrame(index=df.index)
+
+            if "Player" not in df.columns or df.empty:
+                return pd.DataFrame(index=df.index)
+
+            # Orden de jugadores = orden de aparición (como unique())
+            player_codes, _ = pd.factorize(df["Player"])
+            order = pd.DataFrame(
+                {"player": player_codes, "season": df["season"].to_numpy()}
+            )
+            order = order[order["player"] >= 0].sort_values(["player", "season"])
+
+            players = order["player"].to_numpy()
+            group_sizes = np.bincount(players, minlength=1)
+            multi_season = group_sizes[players] > 1
+            positions = order.index.to_numpy()[multi_season]
+            players = players[multi_season]
+            if len(positions) == 0:
+                return pd.DataFrame(index=df.index)
+
+            # Posición de cada fila dentro de las temporadas de su jugador
+            starts = np.flatnonzero(np.r_[True, players[1:] != players[:-1]])
+            ranks = np.arange(len(players)) - np.repeat(
+                starts, np.diff(np.r_[starts, len(players)])
+            )
+            first_season = ranks == 0
+
+            minutes_trend = np.full(len(positions), np.nan)
+            if "Minutes played" in df.columns:
+                minutes = df["Minutes played"].to_numpy(dtype=float)[positions]
+                pct_change = np.full(len(minutes), np.nan)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    pct_change[1:] = minutes[1:] / minutes[:-1] - 1
+                pct_change[first_season] = np.nan
+                minutes_trend = _previous_window_stat(
+                    pct_change, ranks, _nanmean_by_row
+                )
+                minutes_trend[~first_season & np.isnan(minutes_trend)] = 0.0
+            minutes_trend[first_season] = 0.0
+
+            pass_consistency = np.full(len(positions), np.nan)
+            if "Pass accuracy, %" in df.columns:
+                pass_accuracy = df["Pass accuracy, %"].to_numpy(dtype=float)
+                pass_std = _previous_window_stat(
+                    pass_accuracy[positions], ranks, _nanstd_by_row
+                )
+                pass_consistency = np.where(np.isnan(pass_std), 0.5, 1 / (1 + pass_std))
+            pass_consistency[first_season] = 0.5
+
+            return pd.DataFrame(
+                {
+                    "minutes_trend": minutes_trend,
+                    "pass_consistency": pass_consistency,
+                },
+                index=df.index.take(positions),
+            )
+
+        except Exception as e:
+            logger.error(f"Error generando features rolling: {e}")
+            return pd.DataFrame(index=df.index)
+
+    def _generate_legacy_weighted_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Genera features con pesos del sistema legacy.
+
+        Cada tier se calcula sobre columnas completas: valores normalizados por
+        feature, máscara de validez y vector de pesos. El tier específico se
+        resuelve por grupos de posición normalizada con sus propios pesos.
+        """
+        try:
+            if df.empty:
+                return pd.DataFrame([], index=df.index)
+
+            weights = self.legacy_weights
+            if "Primary position" in df.columns:
+                positions = df["Primary position"].map(
+                    weights._normalize_position_for_weights
+                )
+            else:
+                positions = pd.Series("CMF", index=df.index)
+            positions = positions.to_numpy(dtype=object)
+
+            # Universal Features Score (mismos pesos para todas las posiciones)
+            universal_features = [
+                (LEGACY_UNIVERSAL_FIELDS.get(name), config)
+                for features in weights.universal_features.values()
+                for name, config in features.items()
+            ]
+            universal_score = self._legacy_tier_score(
+                df, universal_features, (0, 100), strictly_positive=True
+            )
+
+            # Zone Features Score: media simple de las tres zonas
+            zone_scores = [
+                self._legacy_tier_score(
+                    df,
+                    [
+                        (LEGACY_ZONE_FIELDS.get(name, name), config)
+                        for name, config in weights.zone_features.get(zone, {}).items()
+                    ],
+                    (0, 10),
+                )
+                for zone in ("defensive", "midfield", "offensive")
+            ]
+            zone_score = (zone_scores[0] + zone_scores[1] + zone_scores[2]) / 3
+
+            # Position-Specific Features Score por grupo de posición
+            position_score = np.full(len(df), 50.0)
+            for position in pd.unique(positions):
+                rows = positions == position
+                position_features = [
+                    (LEGACY_POSITION_FIELDS.get(name, name), config)
+                    for name, config in weights.position_features.get(
+                        position, {}
+                    ).items()
+                ]
+                position_score[rows] = self._legacy_tier_score(
+                    df[rows], position_features, (0, 100)
+                )
+
+            # Composite Legacy Score (usando pesos PDI: 40% + 35% + 25%)
+            composite_score = (
+                universal_score * 0.40 + zone_score * 0.35 + position_score * 0.25
+            )
+
+            return pd.DataFrame(
+                {
+                    "legacy_universal_score": universal_score,
+                    "legacy_zone_score": zone_score,
+                    "legacy_position_score": position_score,
+                    "legacy_composite_score": composite_score,
+                    "legacy_position_normalized": positions,
+                    "legacy_universal_weight": 0.40,
+                    "legacy_zone_weight": 0.35,
+                    "legacy_position_weight": 0.25,
+                },
+                index=df.index,
+            )
+
+        except Exception as e:
+            logger.error(f"Error generando legacy weighted features: {e}")
+            return pd.DataFrame()
+
+    def _legacy_tier_score(
+        self,
+        df: pd.DataFrame,
+        features: List[Tuple[Optional[str], Dict]],
+        default_range: Tuple[float, float],
+        strictly_positive: bool = False,
+    ) -> np.ndarray:
+        """
+        Score ponderado (0-100) de un tier legacy para todas las filas.
+
+        Los términos se acumulan en el orden de los pesos legacy, igual que
+        _calculate_universal_score y compañía; filas sin features válidas → 50.
+        """
+        total_score = np.zeros(len(df))
+        total_weight = np.zeros(len(df))
+
+        for column, config in features:
+            if not column or column not in df.columns:
+                continue
+            values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float)
+            valid = values > 0 if strictly_positive else values >= 0
+            weight = config.get("weight", 0.1)
+            normalized = self._normalize_feature_values(
+                values, config.get("expected_range", default_range)
+            )
+            total_score = np.where(
+                valid, total_score + normalized * weight, total_score
+            )
+            total_weight = np.where(valid, total_weight + weight, total_weight)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(total_weight > 0, total_score / total_weight, 50.0)
+
+    def _normalize_feature_values(
+        self, values: np.ndarray, expected_range: Tuple[float, float]
+    ) -> np.ndarray:
+        """Versión vectorizada de _normalize_feature_value."""
+        min_val, max_val = expected_range
+        if max_val <= min_val:
+            return np.full(len(values), 50.0)
+
+        with np.errstate(invalid="ignore"):
+            normalized = ((values - min_val) / (max_val - min_val)) * 100
+            normalized = np.where(normalized < 100.0, normalized, 100.0)
+            return np.where(normalized > 0.0, normalized, 0.0)
+
+    def _generate_rolling_features_rowwise(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Versión anterior jugador a jugador (referencia de equivalencia)."""
         try:
             if "season" not in df.columns:
                 logger.info("No hay columna 'season', omitiendo features rolling")
@@ -1162,8 +1422,10 @@ class AdvancedFeatureEngineer:
             logger.error(f"Error generando features rolling: {e}")
             return pd.DataFrame(index=df.index)
 
-    def _generate_legacy_weighted_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Genera features con pesos del sistema legacy."""
+    def _generate_legacy_weighted_features_rowwise(
+        self, df: pd.DataFrame
+    ) -> pd.DataFrame:
+        """Versión anterior con iterrows (referencia de equivalencia)."""
         try:
             legacy_data = []
 
@@ -1220,16 +1482,9 @@ class AdvancedFeatureEngineer:
             total_score = 0.0
             total_weight = 0.0
 
-            # Mapear campos del dataset a features legacy
-            field_mapping = {
-                "accurate_passes_pct": "Pass accuracy, %",
-                "duels_won_pct": "Duels won, %",
-                "passes_per_90": "Passes per 90",  # Si existe
-            }
-
             for category, features in weights.items():
                 for feature_name, config in features.items():
-                    mapped_field = field_mapping.get(feature_name)
+                    mapped_field = LEGACY_UNIVERSAL_FIELDS.get(feature_name)
                     if mapped_field and mapped_field in row.index:
                         value = row[mapped_field]
                         if pd.notna(value) and value > 0:
@@ -1285,17 +1540,8 @@ class AdvancedFeatureEngineer:
             total_score = 0.0
             total_weight = 0.0
 
-            # Mapeo básico de campos
-            field_mappings = {
-                "goals_per_90": "Goals per 90",
-                "assists_per_90": "Assists per 90",
-                "shots_on_target_pct": "Shots on target, %",
-                "progressive_passes_per_90": "Progressive passes per 90",
-                "key_passes_per_90": "Key passes per 90",
-            }
-
             for feature_name, config in zone_weights.items():
-                mapped_field = field_mappings.get(feature_name, feature_name)
+                mapped_field = LEGACY_ZONE_FIELDS.get(feature_name, feature_name)
                 if mapped_field in row.index:
                     value = row[mapped_field]
                     if pd.notna(value) and value >= 0:
@@ -1323,15 +1569,7 @@ class AdvancedFeatureEngineer:
             total_weight = 0.0
 
             for feature_name, config in weights.items():
-                # Mapeo básico - expandir según necesidades
-                field_mappings = {
-                    "aerial_duels_won_pct": "Aerial duels won, %",
-                    "successful_dribbles_pct": "Successful dribbles, %",
-                    "goals_per_90": "Goals per 90",
-                    "assists_per_90": "Assists per 90",
-                }
-
-                mapped_field = field_mappings.get(feature_name, feature_name)
+                mapped_field = LEGACY_POSITION_FIELDS.get(feature_name, feature_name)
                 if mapped_field in row.index:
                     value = row[mapped_field]
                     if pd.notna(value) and value >= 0:
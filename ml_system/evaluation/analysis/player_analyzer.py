@@ -9,14 +9,13 @@ para mantener arquitectura ml_system sin duplicar funcionalidad.
 """
 
 import logging
-import os
 from typing import Any, Dict, List, Optional, Tuple
 
-import joblib
 import pandas as pd
 
 from controllers.db import get_db_session
 from ml_system.data_processing.processors.position_mapper import PositionMapper
+from ml_system.deployment.services.model_loader import get_model_registry
 from ml_system.evaluation.analysis.advanced_features import (
     AdvancedFeatureEngineer,
     LegacyFeatureWeights,
@@ -29,6 +28,9 @@ from models.professional_stats_model import ProfessionalStats
 
 logger = logging.getLogger(__name__)
 
+# Modelo del fallback legacy de predicción de PDI futuro
+PDI_PREDICTOR_MODEL = "future_pdi_predictor_v1.joblib"
+
 
 class PlayerAnalyzer:
     """
@@ -49,18 +51,6 @@ class PlayerAnalyzer:
         self.enhanced_feature_engineer = AdvancedFeatureEngineer()  # NUEVO
         self.legacy_weights = LegacyFeatureWeights()  # NUEVO
 
-        # Cargar el modelo predictivo de PDI futuro
-        self.pdi_predictor_model = None
-        model_path = "ml_system/outputs/models/future_pdi_predictor_v1.joblib"
-        try:
-            if os.path.exists(model_path):
-                self.pdi_predictor_model = joblib.load(model_path)
-                logger.info(f"Modelo predictivo de PDI cargado desde {model_path}")
-            else:
-                logger.warning(f"No se encontró el modelo predictivo en {model_path}")
-        except Exception as e:
-            logger.error(f"Error al cargar el modelo predictivo de PDI: {e}")
-
         # Posiciones soportadas (compatible con controlador original)
         self.supported_positions = {
             "GK",
@@ -85,6 +75,11 @@ class PlayerAnalyzer:
             "⚖️ Versión 2.0: PDI Calculator + Advanced Feature Engineer + Legacy Integration"
         )
 
+    @property
+    def pdi_predictor_model(self):
+        """Modelo predictivo de PDI futuro (registro compartido, carga perezosa)."""
+        return get_model_registry().get(PDI_PREDICTOR_MODEL)
+
     def predict_future_pdi(self, player_id: int, season: str) -> Optional[float]:
         """
         Predice el PDI futuro de un jugador usando el modelo optimizado de producción.
@@ -26,9 +26,9 @@ class PositionAnalyzer:
     def __init__(self):
         """Inicializa el analizador con mapeos de métricas por posición."""
         # Importar CSV Controller para promedios reales
-        from controllers.csv_stats_controller import CSVStatsController
+        from controllers.csv_stats_controller import get_csv_stats_controller
 
-        self.csv_controller = CSVStatsController()
+        self.csv_controller = get_csv_stats_controller()
 
         # Mapeo completo: 27 posiciones Thai League → 8 grupos científicos (idéntico a PDICalculator)
         self.position_mapping = {
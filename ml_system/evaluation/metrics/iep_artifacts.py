@@ -0,0 +1,237 @@
+"""
+IEP Artifacts - Modelos de clustering IEP precalculados y persistidos.
+
+Cada artefacto corresponde a (grupo posicional, temporada, partidos mínimos)
+y contiene el scaler/PCA/KMeans ajustados más las puntuaciones IEP, tiers y
+percentiles de todos los jugadores. Se versiona con el hash del CSV de la
+temporada, de modo que el ajuste solo se repite cuando cambian los datos.
+
+Autor: Proyecto Fin de Máster - Python Aplicado al Deporte
+Fecha: Agosto 2025
+"""
+
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Cambiar al modificar el contenido o el cálculo de los artefactos
+ARTIFACT_VERSION = "1.0"
+ARTIFACTS_DIRNAME = ".iep_artifacts"
+DEFAULT_ARTIFACTS_PATH = (
+    Path(__file__).parents[3] / "data" / "thai_league_processed" / ARTIFACTS_DIRNAME
+)
+
+# (grupo posicional, temporada, partidos mínimos, wyscout id forzado o None)
+ArtifactKey = Tuple[str, str, int, Optional[str]]
+
+# Artefactos con jugador forzado que se conservan en memoria (LRU)
+FORCED_ARTIFACTS_MAX = 8
+
+
+@dataclass
+class IEPClusterArtifact:
+    """Resultado completo de un ajuste IEP para un grupo posicional."""
+
+    position: str
+    season: str
+    min_matches: int
+    data_hash: Optional[str]
+    signature: str
+    # Modelos ajustados
+    scaler: Any
+    pca: Any
+    kmeans: Any
+    n_clusters: int
+    # Datos por jugador (arrays paralelos)
+    player_names: List[str]
+    teams: List[str]
+    wyscout_ids: List[str]
+    feature_matrix: np.ndarray
+    cluster_labels: np.ndarray
+    pca_components: np.ndarray
+    iep_scores: np.ndarray  # redondeados a 1 decimal
+    percentiles: np.ndarray
+    cluster_tiers: Dict[int, str]
+    # Calidad y contexto
+    total_players: int
+    silhouette: float
+    inertia: float
+    cluster_analysis: Dict
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    artifact_version: str = ARTIFACT_VERSION
+
+    def __len__(self) -> int:
+        return len(self.player_names)
+
+    def find_player(self, predicate: Callable[[str], bool]) -> Optional[int]:
+        """Índice del primer jugador cuyo nombre cumple el predicado."""
+        return next(
+            (i for i, name in enumerate(self.player_names) if predicate(name)), None
+        )
+
+
+class IEPArtifactStore:
+    """
+    Caché en memoria + disco de artefactos IEP compartida por el proceso.
+
+    - Memoria: dict por clave, validado contra hash de datos y firma del modelo
+    - Disco: un pickle por clave base (sin jugador forzado), escrito de forma atómica
+    - Un lock por clave evita ajustar dos veces el mismo grupo en paralelo
+    - Los ajustes con jugador forzado (uno por jugador analizado) van a un LRU
+      acotado y su lock se descarta al expulsarlos
+    """
+
+    def __init__(
+        self,
+        base_path: Union[str, Path] = DEFAULT_ARTIFACTS_PATH,
+        forced_max: int = FORCED_ARTIFACTS_MAX,
+    ):
+        self.base_path = Path(base_path)
+        self.forced_max = forced_max
+        self._artifacts: Dict[ArtifactKey, IEPClusterArtifact] = {}
+        self._forced: "OrderedDict[ArtifactKey, IEPClusterArtifact]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._key_locks: Dict[ArtifactKey, threading.Lock] = {}
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "builds": 0}
+
+    def _remember(self, key: ArtifactKey, artifact: IEPClusterArtifact):
+        """Guarda en memoria; los forzados expulsan al menos usado (con su lock)."""
+        if key[3] is None:
+            self._artifacts[key] = artifact
+            return
+        self._forced[key] = artifact
+        self._forced.move_to_end(key)
+        while len(self._forced) > self.forced_max:
+            evicted, _ = self._forced.popitem(last=False)
+            self._key_locks.pop(evicted, None)
+
+    def _path(self, key: ArtifactKey) -> Path:
+        position, season, min_matches, _ = key
+        return self.base_path / f"iep_{position}_{season}_m{min_matches}.pkl"
+
+    @staticmethod
+    def _is_valid(
+        artifact: Optional[IEPClusterArtifact], data_hash: Optional[str], signature: str
+    ) -> bool:
+        return (
+            artifact is not None
+            and artifact.artifact_version == ARTIFACT_VERSION
+            and artifact.data_hash == data_hash
+            and artifact.signature == signature
+        )
+
+    def _load(self, key: ArtifactKey) -> Optional[IEPClusterArtifact]:
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ Artefacto IEP no válido en {path.name}: {e}")
+            return None
+
+    def _save(self, key: ArtifactKey, artifact: IEPClusterArtifact):
+        try:
+            self.base_path.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            tmp_path = path.with_suffix(".pkl.tmp")
+            with open(tmp_path, "wb") as f:
+                pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo guardar artefacto IEP: {e}")
+
+    def get_or_build(
+        self,
+        key: ArtifactKey,
+        data_hash: Optional[str],
+        signature: str,
+        build: Callable[[], Union[IEPClusterArtifact, Dict]],
+    ) -> Union[IEPClusterArtifact, Dict]:
+        """
+        Devuelve el artefacto vigente para la clave o lo construye.
+
+        Solo se persisten artefactos base con hash conocido; los que fuerzan
+        un jugador concreto o vienen del fallback BD quedan solo en memoria.
+
+        Returns:
+            IEPClusterArtifact, o el dict de error devuelto por build
+        """
+        forced = key[3] is not None
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                artifact = (self._forced if forced else self._artifacts).get(key)
+                if self._is_valid(artifact, data_hash, signature):
+                    if forced:
+                        self._forced.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return artifact
+
+            persist = not forced and data_hash is not None
+            if persist:
+                artifact = self._load(key)
+                if self._is_valid(artifact, data_hash, signature):
+                    with self._lock:
+                        self._remember(key, artifact)
+                        self._stats["disk_hits"] += 1
+                    return artifact
+
+            artifact = build()
+            if not isinstance(artifact, IEPClusterArtifact):
+                if forced:
+                    with self._lock:
+                        if key not in self._forced:
+                            self._key_locks.pop(key, None)
+                return artifact
+
+            with self._lock:
+                self._remember(key, artifact)
+                self._stats["builds"] += 1
+            if persist:
+                self._save(key, artifact)
+            return artifact
+
+    def clear(self, include_disk: bool = False):
+        """Descarta los artefactos en memoria (y opcionalmente en disco)."""
+        with self._lock:
+            self._artifacts.clear()
+            for key in self._forced:
+                self._key_locks.pop(key, None)
+            self._forced.clear()
+        if include_disk and self.base_path.exists():
+            for path in self.base_path.glob("iep_*.pkl"):
+                path.unlink(missing_ok=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores de uso de la caché."""
+        with self._lock:
+            return dict(
+                self._stats,
+                artifacts_in_memory=len(self._artifacts) + len(self._forced),
+                forced_in_memory=len(self._forced),
+            )
+
+
+_iep_artifact_store: Optional[IEPArtifactStore] = None
+
+
+def get_iep_artifact_store() -> IEPArtifactStore:
+    """Obtiene la caché de artefactos IEP compartida."""
+    global _iep_artifact_store
+    if _iep_artifact_store is None:
+        _iep_artifact_store = IEPArtifactStore()
+    return _iep_artifact_store
@@ -23,12 +23,18 @@ from typing import Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
+import sklearn
 from sklearn.cluster import KMeans
 from sklearn.decomposition import PCA
 from sklearn.metrics import silhouette_score
 from sklearn.preprocessing import StandardScaler
 
 from controllers.db import get_db_session
+from ml_system.evaluation.metrics.iep_artifacts import (
+    ARTIFACT_VERSION,
+    IEPClusterArtifact,
+    get_iep_artifact_store,
+)
 from models.professional_stats_model import ProfessionalStats
 
 logger = logging.getLogger(__name__)
@@ -108,6 +114,9 @@ class IEPCalculator:
         """
         Realiza clustering K-means para una posición específica.
 
+        El ajuste se reutiliza desde el artefacto precalculado de
+        (posición, temporada, min_matches) mientras no cambien los datos.
+
         Args:
             position: Posición a analizar (ej: 'CF', 'CMF')
             season: Temporada para análisis
@@ -124,128 +133,22 @@ class IEPCalculator:
                     f"🎯 Jugador actual incluido forzosamente: {current_player_id}"
                 )
 
-            # Obtener datos de liga para la posición
-            position_data = self._get_position_data(
+            artifact = self.get_cluster_artifact(
                 position, season, min_matches, current_player_id
             )
+            if not isinstance(artifact, IEPClusterArtifact):
+                return artifact
 
-            if not position_data or len(position_data) < 10:
-                logger.warning(
-                    f"Datos insuficientes para clustering {position}: {len(position_data) if position_data else 0} jugadores"
-                )
-                return {
-                    "error": "insufficient_data",
-                    "player_count": len(position_data) if position_data else 0,
-                }
-
-            # Preparar features para clustering
-            feature_matrix, player_info = self._prepare_features_matrix(
-                position_data, position
-            )
-
-            if feature_matrix.shape[0] < 10:
-                logger.warning(
-                    f"Features insuficientes después de limpieza: {feature_matrix.shape[0]} jugadores"
-                )
-                return {
-                    "error": "insufficient_features",
-                    "player_count": feature_matrix.shape[0],
-                }
-
-            # Normalizar features
-            normalized_features = self.scaler.fit_transform(feature_matrix)
-
-            # Configurar clustering por posición (default a 4 clusters para mejor granularidad)
-            config = self.position_cluster_config.get(
-                position, {"n_clusters": 4, "features_weight": "balanced"}
-            )
-            # Ajustar clusters por datos disponibles (mínimo 2 jugadores por cluster)
-            n_clusters = min(config["n_clusters"], max(2, len(position_data) // 2))
-
-            # Aplicar K-means clustering
-            self.kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-            cluster_labels = self.kmeans.fit_predict(normalized_features)
-
-            # Aplicar PCA para componentes principales
-            pca_components = self.pca.fit_transform(normalized_features)
-
-            # Calcular métricas de calidad clustering
-            silhouette_avg = silhouette_score(normalized_features, cluster_labels)
-            inertia = self.kmeans.inertia_
-
-            # Calcular IEP scores por jugador
-            iep_scores = self._calculate_iep_scores(
-                normalized_features, cluster_labels, pca_components, n_clusters
-            )
-
-            # Analizar clusters (caracterización)
-            cluster_analysis = self._analyze_clusters(
-                feature_matrix, cluster_labels, player_info, position
-            )
-
-            # Preparar resultados completos
-            results = {
-                "success": True,
-                "position": position,
-                "season": season,
-                "analysis_date": datetime.now().isoformat(),
-                "data_quality": {
-                    "total_players": len(position_data),
-                    "valid_for_clustering": feature_matrix.shape[0],
-                    "features_used": feature_matrix.shape[1],
-                    "min_matches_filter": min_matches,
-                },
-                "clustering_results": {
-                    "n_clusters": n_clusters,
-                    "silhouette_score": round(silhouette_avg, 3),
-                    "inertia": round(inertia, 2),
-                    "cluster_distribution": {
-                        int(i): int(np.sum(cluster_labels == i))
-                        for i in range(n_clusters)
-                    },
-                },
-                "pca_analysis": {
-                    "explained_variance_ratio": [
-                        float(r) for r in self.pca.explained_variance_ratio_
-                    ],
-                    "total_variance_explained": float(
-                        sum(self.pca.explained_variance_ratio_)
-                    ),
-                    "components": self.pca.components_.tolist(),
-                },
-                "players_data": [],
-            }
-
-            # Agregar datos individuales de jugadores
-            for i, info in enumerate(player_info):
-                player_result = {
-                    "player_name": info["name"],
-                    "team": info["team"],
-                    "cluster_id": int(cluster_labels[i]),
-                    "cluster_label": self._get_cluster_label(
-                        cluster_labels[i], n_clusters, iep_scores, cluster_labels
-                    ),
-                    "iep_score": round(iep_scores[i], 1),
-                    "pca_components": [
-                        float(pca_components[i, 0]),
-                        float(pca_components[i, 1]),
-                    ],
-                    "key_features": {
-                        feature: float(feature_matrix[i, j])
-                        for j, feature in enumerate(self.base_features)
-                        if j < feature_matrix.shape[1]
-                    },
-                }
-                results["players_data"].append(player_result)
-
-            # Agregar análisis de clusters
-            results["cluster_analysis"] = cluster_analysis
+            results = self._artifact_to_results(artifact)
 
             # Log resultado
+            total_variance = results["pca_analysis"]["total_variance_explained"]
             logger.info(f"✅ Clustering IEP completado para {position}:")
-            logger.info(f"   📊 {len(position_data)} jugadores, {n_clusters} clusters")
             logger.info(
-                f"   🎯 Silhouette: {silhouette_avg:.3f}, Varianza PCA: {sum(self.pca.explained_variance_ratio_):.1%}"
+                f"   📊 {artifact.total_players} jugadores, {artifact.n_clusters} clusters"
+            )
+            logger.info(
+                f"   🎯 Silhouette: {artifact.silhouette:.3f}, Varianza PCA: {total_variance:.1%}"
             )
 
             return results
@@ -260,6 +163,9 @@ class IEPCalculator:
         """
         Calcula IEP individual para un jugador específico.
 
+        Consulta el artefacto de clustering de su posición: solo se ajusta
+        el modelo si no existe uno vigente para los datos actuales.
+
         Args:
             player_id: ID del jugador
             season: Temporada a analizar
@@ -302,26 +208,21 @@ class IEPCalculator:
                     )
                     return {"error": "no_position", "player_id": player_id}
 
+                full_name = player_stats.full_name or ""
+
             # Obtener clustering de la posición
-            cluster_results = self.calculate_position_clusters(position, season)
+            artifact = self.get_cluster_artifact(position, season)
 
-            if "error" in cluster_results:
-                logger.warning(
-                    f"Error en clustering posicional: {cluster_results['error']}"
-                )
-                return {"error": "clustering_failed", "details": cluster_results}
-
-            # Buscar jugador en resultados de clustering
-            player_data = None
-            for player in cluster_results["players_data"]:
-                # Comparar por nombre o ID (aquí usamos nombre por simplicidad)
-                if str(player_id) in player["player_name"] or player["player_name"] in (
-                    player_stats.full_name or ""
-                ):
-                    player_data = player
-                    break
-
-            if not player_data:
+            if not isinstance(artifact, IEPClusterArtifact):
+                logger.warning(f"Error en clustering posicional: {artifact['error']}")
+                return {"error": "clustering_failed", "details": artifact}
+
+            # Buscar jugador en el artefacto (por nombre, como en el listado)
+            index = artifact.find_player(
+                lambda name: str(player_id) in name or name in full_name
+            )
+
+            if index is None:
                 logger.warning(
                     f"Jugador {player_id} no encontrado en clustering de {position}"
                 )
@@ -331,6 +232,8 @@ class IEPCalculator:
                     "position": position,
                 }
 
+            player_data = self._artifact_player_record(artifact, index)
+
             # Preparar resultado individual
             individual_result = {
                 "success": True,
@@ -342,26 +245,19 @@ class IEPCalculator:
                     "iep_score": player_data["iep_score"],
                     "cluster_tier": player_data["cluster_label"],
                     "cluster_id": player_data["cluster_id"],
-                    "percentile_in_position": self._calculate_percentile(
-                        player_data["iep_score"],
-                        [p["iep_score"] for p in cluster_results["players_data"]],
-                    ),
+                    "percentile_in_position": float(artifact.percentiles[index]),
                 },
                 "efficiency_components": {
                     "principal_component_1": player_data["pca_components"][0],
                     "principal_component_2": player_data["pca_components"][1],
-                    "explained_variance": cluster_results["pca_analysis"][
-                        "total_variance_explained"
-                    ],
+                    "explained_variance": float(
+                        sum(artifact.pca.explained_variance_ratio_)
+                    ),
                 },
                 "position_context": {
-                    "total_players_analyzed": len(cluster_results["players_data"]),
-                    "cluster_distribution": cluster_results["clustering_results"][
-                        "cluster_distribution"
-                    ],
-                    "silhouette_score": cluster_results["clustering_results"][
-                        "silhouette_score"
-                    ],
+                    "total_players_analyzed": len(artifact),
+                    "cluster_distribution": self._cluster_distribution(artifact),
+                    "silhouette_score": round(artifact.silhouette, 3),
                 },
                 "key_performance_features": player_data["key_features"],
             }
@@ -375,6 +271,227 @@ class IEPCalculator:
             logger.error(f"❌ Error calculando IEP individual: {e}")
             return {"error": str(e), "player_id": player_id, "season": season}
 
+    # ============================================================================
+    # ARTEFACTOS DE CLUSTERING PRECALCULADOS
+    # ============================================================================
+
+    def get_cluster_artifact(
+        self,
+        position: str,
+        season: str = "2024-25",
+        min_matches: int = 5,
+        current_player_id: int = None,
+    ) -> Union[IEPClusterArtifact, Dict]:
+        """
+        Obtiene (o ajusta una sola vez) el artefacto IEP de una posición.
+
+        Args:
+            position: Posición o grupo posicional
+            season: Temporada
+            min_matches: Mínimo de partidos para incluir jugador
+            current_player_id: Jugador a incluir aunque no llegue a min_matches
+
+        Returns:
+            IEPClusterArtifact, o dict con "error" si no hay datos suficientes
+        """
+        data_hash = self._season_data_hash(season)
+        signature = self._model_signature(position)
+
+        # El jugador forzado solo cambia el ajuste si no pasaba el filtro
+        position_data = None
+        forced_id = None
+        if current_player_id:
+            position_data = self._get_position_data(
+                position, season, min_matches, current_player_id
+            )
+            forced_id = position_data.attrs.get("forced_wyscout_id")
+
+        def build():
+            data = position_data
+            if data is None:
+                data = self._get_position_data(position, season, min_matches)
+            return self._fit_cluster_artifact(
+                data, position, season, min_matches, data_hash, signature
+            )
+
+        artifact = get_iep_artifact_store().get_or_build(
+            (position, season, min_matches, forced_id), data_hash, signature, build
+        )
+        if isinstance(artifact, IEPClusterArtifact):
+            self.scaler, self.pca, self.kmeans = (
+                artifact.scaler,
+                artifact.pca,
+                artifact.kmeans,
+            )
+        return artifact
+
+    def _season_data_hash(self, season: str) -> Optional[str]:
+        """Hash del CSV de la temporada (None si no está disponible)."""
+        try:
+            from controllers.csv_stats_controller import get_season_store
+
+            entry = get_season_store().get(season)
+            return entry.file_hash if entry is not None else None
+        except Exception as e:
+            logger.warning(f"No se pudo obtener hash de datos de {season}: {e}")
+            return None
+
+    def _model_signature(self, position: str) -> str:
+        """Firma de la configuración del modelo: si cambia, se reajusta."""
+        config = self.position_cluster_config.get(position, {"n_clusters": 4})
+        return "|".join(
+            [
+                ARTIFACT_VERSION,
+                f"sklearn={sklearn.__version__}",
+                ",".join(self.base_features),
+                f"k={config['n_clusters']}",
+            ]
+        )
+
+    def _fit_cluster_artifact(
+        self,
+        position_data: pd.DataFrame,
+        position: str,
+        season: str,
+        min_matches: int,
+        data_hash: Optional[str],
+        signature: str,
+    ) -> Union[IEPClusterArtifact, Dict]:
+        """Ajusta scaler/KMeans/PCA y precalcula scores, tiers y percentiles."""
+        if position_data is None or len(position_data) < 10:
+            player_count = len(position_data) if position_data is not None else 0
+            logger.warning(
+                f"Datos insuficientes para clustering {position}: {player_count} jugadores"
+            )
+            return {"error": "insufficient_data", "player_count": player_count}
+
+        # Preparar features para clustering
+        feature_matrix, player_info = self._prepare_features_matrix(
+            position_data, position
+        )
+
+        if feature_matrix.shape[0] < 10:
+            logger.warning(
+                f"Features insuficientes después de limpieza: {feature_matrix.shape[0]} jugadores"
+            )
+            return {
+                "error": "insufficient_features",
+                "player_count": feature_matrix.shape[0],
+            }
+
+        # Normalizar features
+        scaler = StandardScaler()
+        normalized_features = scaler.fit_transform(feature_matrix)
+
+        # Configurar clustering por posición (default a 4 clusters para mejor granularidad)
+        config = self.position_cluster_config.get(
+            position, {"n_clusters": 4, "features_weight": "balanced"}
+        )
+        # Ajustar clusters por datos disponibles (mínimo 2 jugadores por cluster)
+        n_clusters = min(config["n_clusters"], max(2, len(position_data) // 2))
+
+        # Aplicar K-means clustering
+        kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
+        cluster_labels = kmeans.fit_predict(normalized_features)
+
+        # Aplicar PCA para componentes principales
+        pca = PCA(n_components=2)
+        pca_components = pca.fit_transform(normalized_features)
+
+        # Calcular IEP scores y tiers por cluster
+        iep_scores = self._calculate_iep_scores(
+            normalized_features, cluster_labels, pca_components, n_clusters
+        )
+        cluster_tiers = self._cluster_tiers(iep_scores, cluster_labels, n_clusters)
+
+        # Percentil = posición (primera aparición) del score redondeado en la lista ordenada
+        rounded_scores = np.round(iep_scores, 1)
+        ranks = np.searchsorted(np.sort(rounded_scores), rounded_scores, side="left")
+        percentiles = np.round(ranks / len(rounded_scores) * 100, 1)
+
+        logger.info(
+            f"🧮 Artefacto IEP ajustado: {position} {season} (≥{min_matches} partidos)"
+        )
+        return IEPClusterArtifact(
+            position=position,
+            season=season,
+            min_matches=min_matches,
+            data_hash=data_hash,
+            signature=signature,
+            scaler=scaler,
+            pca=pca,
+            kmeans=kmeans,
+            n_clusters=n_clusters,
+            player_names=[info["name"] for info in player_info],
+            teams=[info["team"] for info in player_info],
+            wyscout_ids=[info["wyscout_id"] for info in player_info],
+            feature_matrix=feature_matrix,
+            cluster_labels=cluster_labels,
+            pca_components=pca_components,
+            iep_scores=rounded_scores,
+            percentiles=percentiles,
+            cluster_tiers=cluster_tiers,
+            total_players=len(position_data),
+            silhouette=float(silhouette_score(normalized_features, cluster_labels)),
+            inertia=float(kmeans.inertia_),
+            cluster_analysis=self._analyze_clusters(
+                feature_matrix, cluster_labels, player_info, position
+            ),
+        )
+
+    def _artifact_player_record(self, artifact: IEPClusterArtifact, i: int) -> Dict:
+        """Entrada de players_data para el jugador i del artefacto."""
+        cluster_id = int(artifact.cluster_labels[i])
+        return {
+            "player_name": artifact.player_names[i],
+            "team": artifact.teams[i],
+            "cluster_id": cluster_id,
+            "cluster_label": artifact.cluster_tiers[cluster_id],
+            "iep_score": float(artifact.iep_scores[i]),
+            "pca_components": artifact.pca_components[i, :2].tolist(),
+            "key_features": dict(
+                zip(self.base_features, artifact.feature_matrix[i].tolist())
+            ),
+        }
+
+    def _cluster_distribution(self, artifact: IEPClusterArtifact) -> Dict[int, int]:
+        counts = np.bincount(artifact.cluster_labels, minlength=artifact.n_clusters)
+        return {i: int(counts[i]) for i in range(artifact.n_clusters)}
+
+    def _artifact_to_results(self, artifact: IEPClusterArtifact) -> Dict:
+        """Reconstruye el dict de resultados de clustering desde el artefacto."""
+        pca = artifact.pca
+        return {
+            "success": True,
+            "position": artifact.position,
+            "season": artifact.season,
+            "analysis_date": datetime.now().isoformat(),
+            "model_fitted_at": artifact.created_at,
+            "data_quality": {
+                "total_players": artifact.total_players,
+                "valid_for_clustering": artifact.feature_matrix.shape[0],
+                "features_used": artifact.feature_matrix.shape[1],
+                "min_matches_filter": artifact.min_matches,
+            },
+            "clustering_results": {
+                "n_clusters": artifact.n_clusters,
+                "silhouette_score": round(artifact.silhouette, 3),
+                "inertia": round(artifact.inertia, 2),
+                "cluster_distribution": self._cluster_distribution(artifact),
+            },
+            "pca_analysis": {
+                "explained_variance_ratio": [
+                    float(r) for r in pca.explained_variance_ratio_
+                ],
+                "total_variance_explained": float(sum(pca.explained_variance_ratio_)),
+                "components": pca.components_.tolist(),
+            },
+            "players_data": [
+                self._artifact_player_record(artifact, i) for i in range(len(artifact))
+            ],
+            "cluster_analysis": artifact.cluster_analysis,
+        }
+
     # ============================================================================
     # MÉTODOS AUXILIARES PRIVADOS
     # ============================================================================
@@ -385,173 +502,116 @@ class IEPCalculator:
         season: str,
         min_matches: int,
         current_player_id: int = None,
-    ) -> List[Dict]:
+    ) -> pd.DataFrame:
         """
         Obtiene datos de liga para una posición específica.
 
         MODIFICADO: Usa CSV (493 jugadores) en lugar de BD (5 jugadores)
         para clustering con datos reales de liga.
+
+        Returns:
+            DataFrame con una fila por jugador y las columnas de base_features.
+            Si se fuerza la inclusión del jugador actual, su Wyscout id queda
+            en ``attrs["forced_wyscout_id"]``.
         """
         try:
             # CAMBIO: Usar CSV en lugar de BD para datos completos
-            from controllers.csv_stats_controller import CSVStatsController
+            from controllers.csv_stats_controller import get_csv_stats_controller
 
-            # 🎯 DEBUG: Logging detallado de filtros
-            logger.info(f"🔍 IEP _get_position_data INICIADO:")
-            logger.info(f"   - position: '{position}'")
-            logger.info(f"   - season: '{season}'")
-            logger.info(f"   - min_matches: {min_matches}")
+            logger.info(
+                f"🔍 IEP _get_position_data: position='{position}', season='{season}', min_matches={min_matches}"
+            )
 
-            csv_controller = CSVStatsController()
+            csv_controller = get_csv_stats_controller()
             df = csv_controller._load_season_data(season)
 
             if df is None:
                 logger.warning(f"No se pudo cargar datos CSV para temporada {season}")
-                return []
-
-            # 🔍 DEBUG: Total jugadores en CSV
-            logger.info(f"🔍 Total jugadores en CSV {season}: {len(df)}")
+                return pd.DataFrame()
 
             # Filtrar por posición o grupo (mapear columnas CSV → BD)
             position_df = self._filter_by_position_or_group(df, position)
-
-            # 🔍 DEBUG: Después de filtro posición
             logger.info(
-                f"🔍 Jugadores después de filtro posición '{position}': {len(position_df)}"
+                f"🔍 Jugadores después de filtro posición '{position}': {len(position_df)}/{len(df)}"
             )
 
+            forced_wyscout_id = None
             # Filtrar por mínimo de partidos (usar "Matches played" del CSV)
             if "Matches played" in position_df.columns:
-                position_df_filtered = position_df[
-                    position_df["Matches played"] >= min_matches
-                ]
-
-                # 🔍 DEBUG: Después de filtro mínimo partidos
+                filtered_df = position_df[position_df["Matches played"] >= min_matches]
                 logger.info(
-                    f"🔍 Jugadores después de filtro ≥{min_matches} partidos: {len(position_df_filtered)}"
+                    f"🔍 Jugadores después de filtro ≥{min_matches} partidos: {len(filtered_df)}"
                 )
 
-                # Si hay current_player_id, verificar si necesita ser agregado manualmente
-                if current_player_id:
-                    # Buscar el jugador actual en la BD para obtener su wyscout_id
-                    from controllers.db import get_db_session
-                    from models.player_model import Player
-
-                    with get_db_session() as session:
-                        current_player = (
-                            session.query(Player)
-                            .filter(Player.player_id == current_player_id)
-                            .first()
+                # Si hay current_player_id, agregarlo si el filtro lo dejó fuera
+                current_wyscout_id = (
+                    self._current_wyscout_id(current_player_id)
+                    if current_player_id
+                    else None
+                )
+                if current_wyscout_id:
+                    wyscout_ids = position_df["Wyscout id"].astype(str)
+                    in_position = wyscout_ids.str.contains(
+                        current_wyscout_id, na=False, regex=False
+                    )
+                    in_filtered = in_position[filtered_df.index]
+
+                    if in_filtered.any():
+                        logger.info(
+                            "✅ Jugador actual ya incluido en filtro de partidos"
+                        )
+                    elif in_position.any():
+                        current_player_row = position_df[in_position]
+                        logger.info(
+                            f"🎯 AGREGANDO jugador actual forzosamente: Wyscout {current_wyscout_id} (Partidos: {current_player_row.iloc[0].get('Matches played', 0)}, Min requerido: {min_matches})"
+                        )
+                        filtered_df = pd.concat(
+                            [filtered_df, current_player_row], ignore_index=True
+                        )
+                        forced_wyscout_id = current_wyscout_id
+                    else:
+                        logger.warning(
+                            f"❌ Jugador actual no encontrado en posición {position}"
                         )
-                        if current_player and current_player.wyscout_id:
-                            current_wyscout_id = str(current_player.wyscout_id)
-                            logger.info(
-                                f"🔍 Buscando jugador actual en CSV - Wyscout ID: {current_wyscout_id}"
-                            )
-
-                            # Verificar si el jugador actual ya está en los datos filtrados
-                            current_in_filtered = (
-                                position_df_filtered["Wyscout id"]
-                                .astype(str)
-                                .str.contains(current_wyscout_id, na=False)
-                                .any()
-                            )
-
-                            if not current_in_filtered:
-                                # Verificar si está en los datos de la posición (antes del filtro de partidos)
-                                current_in_position = (
-                                    position_df["Wyscout id"]
-                                    .astype(str)
-                                    .str.contains(current_wyscout_id, na=False)
-                                    .any()
-                                )
-
-                                if current_in_position:
-                                    # Obtener los datos del jugador actual
-                                    current_player_row = position_df[
-                                        position_df["Wyscout id"]
-                                        .astype(str)
-                                        .str.contains(current_wyscout_id, na=False)
-                                    ]
-                                    if not current_player_row.empty:
-                                        matches_played = current_player_row.iloc[0].get(
-                                            "Matches played", 0
-                                        )
-                                        logger.info(
-                                            f"🎯 AGREGANDO jugador actual forzosamente: {current_player.user.name} (Partidos: {matches_played}, Min requerido: {min_matches})"
-                                        )
-
-                                        # Agregar al jugador actual a los datos filtrados
-                                        position_df = pd.concat(
-                                            [position_df_filtered, current_player_row],
-                                            ignore_index=True,
-                                        )
-                                    else:
-                                        logger.warning(
-                                            f"❌ No se pudo obtener datos del jugador actual del CSV"
-                                        )
-                                        position_df = position_df_filtered
-                                else:
-                                    logger.warning(
-                                        f"❌ Jugador actual no encontrado en posición {position}"
-                                    )
-                                    position_df = position_df_filtered
-                            else:
-                                logger.info(
-                                    f"✅ Jugador actual ya incluido en filtro de partidos"
-                                )
-                                position_df = position_df_filtered
-                        else:
-                            logger.warning(
-                                f"❌ No se pudo obtener wyscout_id del jugador actual"
-                            )
-                            position_df = position_df_filtered
-                else:
-                    position_df = position_df_filtered
 
-            else:
-                position_df = position_df
+                position_df = filtered_df
 
             if len(position_df) == 0:
                 logger.warning(
                     f"❌ No hay jugadores {position} después de todos los filtros en {season}"
                 )
-                return []
-
-            # 🔍 DEBUG: Mostrar algunos jugadores que quedaron
-            logger.info(f"🔍 JUGADORES QUE PASARON TODOS LOS FILTROS (primeros 5):")
-            for i, (idx, row) in enumerate(position_df.head().iterrows()):
-                player_name = row.get("Player", "NO_NAME")
-                matches = row.get("Matches played", 0)
-                wyscout_id = row.get("Wyscout id", "NO_ID")
-                logger.info(
-                    f"   [{i}] {player_name} (Matches: {matches}, Wyscout: {wyscout_id})"
-                )
+                return pd.DataFrame()
 
             # Convertir a formato para análisis (mapear columnas CSV → formato esperado)
-            position_data = []
-
-            for idx, row in position_df.iterrows():
-                # Calcular clearances usando columnas disponibles en CSV
-                clearances_estimate = row.get("Aerial duels per 90", 0) * row.get(
-                    "Aerial duels won, %", 0
-                ) / 100 + row.get("Interceptions per 90", 0)
-
-                player_dict = {
-                    "player_name": f"{row.get('Player', 'Unknown')} ({row.get('Team', 'N/A')})",
-                    "team": row.get("Team", "Unknown"),
-                    "goals_per_90": row.get("Goals per 90", 0) or 0,
-                    "assists_per_90": row.get("Assists per 90", 0) or 0,
-                    "pass_accuracy_pct": row.get("Pass accuracy, %", 0) or 0,
-                    "duels_won_pct": row.get("Duels won, %", 0) or 0,
-                    "shots_per_90": row.get("Shots per 90", 0) or 0,
-                    "interceptions_per_90": row.get("Interceptions per 90", 0) or 0,
-                    "tackles_per_90": row.get("Sliding tackles per 90", 0) or 0,
-                    "clearances_per_90": clearances_estimate,
-                    "minutes_played": row.get("Minutes played", 0) or 0,
-                    "matches_played": row.get("Matches played", 0) or 0,
+            def column(name: str) -> pd.Series:
+                if name in position_df.columns:
+                    return position_df[name].reset_index(drop=True)
+                return pd.Series(0, index=range(len(position_df)))
+
+            players = column("Player").tolist()
+            teams = column("Team").tolist()
+            position_data = pd.DataFrame(
+                {
+                    "player_name": [f"{p} ({t})" for p, t in zip(players, teams)],
+                    "team": teams,
+                    "wyscout_id": column("Wyscout id").astype(str).tolist(),
+                    "goals_per_90": column("Goals per 90"),
+                    "assists_per_90": column("Assists per 90"),
+                    "pass_accuracy_pct": column("Pass accuracy, %"),
+                    "duels_won_pct": column("Duels won, %"),
+                    "shots_per_90": column("Shots per 90"),
+                    "interceptions_per_90": column("Interceptions per 90"),
+                    "tackles_per_90": column("Sliding tackles per 90"),
+                    # Clearances estimado: duelos aéreos ganados + interceptaciones
+                    "clearances_per_90": column("Aerial duels per 90")
+                    * column("Aerial duels won, %")
+                    / 100
+                    + column("Interceptions per 90"),
+                    "minutes_played": column("Minutes played"),
+                    "matches_played": column("Matches played"),
                 }
-                position_data.append(player_dict)
+            )
+            position_data.attrs["forced_wyscout_id"] = forced_wyscout_id
 
             logger.info(
                 f"✅ CSV: Datos obtenidos para {position} en {season}: {len(position_data)} jugadores (vs BD: ~0-5)"
@@ -567,13 +627,29 @@ class IEPCalculator:
                 position, season, min_matches, current_player_id
             )
 
+    def _current_wyscout_id(self, current_player_id: int) -> Optional[str]:
+        """Wyscout id del jugador actual en BD (None si no lo tiene)."""
+        from models.player_model import Player
+
+        with get_db_session() as session:
+            current_player = (
+                session.query(Player)
+                .filter(Player.player_id == current_player_id)
+                .first()
+            )
+            if current_player and current_player.wyscout_id:
+                return str(current_player.wyscout_id)
+
+        logger.warning("❌ No se pudo obtener wyscout_id del jugador actual")
+        return None
+
     def _get_position_data_bd_fallback(
         self,
         position: str,
         season: str,
         min_matches: int,
         current_player_id: int = None,
-    ) -> List[Dict]:
+    ) -> pd.DataFrame:
         """
         Fallback al método original BD si CSV falla.
 
@@ -604,6 +680,7 @@ class IEPCalculator:
                     player_dict = {
                         "player_name": f"{stat.full_name or 'Unknown'} ({stat.team or 'N/A'})",
                         "team": stat.team or "Unknown",
+                        "wyscout_id": str(stat.wyscout_id),
                         "goals_per_90": stat.goals_per_90 or 0,
                         "assists_per_90": stat.assists_per_90 or 0,
                         "pass_accuracy_pct": stat.pass_accuracy_pct or 0,
@@ -621,43 +698,40 @@ class IEPCalculator:
                 logger.info(
                     f"📊 BD Fallback: Datos obtenidos para {position}: {len(position_data)} jugadores"
                 )
-                return position_data
+                return pd.DataFrame(position_data)
 
         except Exception as e:
             logger.error(f"Error en BD fallback: {e}")
-            return []
+            return pd.DataFrame()
 
     def _prepare_features_matrix(
-        self, position_data: List[Dict], position: str
+        self, position_data: pd.DataFrame, position: str
     ) -> Tuple[np.ndarray, List[Dict]]:
-        """Prepara matriz de features para clustering."""
+        """Prepara matriz de features para clustering (vectorizado)."""
         try:
-            features_list = []
-            player_info = []
-
-            for player in position_data:
-                # Extraer features base
-                feature_row = []
-                valid_features = True
-
-                for feature in self.base_features:
-                    value = player.get(feature, 0)
-                    if pd.isna(value) or value is None:
-                        value = 0
-
-                    feature_row.append(float(value))
-
-                # Validar que el jugador tenga datos mínimos
-                if sum(feature_row) == 0 or player.get("minutes_played", 0) < 90:
-                    continue
-
-                features_list.append(feature_row)
-                player_info.append(
-                    {"name": player["player_name"], "team": player["team"]}
-                )
+            raw = position_data.reindex(columns=self.base_features).to_numpy(
+                dtype=np.float64, na_value=np.nan
+            )
+            features = np.where(np.isnan(raw), 0.0, raw)
 
-            # Convertir a numpy array
-            feature_matrix = np.array(features_list)
+            # Validar que el jugador tenga datos mínimos (NaN en minutos no descarta)
+            minutes = position_data["minutes_played"].to_numpy(
+                dtype=np.float64, na_value=np.nan
+            )
+            valid = (features.sum(axis=1) != 0) & ~(minutes < 90)
+
+            feature_matrix = features[valid]
+            rows = np.flatnonzero(valid)
+            names = position_data["player_name"].to_numpy(dtype=object)
+            teams = position_data["team"].to_numpy(dtype=object)
+            if "wyscout_id" in position_data.columns:
+                wyscout_ids = position_data["wyscout_id"].to_numpy(dtype=object)
+            else:
+                wyscout_ids = np.full(len(position_data), None, dtype=object)
+            player_info = [
+                {"name": names[i], "team": teams[i], "wyscout_id": wyscout_ids[i]}
+                for i in rows
+            ]
 
             logger.info(f"✅ Matriz features preparada: {feature_matrix.shape}")
             return feature_matrix, player_info
@@ -675,48 +749,29 @@ class IEPCalculator:
     ) -> np.ndarray:
         """Calcula scores IEP basados en posición en clusters y componentes PCA."""
         try:
-            iep_scores = []
-
-            # Calcular centroides de clusters para referencia
-            cluster_centers = []
+            # Calcular centroides de clusters (en espacio PCA) para referencia
+            cluster_centers = np.zeros((n_clusters, 2))
             for i in range(n_clusters):
                 cluster_mask = cluster_labels == i
                 if np.any(cluster_mask):
-                    center = np.mean(pca_components[cluster_mask], axis=0)
-                    cluster_centers.append(center)
-                else:
-                    cluster_centers.append([0, 0])
+                    cluster_centers[i] = np.mean(pca_components[cluster_mask], axis=0)
 
             # Ordenar clusters por calidad (primer componente PCA)
             cluster_quality_order = sorted(
                 range(n_clusters), key=lambda i: cluster_centers[i][0], reverse=True
             )
+            cluster_rank = np.empty(n_clusters, dtype=np.int64)
+            cluster_rank[cluster_quality_order] = np.arange(n_clusters)
 
-            for i in range(len(normalized_features)):
-                cluster_id = cluster_labels[i]
-                pca_pos = pca_components[i]
+            # Score base por tier de cluster: Elite 85, Strong 65, Average 45, Dev 25
+            base_score = 85 - cluster_rank[cluster_labels] * 20
 
-                # Score base por tier de cluster (0-100)
-                cluster_rank = cluster_quality_order.index(cluster_id)
-                base_score = 85 - (
-                    cluster_rank * 20
-                )  # Elite: 85, Strong: 65, Average: 45, Dev: 25
+            # Ajuste por posición dentro del cluster (±15 PC1, ±5 PC2)
+            pc1_adjustment = np.clip(pca_components[:, 0] * 10, -15, 15)
+            pc2_adjustment = np.clip(pca_components[:, 1] * 3, -5, 5)
 
-                # Ajuste por posición dentro del cluster (±15 puntos)
-                pc1_adjustment = min(
-                    15, max(-15, pca_pos[0] * 10)
-                )  # Principal component influence
-                pc2_adjustment = min(
-                    5, max(-5, pca_pos[1] * 3)
-                )  # Secondary component influence
-
-                # IEP Score final (0-100)
-                iep_score = base_score + pc1_adjustment + pc2_adjustment
-                iep_score = max(0, min(100, iep_score))  # Clamp al rango
-
-                iep_scores.append(iep_score)
-
-            return np.array(iep_scores)
+            # IEP Score final (0-100)
+            return np.clip(base_score + pc1_adjustment + pc2_adjustment, 0, 100)
 
         except Exception as e:
             logger.error(f"Error calculando IEP scores: {e}")
@@ -810,18 +865,19 @@ class IEPCalculator:
                 return f"Cluster {cluster_id + 1}"
             return labels[min(cluster_id, len(labels) - 1)]
 
-        # Calcular IEP promedio por cluster para asignación coherente
-        import numpy as np
+        return self._cluster_tiers(
+            np.asarray(iep_scores), np.asarray(cluster_labels), n_clusters
+        )[cluster_id]
 
+    def _cluster_tiers(
+        self, iep_scores: np.ndarray, cluster_labels: np.ndarray, n_clusters: int
+    ) -> Dict[int, str]:
+        """Etiqueta de tier por cluster según su IEP medio (mejor → peor)."""
+        # Calcular IEP promedio por cluster para asignación coherente
         cluster_averages = {}
         for i in range(n_clusters):
-            cluster_mask = [label == i for label in cluster_labels]
-            cluster_iep_scores = [
-                iep_scores[j]
-                for j, is_in_cluster in enumerate(cluster_mask)
-                if is_in_cluster
-            ]
-            if cluster_iep_scores:
+            cluster_iep_scores = iep_scores[cluster_labels == i]
+            if len(cluster_iep_scores):
                 cluster_averages[i] = np.mean(cluster_iep_scores)
             else:
                 cluster_averages[i] = 0
@@ -844,12 +900,10 @@ class IEPCalculator:
         else:
             tier_names = [f"Tier {i+1}" for i in range(n_clusters)]
 
-        # Encontrar ranking del cluster actual
-        cluster_rank = next(
-            i for i, (cid, _) in enumerate(sorted_clusters) if cid == cluster_id
-        )
-
-        return tier_names[min(cluster_rank, len(tier_names) - 1)]
+        return {
+            int(cid): tier_names[min(rank, len(tier_names) - 1)]
+            for rank, (cid, _) in enumerate(sorted_clusters)
+        }
 
     def _get_cluster_characteristics(
         self, cluster_stats: Dict, position: str
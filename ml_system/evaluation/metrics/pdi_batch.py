@@ -0,0 +1,888 @@
+"""
+Batch PDI Engine - Cálculo vectorizado del PDI para toda la liga.
+
+Equivalente columnar de PDICalculator._calculate_pdi_metrics:
+1. Una sola query carga ProfessionalStats de una o varias temporadas como matriz
+2. Los pesos legacy, SKILL_DOMAINS y POSITION_WEIGHTS se precompilan en arrays
+   NumPy (campo, peso, rango) por grupo posicional
+3. Todas las componentes se evalúan por columnas, en el mismo orden de
+   operaciones que la ruta por objeto (resultados idénticos tras redondear)
+4. MLMetrics se actualiza en bloque: UPDATE por PK + INSERT de las nuevas
+
+Autor: Proyecto Fin de Máster - Python Aplicado al Deporte
+Fecha: Agosto 2025
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert, update
+
+from controllers.db import get_db_session
+from ml_system.evaluation.metrics.pdi_calculator import (
+    POSITION_WEIGHTS,
+    SKILL_DOMAINS,
+    PDICalculator,
+)
+from models.ml_metrics_model import MLMetrics
+from models.player_model import Player
+from models.professional_stats_model import ProfessionalStats
+
+logger = logging.getLogger(__name__)
+
+# Mapeos legacy → columnas ProfessionalStats (idénticos a la ruta por objeto)
+UNIVERSAL_FIELD_MAPPING = {
+    "accurate_passes_pct": "pass_accuracy_pct",
+    "duels_won_pct": "duels_won_pct",
+    "defensive_duels_won_pct": "defensive_duels_won_pct",
+    "yellow_cards_per_90": "yellow_cards",
+}
+ZONE_FIELD_MAPPING = {
+    "goals_per_90": "goals_per_90",
+    "assists_per_90": "assists_per_90",
+    "shots_on_target_pct": "shots_on_target_pct",
+    "progressive_passes_per_90": "progressive_passes_per_90",
+    "key_passes_per_90": "key_passes_per_90",
+    "ball_recoveries_per_90": "ball_recoveries_per_90",
+    "successful_defensive_actions_per_90": "defensive_actions_per_90",
+    "interceptions_per_90": "interceptions_per_90",
+    "clearances_per_90": "clearances_per_90",
+}
+SPECIFIC_FIELD_MAPPING = {
+    "aerial_duels_won_pct": "aerial_duels_won_pct",
+    "successful_dribbles_pct": "dribbles_success_pct",
+    "goals_per_90": "goals_per_90",
+    "assists_per_90": "assists_per_90",
+    "goal_conversion_pct": "goal_conversion_pct",
+    "touches_in_box_per_90": "touches_in_box_per_90",
+    "crosses_per_90": "crosses_per_90",
+    "long_passes_accuracy_pct": "long_passes_accuracy_pct",
+}
+
+# Columnas usadas por las métricas originales (no legacy)
+BASE_FIELDS = (
+    "aerial_duels_won_pct",
+    "assists_per_90",
+    "defensive_actions_per_90",
+    "defensive_duels_won_pct",
+    "dribbles_success_pct",
+    "duels_won_pct",
+    "expected_assists",
+    "expected_goals",
+    "goal_conversion_pct",
+    "goals_per_90",
+    "interceptions_per_90",
+    "key_passes_per_90",
+    "long_passes_accuracy_pct",
+    "matches_played",
+    "minutes_played",
+    "offensive_duels_won_pct",
+    "pass_accuracy_pct",
+    "passes_per_90",
+    "progressive_passes_accuracy_pct",
+    "progressive_passes_per_90",
+    "progressive_runs_per_90",
+    "shot_assists_per_90",
+    "sliding_tackles_per_90",
+    "touches_in_box_per_90",
+    "yellow_cards",
+)
+
+GROUPS = ("GK", "CB", "FB", "DMF", "CMF", "AMF", "W", "CF")
+DOMAINS = tuple(SKILL_DOMAINS)
+
+# Salidas persistidas en MLMetrics (mismo orden que _calculate_pdi_metrics)
+METRIC_COLUMNS = (
+    "pdi_overall",
+    "pdi_universal",
+    "pdi_zone",
+    "pdi_position_specific",
+    "technical_proficiency",
+    "tactical_intelligence",
+    "physical_performance",
+    "consistency_index",
+)
+
+
+@dataclass
+class _LegacyBlock:
+    """Features legacy precompiladas: columna, peso y rango esperado."""
+
+    fields: List[str]
+    weights: np.ndarray
+    mins: np.ndarray
+    maxs: np.ndarray
+    is_yellow: List[bool]
+    configured: bool  # False si la posición no tiene pesos legacy
+
+    def __bool__(self) -> bool:
+        # Con pesos pero sin campos mapeados la ruta legacy devuelve 50.0
+        return self.configured
+
+
+@dataclass
+class StatsMatrix:
+    """Temporada(s) de ProfessionalStats en formato columnar."""
+
+    player_ids: np.ndarray
+    seasons: np.ndarray
+    positions: np.ndarray  # posición original (None → "CF")
+    columns: Dict[str, np.ndarray]  # float64, None → NaN
+
+    def __len__(self) -> int:
+        return len(self.player_ids)
+
+
+def _truthy(values: np.ndarray) -> np.ndarray:
+    """Equivalente vectorizado de `if stats.campo:` (None/0 → False)."""
+    return ~np.isnan(values) & (values != 0)
+
+
+def _weighted_average(
+    terms: Sequence[Tuple[np.ndarray, np.ndarray, float]], size: int
+) -> np.ndarray:
+    """
+    Promedio ponderado de las métricas presentes por fila (50.0 si ninguna).
+
+    Suma en el mismo orden que sum(score * weight ...) de la ruta por objeto.
+    """
+    weighted_sum = np.zeros(size)
+    total_weight = np.zeros(size)
+    for present, score, weight in terms:
+        weighted_sum = weighted_sum + np.where(present, score * weight, 0.0)
+        total_weight = total_weight + np.where(present, weight, 0.0)
+    safe_weight = np.where(total_weight > 0, total_weight, 1.0)
+    return np.where(total_weight > 0, weighted_sum / safe_weight, 50.0)
+
+
+class BatchPDIEngine:
+    """
+    Motor PDI por lotes sobre la tabla ProfessionalStats.
+
+    Uso:
+        engine = BatchPDIEngine()
+        summary = engine.recalculate(seasons=["2024-25"])
+    """
+
+    def __init__(
+        self,
+        calculator: Optional[PDICalculator] = None,
+        session_factory: Callable = None,
+    ):
+        self.calculator = calculator or PDICalculator()
+        self.session_factory = session_factory or get_db_session
+        self._compile_weights()
+
+    # ------------------------------------------------------------------
+    # Compilación de pesos
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _compile_block(features: Dict, mapping: Dict, default_range) -> _LegacyBlock:
+        fields, weights, mins, maxs, is_yellow = [], [], [], [], []
+        for feature_name, config in features.items():
+            mapped_field = mapping.get(feature_name)
+            if not mapped_field or not hasattr(ProfessionalStats, mapped_field):
+                continue
+            min_val, max_val = config.get("expected_range", default_range)
+            fields.append(mapped_field)
+            weights.append(config.get("weight", 0.1))
+            mins.append(min_val)
+            maxs.append(max_val)
+            is_yellow.append(feature_name == "yellow_cards_per_90")
+        return _LegacyBlock(
+            fields,
+            np.asarray(weights, dtype=np.float64),
+            np.asarray(mins, dtype=np.float64),
+            np.asarray(maxs, dtype=np.float64),
+            is_yellow,
+            configured=bool(features),
+        )
+
+    def _compile_weights(self):
+        """Precompila pesos legacy, zonas, dominios y posiciones en arrays."""
+        legacy = self.calculator.legacy_weights
+
+        universal_features = {}
+        for features in legacy.universal_features.values():
+            universal_features.update(features)
+        self.universal_block = self._compile_block(
+            universal_features, UNIVERSAL_FIELD_MAPPING, (0, 100)
+        )
+        self.zone_blocks = {
+            zone: self._compile_block(features, ZONE_FIELD_MAPPING, (0, 10))
+            for zone, features in legacy.zone_features.items()
+        }
+        self.specific_blocks = {
+            group: self._compile_block(
+                legacy.position_features.get(group, {}),
+                SPECIFIC_FIELD_MAPPING,
+                (0, 100),
+            )
+            for group in GROUPS
+        }
+
+        # Pesos de zona por grupo: filas = GROUPS, columnas = def/mid/off
+        zone_weights = self.calculator.zone_weights
+        self.zone_weight_matrix = np.array(
+            [
+                [
+                    zone_weights[g]["defensive"],
+                    zone_weights[g]["midfield"],
+                    zone_weights[g]["offensive"],
+                ]
+                for g in GROUPS
+            ]
+        )
+        # Mismo fallback a 0.3/0.4/0.3 que la ruta enhanced si falta la clave
+        self.legacy_zone_weight_matrix = np.array(
+            [
+                [
+                    zone_weights[g].get("defensive", 0.3),
+                    zone_weights[g].get("midfield", 0.4),
+                    zone_weights[g].get("offensive", 0.3),
+                ]
+                for g in GROUPS
+            ]
+        )
+
+        # PDI jerárquico: métricas por dominio y pesos de dominio por grupo
+        self.domain_blocks = {}
+        for domain, metrics in SKILL_DOMAINS.items():
+            fields = [m for m in metrics if hasattr(ProfessionalStats, m)]
+            self.domain_blocks[domain] = (
+                fields,
+                np.array([metrics[m]["weight"] for m in fields], dtype=np.float64),
+                np.array([metrics[m]["range"][0] for m in fields], dtype=np.float64),
+                np.array([metrics[m]["range"][1] for m in fields], dtype=np.float64),
+            )
+        self.domain_weight_matrix = np.array(
+            [[POSITION_WEIGHTS[g].get(d, 0) for d in DOMAINS] for g in GROUPS]
+        )
+
+    def _required_fields(self) -> List[str]:
+        fields = set(BASE_FIELDS) | set(self.universal_block.fields)
+        for block in list(self.zone_blocks.values()) + list(
+            self.specific_blocks.values()
+        ):
+            fields.update(block.fields)
+        for domain_fields, *_ in self.domain_blocks.values():
+            fields.update(domain_fields)
+        return sorted(fields)
+
+    # ------------------------------------------------------------------
+    # Carga columnar
+    # ------------------------------------------------------------------
+
+    def load_stats(
+        self, session, seasons: Optional[Sequence[str]] = None
+    ) -> StatsMatrix:
+        """
+        Carga ProfessionalStats de jugadores profesionales en una sola query.
+
+        Si hay varias filas por (jugador, temporada) se usa la primera por
+        stat_id, igual que el .first() de la ruta por objeto.
+        """
+        fields = self._required_fields()
+        query = (
+            session.query(
+                ProfessionalStats.player_id,
+                ProfessionalStats.season,
+                ProfessionalStats.primary_position,
+                *[getattr(ProfessionalStats, f) for f in fields],
+            )
+            .join(Player, Player.player_id == ProfessionalStats.player_id)
+            .filter(Player.is_professional != 0)
+        )
+        if seasons:
+            query = query.filter(ProfessionalStats.season.in_(list(seasons)))
+
+        frame = pd.DataFrame(
+            query.order_by(ProfessionalStats.stat_id).all(),
+            columns=["player_id", "season", "primary_position", *fields],
+        )
+        frame = frame[~frame.duplicated(["player_id", "season"])]
+
+        positions = frame["primary_position"].to_numpy(dtype=object)
+        positions = np.where(pd.isna(positions) | (positions == ""), "CF", positions)
+        return StatsMatrix(
+            player_ids=frame["player_id"].to_numpy(dtype=np.int64),
+            seasons=frame["season"].to_numpy(dtype=object),
+            positions=positions,
+            columns={
+                f: frame[f].to_numpy(dtype=np.float64, na_value=np.nan) for f in fields
+            },
+        )
+
+    # ------------------------------------------------------------------
+    # Componentes vectorizadas (espejo de PDICalculator)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _legacy_score(c: Dict[str, np.ndarray], block: _LegacyBlock, size: int):
+        """Ruta legacy: normalización por rango y promedio ponderado (50.0 si vacío)."""
+        total_score = np.zeros(size)
+        total_weight = np.zeros(size)
+        fallback = np.zeros(size, dtype=bool)
+
+        for i, field in enumerate(block.fields):
+            value = c[field]
+            present = value >= 0  # None/NaN → False
+            weight = block.weights[i]
+            min_val, max_val = block.mins[i], block.maxs[i]
+            normalized = np.maximum(
+                0, np.minimum(100, ((value - min_val) / (max_val - min_val)) * 100)
+            )
+
+            if block.is_yellow[i]:
+                matches = c["matches_played"]
+                minutes = c["minutes_played"]
+                per_match = _truthy(matches)
+                per_90 = np.where(minutes > 0, (value / matches) * 90 / minutes, 0.0)
+                inverse = np.maximum(0, 100 - (per_90 / max_val) * 100)
+                normalized = np.where(per_match, inverse, normalized)
+                # minutes None con partidos > 0 lanza TypeError en la ruta por objeto
+                fallback |= present & per_match & np.isnan(minutes)
+
+            total_score = total_score + np.where(present, normalized * weight, 0.0)
+            total_weight = total_weight + np.where(present, weight, 0.0)
+
+        safe_weight = np.where(total_weight > 0, total_weight, 1.0)
+        score = np.where(total_weight > 0, total_score / safe_weight, 50.0)
+        return score, fallback
+
+    @staticmethod
+    def _activity(c: Dict[str, np.ndarray]):
+        present = _truthy(c["minutes_played"]) & _truthy(c["matches_played"])
+        avg_minutes = c["minutes_played"] / c["matches_played"]
+        return present, np.minimum(100, (avg_minutes / 90) * 100)
+
+    @staticmethod
+    def _discipline(c: Dict[str, np.ndarray], factor: float) -> np.ndarray:
+        present = _truthy(c["yellow_cards"]) & _truthy(c["matches_played"])
+        yellow_rate = c["yellow_cards"] / c["matches_played"]
+        return np.where(present, np.maximum(0, 100 - (yellow_rate * factor)), 100.0)
+
+    def _universal_original(self, c, n) -> np.ndarray:
+        activity_present, activity = self._activity(c)
+        always = np.ones(n, dtype=bool)
+        return _weighted_average(
+            [
+                (
+                    _truthy(c["pass_accuracy_pct"]),
+                    np.minimum(100, c["pass_accuracy_pct"] * 1.2),
+                    0.30,
+                ),
+                (
+                    _truthy(c["duels_won_pct"]),
+                    np.minimum(100, c["duels_won_pct"] * 1.5),
+                    0.25,
+                ),
+                (activity_present, activity, 0.20),
+                (always, self._discipline(c, 50), 0.25),
+            ],
+            n,
+        )
+
+    @staticmethod
+    def _defensive_zone(c, n) -> np.ndarray:
+        return _weighted_average(
+            [
+                (
+                    _truthy(c["defensive_actions_per_90"]),
+                    np.minimum(100, c["defensive_actions_per_90"] * 4),
+                    0.40,
+                ),
+                (
+                    _truthy(c["defensive_duels_won_pct"]),
+                    np.minimum(100, c["defensive_duels_won_pct"] * 1.3),
+                    0.35,
+                ),
+                (
+                    _truthy(c["aerial_duels_won_pct"]),
+                    np.minimum(100, c["aerial_duels_won_pct"] * 1.2),
+                    0.25,
+                ),
+            ],
+            n,
+        )
+
+    @staticmethod
+    def _midfield_zone(c, n) -> np.ndarray:
+        return _weighted_average(
+            [
+                (
+                    _truthy(c["passes_per_90"]),
+                    np.minimum(100, c["passes_per_90"] / 6),
+                    0.30,
+                ),
+                (
+                    _truthy(c["progressive_passes_accuracy_pct"]),
+                    np.minimum(100, c["progressive_passes_accuracy_pct"] * 1.1),
+                    0.35,
+                ),
+                (
+                    _truthy(c["key_passes_per_90"]),
+                    np.minimum(100, c["key_passes_per_90"] * 25),
+                    0.35,
+                ),
+            ],
+            n,
+        )
+
+    @staticmethod
+    def _offensive_zone(c, n) -> np.ndarray:
+        return _weighted_average(
+            [
+                (
+                    _truthy(c["goals_per_90"]),
+                    np.minimum(100, c["goals_per_90"] * 50),
+                    0.40,
+                ),
+                (
+                    _truthy(c["assists_per_90"]),
+                    np.minimum(100, c["assists_per_90"] * 40),
+                    0.30,
+                ),
+                (
+                    _truthy(c["expected_goals"]),
+                    np.minimum(100, c["expected_goals"] * 20),
+                    0.30,
+                ),
+            ],
+            n,
+        )
+
+    def _specific_original(self, c, n, group_codes) -> np.ndarray:
+        """Métricas específicas por grupo (GK, defensa, medio, ataque)."""
+        defender = _weighted_average(
+            [
+                (
+                    _truthy(c["interceptions_per_90"]),
+                    np.minimum(100, c["interceptions_per_90"] * 10),
+                    0.40,
+                ),
+                (
+                    _truthy(c["sliding_tackles_per_90"]),
+                    np.minimum(100, c["sliding_tackles_per_90"] * 20),
+                    0.30,
+                ),
+                (
+                    _truthy(c["aerial_duels_won_pct"]),
+                    np.minimum(100, c["aerial_duels_won_pct"] * 1.2),
+                    0.30,
+                ),
+            ],
+            n,
+        )
+        dmf = _weighted_average(
+            [
+                (
+                    _truthy(c["defensive_actions_per_90"]),
+                    np.minimum(100, c["defensive_actions_per_90"] * 4),
+                    0.50,
+                ),
+                (
+                    _truthy(c["passes_per_90"]),
+                    np.minimum(100, c["passes_per_90"] / 6),
+                    0.50,
+                ),
+            ],
+            n,
+        )
+        cmf = _weighted_average(
+            [
+                (
+                    _truthy(c["progressive_passes_per_90"]),
+                    np.minimum(100, c["progressive_passes_per_90"] * 8),
+                    0.60,
+                ),
+                (
+                    _truthy(c["duels_won_pct"]),
+                    np.minimum(100, c["duels_won_pct"] * 1.3),
+                    0.40,
+                ),
+            ],
+            n,
+        )
+        amf = _weighted_average(
+            [
+                (
+                    _truthy(c["key_passes_per_90"]),
+                    np.minimum(100, c["key_passes_per_90"] * 25),
+                    0.60,
+                ),
+                (
+                    _truthy(c["expected_assists"]),
+                    np.minimum(100, c["expected_assists"] * 30),
+                    0.40,
+                ),
+            ],
+            n,
+        )
+        forward = _weighted_average(
+            [
+                (
+                    _truthy(c["goal_conversion_pct"]),
+                    np.minimum(100, c["goal_conversion_pct"] * 2),
+                    0.40,
+                ),
+                (
+                    _truthy(c["touches_in_box_per_90"]),
+                    np.minimum(100, c["touches_in_box_per_90"] * 8),
+                    0.30,
+                ),
+                (
+                    _truthy(c["shot_assists_per_90"]),
+                    np.minimum(100, c["shot_assists_per_90"] * 15),
+                    0.30,
+                ),
+            ],
+            n,
+        )
+        by_group = np.stack(
+            [
+                self._defensive_zone(c, n),  # GK
+                defender,  # CB
+                defender,  # FB
+                dmf,
+                cmf,
+                amf,
+                forward,  # W
+                forward,  # CF
+            ]
+        )
+        return by_group[group_codes, np.arange(n)]
+
+    @staticmethod
+    def _technical(c, n) -> np.ndarray:
+        return _weighted_average(
+            [
+                (
+                    _truthy(c["pass_accuracy_pct"]),
+                    np.minimum(100, c["pass_accuracy_pct"] * 1.1),
+                    0.30,
+                ),
+                (
+                    _truthy(c["dribbles_success_pct"]),
+                    np.minimum(100, c["dribbles_success_pct"] * 1.2),
+                    0.25,
+                ),
+                (
+                    _truthy(c["long_passes_accuracy_pct"]),
+                    np.minimum(100, c["long_passes_accuracy_pct"] * 1.1),
+                    0.25,
+                ),
+                (
+                    _truthy(c["touches_in_box_per_90"]),
+                    np.minimum(100, c["touches_in_box_per_90"] * 5),
+                    0.20,
+                ),
+            ],
+            n,
+        )
+
+    @staticmethod
+    def _tactical(c, n) -> np.ndarray:
+        return _weighted_average(
+            [
+                (
+                    _truthy(c["progressive_passes_per_90"]),
+                    np.minimum(100, c["progressive_passes_per_90"] * 6),
+                    0.40,
+                ),
+                (
+                    _truthy(c["progressive_runs_per_90"]),
+                    np.minimum(100, c["progressive_runs_per_90"] * 15),
+                    0.30,
+                ),
+                (
+                    _truthy(c["duels_won_pct"]),
+                    np.minimum(100, c["duels_won_pct"] * 1.2),
+                    0.30,
+                ),
+            ],
+            n,
+        )
+
+    def _physical(self, c, n) -> np.ndarray:
+        endurance_present, endurance = self._activity(c)
+        return _weighted_average(
+            [
+                (
+                    _truthy(c["offensive_duels_won_pct"]),
+                    np.minimum(100, c["offensive_duels_won_pct"] * 1.3),
+                    0.40,
+                ),
+                (
+                    _truthy(c["progressive_runs_per_90"]),
+                    np.minimum(100, c["progressive_runs_per_90"] * 12),
+                    0.35,
+                ),
+                (endurance_present, endurance, 0.25),
+            ],
+            n,
+        )
+
+    def _consistency(self, c, n) -> np.ndarray:
+        regularity_present, regularity = self._activity(c)
+        efficiency = np.where(
+            _truthy(c["pass_accuracy_pct"]),
+            np.minimum(100, c["pass_accuracy_pct"] * 1.1),
+            70.0,
+        )
+        always = np.ones(n, dtype=bool)
+        return _weighted_average(
+            [
+                (always, self._discipline(c, 60), 0.50),
+                (regularity_present, regularity, 0.30),
+                (always, efficiency, 0.20),
+            ],
+            n,
+        )
+
+    def _hierarchical(self, c, n, group_codes) -> Dict[str, np.ndarray]:
+        """PDI jerárquico (SKILL_DOMAINS × POSITION_WEIGHTS) vectorizado."""
+        result = {}
+        final_score = np.zeros(n)
+        for j, domain in enumerate(DOMAINS):
+            fields, weights, mins, maxs = self.domain_blocks[domain]
+            total_score = np.zeros(n)
+            total_weight = np.zeros(n)
+            for i, field in enumerate(fields):
+                value = c[field]
+                present = ~np.isnan(value)
+                clamped = np.maximum(mins[i], np.minimum(value, maxs[i]))
+                span = maxs[i] - mins[i]
+                normalized = ((clamped - mins[i]) / span) * 100 if span != 0 else 0
+                total_score = total_score + np.where(
+                    present, normalized * weights[i], 0.0
+                )
+                total_weight = total_weight + np.where(present, weights[i], 0.0)
+            safe_weight = np.where(total_weight > 0, total_weight, 1.0)
+            domain_score = np.where(total_weight > 0, total_score / safe_weight, 0.0)
+            result[f"pdi_{domain}"] = domain_score
+            final_score = (
+                final_score + domain_score * self.domain_weight_matrix[group_codes, j]
+            )
+        result["pdi_overall"] = final_score
+        return result
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def _group_codes(self, positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Códigos de grupo científico y de grupo legacy por fila."""
+        mapping = self.calculator.position_mapping
+        legacy = self.calculator.legacy_weights
+        uniques, inverse = np.unique(positions.astype(str), return_inverse=True)
+        groups = np.array([GROUPS.index(mapping.get(p, "CF")) for p in uniques])
+        legacy_groups = np.array(
+            [GROUPS.index(legacy._normalize_position_for_weights(p)) for p in uniques]
+        )
+        return groups[inverse], legacy_groups[inverse]
+
+    def compute(self, matrix: StatsMatrix) -> Dict[str, np.ndarray]:
+        """
+        Calcula todas las componentes PDI para cada fila de la matriz.
+
+        Returns:
+            Dict columna → array (sin redondear), más position_analyzed y
+            el desglose jerárquico con prefijo "hierarchical_"
+        """
+        n = len(matrix)
+        c = matrix.columns
+        group_codes, legacy_codes = self._group_codes(matrix.positions)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # Universal: 70% legacy + 30% original
+            universal_original = self._universal_original(c, n)
+            if self.universal_block:
+                enhanced, fallback = self._legacy_score(c, self.universal_block, n)
+                universal = enhanced * 0.7 + universal_original * 0.3
+                universal = np.where(fallback, universal_original, universal)
+            else:
+                universal = universal_original
+
+            # Zona: zonas legacy ponderadas por posición + zona original
+            zone_scores = [
+                self._defensive_zone(c, n),
+                self._midfield_zone(c, n),
+                self._offensive_zone(c, n),
+            ]
+            zone_w = self.zone_weight_matrix[group_codes]
+            zone_original = (
+                zone_scores[0] * zone_w[:, 0]
+                + zone_scores[1] * zone_w[:, 1]
+                + zone_scores[2] * zone_w[:, 2]
+            )
+            legacy_zones = {
+                name: self._legacy_score(c, block, n)[0]
+                for name, block in self.zone_blocks.items()
+            }
+            if legacy_zones:
+                legacy_w = self.legacy_zone_weight_matrix[group_codes]
+                no_zone = np.full(n, 50.0)
+                weighted = (
+                    legacy_zones.get("defensive", no_zone) * legacy_w[:, 0]
+                    + legacy_zones.get("midfield", no_zone) * legacy_w[:, 1]
+                    + legacy_zones.get("offensive", no_zone) * legacy_w[:, 2]
+                )
+                zone = weighted * 0.7 + zone_original * 0.3
+            else:
+                zone = zone_original
+
+            # Específicas: bloque legacy del grupo legacy + específica original
+            specific_original = self._specific_original(c, n, group_codes)
+            specific = specific_original.copy()
+            for code, group in enumerate(GROUPS):
+                block = self.specific_blocks[group]
+                rows = legacy_codes == code
+                if not block or not rows.any():
+                    continue
+                sub = {f: values[rows] for f, values in c.items()}
+                enhanced, _ = self._legacy_score(sub, block, int(rows.sum()))
+                specific[rows] = enhanced * 0.7 + specific_original[rows] * 0.3
+
+            weights = self.calculator.pdi_weights
+            pdi = (
+                universal * weights["universal"]
+                + zone * weights["zone"]
+                + specific * weights["position_specific"]
+            )
+
+            results = {
+                "pdi_overall": pdi,
+                "pdi_universal": universal,
+                "pdi_zone": zone,
+                "pdi_position_specific": specific,
+                "technical_proficiency": self._technical(c, n),
+                "tactical_intelligence": self._tactical(c, n),
+                "physical_performance": self._physical(c, n),
+                "consistency_index": self._consistency(c, n),
+            }
+            for key, values in self._hierarchical(c, n, group_codes).items():
+                results[f"hierarchical_{key}"] = values
+
+        group_names = np.array(GROUPS, dtype=object)[group_codes]
+        results["position_analyzed"] = np.array(
+            [f"{p} ({g})" for p, g in zip(matrix.positions, group_names)],
+            dtype=object,
+        )
+        return results
+
+    def _metric_rows(
+        self, matrix: StatsMatrix, results: Dict[str, np.ndarray]
+    ) -> List[Dict]:
+        """Filas listas para MLMetrics (round() de Python, como la ruta por objeto)."""
+        columns = [results[name].tolist() for name in METRIC_COLUMNS]
+        rows = []
+        for i, values in enumerate(zip(*columns)):
+            row = {name: round(v, 2) for name, v in zip(METRIC_COLUMNS, values)}
+            row["player_id"] = int(matrix.player_ids[i])
+            row["season"] = matrix.seasons[i]
+            row["position_analyzed"] = results["position_analyzed"][i]
+            rows.append(row)
+        return rows
+
+    def upsert(self, session, rows: List[Dict]) -> Tuple[int, int]:
+        """
+        Actualiza en bloque las métricas existentes e inserta las nuevas.
+
+        Returns:
+            (insertadas, actualizadas)
+        """
+        if not rows:
+            return 0, 0
+
+        seasons = sorted({row["season"] for row in rows})
+        existing = {}
+        for metric_id, player_id, season in (
+            session.query(MLMetrics.metric_id, MLMetrics.player_id, MLMetrics.season)
+            .filter(MLMetrics.season.in_(seasons))
+            .order_by(MLMetrics.metric_id)
+        ):
+            existing.setdefault((player_id, season), metric_id)
+
+        now = datetime.utcnow()
+        updates, inserts = [], []
+        for row in rows:
+            metric_id = existing.get((row["player_id"], row["season"]))
+            if metric_id is not None:
+                updates.append(
+                    dict(row, metric_id=metric_id, last_calculated=now, updated_at=now)
+                )
+            else:
+                inserts.append(
+                    dict(
+                        row,
+                        model_version=self.calculator.model_version,
+                        last_calculated=now,
+                        created_at=now,
+                    )
+                )
+
+        if updates:
+            session.execute(update(MLMetrics), updates)
+        if inserts:
+            session.execute(insert(MLMetrics), inserts)
+        session.commit()
+        return len(inserts), len(updates)
+
+    def recalculate(self, seasons: Optional[Sequence[str]] = None) -> Dict:
+        """
+        Recalcula y persiste el PDI de todos los jugadores profesionales.
+
+        Args:
+            seasons: Temporadas a procesar (None = todas)
+
+        Returns:
+            Dict con filas procesadas, inserciones/actualizaciones y tiempos
+        """
+        try:
+            start = time.perf_counter()
+            with self.session_factory() as session:
+                matrix = self.load_stats(session, seasons)
+                loaded = time.perf_counter()
+
+                results = self.compute(matrix)
+                rows = self._metric_rows(matrix, results)
+                computed = time.perf_counter()
+
+                inserted, updated = self.upsert(session, rows)
+            finished = time.perf_counter()
+
+            pdi_values = results["pdi_overall"]
+            summary = {
+                "rows": len(matrix),
+                "inserted": inserted,
+                "updated": updated,
+                "avg_pdi_overall": (
+                    round(float(np.mean(pdi_values)), 2) if len(matrix) else 0.0
+                ),
+                "max_pdi_overall": (
+                    round(float(np.max(pdi_values)), 2) if len(matrix) else 0.0
+                ),
+                "min_pdi_overall": (
+                    round(float(np.min(pdi_values)), 2) if len(matrix) else 0.0
+                ),
+                "load_ms": round((loaded - start) * 1000, 1),
+                "compute_ms": round((computed - loaded) * 1000, 1),
+                "upsert_ms": round((finished - computed) * 1000, 1),
+                "total_ms": round((finished - start) * 1000, 1),
+            }
+            logger.info(
+                f"⚡ PDI batch: {summary['rows']} filas en {summary['total_ms']:.0f}ms "
+                f"({inserted} nuevas, {updated} actualizadas)"
+            )
+            return summary
+
+        except Exception as e:
+            logger.error(f"❌ Error en recálculo PDI batch: {e}")
+            return {"error": str(e), "rows": 0}
@@ -25,6 +25,106 @@ from models.professional_stats_model import ProfessionalStats
 
 logger = logging.getLogger(__name__)
 
+# Dominios de habilidad del PDI jerárquico y las métricas que los componen
+SKILL_DOMAINS = {
+    "attacking": {
+        "goals_per_90": {"weight": 0.3, "range": (0, 1)},
+        "expected_goals": {"weight": 0.3, "range": (0, 1)},
+        "shots_on_target_pct": {"weight": 0.2, "range": (0, 100)},
+        "goal_conversion_pct": {"weight": 0.2, "range": (0, 100)},
+    },
+    "playmaking": {
+        "assists_per_90": {"weight": 0.3, "range": (0, 1)},
+        "expected_assists": {"weight": 0.3, "range": (0, 1)},
+        "key_passes_per_90": {"weight": 0.2, "range": (0, 5)},
+        "progressive_passes_per_90": {"weight": 0.2, "range": (0, 20)},
+    },
+    "defending": {
+        "defensive_duels_won_pct": {"weight": 0.4, "range": (0, 100)},
+        "interceptions_per_90": {"weight": 0.3, "range": (0, 10)},
+        "successful_defensive_actions_per_90": {
+            "weight": 0.3,
+            "range": (0, 15),
+        },
+    },
+    "passing": {
+        "pass_accuracy_pct": {"weight": 0.5, "range": (50, 100)},
+        "long_passes_accuracy_pct": {"weight": 0.2, "range": (40, 100)},
+        "accurate_passes_to_final_third_pct": {
+            "weight": 0.3,
+            "range": (50, 100),
+        },
+    },
+    "physical": {
+        "duels_won_pct": {"weight": 0.4, "range": (40, 100)},
+        "aerial_duels_won_pct": {"weight": 0.3, "range": (30, 100)},
+        "minutes_played": {
+            "weight": 0.3,
+            "range": (0, 3000),
+        },  # As a proxy for stamina/availability
+    },
+}
+
+# Pesos de dominio por posición (8 grupos científicos)
+POSITION_WEIGHTS = {
+    "GK": {
+        "defending": 0.5,
+        "passing": 0.4,
+        "physical": 0.1,
+        "attacking": 0.0,
+        "playmaking": 0.0,
+    },
+    "CB": {
+        "defending": 0.6,
+        "physical": 0.2,
+        "passing": 0.2,
+        "attacking": 0.0,
+        "playmaking": 0.0,
+    },
+    "FB": {
+        "defending": 0.4,
+        "physical": 0.2,
+        "passing": 0.2,
+        "playmaking": 0.1,
+        "attacking": 0.1,
+    },
+    "DMF": {
+        "defending": 0.4,
+        "passing": 0.3,
+        "physical": 0.2,
+        "playmaking": 0.1,
+        "attacking": 0.0,
+    },
+    "CMF": {
+        "passing": 0.4,
+        "playmaking": 0.3,
+        "physical": 0.1,
+        "defending": 0.1,
+        "attacking": 0.1,
+    },
+    "AMF": {
+        "playmaking": 0.4,
+        "attacking": 0.3,
+        "passing": 0.2,
+        "physical": 0.1,
+        "defending": 0.0,
+    },
+    "W": {
+        "attacking": 0.4,
+        "playmaking": 0.4,
+        "physical": 0.1,
+        "passing": 0.1,
+        "defending": 0.0,
+    },
+    "CF": {
+        "attacking": 0.6,
+        "physical": 0.2,
+        "playmaking": 0.1,
+        "passing": 0.1,
+        "defending": 0.0,
+    },
+}
+
 
 class PDICalculator:
     """
@@ -138,105 +238,7 @@ class PDICalculator:
             f"Iniciando cálculo de PDI Jerárquico para jugador {stats.player_id}"
         )
 
-        # 1. Definición de Dominios de Habilidad y las métricas que los componen
-        SKILL_DOMAINS = {
-            "attacking": {
-                "goals_per_90": {"weight": 0.3, "range": (0, 1)},
-                "expected_goals": {"weight": 0.3, "range": (0, 1)},
-                "shots_on_target_pct": {"weight": 0.2, "range": (0, 100)},
-                "goal_conversion_pct": {"weight": 0.2, "range": (0, 100)},
-            },
-            "playmaking": {
-                "assists_per_90": {"weight": 0.3, "range": (0, 1)},
-                "expected_assists": {"weight": 0.3, "range": (0, 1)},
-                "key_passes_per_90": {"weight": 0.2, "range": (0, 5)},
-                "progressive_passes_per_90": {"weight": 0.2, "range": (0, 20)},
-            },
-            "defending": {
-                "defensive_duels_won_pct": {"weight": 0.4, "range": (0, 100)},
-                "interceptions_per_90": {"weight": 0.3, "range": (0, 10)},
-                "successful_defensive_actions_per_90": {
-                    "weight": 0.3,
-                    "range": (0, 15),
-                },
-            },
-            "passing": {
-                "pass_accuracy_pct": {"weight": 0.5, "range": (50, 100)},
-                "long_passes_accuracy_pct": {"weight": 0.2, "range": (40, 100)},
-                "accurate_passes_to_final_third_pct": {
-                    "weight": 0.3,
-                    "range": (50, 100),
-                },
-            },
-            "physical": {
-                "duels_won_pct": {"weight": 0.4, "range": (40, 100)},
-                "aerial_duels_won_pct": {"weight": 0.3, "range": (30, 100)},
-                "minutes_played": {
-                    "weight": 0.3,
-                    "range": (0, 3000),
-                },  # As a proxy for stamina/availability
-            },
-        }
-
-        # 2. Definición de Pesos por Posición (usando los 8 grupos científicos)
-        POSITION_WEIGHTS = {
-            "GK": {
-                "defending": 0.5,
-                "passing": 0.4,
-                "physical": 0.1,
-                "attacking": 0.0,
-                "playmaking": 0.0,
-            },
-            "CB": {
-                "defending": 0.6,
-                "physical": 0.2,
-                "passing": 0.2,
-                "attacking": 0.0,
-                "playmaking": 0.0,
-            },
-            "FB": {
-                "defending": 0.4,
-                "physical": 0.2,
-                "passing": 0.2,
-                "playmaking": 0.1,
-                "attacking": 0.1,
-            },
-            "DMF": {
-                "defending": 0.4,
-                "passing": 0.3,
-                "physical": 0.2,
-                "playmaking": 0.1,
-                "attacking": 0.0,
-            },
-            "CMF": {
-                "passing": 0.4,
-                "playmaking": 0.3,
-                "physical": 0.1,
-                "defending": 0.1,
-                "attacking": 0.1,
-            },
-            "AMF": {
-                "playmaking": 0.4,
-                "attacking": 0.3,
-                "passing": 0.2,
-                "physical": 0.1,
-                "defending": 0.0,
-            },
-            "W": {
-                "attacking": 0.4,
-                "playmaking": 0.4,
-                "physical": 0.1,
-                "passing": 0.1,
-                "defending": 0.0,
-            },
-            "CF": {
-                "attacking": 0.6,
-                "physical": 0.2,
-                "playmaking": 0.1,
-                "passing": 0.1,
-                "defending": 0.0,
-            },
-        }
+        # 1-2. Dominios de habilidad y pesos por posición: SKILL_DOMAINS / POSITION_WEIGHTS
 
         # Función helper para normalizar un valor
         def normalize(value, min_val, max_val):
@@ -379,7 +381,9 @@ class PDICalculator:
                     season,
                 )
 
-                new_metrics = self._calculate_pdi_metrics(session, player, season)
+                new_metrics = self._calculate_pdi_metrics(
+                    session, player, season, prof_stats=prof_stats_check
+                )
                 if not new_metrics:
                     logger.error("Error calculando métricas para jugador %d", player_id)
                     return None
@@ -417,8 +421,26 @@ class PDICalculator:
             logger.error("Error en get_or_calculate_metrics: %s", str(e))
             return None
 
+    def calculate_metrics_batch(self, seasons: Optional[List[str]] = None) -> Dict:
+        """
+        Recalcula el PDI de toda la liga con el motor vectorizado.
+
+        Args:
+            seasons: Temporadas a recalcular (None = todas)
+
+        Returns:
+            Dict con resumen del lote (filas, inserciones, actualizaciones, tiempos)
+        """
+        from ml_system.evaluation.metrics.pdi_batch import BatchPDIEngine
+
+        return BatchPDIEngine(self).recalculate(seasons)
+
     def _calculate_pdi_metrics(
-        self, session: Session, player: Player, season: str
+        self,
+        session: Session,
+        player: Player,
+        season: str,
+        prof_stats: Optional[ProfessionalStats] = None,
     ) -> Optional[Dict]:
         """
         Calcula métricas PDI para un jugador específico usando lógica científica.
@@ -427,17 +449,19 @@ class PDICalculator:
             session: Sesión de base de datos
             player: Objeto Player
             season: Temporada a analizar
+            prof_stats: Stats ya cargadas (evita repetir la query)
 
         Returns:
             dict: Métricas calculadas o None si falla
         """
         try:
             # Obtener estadísticas profesionales
-            prof_stats = (
-                session.query(ProfessionalStats)
-                .filter_by(player_id=player.player_id, season=season)
-                .first()
-            )
+            if prof_stats is None:
+                prof_stats = (
+                    session.query(ProfessionalStats)
+                    .filter_by(player_id=player.player_id, season=season)
+                    .first()
+                )
 
             if not prof_stats:
                 logger.warning(
@@ -15,9 +15,12 @@ if project_root not in sys.path:
 
 import logging
 
+import numpy as np
 import pandas as pd
 import xgboost as xgb
 
+from ml_system.data_processing.storage import read_season_table
+
 
 class Stats:
     def __init__(self, **kwargs):
@@ -27,6 +30,59 @@ class Stats:
 
 logger = logging.getLogger(__name__)
 
+# Features de la última temporada (columna CSV → mismo nombre saneado)
+BASIC_FEATURES = [
+    "Age",
+    "Height",
+    "Weight",
+    "Minutes played",
+    "Matches played",
+    "Pass accuracy, %",
+    "Duels won, %",
+    "Successful dribbles, %",
+    "Goals per 90",
+    "Assists per 90",
+    "xG per 90",
+    "xA per 90",
+    "Defensive duels won, %",
+    "Aerial duels won, %",
+    "Yellow cards per 90",
+]
+POSITION_GROUPS = ["GK", "DEF", "MID", "FWD"]
+PDI_BASELINE_METRICS = ["Pass accuracy, %", "Duels won, %", "Minutes played"]
+# Métricas del PDI objetivo (en este orden) con su peso
+TARGET_PDI_WEIGHTS = [
+    ("Pass accuracy, %", 0.25),
+    ("Duels won, %", 0.20),
+    ("Minutes played", 0.15),
+    ("Goals per 90", 0.20),
+    ("Assists per 90", 0.20),
+]
+
+
+# Features que solo existen con 2+ temporadas previas (en orden de inserción)
+TREND_FEATURES = [
+    "minutes_trend",
+    "minutes_mean",
+    "minutes_std",
+    "pass_acc_trend",
+    "pass_acc_consistency",
+    "age_development_factor",
+]
+# Features que el dict por jugador añade después de las de tendencia
+TAIL_FEATURES = [
+    "career_seasons",
+    "years_to_target",
+    "team_stability",
+    "pdi_baseline",
+    "age_minutes_interaction",
+    "position_age_factor",
+]
+
+
+def _feature_name(column: str) -> str:
+    return column.replace(" ", "_").replace(",", "").replace("%", "pct")
+
 
 class FuturePDIPredictor:
     """
@@ -129,7 +185,7 @@ class FuturePDIPredictor:
             "processed_complete.csv",
         )
         try:
-            df = pd.read_csv(csv_path)
+            df = read_season_table(csv_path)
             df = self.rename_columns(df)
             # The CSV does not have a player_id column, so we create one from the wyscout_id
             df["player_id"] = df["wyscout_id"]
@@ -150,6 +206,10 @@ class FuturePDIPredictor:
         """
         Transforma los datos históricos en un dataset de entrenamiento con features (X) y target (y).
 
+        Construye todos los pares (jugador, temporada objetivo) en bloque con
+        operaciones por grupo; el resultado es idéntico al de
+        _create_training_dataset_rowwise (features, target, orden y columnas).
+
         Args:
             historical_df: DataFrame con todos los datos históricos.
             years_ahead: El número de años en el futuro a predecir (1 o 2).
@@ -160,6 +220,36 @@ class FuturePDIPredictor:
         logger.info(
             f"🔧 Creando dataset temporal sin data leakage (predecir +{years_ahead} años)"
         )
+        history = self._temporal_history(historical_df)
+        window, targets, pair_years = self._temporal_pairs(history, years_ahead)
+        if not len(pair_years):
+            return self._finalize_training_set([], [], [])
+
+        features, valid_features = self._engineer_temporal_features_batch(
+            window, pair_years
+        )
+        target_pdi = self._calculate_target_pdi_batch(targets)
+        keep = valid_features & ~np.isnan(target_pdi)
+        if not keep.any():
+            return self._finalize_training_set([], [], [])
+
+        # Mismo orden de columnas que DataFrame(lista de dicts): el del primer
+        # par válido y después las claves que aparecen más tarde
+        trend_keys = [key for key in features if key in TREND_FEATURES]
+        base_keys = [key for key in features if key not in TREND_FEATURES]
+        has_trend = window.groupby("_pair").size().to_numpy()[keep] >= 2
+        if has_trend[0]:
+            columns = base_keys[: -len(TAIL_FEATURES)] + trend_keys + TAIL_FEATURES
+        else:
+            columns = base_keys + (trend_keys if has_trend.any() else [])
+
+        X = pd.DataFrame({key: features[key][keep] for key in columns})
+        return self._finalize_training_set(
+            X, pd.Series(target_pdi[keep]), pd.Series(pair_years[keep])
+        )
+
+    def _temporal_history(self, historical_df: pd.DataFrame) -> pd.DataFrame:
+        """Añade season_year, descarta temporadas inválidas y ordena por jugador."""
 
         # Convertir temporadas a formato numérico
         def season_to_year(season_str):
@@ -181,6 +271,75 @@ class FuturePDIPredictor:
         logger.info(
             f"📊 Datos: {len(historical_df)} registros, temporadas: {sorted(historical_df['season_year'].unique())}"
         )
+        return historical_df
+
+    def _temporal_pairs(
+        self, history: pd.DataFrame, years_ahead: int
+    ) -> tuple[pd.DataFrame, pd.DataFrame, np.ndarray]:
+        """
+        Selecciona en bloque los pares (jugador, temporada objetivo).
+
+        Returns:
+            (filas de entrenamiento con columna _pair, fila objetivo por par,
+            temporada objetivo por par). Los pares siguen el orden del recorrido
+            por jugador: temporada objetivo y, dentro, el del set de comunes.
+        """
+        windows, targets, pair_years = [], [], []
+        n_pairs = 0
+        available_years = sorted(history["season_year"].unique())
+
+        for target_year in available_years[years_ahead:]:
+            train_years = [y for y in available_years if y < target_year][-3:]
+            if len(train_years) == 0:
+                continue
+
+            logger.info(
+                f"🎯 Prediciendo temporada {target_year} usando temporadas {train_years}"
+            )
+
+            train_data = history[history["season_year"].isin(train_years)]
+            target_data = history[history["season_year"] == target_year]
+            common_players = set(train_data["player_id"]).intersection(
+                set(target_data["player_id"])
+            )
+            logger.info(f"   📋 Jugadores comunes: {len(common_players)}")
+
+            # NaN nunca coincide consigo mismo en el filtro por jugador
+            order = [p for p in common_players if pd.notna(p)]
+            if not order:
+                continue
+            rank = {player_id: n_pairs + i for i, player_id in enumerate(order)}
+
+            window = train_data.assign(_pair=train_data["player_id"].map(rank))
+            windows.append(window[window["_pair"].notna()])
+            target = target_data.assign(_pair=target_data["player_id"].map(rank))
+            target = target[target["_pair"].notna()]
+            targets.append(target.drop_duplicates("_pair", keep="last"))
+            pair_years.extend([target_year] * len(order))
+            n_pairs += len(order)
+
+        if not windows:
+            return pd.DataFrame(), pd.DataFrame(), np.array([], dtype=int)
+
+        window = pd.concat(windows).astype({"_pair": int})
+        window = window.sort_values("_pair", kind="stable")
+        target = pd.concat(targets).astype({"_pair": int}).sort_values("_pair")
+        return window, target, np.asarray(pair_years)
+
+    def _create_training_dataset_rowwise(
+        self, historical_df: pd.DataFrame, years_ahead: int = 1
+    ) -> tuple[pd.DataFrame, pd.Series, pd.Series]:
+        """
+        Versión original jugador a jugador (referencia de equivalencia).
+
+        Args:
+            historical_df: DataFrame con todos los datos históricos.
+            years_ahead: El número de años en el futuro a predecir (1 o 2).
+
+        Returns:
+            Tuple[pd.DataFrame, pd.Series, pd.Series]: Features (X), target (y) y seasons.
+        """
+        historical_df = self._temporal_history(historical_df)
 
         features_list = []
         target_list = []
@@ -199,10 +358,6 @@ class FuturePDIPredictor:
             if len(train_years) == 0:
                 continue
 
-            logger.info(
-                f"🎯 Prediciendo temporada {target_year} usando temporadas {train_years}"
-            )
-
             # Datos de entrenamiento (temporadas pasadas)
             train_data = historical_df[historical_df["season_year"].isin(train_years)]
 
@@ -214,8 +369,6 @@ class FuturePDIPredictor:
                 set(target_data["player_id"])
             )
 
-            logger.info(f"   📋 Jugadores comunes: {len(common_players)}")
-
             for player_id in common_players:
                 player_train = train_data[
                     train_data["player_id"] == player_id
@@ -245,14 +398,16 @@ class FuturePDIPredictor:
                 target_list.append(target_pdi)
                 season_list.append(target_year)  # Año que estamos prediciendo
 
-        if not features_list:
+        return self._finalize_training_set(
+            pd.DataFrame(features_list), pd.Series(target_list), pd.Series(season_list)
+        )
+
+    def _finalize_training_set(self, X, y, seasons):
+        """Imputa valores faltantes y registra el resumen del dataset."""
+        if len(X) == 0:
             logger.warning("❌ No se pudieron crear pares de entrenamiento válidos")
             return pd.DataFrame(), pd.Series(), pd.Series()
 
-        X = pd.DataFrame(features_list)
-        y = pd.Series(target_list)
-        seasons = pd.Series(season_list)
-
         # Imputar valores faltantes
         X = X.fillna(X.median()).fillna(0)
 
@@ -263,6 +418,187 @@ class FuturePDIPredictor:
         logger.info(f"Dataset de entrenamiento creado con {len(X)} muestras.")
         return X, y, seasons
 
+    def _engineer_temporal_features_batch(
+        self, window: pd.DataFrame, pair_years: np.ndarray
+    ) -> tuple[dict, np.ndarray]:
+        """
+        Versión vectorizada de _engineer_temporal_features para todos los pares.
+
+        Replica la aritmética de pandas (pct_change, mean, std) operación a
+        operación sobre las 3 últimas temporadas de cada par, de modo que los
+        valores coinciden bit a bit.
+
+        Args:
+            window: Filas de entrenamiento ordenadas por _pair y temporada
+            pair_years: Temporada objetivo de cada par
+
+        Returns:
+            (dict feature → array por par, máscara de pares con features válidas)
+        """
+        n_pairs = len(pair_years)
+        pair = window["_pair"].to_numpy()
+        size = np.bincount(pair, minlength=n_pairs)
+        from_end = window.groupby("_pair").cumcount(ascending=False).to_numpy()
+        latest = window[from_end == 0]
+        multi = size >= 2
+        valid = np.ones(n_pairs, dtype=bool)
+
+        def latest_values(column):
+            return pd.to_numeric(latest[column], errors="coerce").to_numpy(float)
+
+        def recent_matrix(column, fill):
+            """Últimas (hasta) 3 temporadas alineadas a la derecha."""
+            values = pd.to_numeric(window[column], errors="coerce").fillna(fill)
+            matrix = np.full((n_pairs, 3), np.nan)
+            sel = from_end < 3
+            matrix[pair[sel], 2 - from_end[sel]] = values.to_numpy(float)[sel]
+            return matrix
+
+        def trend_mean_std(matrix):
+            """pct_change().fillna(0).mean(), mean() y std() de pandas."""
+            v0, v1, v2 = matrix.T
+            three = size >= 3
+            with np.errstate(divide="ignore", invalid="ignore"):
+                r1 = v1 / v0 - 1
+                r2 = v2 / v1 - 1
+                r1 = np.where(np.isnan(r1), 0.0, r1)
+                r2 = np.where(np.isnan(r2), 0.0, r2)
+                trend = np.where(three, (0.0 + r1 + r2) / 3, (0.0 + r2) / 2)
+                mean = np.where(three, (v0 + v1 + v2) / 3, (v1 + v2) / 2)
+                var = np.where(
+                    three,
+                    ((mean - v0) ** 2 + (mean - v1) ** 2 + (mean - v2) ** 2) / 2,
+                    ((mean - v1) ** 2 + (mean - v2) ** 2) / 1,
+                )
+                std = np.sqrt(var)
+            return trend, mean, std
+
+        def only_multi(values):
+            return np.where(multi, values, np.nan)
+
+        features = {}
+
+        # === FEATURES BÁSICOS DE LA ÚTIMA TEMPORADA ===
+        for feature in BASIC_FEATURES:
+            if feature in window.columns:
+                values = latest_values(feature)
+                features[_feature_name(feature)] = np.where(
+                    np.isnan(values), 0.0, values
+                )
+            else:
+                features[_feature_name(feature)] = np.zeros(n_pairs)
+
+        # === FEATURES POSICIONALES ===
+        if "Position_Group" in window.columns:
+            position_group = latest["Position_Group"].to_numpy(object)
+        else:
+            position_group = np.full(n_pairs, "MID", dtype=object)
+        for pos in POSITION_GROUPS:
+            features[f"pos_{pos}"] = (position_group == pos).astype(float)
+
+        # === FEATURES TEMPORALES (ROLLING) ===
+        if "Minutes played" in window.columns:
+            trend, mean, std = trend_mean_std(recent_matrix("Minutes played", 0))
+            features["minutes_trend"] = only_multi(trend)
+            features["minutes_mean"] = only_multi(mean)
+            features["minutes_std"] = only_multi(std)
+
+        if "Pass accuracy, %" in window.columns:
+            trend, _, std = trend_mean_std(recent_matrix("Pass accuracy, %", 0))
+            features["pass_acc_trend"] = only_multi(trend)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                consistency = np.where(std > 0, 1.0 / (1.0 + std), 1.0)
+            features["pass_acc_consistency"] = only_multi(consistency)
+
+        if "Age" in window.columns:
+            current_age = recent_matrix("Age", 25)[:, 2]
+            factor = np.where(
+                current_age < 24, 1.2, np.where(current_age > 30, 0.9, 1.0)
+            )
+            features["age_development_factor"] = only_multi(factor)
+
+        # === FEATURES DE EXPERIENCIA Y ESTABILIDAD ===
+        features["career_seasons"] = size.astype(float)
+        features["years_to_target"] = (
+            pair_years - latest["season_year"].to_numpy()
+        ).astype(float)
+
+        if "Team" in window.columns:
+            team_changes = window.groupby("_pair")["Team"].nunique().to_numpy()
+            # 1 / 0 lanzaba excepción y el par se descartaba
+            valid &= ~(multi & (team_changes == 0))
+            with np.errstate(divide="ignore"):
+                stability = 1.0 / team_changes
+            features["team_stability"] = np.where(multi, stability, 1.0)
+        else:
+            features["team_stability"] = np.ones(n_pairs)
+
+        # === PDI PREVIO (SIN CIRCULARIDAD) ===
+        total = np.zeros(n_pairs)
+        count = np.zeros(n_pairs)
+        for metric in PDI_BASELINE_METRICS:
+            if metric in window.columns:
+                values = latest_values(metric)
+                present = ~np.isnan(values)
+                total = np.where(present, total + values, total)
+                count += present
+        with np.errstate(divide="ignore", invalid="ignore"):
+            baseline = np.where(count > 0, total / count, 50.0)
+        if "PDI" in window.columns:
+            pdi = latest_values("PDI")
+            baseline = np.where(np.isnan(pdi), baseline, pdi)
+        features["pdi_baseline"] = baseline
+
+        # === FEATURES DE INTERACCIÓN ===
+        age = features["Age"]
+        features["age_minutes_interaction"] = age * features["Minutes_played"] / 1000
+        defensive = (position_group == "DEF") | (position_group == "GK")
+        features["position_age_factor"] = np.where(defensive, age * 1, age * 0.8)
+
+        return features, valid
+
+    def _calculate_target_pdi_batch(self, targets: pd.DataFrame) -> np.ndarray:
+        """
+        Versión vectorizada de _calculate_target_pdi (NaN donde devolvía None).
+
+        Args:
+            targets: Fila objetivo de cada par, ordenada por _pair
+
+        Returns:
+            Array con el PDI objetivo por par
+        """
+        n_pairs = len(targets)
+        result = np.full(n_pairs, np.nan)
+
+        # Sin alguna de las columnas, el acceso por clave fallaba para todos
+        if all(metric in targets.columns for metric, _ in TARGET_PDI_WEIGHTS):
+            weighted = np.zeros(n_pairs)
+            weight_sum = np.zeros(n_pairs)
+            count = np.zeros(n_pairs)
+            for metric, weight in TARGET_PDI_WEIGHTS:
+                values = pd.to_numeric(targets[metric], errors="coerce").to_numpy(float)
+                present = ~np.isnan(values)
+                if metric == "Minutes played":
+                    values = values / 2500 * 100
+                elif metric == "Goals per 90":
+                    values = values * 30
+                elif metric == "Assists per 90":
+                    values = values * 25
+                if metric in ("Minutes played", "Goals per 90", "Assists per 90"):
+                    values = np.where(values < 100, values, 100.0)
+                weighted = np.where(present, weighted + values * weight, weighted)
+                weight_sum = np.where(present, weight_sum + weight, weight_sum)
+                count += present
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                pdi = np.clip(30 + (weighted / weight_sum) * 0.65, 30, 95)
+            result = np.where(count >= 3, pdi, np.nan)
+
+        if "PDI" in targets.columns:
+            existing = pd.to_numeric(targets["PDI"], errors="coerce").to_numpy(float)
+            result = np.where(np.isnan(existing), result, existing)
+        return result
+
     def _engineer_temporal_features(
         self, player_train: pd.DataFrame, target_year: int
     ) -> dict:
@@ -286,37 +622,15 @@ class FuturePDIPredictor:
             features = {}
 
             # === FEATURES BÁSICOS DE LA ÚTIMA TEMPORADA ===
-            basic_features = [
-                "Age",
-                "Height",
-                "Weight",
-                "Minutes played",
-                "Matches played",
-                "Pass accuracy, %",
-                "Duels won, %",
-                "Successful dribbles, %",
-                "Goals per 90",
-                "Assists per 90",
-                "xG per 90",
-                "xA per 90",
-                "Defensive duels won, %",
-                "Aerial duels won, %",
-                "Yellow cards per 90",
-            ]
-
-            for feature in basic_features:
+            for feature in BASIC_FEATURES:
                 if feature in latest_season.index and pd.notna(latest_season[feature]):
-                    features[
-                        f'{feature.replace(" ", "_").replace(",", "").replace("%", "pct")}'
-                    ] = float(latest_season[feature])
+                    features[_feature_name(feature)] = float(latest_season[feature])
                 else:
-                    features[
-                        f'{feature.replace(" ", "_").replace(",", "").replace("%", "pct")}'
-                    ] = 0.0
+                    features[_feature_name(feature)] = 0.0
 
             # === FEATURES POSICIONALES ===
             position_group = latest_season.get("Position_Group", "MID")
-            for pos in ["GK", "DEF", "MID", "FWD"]:
+            for pos in POSITION_GROUPS:
                 features[f"pos_{pos}"] = 1.0 if position_group == pos else 0.0
 
             # === FEATURES TEMPORALES (ROLLING) ===
@@ -381,7 +695,7 @@ class FuturePDIPredictor:
             else:
                 # PDI sintético basado en métricas clave
                 key_metrics = []
-                for metric in ["Pass accuracy, %", "Duels won, %", "Minutes played"]:
+                for metric in PDI_BASELINE_METRICS:
                     if metric in latest_season.index and pd.notna(
                         latest_season[metric]
                     ):
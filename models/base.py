@@ -1,5 +1,6 @@
 # models/base.py
 import sqlalchemy
+from sqlalchemy import DDL, Index, event
 from sqlalchemy.orm import DeclarativeBase
 
 
@@ -10,3 +11,21 @@ class Base(DeclarativeBase):
     type_annotation_map = {
         # SessionStatus se importa más adelante para evitar circular import
     }
+
+
+# Los índices trigram necesitan la extensión pg_trgm en PostgreSQL
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+
+def trigram_index(name: str, column: str) -> Index:
+    """
+    Índice GIN trigram para búsquedas ILIKE '%texto%' en PostgreSQL.
+    En otros motores se crea como índice normal.
+    """
+    return Index(
+        name, column, postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"}
+    )
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 if TYPE_CHECKING:
@@ -25,6 +25,9 @@ class MLMetrics(Base):
     """
 
     __tablename__ = "ml_metrics"
+    __table_args__ = (
+        Index("uq_ml_metrics_player_season", "player_id", "season", unique=True),
+    )
 
     # Identificación principal
     metric_id: Mapped[int] = mapped_column(Integer, primary_key=True)
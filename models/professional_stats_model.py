@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import date
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import Boolean, Date, Float, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Date, Float, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 if TYPE_CHECKING:
@@ -139,8 +139,14 @@ class ProfessionalStats(Base):
     # Relación con el jugador
     player: Mapped["Player"] = relationship(back_populates="professional_stats")
 
-    # Índice único para evitar duplicados
-    __table_args__ = ({"sqlite_autoincrement": True},)
+    # Índice único para evitar duplicados (una fila por jugador y temporada)
+    __table_args__ = (
+        Index(
+            "uq_professional_stats_player_season", "player_id", "season", unique=True
+        ),
+        Index("ix_professional_stats_season", "season"),
+        {"sqlite_autoincrement": True},
+    )
 
     def __repr__(self) -> str:
         return f"<ProfessionalStats(player={self.player_name}, season={self.season}, team={self.team})>"
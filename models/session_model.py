@@ -3,15 +3,27 @@ from __future__ import annotations
 import enum
 from datetime import datetime
 from typing import TYPE_CHECKING, Optional
-
-from sqlalchemy import Boolean, DateTime, Enum, ForeignKey, Integer, String
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    and_,
+    case,
+    literal,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 if TYPE_CHECKING:
     from models.coach_model import Coach
     from models.player_model import Player
 
-from .base import Base
+from .base import Base, trigram_index
 
 
 class SessionStatus(enum.Enum):
@@ -22,9 +34,43 @@ class SessionStatus(enum.Enum):
 
 # Nota: Usando ENUM nativo PostgreSQL para compatibilidad
 
+# Las horas de sesión se guardan sin zona, en hora de Madrid
+LOCAL_TZ = ZoneInfo("Europe/Madrid")
+
+
+def local_now() -> datetime:
+    """Hora actual de Madrid sin zona, comparable con start_time/end_time."""
+    return datetime.now(LOCAL_TZ).replace(tzinfo=None)
+
+
+def derive_status(
+    status: SessionStatus, end_time: Optional[datetime], now: Optional[datetime] = None
+) -> SessionStatus:
+    """
+    Estado a mostrar: una sesión programada que ya terminó cuenta como
+    completada aunque el job de background aún no la haya actualizado.
+    """
+    if (
+        status == SessionStatus.SCHEDULED
+        and end_time
+        and end_time <= (now or local_now())
+    ):
+        return SessionStatus.COMPLETED
+    return status
+
 
 class Session(Base):
     __tablename__ = "sessions"
+    # Listados por rango de fechas, por coach/player + estado y sync con Calendar
+    __table_args__ = (
+        Index("ix_sessions_start_time", "start_time"),
+        Index("ix_sessions_coach_status_start", "coach_id", "status", "start_time"),
+        Index("ix_sessions_player_status_start", "player_id", "status", "start_time"),
+        Index("uq_sessions_calendar_event_id", "calendar_event_id", unique=True),
+        # Búsqueda por nombre en el selector de edición
+        trigram_index("ix_sessions_coach_name_snapshot_trgm", "coach_name_snapshot"),
+        trigram_index("ix_sessions_player_name_snapshot_trgm", "player_name_snapshot"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     coach_id: Mapped[Optional[int]] = mapped_column(
@@ -84,3 +130,21 @@ class Session(Base):
     # Relaciones (opcionales para soportar eliminación de usuarios)
     coach: Mapped[Optional["Coach"]] = relationship(back_populates="sessions")
     player: Mapped[Optional["Player"]] = relationship(back_populates="sessions")
+
+    def effective_status(self, now: Optional[datetime] = None) -> SessionStatus:
+        """Estado derivado (ver derive_status) sin escribir en la BD."""
+        return derive_status(self.status, self.end_time, now)
+
+    @classmethod
+    def effective_status_expr(cls, now: Optional[datetime] = None):
+        """Expresión SQL del estado derivado, para filtrar por estado."""
+        return case(
+            (
+                and_(
+                    cls.status == SessionStatus.SCHEDULED,
+                    cls.end_time <= (now or local_now()),
+                ),
+                literal(SessionStatus.COMPLETED, cls.status.type),
+            ),
+            else_=cls.status,
+        )
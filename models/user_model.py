@@ -13,7 +13,7 @@ if TYPE_CHECKING:
     from models.admin_model import Admin
     from models.admin_model import Admin
 
-from .base import Base
+from .base import Base, trigram_index
 
 
 class UserType(enum.Enum):
@@ -24,6 +24,8 @@ class UserType(enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    # Búsqueda de sesiones por nombre de coach/player
+    __table_args__ = (trigram_index("ix_users_name_trgm", "name"),)
 
     user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
     username: Mapped[str] = mapped_column(String, unique=True, nullable=False)
@@ -2659,40 +2659,15 @@ def create_sessions_table_dash(
             to_date = (datetime.now() + timedelta(days=14)).date()
 
         with SessionController() as controller:
-            # Obtener sesiones filtradas usando el controller existente
-            sessions = controller.get_sessions_for_display(
+            # Filas de la tabla en una sola consulta (solo columnas mostradas)
+            table_data = controller.iter_sessions_table_rows(
                 start_date=from_date,
                 end_date=to_date,
                 player_id=player_id,
-                coach_id=coach_id,  # Añadir soporte para coach_id
-                status_filter=status_filter,  # Usar el filtro ya implementado
+                coach_id=coach_id,
+                status_filter=status_filter,
             )
 
-            if not sessions:
-                return dbc.Alert(
-                    "No sessions found for the selected period.",
-                    color="info",
-                    style={
-                        "background-color": "#2A2A2A",
-                        "border": "none",
-                        "color": "#CCCCCC",
-                    },
-                )
-
-            # Formatear sesiones para tabla usando el controller
-            table_data = controller.format_sessions_for_table(sessions)
-
-            # Crear encabezados usando estilos existentes
-            headers = [
-                html.Th("ID"),
-                html.Th("Coach"),
-                html.Th("Player"),
-                html.Th("Date"),
-                html.Th("Start Time"),
-                html.Th("End Time"),
-                html.Th("Status"),
-            ]
-
             # Crear filas usando clases existentes
             rows = []
             for session_data in table_data:
@@ -2718,6 +2693,28 @@ def create_sessions_table_dash(
                 )
                 rows.append(row)
 
+            if not rows:
+                return dbc.Alert(
+                    "No sessions found for the selected period.",
+                    color="info",
+                    style={
+                        "background-color": "#2A2A2A",
+                        "border": "none",
+                        "color": "#CCCCCC",
+                    },
+                )
+
+            # Crear encabezados usando estilos existentes
+            headers = [
+                html.Th("ID"),
+                html.Th("Coach"),
+                html.Th("Player"),
+                html.Th("Date"),
+                html.Th("Start Time"),
+                html.Th("End Time"),
+                html.Th("Status"),
+            ]
+
             # Crear tabla usando estilos mínimos
             table = dbc.Table(
                 [html.Thead(html.Tr(headers)), html.Tbody(rows)],
@@ -3174,7 +3171,7 @@ def create_iep_clustering_chart(
                 return None
 
             try:
-                from controllers.csv_stats_controller import CSVStatsController
+                from controllers.csv_stats_controller import get_csv_stats_controller
                 from controllers.db import get_db_session
                 from models.player_model import Player
 
@@ -3186,7 +3183,7 @@ def create_iep_clustering_chart(
                     )
 
                     if player_record and player_record.wyscout_id:
-                        csv_controller = CSVStatsController()
+                        csv_controller = get_csv_stats_controller()
                         available_seasons = csv_controller.get_available_seasons_list()
 
                         # Buscar en cada temporada empezando por la más reciente
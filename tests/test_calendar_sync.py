@@ -0,0 +1,448 @@
+# tests/test_calendar_sync.py
+"""
+Tests de la sincronización Calendar → BD contra un Google Calendar falso.
+Cubren paginación, modo incremental con syncToken y fallback ante 410 Gone.
+"""
+import datetime as dt
+import itertools
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import controllers.calendar_batch as calendar_batch
+import controllers.calendar_sync_core as sync_core
+import controllers.calendar_utils as calendar_utils
+import controllers.session_controller as session_controller
+from controllers.calendar_batch import CalendarBatchWriter, CalendarColorQueue
+from models import Base, Coach, Player, Session, SessionStatus, User, UserType
+from tests.conftest import _create_test_users
+
+
+class _Request:
+    def __init__(self, fn):
+        self._fn = fn
+
+    def execute(self):
+        return self._fn()
+
+
+class _BatchRequest:
+    """Batch HTTP request falso: ejecuta cada petición y avisa al callback."""
+
+    def __init__(self, service, callback):
+        self._service = service
+        self._callback = callback
+        self._requests = []
+
+    def add(self, request, request_id):
+        self._requests.append((request_id, request))
+
+    def execute(self):
+        self._service.batch_sizes.append(len(self._requests))
+        for request_id, request in self._requests:
+            try:
+                if self._service.fail_next:
+                    status = self._service.fail_next.pop(0)
+                    raise HttpError(httplib2.Response({"status": status}), b"error")
+                self._callback(request_id, request.execute(), None)
+            except HttpError as e:
+                self._callback(request_id, None, e)
+        if self._service.timeouts_after_execute:
+            # El servidor ya aplicó el lote pero la respuesta no llega
+            self._service.timeouts_after_execute -= 1
+            raise TimeoutError("batch response timed out")
+
+
+class FakeCalendarService:
+    """Calendar v3 mínimo en memoria: list (paginado + syncToken), get, insert, patch y batch."""
+
+    def __init__(self):
+        self.store = {}
+        self.changed_at = {}
+        self.version = 0
+        self.list_calls = []
+        self.expired_tokens = set()
+        self.batch_sizes = []
+        # Status HTTP a devolver en las próximas peticiones de batch
+        self.fail_next = []
+        self.timeouts_after_execute = 0  # lotes que fallan tras ejecutarse
+        self._ids = itertools.count(1)
+
+    # --- Helpers de escenario -------------------------------------------
+    def _touch(self, event_id):
+        self.version += 1
+        self.changed_at[event_id] = self.version
+        # "updated" en el futuro para que Calendar gane el tiebreaker
+        self.store[event_id]["updated"] = (
+            dt.datetime.now(dt.timezone.utc) + dt.timedelta(hours=1)
+        ).isoformat()
+
+    def add_event(self, start, description=""):
+        event_id = f"ev{next(self._ids)}"
+        self.store[event_id] = {
+            "id": event_id,
+            "status": "confirmed",
+            "summary": "Session: Test Coach × Test Player",
+            "description": description,
+            "colorId": "9",
+            "start": {"dateTime": start.isoformat()},
+            "end": {"dateTime": (start + dt.timedelta(hours=1)).isoformat()},
+            "extendedProperties": {"private": {"coach_id": "2", "player_id": "3"}},
+        }
+        self._touch(event_id)
+        return event_id
+
+    def edit_event(self, event_id, **fields):
+        self.store[event_id].update(fields)
+        self._touch(event_id)
+
+    def cancel_event(self, event_id):
+        self.store[event_id]["status"] = "cancelled"
+        self._touch(event_id)
+
+    # --- API ---------------------------------------------------------------
+    def events(self):
+        return self
+
+    def list(self, calendarId, maxResults=250, pageToken=None, **params):
+        self.list_calls.append(dict(params, pageToken=pageToken))
+        return _Request(lambda: self._list(maxResults, pageToken, **params))
+
+    def _list(self, max_results, page_token, syncToken=None, **params):
+        if syncToken is not None:
+            if syncToken in self.expired_tokens:
+                raise HttpError(httplib2.Response({"status": 410}), b"Gone")
+            since = int(syncToken.split("-")[1])
+            items = [
+                ev for ev_id, ev in self.store.items() if self.changed_at[ev_id] > since
+            ]
+        else:
+            time_min = dt.datetime.fromisoformat(params["timeMin"])
+            time_max = dt.datetime.fromisoformat(params["timeMax"])
+            items = [
+                ev
+                for ev in self.store.values()
+                if ev["status"] != "cancelled"
+                and time_min
+                <= dt.datetime.fromisoformat(ev["start"]["dateTime"])
+                <= time_max
+            ]
+
+        offset = int(page_token or 0)
+        page = [dict(ev) for ev in items[offset : offset + max_results]]
+        response = {"items": page}
+        if offset + max_results < len(items):
+            response["nextPageToken"] = str(offset + max_results)
+        else:
+            response["nextSyncToken"] = f"tok-{self.version}"
+        return response
+
+    def new_batch_http_request(self, callback):
+        return _BatchRequest(self, callback)
+
+    def insert(self, calendarId, body):
+        def _insert():
+            event_id = body.get("id") or f"ev{next(self._ids)}"
+            if event_id in self.store:
+                raise HttpError(httplib2.Response({"status": 409}), b"Conflict")
+            self.store[event_id] = dict(body, id=event_id, status="confirmed")
+            self._touch(event_id)
+            return dict(self.store[event_id])
+
+        return _Request(_insert)
+
+    def get(self, calendarId, eventId):
+        return _Request(lambda: dict(self.store[eventId]))
+
+    def patch(self, calendarId, eventId, body):
+        def _patch():
+            if eventId not in self.store:
+                raise HttpError(httplib2.Response({"status": 404}), b"Not Found")
+            event = self.store[eventId]
+            for key, value in body.items():
+                if key == "extendedProperties":
+                    event.setdefault(key, {}).setdefault("private", {}).update(
+                        value.get("private", {})
+                    )
+                else:
+                    event[key] = value
+            self._touch(eventId)
+            return dict(event)
+
+        return _Request(_patch)
+
+
+@pytest.fixture
+def fake_calendar(monkeypatch, tmp_path):
+    """Conecta calendar_sync_core a una BD SQLite y a un Calendar falso."""
+    # BD en fichero: la sync abre varias sesiones concurrentes
+    engine = create_engine(f"sqlite:///{tmp_path / 'sync.db'}")
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine)
+    seed = SessionLocal()
+    _create_test_users(seed)
+    seed.close()
+
+    service = FakeCalendarService()
+    monkeypatch.setattr(sync_core, "calendar", lambda: service)
+    monkeypatch.setattr(sync_core, "get_db_session", SessionLocal)
+    monkeypatch.setattr(calendar_utils, "get_db_session", SessionLocal)
+    calendar_utils.invalidate_user_name_index()
+    monkeypatch.setattr(sync_core, "CAL_ID", "test-calendar")
+    monkeypatch.setattr(sync_core, "EVENTS_PAGE_SIZE", 2)
+    monkeypatch.setattr(
+        sync_core, "CALENDAR_SYNC_STATE_PATH", str(tmp_path / "sync_state.json")
+    )
+
+    service.db = SessionLocal
+    return service
+
+
+def _tomorrow_at(hour):
+    tomorrow = dt.datetime.now(dt.timezone.utc) + dt.timedelta(days=1)
+    return tomorrow.replace(hour=hour, minute=0, second=0, microsecond=0)
+
+
+class TestCalendarSyncIncremental:
+    """Tests de sync completa paginada e incremental con syncToken."""
+
+    def test_full_sync_follows_pagination_and_saves_token(self, fake_calendar):
+        """TEST: La sync completa recorre todas las páginas y guarda el token"""
+        for hour in range(8, 13):
+            fake_calendar.add_event(_tomorrow_at(hour))
+        version_at_listing = fake_calendar.version
+
+        imported, updated, deleted, rejected, _ = (
+            sync_core.sync_calendar_to_db_with_feedback()
+        )
+
+        assert imported == 5
+        assert rejected == []
+        assert len(fake_calendar.list_calls) == 3  # 5 eventos / página de 2
+        assert sync_core._load_sync_token() == f"tok-{version_at_listing}"
+
+    def test_incremental_sync_only_fetches_changes(self, fake_calendar):
+        """TEST: El modo incremental pide solo los cambios y aplica updates"""
+        event_ids = [fake_calendar.add_event(_tomorrow_at(h)) for h in range(8, 13)]
+        sync_core.sync_calendar_to_db_with_feedback()
+        # Absorber el eco de los patches hechos tras la importación
+        sync_core.sync_calendar_to_db_with_feedback(incremental=True)
+        fake_calendar.list_calls.clear()
+
+        fake_calendar.edit_event(event_ids[0], description="Nuevas notas")
+        imported, updated, deleted, _, _ = sync_core.sync_calendar_to_db_with_feedback(
+            incremental=True
+        )
+
+        assert (imported, updated, deleted) == (0, 1, 0)
+        assert len(fake_calendar.list_calls) == 1
+        assert "syncToken" in fake_calendar.list_calls[0]
+        db = fake_calendar.db()
+        session = db.query(Session).filter_by(calendar_event_id=event_ids[0]).one()
+        assert session.notes == "Nuevas notas"
+        db.close()
+
+    def test_incremental_sync_deletes_cancelled_events(self, fake_calendar):
+        """TEST: Un evento cancelado elimina su sesión en modo incremental"""
+        event_ids = [fake_calendar.add_event(_tomorrow_at(h)) for h in (9, 10)]
+        sync_core.sync_calendar_to_db_with_feedback()
+
+        fake_calendar.cancel_event(event_ids[1])
+        _, _, deleted, _, _ = sync_core.sync_calendar_to_db_with_feedback(
+            incremental=True
+        )
+
+        assert deleted == 1
+        db = fake_calendar.db()
+        remaining = [s.calendar_event_id for s in db.query(Session).all()]
+        assert remaining == [event_ids[0]]
+        db.close()
+
+    def test_incremental_sync_applies_moves_outside_window(self, fake_calendar):
+        """TEST: Un evento movido fuera de la ventana actualiza su sesión"""
+        event_id = fake_calendar.add_event(_tomorrow_at(9))
+        sync_core.sync_calendar_to_db_with_feedback()
+        sync_core.sync_calendar_to_db_with_feedback(incremental=True)
+
+        new_start = _tomorrow_at(9) + dt.timedelta(days=60)
+        fake_calendar.edit_event(
+            event_id,
+            start={"dateTime": new_start.isoformat()},
+            end={"dateTime": (new_start + dt.timedelta(hours=1)).isoformat()},
+        )
+        _, updated, _, _, _ = sync_core.sync_calendar_to_db_with_feedback(
+            incremental=True
+        )
+
+        assert updated == 1
+        db = fake_calendar.db()
+        session = db.query(Session).filter_by(calendar_event_id=event_id).one()
+        madrid = dt.timezone(dt.timedelta(hours=2))
+        assert session.start_time == new_start.astimezone(madrid).replace(tzinfo=None)
+        db.close()
+
+    def test_expired_token_falls_back_to_full_sync(self, fake_calendar):
+        """TEST: Ante 410 Gone se descarta el token y se hace sync completa"""
+        fake_calendar.add_event(_tomorrow_at(9))
+        sync_core.sync_calendar_to_db_with_feedback()
+        fake_calendar.expired_tokens.add(sync_core._load_sync_token())
+        fake_calendar.add_event(_tomorrow_at(11))
+        version_at_listing = fake_calendar.version
+        fake_calendar.list_calls.clear()
+
+        imported, _, _, _, _ = sync_core.sync_calendar_to_db_with_feedback(
+            incremental=True
+        )
+
+        assert imported == 1
+        assert "syncToken" in fake_calendar.list_calls[0]
+        assert "timeMin" in fake_calendar.list_calls[1]
+        assert sync_core._load_sync_token() == f"tok-{version_at_listing}"
+
+
+class TestCalendarBatchWrites:
+    """Tests de escrituras agrupadas BD → Calendar."""
+
+    def test_writer_splits_batches_and_retries_transient_errors(self, fake_calendar):
+        """TEST: El writer agrupa en lotes de 50 y reintenta errores transitorios"""
+        writer = CalendarBatchWriter(fake_calendar, "test-calendar", backoff_base=0)
+        results = []
+        for i in range(120):
+            writer.insert(
+                {"summary": f"Evento {i}"},
+                callback=lambda resp, err: results.append(err is None),
+            )
+        fake_calendar.fail_next = [503, 429]
+
+        stats = writer.flush()
+
+        assert fake_calendar.batch_sizes == [50, 50, 20, 2]
+        assert stats["retried"] == 2
+        assert stats["failed"] == 0
+        assert len(results) == 120 and all(results)
+        assert all("latency_ms" in b for b in stats["batches"])
+
+    def test_sync_db_to_calendar_batches_inserts_and_links_existing(
+        self, fake_calendar, monkeypatch
+    ):
+        """TEST: El push BD→Calendar vincula eventos existentes y crea el resto en batch"""
+        monkeypatch.setattr(session_controller, "get_db_session", fake_calendar.db)
+        start = _tomorrow_at(10).replace(tzinfo=None)
+        db = fake_calendar.db()
+        for offset in range(3):
+            db.add(
+                Session(
+                    coach_id=2,
+                    player_id=3,
+                    start_time=start + dt.timedelta(days=offset),
+                    end_time=start + dt.timedelta(days=offset, hours=1),
+                    status=SessionStatus.SCHEDULED,
+                )
+            )
+        db.commit()
+        db.close()
+        existing_id = fake_calendar.add_event(start.replace(tzinfo=dt.timezone.utc))
+        fake_calendar.edit_event(
+            existing_id, summary="Session: Test Coach × Test Player #C2 #P3"
+        )
+
+        pushed, updated = sync_core.sync_db_to_calendar()
+
+        assert (pushed, updated) == (3, 0)
+        assert fake_calendar.batch_sizes == [2]
+        db = fake_calendar.db()
+        event_ids = {s.calendar_event_id for s in db.query(Session).all()}
+        assert existing_id in event_ids and None not in event_ids
+        db.close()
+
+    def test_batch_timeout_retry_does_not_duplicate_inserts(
+        self, fake_calendar, monkeypatch
+    ):
+        """TEST: Reintentar un lote ya aplicado no duplica los eventos creados"""
+        monkeypatch.setattr(session_controller, "get_db_session", fake_calendar.db)
+        monkeypatch.setattr(sync_core, "_prefetch_events_for", lambda svc, s: [])
+        start = _tomorrow_at(10).replace(tzinfo=None)
+        db = fake_calendar.db()
+        for offset in range(3):
+            db.add(
+                Session(
+                    coach_id=2,
+                    player_id=3,
+                    start_time=start + dt.timedelta(days=offset),
+                    end_time=start + dt.timedelta(days=offset, hours=1),
+                    status=SessionStatus.SCHEDULED,
+                )
+            )
+        db.commit()
+        db.close()
+        monkeypatch.setattr(
+            sync_core,
+            "CalendarBatchWriter",
+            lambda svc, cal_id: CalendarBatchWriter(svc, cal_id, backoff_base=0),
+        )
+        fake_calendar.timeouts_after_execute = 1
+
+        pushed, _ = sync_core.sync_db_to_calendar()
+
+        assert pushed == 3
+        assert fake_calendar.batch_sizes == [3, 3]
+        assert len(fake_calendar.store) == 3
+        db = fake_calendar.db()
+        event_ids = sorted(s.calendar_event_id for s in db.query(Session).all())
+        assert event_ids == sorted(fake_calendar.store)
+        db.close()
+
+    def test_color_queue_requeues_failed_patches(self, fake_calendar, monkeypatch):
+        """TEST: Un color que falla vuelve a la cola; un evento borrado no"""
+        monkeypatch.setattr(
+            calendar_batch,
+            "CalendarBatchWriter",
+            lambda svc, cal_id: CalendarBatchWriter(svc, cal_id, max_retries=0),
+        )
+        event_ids = [fake_calendar.add_event(_tomorrow_at(h)) for h in (9, 10)]
+        queue = CalendarColorQueue()
+        for event_id in event_ids:
+            queue.enqueue(event_id, "2")
+        queue.enqueue("deleted-event", "2")
+        fake_calendar.fail_next = [503]
+
+        assert queue.flush(fake_calendar, "test-calendar") == 1
+        assert len(queue) == 1
+        assert fake_calendar.store[event_ids[1]]["colorId"] == "2"
+
+        assert queue.flush(fake_calendar, "test-calendar") == 1
+        assert len(queue) == 0
+        assert fake_calendar.store[event_ids[0]]["colorId"] == "2"
+
+
+class TestUserNameIndex:
+    """Tests de resolución nombre → coach/player con el índice en memoria."""
+
+    def test_guess_ids_resolves_names_from_index(self, fake_calendar):
+        """TEST: Los nombres del título se resuelven a ids sin IDs explícitos"""
+        event = {"summary": "Sesión: Test Coach × Test Player"}
+        assert sync_core.guess_coach_player_ids(event) == (2, 3)
+
+    def test_ambiguous_names_are_not_resolved(self, fake_calendar):
+        """TEST: Dos usuarios activos con el mismo nombre normalizado → None"""
+        db = fake_calendar.db()
+        user = User(
+            username="test_player_2",
+            name="Tést  Player",
+            password_hash="x",
+            email="player2@test.com",
+            user_type=UserType.player,
+            is_active=True,
+        )
+        db.add(user)
+        db.flush()
+        db.add(Player(player_id=user.user_id, user=user))
+        db.commit()
+        db.close()
+        calendar_utils.invalidate_user_name_index()
+
+        assert calendar_utils.find_unique_user_id(Coach, "test coach") == 2
+        assert calendar_utils.find_unique_user_id(Player, "test player") is None
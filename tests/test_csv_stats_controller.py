@@ -0,0 +1,227 @@
+# tests/test_csv_stats_controller.py
+"""
+Tests del CSVStatsController y su almacén de temporadas compartido.
+Cubren la cache por temporada (hits, invalidación por mtime/tamaño,
+revalidación por hash) y la paridad de las tablas ordenadas con el
+cálculo original sobre DataFrames.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import controllers.csv_stats_controller as csv_stats
+from controllers.csv_stats_controller import CSVStatsController, SeasonDataStore
+
+POSITIONS = ["GK", "CB", "LCB", "RB", "LWB", "DMF", "LCMF", "AMF", "RW", "CF"]
+
+
+def _write_season(base_path, season, rows=120, seed=0):
+    """Escribe un processed_<season>.csv sintético y devuelve su ruta."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            "Player": [f"Player {seed}-{i}" for i in range(rows)],
+            "Primary position": rng.choice(POSITIONS, rows),
+            "Team": rng.choice(["Buriram", "Bangkok", "Chiangrai"], rows),
+            "Matches played": rng.integers(0, 30, rows),
+            # Valores redondeados para forzar empates y ceros exactos
+            "Goals per 90": rng.choice([0.0, 0.1, 0.25, 0.5, 0.75], rows),
+            "Assists per 90": rng.random(rows).round(2),
+            "Accurate passes, %": rng.uniform(50, 95, rows).round(1),
+            "Interceptions per 90": rng.random(rows).round(1),
+        }
+    )
+    # Huecos para comprobar que los NaN se descartan igual
+    df.loc[df.index % 7 == 0, "Assists per 90"] = np.nan
+    path = base_path / f"processed_{season}.csv"
+    df.to_csv(path, index=False)
+    return path
+
+
+class TestSeasonDataStore:
+    """Tests de la cache de temporadas del proceso."""
+
+    def test_second_get_is_cache_hit(self, tmp_path):
+        """TEST: La segunda lectura devuelve la misma entrada sin reparsear"""
+        _write_season(tmp_path, "2023-24")
+        store = SeasonDataStore(tmp_path)
+
+        first = store.get("2023-24")
+        second = store.get("2023-24")
+
+        assert first is second
+        stats = store.get_stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["seasons_loaded"] == ["2023-24"]
+
+    def test_content_change_reloads(self, tmp_path):
+        """TEST: Un cambio de tamaño/mtime con contenido nuevo recarga la temporada"""
+        path = _write_season(tmp_path, "2023-24", rows=50)
+        store = SeasonDataStore(tmp_path)
+        first = store.get("2023-24")
+
+        _write_season(tmp_path, "2023-24", rows=60, seed=1)
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, first.mtime_ns + 1_000_000_000))
+        second = store.get("2023-24")
+
+        assert second is not first
+        assert len(second.frame) == 60
+        assert second.file_hash != first.file_hash
+        stats = store.get_stats()
+        assert stats["reloads"] == 1
+        assert stats["misses"] == 2
+
+    def test_touch_without_change_revalidates_by_hash(self, tmp_path):
+        """TEST: Solo cambia el mtime: se revalida por sha1 sin reparsear"""
+        path = _write_season(tmp_path, "2023-24")
+        store = SeasonDataStore(tmp_path)
+        first = store.get("2023-24")
+
+        stat = path.stat()
+        new_mtime = first.mtime_ns + 1_000_000_000
+        os.utime(path, ns=(stat.st_atime_ns, new_mtime))
+        second = store.get("2023-24")
+        third = store.get("2023-24")
+
+        assert second is first and third is first
+        assert first.mtime_ns == new_mtime
+        stats = store.get_stats()
+        assert stats["revalidations"] == 1
+        assert stats["reloads"] == 0
+        assert stats["misses"] == 1
+        assert stats["hits"] == 2
+
+    def test_missing_file_drops_entry(self, tmp_path):
+        """TEST: Si el CSV desaparece la temporada deja de estar cargada"""
+        path = _write_season(tmp_path, "2023-24")
+        store = SeasonDataStore(tmp_path)
+        assert store.get("2023-24") is not None
+
+        path.unlink()
+
+        assert store.get("2023-24") is None
+        assert store.get_stats()["seasons_loaded"] == []
+
+
+@pytest.fixture
+def stats_controller(monkeypatch, tmp_path):
+    """CSVStatsController sobre tres temporadas sintéticas."""
+    for seed, season in enumerate(["2022-23", "2023-24", "2024-25"]):
+        _write_season(tmp_path, season, rows=150, seed=seed)
+    monkeypatch.setattr(csv_stats, "DEFAULT_DATA_PATH", tmp_path)
+    monkeypatch.setattr(csv_stats, "_season_store", SeasonDataStore(tmp_path))
+    return CSVStatsController()
+
+
+def _reference_values(controller, position, seasons, csv_field):
+    """Valores de la métrica como los calculaba la versión con DataFrames."""
+    specific_positions = [
+        pos for pos, grp in controller.position_mapping.items() if grp == position
+    ]
+    frames = [
+        pd.read_csv(controller.base_path / f"processed_{season}.csv")
+        for season in seasons
+    ]
+    combined = pd.concat(frames, ignore_index=True)
+    return combined[combined["Primary position"].isin(specific_positions)][csv_field]
+
+
+def _reference_percentiles(controller, position, seasons, metric, player_value):
+    metric_values = _reference_values(
+        controller, position, seasons, controller.csv_field_mapping[metric]
+    ).dropna()
+    if len(metric_values) < 10:
+        return None
+    below = (metric_values <= player_value).sum() / len(metric_values) * 100
+    return {
+        "p10": float(metric_values.quantile(0.10)),
+        "p25": float(metric_values.quantile(0.25)),
+        "p50": float(metric_values.quantile(0.50)),
+        "p75": float(metric_values.quantile(0.75)),
+        "p90": float(metric_values.quantile(0.90)),
+        "sample_size": len(metric_values),
+        "min": float(metric_values.min()),
+        "max": float(metric_values.max()),
+        "player_percentile": max(0.1, min(99.9, below)),
+    }
+
+
+SEASON_SETS = [["2024-25"], ["2023-24", "2024-25"], ["2022-23", "2023-24", "2024-25"]]
+PARITY_METRICS = [
+    "goals_per_90",
+    "assists_per_90",
+    "pass_accuracy_pct",
+    "interceptions_per_90",
+]
+
+
+class TestSortedTablesParity:
+    """Las tablas ordenadas dan los mismos resultados que el cálculo con pandas."""
+
+    @pytest.mark.parametrize("seasons", SEASON_SETS)
+    def test_metric_percentiles_match_dataframe_path(self, stats_controller, seasons):
+        """TEST: get_metric_percentiles coincide en una y varias temporadas"""
+        groups = sorted(set(stats_controller.position_mapping.values()))
+        compared = 0
+        for position in groups:
+            for metric in PARITY_METRICS:
+                for player_value in (0.0, 0.25, 0.5, 75.0):
+                    result = stats_controller.get_metric_percentiles(
+                        position, seasons, metric, player_value=player_value
+                    )
+                    expected = _reference_percentiles(
+                        stats_controller, position, seasons, metric, player_value
+                    )
+                    if expected is None:
+                        assert result is None
+                        continue
+                    assert result.keys() == expected.keys()
+                    for key, value in expected.items():
+                        assert result[key] == pytest.approx(value, rel=1e-12)
+                    compared += 1
+        assert compared > 0
+
+    @pytest.mark.parametrize("seasons", SEASON_SETS)
+    def test_zero_counts_match_dataframe_path(self, stats_controller, seasons):
+        """TEST: get_zero_count_for_metric cuenta los mismos ceros exactos"""
+        groups = sorted(set(stats_controller.position_mapping.values()))
+        zeros_seen = 0
+        for position in groups:
+            for metric in PARITY_METRICS:
+                values = _reference_values(
+                    stats_controller,
+                    position,
+                    seasons,
+                    stats_controller.csv_field_mapping[metric],
+                )
+                expected = int((values == 0.0).sum())
+                assert (
+                    stats_controller.get_zero_count_for_metric(
+                        position, seasons, metric
+                    )
+                    == expected
+                )
+                zeros_seen += expected
+        assert zeros_seen > 0
+
+    def test_merged_tables_follow_season_versions(self, stats_controller, tmp_path):
+        """TEST: Reescribir una temporada invalida la combinación memorizada"""
+        seasons = ["2023-24", "2024-25"]
+        before = stats_controller.get_metric_percentiles("CB", seasons, "goals_per_90")
+
+        path = _write_season(tmp_path, "2024-25", rows=200, seed=42)
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        after = stats_controller.get_metric_percentiles("CB", seasons, "goals_per_90")
+        expected = _reference_percentiles(
+            stats_controller, "CB", seasons, "goals_per_90", 0.0
+        )
+
+        assert after["sample_size"] == expected["sample_size"]
+        assert after["sample_size"] != before["sample_size"]
+        assert after["p50"] == pytest.approx(expected["p50"])
@@ -0,0 +1,350 @@
+"""
+Test suite para el procesamiento y almacenamiento de datos de temporadas.
+
+Incluye tests para:
+- FuzzyMatcher indexado
+- BatchProcessor incremental
+- Almacenamiento columnar de temporadas
+- LookupEngine y búsqueda de nombres
+"""
+
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_system.data_processing.processors import fuzzy_matcher
+from ml_system.data_processing.processors.batch_processor import BatchProcessor
+from ml_system.data_processing.processors.fuzzy_matcher import FuzzyMatcher
+from ml_system.data_processing.processors.lookup_engine import LookupEngine
+from ml_system.data_processing.processors.name_search import NameSearchIndex
+from ml_system.data_processing.storage import (
+    columnar_path,
+    read_season_table,
+    write_season_table,
+)
+from ml_system.deployment.scripts.benchmark_fuzzy_matcher import (
+    synthetic_csv,
+    synthetic_name,
+    synthetic_players,
+)
+from ml_system.deployment.scripts.benchmark_name_search import (
+    legacy_fuzzy_search,
+    make_typo,
+)
+
+
+class TestFuzzyMatcherIndex:
+    """Tests del matching indexado frente al recorrido lineal original."""
+
+    @pytest.fixture
+    def synthetic_season(self):
+        rng = np.random.default_rng(11)
+        players = synthetic_players(300, rng)
+        extra = ["Li", "Ana", "José Núñez", "ชนาธิป", "O'Neil-Smith"]
+        for i, name in enumerate(extra):
+            players.append(
+                (
+                    SimpleNamespace(player_id=900 + i, wyscout_id=str(i)),
+                    SimpleNamespace(user_id=900 + i, name=name),
+                )
+            )
+        df = synthetic_csv(players, 200, rng)
+        queries = pd.DataFrame(
+            {
+                "Full name": ["li", "Anna", "Jose Nunez", "ชนาธิป", "Oneil Smith", ""],
+                "Wyscout id": [0, 0, 0, 0, 0, 0],
+            }
+        )
+        return players, pd.concat([df, queries], ignore_index=True)
+
+    @pytest.mark.parametrize("threshold", [75, 85, 95])
+    def test_indexed_matches_linear_scan(self, synthetic_season, threshold):
+        """TEST: El matching indexado devuelve exactamente lo mismo que el lineal"""
+        players, df = synthetic_season
+        matcher = FuzzyMatcher(session_factory=lambda: None)
+
+        indexed = matcher.match_players(players, df, threshold)
+        linear = matcher._match_players_linear(players, df, threshold)
+
+        assert indexed == linear
+        assert indexed["fuzzy_matches"] or indexed["multiple_matches"]
+
+    def test_process_pool_keeps_order(self, synthetic_season, monkeypatch):
+        """TEST: La puntuación en paralelo conserva el orden del CSV"""
+        players, df = synthetic_season
+        matcher = FuzzyMatcher(session_factory=lambda: None)
+        monkeypatch.setattr(fuzzy_matcher, "PARALLEL_MIN_QUERIES", 1)
+
+        parallel = matcher.match_players(players, df, workers=2)
+        assert parallel == matcher.match_players(players, df)
+
+
+class TestBatchProcessorIncremental:
+    """Tests de reprocesamiento incremental por hashes de filas."""
+
+    def test_only_changed_players_are_patched(self, tmp_path, monkeypatch):
+        """TEST: Solo se re-derivan y reescriben los jugadores modificados"""
+        monkeypatch.chdir(tmp_path)
+        raw = pd.DataFrame(
+            {
+                "Wyscout id": [1, 2, 3],
+                "Player": ["A", "B", "C"],
+                "Goals": [1, None, 3],
+                "Minutes played": [90, 180, 270],
+            }
+        )
+        processor = BatchProcessor()
+        processor.processed_dir = processor.extractor.cache_dir = tmp_path
+        downloads = {"df": raw}
+
+        def download_season_data(season):
+            return True, downloads["df"].copy(), "ok"
+
+        processor.extractor.download_season_data = download_season_data
+        processor.preprocess_season_with_ml("2024-25", force_reprocess=True)
+        processor._generate_complete_cache()
+        processed_file = tmp_path / "processed_2024-25.csv"
+        before = processed_file.read_text().splitlines()
+
+        updated = raw.drop(index=2)
+        updated.loc[0, "Goals"] = 2
+        updated.loc[3] = [4, "D", 0, 45]
+        updated.to_csv(tmp_path / "thai_league_2024-25.csv", index=False)
+        downloads["df"] = updated
+        assert processor._season_needs_update("2024-25", is_active=False)
+
+        result = processor.preprocess_season_with_ml("2024-25")
+
+        after = processed_file.read_text().splitlines()
+        assert result["update_mode"] == "incremental"
+        assert (result["rows_changed"], result["rows_removed"]) == (2, 1)
+        assert len(after) == 4 and after[2] == before[2]
+        complete = pd.read_csv(tmp_path / "processed_complete.csv")
+        assert complete["Wyscout id"].tolist() == [1, 2, 4]
+        assert complete["Goals"].tolist() == [2, 0, 0]
+
+
+class TestSeasonStorage:
+    """Tests del almacenamiento columnar de temporadas."""
+
+    def test_projection_filters_and_stale_csv(self, tmp_path):
+        """TEST: Parquet equivalente al CSV, con proyección, filtros y regeneración"""
+        pytest.importorskip("pyarrow")
+        csv_path = tmp_path / "processed_complete.csv"
+        df = pd.DataFrame(
+            {
+                "Wyscout id": [1, 2, 3, 4],
+                "Player": ["A", "B", None, "D"],
+                "Team": ["X", "Y", "X", "Z"],
+                "season": ["2023-24", "2023-24", "2024-25", "2024-25"],
+                "Goals": [1.5, None, 3.0, 0.0],
+                "On loan": [True, False, False, True],
+            }
+        )
+        write_season_table(df, csv_path)
+
+        assert columnar_path(csv_path).exists()
+        pd.testing.assert_frame_equal(
+            read_season_table(csv_path), pd.read_csv(csv_path)
+        )
+        subset = read_season_table(
+            csv_path,
+            columns=["Wyscout id", "Goals"],
+            filters=[("season", "==", "2024-25")],
+        )
+        assert subset["Wyscout id"].tolist() == [3, 4]
+        assert list(subset.columns) == ["Wyscout id", "Goals"]
+        categorical = read_season_table(csv_path, categorical=True)
+        assert categorical["Team"].dtype == "category"
+
+        # Un CSV modificado por fuera deja el Parquet obsoleto y se relee
+        df.iloc[:2].to_csv(csv_path, index=False)
+        mtime_ns = columnar_path(csv_path).stat().st_mtime_ns + 10**9
+        os.utime(csv_path, ns=(mtime_ns, mtime_ns))
+        assert read_season_table(csv_path)["Wyscout id"].tolist() == [1, 2]
+
+    def test_concurrent_readers_regenerate_parquet_once(self, tmp_path):
+        """TEST: Lectores concurrentes de un CSV obsoleto regeneran una sola vez"""
+        pytest.importorskip("pyarrow")
+        from concurrent.futures import ThreadPoolExecutor
+
+        from ml_system.data_processing.storage import season_storage
+
+        csv_path = tmp_path / "processed_complete.csv"
+        df = pd.DataFrame({"Wyscout id": range(200), "season": ["2024-25"] * 200})
+        write_season_table(df, csv_path)
+        df.iloc[:50].to_csv(csv_path, index=False)
+        mtime_ns = columnar_path(csv_path).stat().st_mtime_ns + 10**9
+        os.utime(csv_path, ns=(mtime_ns, mtime_ns))
+
+        writes = []
+        original = season_storage._write_parquet
+
+        def counting_write(*args, **kwargs):
+            writes.append(args[1])
+            original(*args, **kwargs)
+
+        with patch.object(season_storage, "_write_parquet", counting_write):
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                results = list(
+                    pool.map(lambda _: read_season_table(csv_path), range(8))
+                )
+
+        assert len(writes) == 1
+        assert all(len(result) == 50 for result in results)
+        assert len(read_season_table(csv_path)) == 50
+        # Sin temporales huérfanos junto al CSV
+        assert sorted(p.name for p in tmp_path.iterdir()) == [
+            "processed_complete.csv",
+            "processed_complete.parquet",
+        ]
+
+
+def _processed_season(season, players):
+    """CSV procesado mínimo de una temporada para el LookupEngine."""
+    rng = np.random.default_rng(len(players))
+    return pd.DataFrame(
+        {
+            "Player": players,
+            "Team": rng.choice(["Buriram", "Bangkok", "Chiangrai"], len(players)),
+            "Primary position": rng.choice(["CB", "CMF", "CF"], len(players)),
+            "Age": rng.integers(18, 35, len(players)),
+            "Matches played": rng.integers(0, 30, len(players)),
+            "Minutes played": rng.integers(0, 2700, len(players)),
+            "Goals": rng.integers(0, 10, len(players)),
+            "Assists": rng.integers(0, 8, len(players)),
+            "season": season,
+        }
+    )
+
+
+class TestLookupEngineSnapshot:
+    """Tests del snapshot en disco de los índices del LookupEngine."""
+
+    PLAYERS = ["Chanathip Songkrasin", "Teerasil Dangda", "Supachok Sarachat"]
+
+    @pytest.fixture
+    def processed_dir(self, tmp_path):
+        for season, extra in (("2023-24", ["Bordin Phala"]), ("2024-25", [])):
+            _processed_season(season, self.PLAYERS + extra).to_csv(
+                tmp_path / f"processed_{season}.csv", index=False
+            )
+        return tmp_path
+
+    @staticmethod
+    def _engine(processed_dir):
+        engine = LookupEngine()
+        engine.processed_dir = processed_dir
+        engine.snapshot_dir = processed_dir / ".lookup_index"
+        return engine
+
+    @staticmethod
+    def _indexes(engine):
+        engine._ensure_indexes()
+        return {
+            "players": {
+                name: engine.player_index[name] for name in engine.player_index
+            },
+            "positions": engine.position_index,
+            "teams": engine.team_index,
+            "seasons": {s: df.to_dict("list") for s, df in engine.season_index.items()},
+        }
+
+    @staticmethod
+    def _lookup(engine, name):
+        result = engine.lookup_player_instantly(name)
+        result.pop("lookup_time_ms")
+        return result
+
+    def test_snapshot_matches_fresh_index(self, processed_dir):
+        """TEST: Los índices cargados del snapshot equivalen a reindexar los CSVs"""
+        fresh = self._engine(processed_dir)
+        expected = self._indexes(fresh)
+        assert (processed_dir / ".lookup_index" / "meta.json").exists()
+
+        cached = self._engine(processed_dir)
+        assert cached._load_snapshot()
+        cached._indexes_ready = True
+
+        assert self._indexes(cached) == expected
+        for name in self.PLAYERS + ["Bordin Phala", "Teerasil Dangd"]:
+            assert self._lookup(cached, name) == self._lookup(fresh, name)
+
+    def test_changed_csv_invalidates_snapshot(self, processed_dir):
+        """TEST: Un CSV modificado invalida el snapshot y se reindexa"""
+        self._indexes(self._engine(processed_dir))
+
+        csv_path = processed_dir / "processed_2024-25.csv"
+        _processed_season("2024-25", self.PLAYERS + ["Ekanit Panya"]).to_csv(
+            csv_path, index=False
+        )
+        mtime_ns = csv_path.stat().st_mtime_ns + 10**9
+        os.utime(csv_path, ns=(mtime_ns, mtime_ns))
+
+        engine = self._engine(processed_dir)
+        assert not engine._load_snapshot()
+        assert "Ekanit Panya" in self._indexes(engine)["players"]
+        # El nuevo snapshot ya refleja el CSV actual
+        assert self._engine(processed_dir)._load_snapshot()
+
+
+class TestNameSearchIndex:
+    """Tests del índice de trigramas + trie para nombres de jugadores."""
+
+    NAMES = [
+        "Chanathip Songkrasin",
+        "Chanapat Buaphan",
+        "Teerasil Dangda",
+        "Supachok Sarachat",
+        "Sarach Yooyen",
+        "José Ángel Núñez",
+    ]
+
+    def test_accents_and_case_fold_to_exact_match(self):
+        """TEST: Mayúsculas, acentos y espacios extra dan coincidencia exacta"""
+        index = NameSearchIndex(self.NAMES)
+
+        assert index.search("  CHANATHIP   songkrasin ") == [
+            ("Chanathip Songkrasin", 1.0)
+        ]
+        assert index.search("jose angel nunez") == [("José Ángel Núñez", 1.0)]
+        assert index.search("José ángel NÚÑEZ") == [("José Ángel Núñez", 1.0)]
+
+    def test_typos_rank_closest_name_first(self):
+        """TEST: Con typos el nombre más parecido sale primero y bajo umbral no hay"""
+        index = NameSearchIndex(self.NAMES)
+
+        results = index.search("Chanatip Songkrasn")
+        assert results[0][0] == "Chanathip Songkrasin"
+        assert [score for _, score in results] == sorted(
+            (score for _, score in results), reverse=True
+        )
+        assert index.search("Chana", threshold=0.8) == []
+        assert index.search("Xyzzy Qwerty") == []
+
+    def test_autocomplete_matches_any_word_prefix(self):
+        """TEST: El autocompletado encuentra nombre o apellido por prefijo"""
+        index = NameSearchIndex(self.NAMES)
+
+        assert index.autocomplete("chana") == [
+            "Chanathip Songkrasin",
+            "Chanapat Buaphan",
+        ]
+        assert index.autocomplete("sara") == ["Supachok Sarachat", "Sarach Yooyen"]
+        assert index.autocomplete("nun") == ["José Ángel Núñez"]
+        assert index.autocomplete("zz") == []
+
+    def test_matches_legacy_linear_scan(self):
+        """TEST: Mismos resultados que el escaneo lineal con difflib"""
+        rng = np.random.default_rng(7)
+        names = list(dict.fromkeys(synthetic_name(rng) for _ in range(500)))
+        index = NameSearchIndex(names)
+
+        for _ in range(200):
+            target = names[int(rng.integers(len(names)))]
+            query = make_typo(target, rng)
+            assert index.search(query) == legacy_fuzzy_search(names, query)
@@ -0,0 +1,321 @@
+"""
+Test suite para el pipeline ETL de la Thai League.
+
+Incluye tests para:
+- Carga masiva del ThaiLeagueLoader
+- Checkpoints y ejecución multi-temporada del ETLCoordinator
+"""
+
+import random
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from ml_system.data_acquisition.extractors import ThaiLeagueLoader
+from ml_system.data_acquisition.extractors import loader as loader_module
+from ml_system.deployment.orchestration.etl_checkpoints import PhaseCheckpointStore
+from ml_system.deployment.orchestration.etl_coordinator import ETLCoordinator
+from models import (
+    Base,
+    ImportStatus,
+    Player,
+    ProfessionalStats,
+    ThaiLeagueSeason,
+    User,
+    UserType,
+)
+
+
+def _loader_db(existing_ids):
+    """BD SQLite con 60 jugadores profesionales y estadísticas previas para algunos."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine)
+    with SessionLocal() as session:
+        for i in range(60):
+            user = User(
+                user_id=i + 1,
+                username=f"thai_{i}",
+                name=f"Thai {i}",
+                password_hash="x",
+                email=f"thai{i}@test.com",
+                user_type=UserType.player,
+            )
+            session.add(user)
+            session.add(Player(player_id=i + 1, user=user, is_professional=1))
+        for player_id in existing_ids:
+            session.add(
+                ProfessionalStats(
+                    player_id=player_id,
+                    wyscout_id=player_id,
+                    season="2024-25",
+                    player_name="Old",
+                    full_name="Old",
+                    team="Old FC",
+                    goals=99,
+                )
+            )
+        session.commit()
+    return SessionLocal
+
+
+class TestThaiLeagueLoaderBulk:
+    """Tests de la importación por conjuntos de ThaiLeagueLoader."""
+
+    COLUMN_MAPPING = {
+        "Wyscout id": "wyscout_id",
+        "Player": "player_name",
+        "Full name": "full_name",
+        "Team": "team",
+        "Position": "primary_position",
+        "Age": "age",
+        "Goals": "goals",
+    }
+
+    @pytest.fixture
+    def season_input(self):
+        rng = random.Random(3)
+        rows = [
+            {
+                "Wyscout id": i + 1,
+                "Player": f"P. {i}",
+                "Full name": f"Player {i}",
+                "Team": f"Team {i % 5}",
+                "Position": rng.choice(["CF", "LW", "  ", None]),
+                "Age": rng.choice([None, 19, 24, 31]),
+                "Goals": rng.choice([None, 0, 3, 12]),
+            }
+            for i in range(60)
+        ]
+        # Nombre repetido: se usa la primera fila, como en la ruta original
+        rows.append(dict(rows[0], Team="Duplicate FC"))
+        matches = [
+            {"csv_player": f"Player {i}", "matched_player": {"player_id": i + 1}}
+            for i in range(60)
+        ]
+        matching_results = {
+            "exact_matches": matches[:40],
+            "fuzzy_matches": matches[40:]
+            + [{"csv_player": "Ghost", "matched_player": {"player_id": 1}}],
+            "no_matches": ["Unknown"],
+        }
+        return pd.DataFrame(rows), matching_results
+
+    @staticmethod
+    def _snapshot(session_factory):
+        columns = [
+            c
+            for c in ProfessionalStats.__table__.columns.keys()
+            if c not in ("stat_id", "created_at", "updated_at")
+        ]
+
+        def plain(value):
+            # La ruta original pasa numpy.int64, que SQLite guarda como blob
+            if isinstance(value, bytes):
+                return int.from_bytes(value, "little")
+            return value
+
+        with session_factory() as session:
+            return sorted(
+                tuple(plain(getattr(stats, c)) for c in columns)
+                for stats in session.query(ProfessionalStats)
+            )
+
+    def test_bulk_matches_rowwise_import(self, season_input):
+        """TEST: La importación por conjuntos deja la misma tabla que la original"""
+        df, matching_results = season_input
+        existing_ids = range(1, 60, 3)
+        bulk_db, rowwise_db = _loader_db(existing_ids), _loader_db(existing_ids)
+
+        ok_bulk, _, bulk_stats = ThaiLeagueLoader(bulk_db).import_season_data(
+            "2024-25", df, matching_results, self.COLUMN_MAPPING
+        )
+        ok_rows, _, row_stats = ThaiLeagueLoader(rowwise_db).import_season_data(
+            "2024-25", df, matching_results, self.COLUMN_MAPPING, bulk=False
+        )
+
+        assert ok_bulk and ok_rows
+        assert self._snapshot(bulk_db) == self._snapshot(rowwise_db)
+        for key in (
+            "imported_records",
+            "matched_players",
+            "unmatched_players",
+            "errors",
+        ):
+            assert bulk_stats[key] == row_stats[key]
+        assert (bulk_stats["inserted_records"], bulk_stats["updated_records"]) == (
+            40,
+            20,
+        )
+        assert bulk_stats["rows_per_sec"] > 0
+
+    def test_bulk_reimport_updates_in_place(self, season_input):
+        """TEST: Reimportar la temporada actualiza sin duplicar registros"""
+        df, matching_results = season_input
+        session_factory = _loader_db([])
+        loader = ThaiLeagueLoader(session_factory)
+
+        loader.import_season_data("2024-25", df, matching_results, self.COLUMN_MAPPING)
+        _, _, stats = loader.import_season_data(
+            "2024-25", df, matching_results, self.COLUMN_MAPPING
+        )
+
+        assert (stats["inserted_records"], stats["updated_records"]) == (0, 60)
+        with session_factory() as session:
+            assert session.query(ProfessionalStats).count() == 60
+            season = session.query(ThaiLeagueSeason).one()
+            assert season.import_status == ImportStatus.completed
+
+    def test_bad_row_only_fails_its_batch(self, season_input, monkeypatch):
+        """TEST: Una fila inválida se reporta sola y el resto se importa"""
+        df, matching_results = season_input
+        df.loc[df["Full name"] == "Player 7", "Team"] = None  # team es NOT NULL
+        monkeypatch.setattr(loader_module, "BULK_BATCH_SIZE", 10)
+        session_factory = _loader_db(range(1, 60, 3))
+        rowwise_factory = _loader_db(range(1, 60, 3))
+
+        ok, _, stats = ThaiLeagueLoader(session_factory).import_season_data(
+            "2024-25", df, matching_results, self.COLUMN_MAPPING
+        )
+        _, _, row_stats = ThaiLeagueLoader(rowwise_factory).import_season_data(
+            "2024-25", df, matching_results, self.COLUMN_MAPPING, bulk=False
+        )
+
+        assert ok
+        assert stats["errors"] == row_stats["errors"]
+        assert any("Player 7" in detail for detail in stats["error_details"])
+        assert not any("Player 17" in detail for detail in stats["error_details"])
+        assert stats["imported_records"] == row_stats["imported_records"]
+        assert (stats["inserted_records"], stats["updated_records"]) == (39, 20)
+        assert self._snapshot(session_factory) == self._snapshot(rowwise_factory)
+        with session_factory() as session:
+            assert session.query(ProfessionalStats).count() == 59
+
+
+class TestETLPhaseCheckpoints:
+    """Tests de reanudación del pipeline ETL por checkpoints de fase."""
+
+    def test_rerun_skips_completed_phases(self, tmp_path):
+        """TEST: Tras fallar Modeling, la reejecución reutiliza Data Preparation"""
+        store = PhaseCheckpointStore(tmp_path)
+        coordinator = ETLCoordinator(
+            session_factory=MagicMock(), checkpoint_store=store
+        )
+        raw_df = pd.DataFrame({"Player": ["A", "B"], "Age": [20, 21]})
+        prepared = (raw_df, {"exact_matches": []}, {"transform": {}, "matching": {}})
+        coordinator._phase_1_business_understanding = MagicMock(
+            return_value=(True, "ok")
+        )
+        coordinator._phase_2_data_understanding = lambda season: (raw_df, {})
+        coordinator._phase_3_data_preparation = MagicMock(return_value=prepared)
+        coordinator._phase_4_modeling = MagicMock(
+            side_effect=[(False, {}), (True, {"loaded_records": 2})]
+        )
+        coordinator._phase_5_evaluation = MagicMock(return_value=(True, {}))
+
+        first_success, _, _ = coordinator.execute_full_crisp_dm_pipeline("2024-25")
+        assert not first_success and store.has_pending("2024-25")
+
+        success, _, results = coordinator.execute_full_crisp_dm_pipeline("2024-25")
+
+        timings = results["phase_timings"]
+        assert success
+        assert coordinator._phase_3_data_preparation.call_count == 1
+        assert timings["data_preparation"]["from_checkpoint"]
+        assert not timings["modeling"]["from_checkpoint"]
+        assert set(timings) == {
+            "business_understanding",
+            "data_understanding",
+            "data_preparation",
+            "modeling",
+            "evaluation",
+            "deployment",
+        }
+        assert not store.has_pending("2024-25")
+
+    @staticmethod
+    def _stub_coordinator(tmp_path, failing_season=None):
+        coordinator = ETLCoordinator(
+            session_factory=MagicMock(),
+            checkpoint_store=PhaseCheckpointStore(tmp_path),
+        )
+        raw_df = pd.DataFrame({"Player": ["A", "B"], "Age": [20, 21]})
+        prepared = (raw_df, {"exact_matches": []}, {"transform": {}, "matching": {}})
+        coordinator._phase_1_business_understanding = MagicMock(
+            return_value=(True, "ok")
+        )
+        coordinator._phase_2_data_understanding = lambda season: (raw_df, {})
+        coordinator._phase_3_data_preparation = MagicMock(return_value=prepared)
+        coordinator._phase_4_modeling = lambda season, *args, **kwargs: (
+            season != failing_season,
+            {"loaded_records": 2},
+        )
+        coordinator._phase_5_evaluation = MagicMock(return_value=(True, {}))
+        return coordinator
+
+    def test_multi_season_runs_each_season_with_timings(self, tmp_path):
+        """TEST: Con un worker cada temporada corre en orden con sus tiempos"""
+        coordinator = self._stub_coordinator(tmp_path, failing_season="2023-24")
+
+        summary = coordinator.execute_multi_season_pipeline(
+            ["2023-24", "2024-25"], max_workers=1
+        )
+
+        assert summary["workers"] == 1
+        assert list(summary["seasons"]) == ["2023-24", "2024-25"]
+        assert summary["seasons_successful"] == 1
+        assert summary["seasons_failed"] == ["2023-24"]
+        ok_run = summary["seasons"]["2024-25"]
+        assert ok_run["success"]
+        assert "evaluation" in ok_run["phase_timings"]
+        failed_run = summary["seasons"]["2023-24"]
+        assert "modeling" in failed_run["phase_timings"]
+        assert "evaluation" not in failed_run["phase_timings"]
+
+    def test_custom_session_factory_runs_in_process(self, tmp_path, monkeypatch):
+        """TEST: Una session_factory propia no se envía al pool de procesos"""
+        from ml_system.deployment.orchestration import etl_coordinator
+
+        def _no_pool(*args, **kwargs):
+            raise AssertionError("no debe crear el pool de procesos")
+
+        monkeypatch.setattr(etl_coordinator, "ProcessPoolExecutor", _no_pool)
+        coordinator = self._stub_coordinator(tmp_path)
+
+        summary = coordinator.execute_multi_season_pipeline(
+            ["2022-23", "2023-24", "2024-25"], max_workers=4
+        )
+
+        assert summary["workers"] == 1
+        assert summary["seasons_successful"] == 3
+        assert summary["seasons_failed"] == []
+
+    def test_failed_pdi_batch_fails_evaluation(self, tmp_path):
+        """TEST: Un error del lote PDI marca Evaluation como fallida y la reanuda"""
+        coordinator = self._stub_coordinator(tmp_path)
+        del coordinator._phase_5_evaluation
+        coordinator._phase_3_data_preparation.return_value = (
+            pd.DataFrame({"Player": ["A", "B"], "Age": [20, 21]}),
+            {"exact_matches": [{"player_id": 1}]},
+            {"transform": {}, "matching": {}},
+        )
+        coordinator.pdi_calculator = MagicMock()
+        coordinator.pdi_calculator.calculate_metrics_batch.return_value = {
+            "error": "deadlock detected",
+            "rows": 0,
+        }
+
+        success, message, results = coordinator.execute_full_crisp_dm_pipeline(
+            "2024-25"
+        )
+
+        evaluation = results["pipeline_phases"]["evaluation"]
+        assert not success and "deadlock detected" in message
+        assert not evaluation["success"]
+        assert evaluation["pdi_metrics"]["error"] == "deadlock detected"
+        assert results["errors"] == ["Evaluation: deadlock detected"]
+        assert "deployment" not in results["pipeline_phases"]
+        assert coordinator.checkpoints.has_pending("2024-25")
@@ -8,10 +8,30 @@ Incluye tests para:
 - Integración con base de datos
 """
 
+import os
+import random
 from datetime import datetime, timedelta
 from unittest.mock import MagicMock, patch
 
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import Float, Integer, create_engine
+from sqlalchemy.orm import sessionmaker
+
+from ml_system.deployment.services import model_loader, pdi_prediction_service
+from ml_system.deployment.services.feature_store import (
+    MODEL_FEATURE_COLUMNS,
+    SeasonFeatureStore,
+)
+from ml_system.evaluation.analysis.advanced_features import AdvancedFeatureEngineer
 from ml_system.evaluation.analysis.player_analyzer import PlayerAnalyzer
+from ml_system.evaluation.metrics import iep_artifacts
+from ml_system.evaluation.metrics.iep_calculator import IEPCalculator
+from ml_system.evaluation.metrics.pdi_batch import METRIC_COLUMNS, BatchPDIEngine
+from ml_system.evaluation.metrics.pdi_calculator import PDICalculator
+from ml_system.modeling.train_future_pdi_model import BASIC_FEATURES, FuturePDIPredictor
+from models import Base, Player, ProfessionalStats, User, UserType
 from models.ml_metrics_model import MLMetrics
 
 
@@ -328,3 +348,425 @@ class TestMLMetricsController:
         assert averages["tactical_avg"] == 76.0  # (75+76+77)/3
         assert averages["physical_avg"] == 86.0  # (85+86+87)/3
         assert averages["consistency_avg"] == 65.0  # (60+65+70)/3
+
+
+class TestIEPClusterArtifacts:
+    """Tests de los artefactos IEP precalculados por posición y temporada."""
+
+    @pytest.fixture
+    def artifact_store(self, monkeypatch, tmp_path):
+        store = iep_artifacts.IEPArtifactStore(tmp_path / "iep")
+        monkeypatch.setattr(iep_artifacts, "_iep_artifact_store", store)
+        return store
+
+    def test_clusters_fit_once_and_persist(self, artifact_store):
+        """TEST: El ajuste se hace una vez y se reutiliza desde memoria y disco"""
+        calculator = IEPCalculator()
+        first = calculator.calculate_position_clusters("CF", "2024-25")
+        second = IEPCalculator().calculate_position_clusters("CF", "2024-25")
+
+        assert first["success"] and first["players_data"] == second["players_data"]
+        assert artifact_store.get_stats()["builds"] == 1
+
+        # Un proceso nuevo carga el artefacto de disco sin reajustar
+        fresh_store = iep_artifacts.IEPArtifactStore(artifact_store.base_path)
+        iep_artifacts._iep_artifact_store = fresh_store
+        third = calculator.calculate_position_clusters("CF", "2024-25")
+        assert third["players_data"] == first["players_data"]
+        assert fresh_store.get_stats()["disk_hits"] == 1
+
+    def test_data_hash_change_refits(self, artifact_store, monkeypatch):
+        """TEST: Si cambia el hash de los datos el artefacto se recalcula"""
+        calculator = IEPCalculator()
+        calculator.calculate_position_clusters("CB", "2024-25")
+        monkeypatch.setattr(calculator, "_season_data_hash", lambda season: "nuevo")
+        calculator.calculate_position_clusters("CB", "2024-25")
+
+        assert artifact_store.get_stats()["builds"] == 2
+
+    def test_player_iep_is_lookup_in_artifact(self, artifact_store):
+        """TEST: El IEP individual sale del artefacto con su percentil precalculado"""
+        calculator = IEPCalculator()
+        artifact = calculator.get_cluster_artifact("CF", "2024-25")
+        name = artifact.player_names[0]
+
+        stats = MagicMock(primary_position="CF", full_name=name)
+        session = MagicMock()
+        session.query.return_value.filter.return_value.first.return_value = stats
+        calculator.session_factory = MagicMock()
+        calculator.session_factory.return_value.__enter__.return_value = session
+
+        result = calculator.calculate_player_iep(999999, "2024-25")
+
+        metrics = result["iep_metrics"]
+        assert metrics["iep_score"] == artifact.iep_scores[0]
+        assert metrics["percentile_in_position"] == artifact.percentiles[0]
+        assert artifact_store.get_stats()["builds"] == 1
+
+    def test_forced_player_fits_are_bounded(self, tmp_path):
+        """TEST: Los ajustes con jugador forzado no crecen sin límite en memoria"""
+        store = iep_artifacts.IEPArtifactStore(tmp_path / "iep", forced_max=2)
+        artifact = MagicMock(
+            spec=iep_artifacts.IEPClusterArtifact,
+            artifact_version=iep_artifacts.ARTIFACT_VERSION,
+            data_hash="h",
+            signature="s",
+        )
+        builds = []
+
+        def _get(wyscout_id):
+            key = ("CF", "2024-25", 5, wyscout_id)
+            return store.get_or_build(
+                key, "h", "s", lambda: builds.append(key) or artifact
+            )
+
+        _get(None)
+        for wyscout_id in ("1", "2", "3"):
+            _get(wyscout_id)
+        _get("3")
+        store.get_or_build(("CF", "2024-25", 5, "4"), "h", "s", lambda: {"error": 1})
+
+        stats = store.get_stats()
+        assert stats["forced_in_memory"] == 2
+        assert stats["artifacts_in_memory"] == 3
+        assert set(store._key_locks) == {
+            ("CF", "2024-25", 5, None),
+            ("CF", "2024-25", 5, "2"),
+            ("CF", "2024-25", 5, "3"),
+        }
+        # El expulsado se reajusta; el base y los recientes salen de memoria
+        _get("1")
+        _get(None)
+        assert len(builds) == 5
+
+
+@pytest.fixture
+def stats_db():
+    """BD SQLite con ProfessionalStats aleatorias (con None, ceros y negativos)."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine)
+    session = SessionLocal()
+    rng = random.Random(7)
+    calculator = PDICalculator()
+    positions = list(calculator.position_mapping) + ["", None, "UNKNOWN"]
+    numeric_columns = [
+        column
+        for column in ProfessionalStats.__table__.columns
+        if isinstance(column.type, (Integer, Float))
+        and column.name not in ("stat_id", "player_id", "wyscout_id")
+    ]
+
+    for i in range(300):
+        user = User(
+            username=f"pro_{i}",
+            name=f"Pro {i}",
+            password_hash="x",
+            email=f"pro{i}@test.com",
+            user_type=UserType.player,
+        )
+        session.add(user)
+        session.flush()
+        session.add(Player(player_id=user.user_id, user=user, is_professional=1))
+
+        values = {}
+        for column in numeric_columns:
+            roll = rng.random()
+            if roll < 0.1:
+                values[column.name] = None
+            elif roll < 0.2:
+                values[column.name] = 0
+            elif isinstance(column.type, Integer):
+                values[column.name] = rng.randint(0, 3500)
+            else:
+                values[column.name] = rng.uniform(-1, 120)
+        session.add(
+            ProfessionalStats(
+                player_id=user.user_id,
+                wyscout_id=i,
+                season="2024-25",
+                player_name=f"Pro {i}",
+                full_name=f"Pro {i}",
+                team="Team",
+                primary_position=rng.choice(positions),
+                **values,
+            )
+        )
+    session.commit()
+    session.close()
+    return SessionLocal
+
+
+class TestBatchPDIEngine:
+    """Tests del motor PDI vectorizado frente a la ruta por objeto."""
+
+    def test_batch_matches_per_object_path(self, stats_db):
+        """TEST: El motor batch reproduce exactamente _calculate_pdi_metrics"""
+        calculator = PDICalculator()
+        engine = BatchPDIEngine(calculator, session_factory=stats_db)
+
+        with stats_db() as session:
+            matrix = engine.load_stats(session)
+            results = engine.compute(matrix)
+            rows = engine._metric_rows(matrix, results)
+
+            for i, row in enumerate(rows):
+                player = session.get(Player, row["player_id"])
+                expected = calculator._calculate_pdi_metrics(session, player, "2024-25")
+                for key in METRIC_COLUMNS + ("position_analyzed",):
+                    assert row[key] == expected[key], (row["player_id"], key)
+
+                stats = (
+                    session.query(ProfessionalStats)
+                    .filter_by(player_id=row["player_id"])
+                    .one()
+                )
+                hierarchical = calculator._calculate_hierarchical_pdi(stats)
+                for key, value in hierarchical.items():
+                    assert results[f"hierarchical_{key}"][i] == value
+
+    def test_recalculate_upserts_ml_metrics(self, stats_db):
+        """TEST: El recálculo inserta la primera vez y actualiza después"""
+        engine = BatchPDIEngine(session_factory=stats_db)
+
+        first = engine.recalculate(["2024-25"])
+        second = engine.recalculate(["2024-25"])
+
+        assert (first["inserted"], first["updated"]) == (300, 0)
+        assert (second["inserted"], second["updated"]) == (0, 300)
+        with stats_db() as session:
+            assert session.query(MLMetrics).count() == 300
+
+
+class TestFuturePDITrainingSet:
+    """Tests del constructor vectorizado del dataset temporal de PDI futuro."""
+
+    @pytest.fixture
+    def history(self):
+        rng = np.random.default_rng(21)
+        rows = []
+        for player_id in range(120):
+            start = int(rng.integers(2016, 2024))
+            for year in range(start, min(2025, start + int(rng.integers(1, 6)))):
+                row = {"player_id": player_id, "season": f"{year}-{year - 1999}"}
+                for column in BASIC_FEATURES:
+                    roll = rng.random()
+                    if roll < 0.1:
+                        row[column] = np.nan
+                    elif roll < 0.2:
+                        row[column] = 0.0
+                    else:
+                        row[column] = rng.uniform(0, 99)
+                row["Position_Group"] = rng.choice(["GK", "DEF", "MID", "FWD", None])
+                row["Team"] = rng.choice(["A", "B", None])
+                rows.append(row)
+        return pd.DataFrame(rows)
+
+    @pytest.mark.parametrize("years_ahead", [1, 2])
+    def test_vectorized_matches_rowwise(self, history, years_ahead):
+        """TEST: El constructor vectorizado reproduce exactamente el original"""
+        predictor = FuturePDIPredictor()
+
+        X, y, seasons = predictor.create_training_dataset(history, years_ahead)
+        X_ref, y_ref, seasons_ref = predictor._create_training_dataset_rowwise(
+            history, years_ahead
+        )
+
+        assert len(X) > 0
+        pd.testing.assert_frame_equal(X, X_ref, check_exact=True)
+        pd.testing.assert_series_equal(y, y_ref, check_exact=True)
+        pd.testing.assert_series_equal(seasons, seasons_ref, check_exact=True)
+
+
+class TestAdvancedFeatureStages:
+    """Tests de las etapas rolling y legacy vectorizadas de AdvancedFeatureEngineer."""
+
+    @pytest.fixture
+    def seasons_df(self):
+        rng = np.random.default_rng(15)
+        positions = ["GK", "CB", "LB", "DMF", "CMF", "AMF", "LW", "CF", None]
+        rows = []
+        for player_id in range(80):
+            years = rng.choice(np.arange(2012, 2025), size=rng.integers(1, 11))
+            for year in sorted(set(years), key=lambda _: rng.random()):
+                rows.append(
+                    {
+                        "Player": f"Player {player_id}" if player_id % 20 else None,
+                        "season": f"{year}-{year - 1999}",
+                        "Primary position": rng.choice(positions),
+                        "Minutes played": float(rng.choice([0, rng.integers(1, 3000)])),
+                        "Pass accuracy, %": (
+                            np.nan if rng.random() < 0.1 else rng.uniform(40, 100)
+                        ),
+                        "Duels won, %": rng.uniform(-5, 90),
+                        "Passes per 90": rng.uniform(0, 130),
+                        "Goals per 90": rng.uniform(-0.1, 2.5),
+                        "Key passes per 90": rng.uniform(0, 9),
+                        "Aerial duels won, %": rng.uniform(0, 100),
+                    }
+                )
+        df = pd.DataFrame(rows)
+        return df.set_axis(rng.permutation(len(df)) * 7)
+
+    def test_rolling_matches_rowwise(self, seasons_df):
+        """TEST: Las ventanas expanding reproducen el cálculo por jugador"""
+        engineer = AdvancedFeatureEngineer()
+
+        rolling = engineer._generate_rolling_features(seasons_df)
+        reference = engineer._generate_rolling_features_rowwise(seasons_df)
+
+        assert len(rolling) > 0
+        pd.testing.assert_frame_equal(rolling, reference, check_exact=True)
+
+    def test_legacy_weighted_matches_rowwise(self, seasons_df):
+        """TEST: Los scores legacy por columnas coinciden con los de iterrows"""
+        engineer = AdvancedFeatureEngineer()
+
+        legacy = engineer._generate_legacy_weighted_features(seasons_df)
+        reference = engineer._generate_legacy_weighted_features_rowwise(seasons_df)
+
+        assert set(legacy["legacy_position_normalized"]) > {"GK", "CF"}
+        pd.testing.assert_frame_equal(legacy, reference, check_exact=True)
+
+
+class _RecordingModel:
+    """Modelo mínimo: suma dos features y registra cada llamada a predict."""
+
+    feature_names_in_ = np.array(MODEL_FEATURE_COLUMNS)
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, X):
+        assert list(X.columns) == MODEL_FEATURE_COLUMNS
+        self.calls.append(len(X))
+        return (X["age"] + X["pdi_overall_lag1"] / 2).to_numpy()
+
+
+class TestPdiPredictionBatch:
+    """Tests de predict_many y del feature store por temporada."""
+
+    @pytest.fixture
+    def service(self, stats_db, tmp_path, monkeypatch):
+        model = _RecordingModel()
+        monkeypatch.setattr(
+            pdi_prediction_service,
+            "load_production_model",
+            lambda: (model, {"validation_passed": True, "expected_mae": 3.0}),
+        )
+        store = SeasonFeatureStore(processed_dir=tmp_path, session_factory=stats_db)
+        return pdi_prediction_service.PdiPredictionService(feature_store=store)
+
+    def test_csv_matrix_follows_model_order(self, stats_db, tmp_path):
+        """TEST: La matriz del CSV usa el orden del modelo, posiciones y lag"""
+        pd.DataFrame(
+            {
+                "Wyscout id": [1, 2, 3],
+                "Primary position": ["GK", "LCMF", "RWF"],
+                "Age": [21, 25, 30],
+                "Accurate passes, %": [80.0, np.nan, 70.0],
+                "PDI": [50.0, 60.0, 70.0],
+            }
+        ).to_csv(tmp_path / "processed_2024-25.csv", index=False)
+        pd.DataFrame({"Wyscout id": [1], "PDI": [45.0]}).to_csv(
+            tmp_path / "processed_2023-24.csv", index=False
+        )
+
+        store = SeasonFeatureStore(processed_dir=tmp_path, session_factory=stats_db)
+        matrix = store.get_season_matrix("2024-25")
+
+        assert list(matrix.columns) == MODEL_FEATURE_COLUMNS
+        assert matrix["pdi_overall_lag1"].tolist() == [45.0, 60.0, 70.0]
+        assert matrix["pass_accuracy_pct"].tolist() == [80.0, 75.0, 70.0]
+        assert matrix[["pos_GK", "pos_CMF", "pos_W"]].to_numpy().trace() == 3
+        assert store.get_season_matrix("2024-25") is matrix
+
+    def test_predict_many_single_model_call(self, service):
+        """TEST: predict_many predice todos los jugadores con una sola llamada"""
+        results = service.predict_many(None, "2024-25", years_ahead=2)
+        matrix = service.feature_store.get_season_matrix("2024-25")
+
+        assert len(results) == len(matrix) == 300
+        assert service.model.calls == [300]
+        for player_id in matrix.index[:20]:
+            row = matrix.loc[player_id]
+            expected = np.clip(row["age"] + row["pdi_overall_lag1"] / 2, 30, 100)
+            assert results[player_id]["prediction"] == expected
+            assert results[player_id]["target_season"] == "2026-27"
+
+        # Cache por versión de modelo: sin nuevas llamadas hasta cambiar de versión
+        single = service.predict_future_pdi(int(matrix.index[0]), "2024-25", 2)
+        assert single == results[matrix.index[0]]
+        assert service.model.calls == [300]
+
+        service.model_version = "retrained"
+        service.predict_many(matrix.index[:5], "2024-25", years_ahead=2)
+        assert service.model.calls == [300, 5]
+        assert service.predict_many([-1], "2024-25") == {}
+
+    def test_prediction_cache_follows_feature_changes(self, service, stats_db):
+        """TEST: Cambios en la BD de features invalidan las predicciones cacheadas"""
+        store = service.feature_store
+        store.db_refresh_seconds = 0
+        first = service.predict_many(None, "2024-25")
+        version = store.season_version("2024-25")
+
+        # Reconstrucción sin cambios: misma versión, predicciones de la cache
+        assert service.predict_many(None, "2024-25") == first
+        assert store.season_version("2024-25") == version
+        assert service.model.calls == [300]
+
+        player_id = int(store.get_season_matrix("2024-25").index[0])
+        with stats_db() as session:
+            stat = session.query(ProfessionalStats).filter_by(player_id=player_id).one()
+            stat.age = 99
+            session.commit()
+
+        second = service.predict_many(None, "2024-25")
+        assert store.season_version("2024-25") != version
+        assert service.model.calls == [300, 300]
+        assert store.get_season_matrix("2024-25").loc[player_id, "age"] == 99
+        assert second[player_id]["prediction"] != first[player_id]["prediction"]
+
+
+class TestModelRegistry:
+    """Tests del registro de modelos compartido."""
+
+    @pytest.fixture
+    def registry(self, tmp_path, monkeypatch):
+        source = model_loader.DEFAULT_MODELS_DIR / "future_pdi_predictor_v1.joblib"
+        (tmp_path / source.name).write_bytes(source.read_bytes())
+        registry = model_loader.ModelRegistry(models_dir=tmp_path)
+        monkeypatch.setattr(model_loader, "_model_registry", registry)
+        return registry
+
+    def test_analyzers_share_one_load(self, registry):
+        """TEST: Varios PlayerAnalyzer deserializan el modelo una sola vez"""
+        analyzers = [PlayerAnalyzer(session_factory=lambda: None) for _ in range(4)]
+
+        models = {id(analyzer.pdi_predictor_model) for analyzer in analyzers}
+
+        stats = registry.get_stats()
+        assert len(models) == 1
+        assert stats["loads"] == 1 and stats["hits"] == 3
+        model_stats = stats["models"]["future_pdi_predictor_v1.joblib"]
+        assert model_stats["load_seconds"] > 0
+        assert model_stats["memory_bytes"] >= 0
+
+    def test_reload_on_change_keeps_versions(self, registry, tmp_path):
+        """TEST: Un fichero modificado se recarga y la versión anterior se conserva"""
+        path = tmp_path / "future_pdi_predictor_v1.joblib"
+        first = registry.get_entry(path.name)
+
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        second = registry.get_entry(path.name)
+
+        assert second is not first and second.version != first.version
+        assert registry.get_versions(path.name) == [first, second]
+        assert registry.get_stats()["reloads"] == 1
+
+        # Volver a la versión anterior reutiliza la ya cargada
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert registry.get_entry(path.name) is first
+        assert registry.get("missing.joblib") is None
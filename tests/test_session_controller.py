@@ -0,0 +1,332 @@
+# tests/test_session_controller.py
+"""
+Tests de las consultas de sesiones contra una BD SQLite.
+Cubren el número de consultas por listado (regresiones N+1), los contadores
+agrupados de sesiones, el estado derivado de sesiones pasadas, la búsqueda
+paginada del selector de edición y la migración de índices secundarios.
+"""
+import datetime as dt
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+import controllers.player_controller as player_controller
+import controllers.session_controller as session_controller
+from controllers import db_indexes, session_stats
+from controllers.calendar_batch import CalendarColorQueue
+from models import Base, MLMetrics, Player, Session, SessionStatus, User, UserType
+from tests.conftest import _create_test_users
+
+
+@pytest.fixture
+def sessions_db(monkeypatch, tmp_path):
+    """BD SQLite con usuarios de prueba y contador de consultas SQL."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'sessions.db'}")
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine)
+    seed = SessionLocal()
+    _create_test_users(seed)
+    seed.close()
+
+    statements = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    monkeypatch.setattr(session_controller, "get_db_session", SessionLocal)
+    monkeypatch.setattr(player_controller, "get_db_session", SessionLocal)
+    monkeypatch.setattr(
+        session_stats,
+        "_session_stats_service",
+        session_stats.SessionStatsService(SessionLocal, ttl_seconds=60),
+    )
+    return SessionLocal, statements
+
+
+def _selects(statements):
+    return [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+
+
+class TestSessionsTableRows:
+    """Tests del listado de sesiones en formato tabla."""
+
+    def test_table_rows_use_a_single_query(self, sessions_db):
+        """TEST: La tabla sale de una consulta, sin consultas por fila"""
+        SessionLocal, statements = sessions_db
+        today = dt.date.today() + dt.timedelta(days=1)
+        db = SessionLocal()
+        for i in range(30):
+            start = dt.datetime.combine(today, dt.time(8)) + dt.timedelta(hours=i)
+            db.add(
+                Session(
+                    coach_id=2 if i % 3 else None,
+                    player_id=3,
+                    coach_name_snapshot="Old Coach",
+                    start_time=start,
+                    end_time=start + dt.timedelta(hours=1),
+                    status=SessionStatus.SCHEDULED,
+                )
+            )
+        db.commit()
+        db.close()
+        statements.clear()
+
+        rows = session_controller.get_sessions_table_rows(
+            today, today + dt.timedelta(days=2), status_filter=["scheduled"]
+        )
+
+        assert len(_selects(statements)) == 1
+        assert len(rows) == 30
+        assert rows[0]["Coach"] == "Old Coach"
+        assert rows[1]["Coach"] == "Test Coach"
+        assert {row["Player"] for row in rows} == {"Test Player"}
+        assert rows[0]["Start Time"] == "08:00" and rows[0]["Status"] == "scheduled"
+
+
+class TestPastSessions:
+    """Tests del estado derivado y del rollover de sesiones pasadas."""
+
+    def test_reads_derive_status_and_rollover_is_one_update(self, sessions_db):
+        """TEST: Las lecturas no escriben y el rollover es un solo UPDATE"""
+        SessionLocal, statements = sessions_db
+        start = dt.datetime.now() - dt.timedelta(days=3)
+        db = SessionLocal()
+        for i in range(3):
+            db.add(
+                Session(
+                    coach_id=2,
+                    player_id=3,
+                    start_time=start + dt.timedelta(hours=i),
+                    end_time=start + dt.timedelta(hours=i + 1),
+                    status=SessionStatus.SCHEDULED,
+                    calendar_event_id=f"event-{i}" if i else None,
+                )
+            )
+        db.commit()
+        db.close()
+        statements.clear()
+
+        rows = session_controller.get_sessions_table_rows(
+            start.date(), dt.date.today(), status_filter=["completed"]
+        )
+
+        assert len(rows) == 3 and {row["Status"] for row in rows} == {"completed"}
+        assert all(s.lstrip().upper().startswith("SELECT") for s in statements)
+
+        statements.clear()
+        queue = CalendarColorQueue()
+        with session_controller.SessionController() as controller:
+            assert controller.update_past_sessions(queue) == 3
+            updates = [s for s in statements if s.lstrip().upper() != "COMMIT"]
+            assert len(updates) == 1 and updates[0].startswith("UPDATE")
+            assert controller.update_past_sessions(queue) == 0
+        assert len(queue) == 2
+        assert session_controller.get_coach_stats(2)["completed"] == 3
+
+        # Tras un reinicio la cola está vacía: se reconstruye desde is_dirty
+        restarted = CalendarColorQueue()
+        with session_controller.SessionController() as controller:
+            assert controller.enqueue_pending_colors(restarted) == 2
+        assert len(restarted) == 2
+
+
+class TestSessionSearch:
+    """Tests de la búsqueda paginada de sesiones."""
+
+    def test_search_pages_with_cursor_in_sql(self, sessions_db):
+        """TEST: Filtra en SQL, devuelve N resultados y pagina con cursor"""
+        SessionLocal, statements = sessions_db
+        start = dt.datetime(2025, 3, 1, 10, 0)
+        db = SessionLocal()
+        for i in range(12):
+            db.add(
+                Session(
+                    coach_id=2 if i % 2 else None,
+                    player_id=3,
+                    coach_name_snapshot="Old_Coach" if i % 2 == 0 else None,
+                    start_time=start + dt.timedelta(days=i),
+                    end_time=start + dt.timedelta(days=i, hours=1),
+                )
+            )
+        db.commit()
+        db.close()
+        statements.clear()
+
+        with session_controller.SessionController() as controller:
+            first, cursor = controller.search_sessions("test coach", limit=4)
+            second, last_cursor = controller.search_sessions(
+                "test coach", limit=4, cursor=cursor
+            )
+            by_snapshot, _ = controller.search_sessions("old_")
+            by_date, _ = controller.search_sessions("05/03/2025")
+            by_day_month, _ = controller.search_sessions("06/03")
+            by_id, _ = controller.search_sessions("7")
+
+        # Hasta 2 consultas por página (próximas + pasadas); la 2ª página ya
+        # parte del tramo de pasadas
+        assert len(_selects(statements)) == 11
+        assert list(first) == [12, 10, 8, 6] and list(second) == [4, 2]
+        assert cursor and last_cursor is None
+        assert first[12].startswith("🔘 Past – Test Coach with Test Player (12/03")
+        assert len(by_snapshot) == 6 and all(i % 2 for i in by_snapshot)
+        assert list(by_date) == [5] and list(by_day_month) == [6]
+        assert list(by_id) == [7]
+        assert "completed" in by_id[7]
+
+    def test_search_matches_fragments_and_orders_upcoming_first(self, sessions_db):
+        """TEST: IDs y fechas parciales por subcadena; próximas primero y cercanas"""
+        SessionLocal, _ = sessions_db
+        today = dt.datetime.combine(dt.date.today(), dt.time(10, 0))
+        offsets = [-40, -2, 1, 3, 30, 400]
+        db = SessionLocal()
+        for days in offsets:
+            start = today + dt.timedelta(days=days)
+            db.add(
+                Session(
+                    coach_id=2,
+                    player_id=3,
+                    start_time=start,
+                    end_time=start + dt.timedelta(hours=1),
+                )
+            )
+        old_start = dt.datetime(2020, 1, 1, 10, 0)
+        db.add(Session(id=1234, start_time=old_start, end_time=old_start))
+        db.commit()
+        db.close()
+        day_of = {i + 1: today + dt.timedelta(days=d) for i, d in enumerate(offsets)}
+
+        with session_controller.SessionController() as controller:
+            first, cursor = controller.search_sessions(limit=3)
+            second, _ = controller.search_sessions(limit=3, cursor=cursor)
+            by_player, _ = controller.search_sessions("test player")
+            by_id, _ = controller.search_sessions("23")
+            partial = day_of[5].strftime("%d/%m")[:4]  # 'dd/m'
+            by_partial, _ = controller.search_sessions(partial)
+            by_month, _ = controller.search_sessions(day_of[6].strftime("/%m/%Y"))
+
+        # Próximas de la más cercana a la más lejana, luego pasadas
+        assert list(first) == [3, 4, 5] and list(second) == [6, 2, 1]
+        assert len(by_player) == 6
+        assert 1234 in by_id
+        assert 5 in by_partial and all(
+            partial in day_of[i].strftime("%d/%m/%Y") for i in by_partial
+        )
+        assert 6 in by_month
+
+
+class TestSessionStatsService:
+    """Tests de los contadores agrupados de sesiones."""
+
+    def test_player_list_uses_constant_queries(self, sessions_db):
+        """TEST: La lista de jugadores usa 3 consultas y se invalida al escribir"""
+        SessionLocal, statements = sessions_db
+        now = dt.datetime.now()
+        db = SessionLocal()
+        for i in range(5):
+            user = User(
+                username=f"player_{i}",
+                name=f"Player {i}",
+                password_hash="x",
+                email=f"player{i}@test.com",
+                user_type=UserType.player,
+            )
+            db.add(user)
+            db.flush()
+            db.add(Player(player_id=user.user_id, user=user, enrolment=10))
+            for days, status in ((-2, SessionStatus.COMPLETED), (i + 1, None)):
+                start = now + dt.timedelta(days=days)
+                db.add(
+                    Session(
+                        coach_id=2,
+                        player_id=user.user_id,
+                        start_time=start,
+                        end_time=start + dt.timedelta(hours=1),
+                        status=status or SessionStatus.SCHEDULED,
+                    )
+                )
+        db.commit()
+        db.close()
+        statements.clear()
+
+        cards = player_controller.get_players_for_list()
+
+        assert len(_selects(statements)) == 3
+        assert len(cards) == 6
+        card = next(c for c in cards if c["name"] == "Player 0")
+        assert card["sessions_count"] == 1 and card["remaining_sessions"] == 9
+        assert card["next_session"] != "To be confirmed"
+        assert session_controller.get_coach_stats(2)["scheduled"] == 5
+
+        db = SessionLocal()
+        db.add(Session(coach_id=2, player_id=3, status=SessionStatus.CANCELED))
+        db.commit()
+        db.close()
+        assert session_controller.get_coach_stats(2)["canceled"] == 1
+
+    def test_ended_scheduled_sessions_count_as_completed(self, sessions_db):
+        """TEST: Una sesión programada ya terminada cuenta como completada"""
+        SessionLocal, _ = sessions_db
+        start = dt.datetime.now() - dt.timedelta(hours=3)
+        db = SessionLocal()
+        db.add(
+            Session(
+                coach_id=2,
+                player_id=3,
+                start_time=start,
+                end_time=start + dt.timedelta(hours=1),
+                status=SessionStatus.SCHEDULED,
+            )
+        )
+        db.commit()
+        db.close()
+
+        stats = session_stats.get_session_stats_service().get_coach_stats([2])[2]
+
+        assert (stats["completed"], stats["scheduled"]) == (1, 0)
+        assert stats["next_session_id"] is None
+
+    def test_read_between_flush_and_commit_is_discarded(self, sessions_db):
+        """TEST: Lo cacheado entre el flush y el commit se descarta al confirmar"""
+        SessionLocal, _ = sessions_db
+        service = session_stats.get_session_stats_service()
+        writer = SessionLocal()
+        writer.add(Session(coach_id=2, player_id=3, status=SessionStatus.CANCELED))
+        writer.flush()
+
+        # Otro lector aún ve el estado confirmado y lo cachea
+        assert service.get_coach_stats([2])[2]["canceled"] == 0
+        writer.commit()
+        writer.close()
+
+        assert service.get_coach_stats([2])[2]["canceled"] == 1
+
+
+class TestIndexMigration:
+    """Tests de la migración idempotente de índices."""
+
+    def test_apply_indexes_is_idempotent_and_skips_duplicates(self, sessions_db):
+        """TEST: Crea los índices que faltan, respeta duplicados y no repite"""
+        SessionLocal, _ = sessions_db
+        engine = SessionLocal.kw["bind"]
+        with engine.begin() as conn:
+            for index in db_indexes.managed_indexes():
+                conn.execute(text(f"DROP INDEX {index.name}"))
+        db = SessionLocal()
+        db.add_all([MLMetrics(player_id=3, season="2024-25") for _ in range(2)])
+        db.commit()
+        db.close()
+
+        results = {r["index"]: r["status"] for r in db_indexes.apply_indexes(engine)}
+
+        assert results["uq_ml_metrics_player_season"] == "duplicates"
+        assert results["ix_sessions_start_time"] == "created"
+        assert db_indexes.verify_indexes(engine)["missing"] == [
+            "uq_ml_metrics_player_season"
+        ]
+        plans = db_indexes.explain_hot_queries(engine)
+        assert "ix_sessions_start_time" in " ".join(plans["sessions_by_range"])
+
+        rerun = db_indexes.apply_indexes(engine)
+        assert {r["status"] for r in rerun} == {"exists", "duplicates"}
@@ -0,0 +1,294 @@
+# tests/test_webhook_sync.py
+"""
+Tests del servidor de webhooks sin red ni Google Calendar.
+Cubren el planificador de syncs (coalescencia, debounce con reloj
+controlado, una sola sync a la vez) y la difusión SSE (fan-out, buffer por
+cliente, replay con Last-Event-ID).
+"""
+import threading
+import time
+
+import pytest
+
+from controllers.sse_broadcaster import SSEBroadcaster
+from controllers.sync_scheduler import SyncScheduler
+
+
+class FakeClock:
+    """Reloj monotónico que solo avanza cuando el test lo pide."""
+
+    def __init__(self):
+        self.now = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            return self.now
+
+    def advance(self, seconds):
+        with self._lock:
+            self.now += seconds
+
+
+class FakeSync:
+    """Sync falsa que registra ejecuciones y puede quedarse bloqueada."""
+
+    def __init__(self, duration=0.0):
+        self.duration = duration
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+        self.finished = threading.Semaphore(0)
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        self.started.set()
+        self.release.wait(5)
+        time.sleep(self.duration)
+        with self._lock:
+            self.active -= 1
+        self.finished.release()
+
+    def wait_runs(self, runs, timeout=5.0):
+        for _ in range(runs):
+            assert self.finished.acquire(timeout=timeout)
+
+
+def _wait_idle(scheduler, timeout=5.0):
+    """Espera a que cada notificación haya terminado en una sync o descartada."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        stats = scheduler.get_stats()
+        handled = stats["runs"] + stats["coalesced"] + stats["dropped"]
+        if not stats["running"] and handled == stats["notifications"]:
+            return stats
+        time.sleep(0.01)
+    raise AssertionError("el scheduler no quedó inactivo")
+
+
+@pytest.fixture
+def make_scheduler():
+    """Crea schedulers y los detiene al terminar el test."""
+    created = []
+
+    def _make(run_sync, **kwargs):
+        scheduler = SyncScheduler(run_sync, **kwargs)
+        created.append(scheduler)
+        return scheduler
+
+    yield _make
+    for scheduler in created:
+        scheduler.stop()
+
+
+class TestSyncScheduler:
+    """Tests del worker único con debounce y coalescencia."""
+
+    def test_notifications_during_sync_coalesce_into_one_run(self, make_scheduler):
+        """TEST: Las notificaciones recibidas durante una sync provocan una sola más"""
+        sync = FakeSync()
+        sync.release.clear()
+        scheduler = make_scheduler(sync, debounce_seconds=0)
+
+        scheduler.submit({"resource_state": "exists"})
+        assert sync.started.wait(5)
+        for _ in range(5):
+            scheduler.submit({"resource_state": "exists"})
+        sync.release.set()
+        sync.wait_runs(2)
+        stats = _wait_idle(scheduler)
+
+        assert sync.calls == 2
+        assert stats["notifications"] == 6
+        assert stats["runs"] == 2
+        assert stats["coalesced"] == 4
+
+    def test_debounce_waits_for_the_window_on_the_clock(self, make_scheduler):
+        """TEST: La sync no arranca hasta que el reloj cierra la ventana"""
+        clock = FakeClock()
+        sync = FakeSync()
+        scheduler = make_scheduler(sync, debounce_seconds=10, clock=clock)
+
+        scheduler.submit()
+        time.sleep(0.2)
+        scheduler.submit()
+        scheduler.submit()
+        time.sleep(0.2)
+        assert sync.calls == 0
+
+        clock.advance(10)
+        sync.wait_runs(1)
+        assert scheduler.get_stats()["coalesced"] == 2
+
+        scheduler.submit()
+        time.sleep(0.2)
+        assert sync.calls == 1
+        clock.advance(10)
+        sync.wait_runs(1)
+        assert sync.calls == 2
+
+    def test_never_runs_two_syncs_at_once(self, make_scheduler):
+        """TEST: Con muchos productores concurrentes nunca hay dos syncs a la vez"""
+        sync = FakeSync(duration=0.01)
+        scheduler = make_scheduler(sync, debounce_seconds=0, max_queue=10)
+
+        def _produce():
+            for _ in range(25):
+                scheduler.submit()
+                time.sleep(0.001)
+
+        producers = [threading.Thread(target=_produce) for _ in range(8)]
+        for thread in producers:
+            thread.start()
+        for thread in producers:
+            thread.join()
+        stats = _wait_idle(scheduler)
+
+        assert sync.max_active == 1
+        assert stats["notifications"] == 200
+        assert stats["runs"] == sync.calls
+
+    def test_failed_sync_is_counted_and_worker_keeps_running(self, make_scheduler):
+        """TEST: Un error en la sync no detiene el worker"""
+        calls = []
+
+        def _failing_sync():
+            calls.append(1)
+            raise RuntimeError("Calendar caído")
+
+        scheduler = make_scheduler(_failing_sync, debounce_seconds=0)
+        scheduler.submit()
+        _wait_idle(scheduler)
+        scheduler.submit()
+        stats = _wait_idle(scheduler)
+
+        assert len(calls) == 2
+        assert stats["errors"] == 2
+
+    def test_webhook_sync_errors_reach_the_scheduler(self, monkeypatch):
+        """TEST: Un fallo del ciclo webhook cuenta en el servidor y en el scheduler"""
+        from controllers import webhook_server
+
+        def _calendar_down(**kwargs):
+            raise RuntimeError("Calendar caído")
+
+        cleared = []
+        monkeypatch.setattr(
+            webhook_server, "sync_calendar_to_db_with_feedback", _calendar_down
+        )
+        monkeypatch.setattr(
+            webhook_server,
+            "save_sync_problems",
+            lambda rejected, warnings: cleared.append((rejected, warnings)),
+        )
+        server = webhook_server.WebhookServer(port=0)
+        scheduler = server.sync_scheduler
+        scheduler.debounce_seconds = 0
+        scheduler.start()
+        try:
+            scheduler.submit()
+            stats = _wait_idle(scheduler)
+        finally:
+            scheduler.stop()
+
+        assert stats["errors"] == 1
+        assert server.stats["sync_errors"] == 1
+        assert cleared == [([], [])]
+
+
+def _payloads(sub):
+    return [data for _, data in sub.drain()]
+
+
+class TestSSEBroadcaster:
+    """Tests del fan-out SSE con buffers por cliente y replay."""
+
+    def test_every_subscriber_receives_every_event(self):
+        """TEST: Cada evento publicado llega a todos los clientes conectados"""
+        broadcaster = SSEBroadcaster()
+        subs = [broadcaster.subscribe() for _ in range(3)]
+
+        ids = [broadcaster.publish({"n": n}) for n in range(4)]
+
+        assert ids == sorted(ids) and len(set(ids)) == 4
+        for sub in subs:
+            assert _payloads(sub) == [{"n": n} for n in range(4)]
+        assert broadcaster.get_stats()["subscribers"] == 3
+
+    def test_slow_client_is_dropped_without_affecting_others(self):
+        """TEST: Un cliente con el buffer lleno se desconecta y el resto sigue"""
+        broadcaster = SSEBroadcaster(client_buffer_size=3)
+        slow = broadcaster.subscribe()
+        fast = broadcaster.subscribe()
+
+        for n in range(3):
+            broadcaster.publish({"n": n})
+        assert len(_payloads(fast)) == 3
+        broadcaster.publish({"n": 3})
+
+        assert slow.dropped
+        assert [d["n"] for d in _payloads(fast)] == [3]
+        stats = broadcaster.get_stats()
+        assert stats["dropped_clients"] == 1
+        assert stats["subscribers"] == 1
+
+    def test_stream_ends_after_overflow(self):
+        """TEST: El stream de un cliente desbordado entrega lo pendiente y termina"""
+        broadcaster = SSEBroadcaster(client_buffer_size=2, heartbeat_seconds=0.01)
+        stream = broadcaster.stream()
+        assert "heartbeat" in next(stream)  # ya suscrito
+
+        for n in range(3):
+            broadcaster.publish({"n": n})
+        chunks = list(stream)
+
+        assert len(chunks) == 2
+        assert broadcaster.get_stats()["subscribers"] == 0
+
+    def test_reconnect_replays_missed_events(self):
+        """TEST: Con Last-Event-ID se reciben solo los eventos posteriores"""
+        broadcaster = SSEBroadcaster()
+        ids = [broadcaster.publish({"n": n}) for n in range(5)]
+
+        sub = broadcaster.subscribe(last_event_id=str(ids[1]))
+
+        assert _payloads(sub) == [{"n": 2}, {"n": 3}, {"n": 4}]
+        assert broadcaster.get_stats()["full_resyncs"] == 0
+        up_to_date = broadcaster.subscribe(last_event_id=str(ids[-1]))
+        assert _payloads(up_to_date) == []
+
+    @pytest.mark.parametrize("case", ["previous_process", "future", "evicted"])
+    def test_unknown_ids_get_full_state(self, case):
+        """TEST: Ids de otro proceso, futuros o fuera del historial piden refresco"""
+        old = SSEBroadcaster()
+        old_id = old.publish({"n": 0})
+        broadcaster = SSEBroadcaster(history_size=3)
+        ids = [broadcaster.publish({"n": n}) for n in range(5)]
+        last_event_id = {
+            "previous_process": old_id,
+            "future": ids[-1] + 1,
+            "evicted": ids[0],
+        }[case]
+
+        sub = broadcaster.subscribe(last_event_id=str(last_event_id))
+        items = sub.drain()
+
+        assert len(items) == 1
+        event_id, data = items[0]
+        assert data["full_refresh"] is True
+        assert event_id == ids[-1]
+        assert broadcaster.get_stats()["full_resyncs"] == 1
+
+    def test_ids_do_not_restart_with_the_process(self):
+        """TEST: Un proceso nuevo nunca reutiliza ids de uno anterior"""
+        first = SSEBroadcaster().publish({"n": 0})
+        second = SSEBroadcaster().publish({"n": 0})
+
+        assert second > first